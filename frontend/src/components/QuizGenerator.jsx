@@ -1,8 +1,9 @@
 import React, { useState, useRef } from 'react';
-import { generateQuiz, generateSummary, generateGlossary, uploadPDF } from '../services/api';
+import { generateQuiz, generateSummary, generateGlossary, uploadPDFStream } from '../services/api';
 
 const QuizGenerator = () => {
   const [inputText, setInputText] = useState('');
+  const [documentId, setDocumentId] = useState(null);
   const [topic, setTopic] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState(null);
@@ -20,10 +21,22 @@ const QuizGenerator = () => {
     setIsLoading(true);
     setError(null);
 
+    // Same default the server assumes when pre-generating ("cell_biology.pdf" -> "cell biology")
+    const uploadTopic = topic.trim() || file.name.replace(/\.pdf$/i, '').replace(/[_\-\s]+/g, ' ').trim();
+
     try {
-      const result = await uploadPDF(file);
+      // Pages are reported as they are extracted, so large books show progress
+      const result = await uploadPDFStream(file, ({ page }) => {
+        setError({
+          title: "Extracting PDF",
+          message: `Extracted ${page} page(s) so far...`
+        });
+      }, uploadTopic);
       if (result.success) {
-        setInputText(result.extracted_text);
+        // The server keeps the text; later requests only send the document id
+        setDocumentId(result.document_id);
+        setInputText('');
+        if (!topic.trim()) setTopic(uploadTopic);
         setError({
           title: "PDF Uploaded Successfully",
           message: `Extracted text from ${result.page_count} page(s). Please set a topic and generate your study materials.`
@@ -49,7 +62,7 @@ const QuizGenerator = () => {
     setGlossaryData(null);
     setSelectedAnswers({});
 
-    if (!inputText.trim() || !topic.trim()) {
+    if ((!documentId && !inputText.trim()) || !topic.trim()) {
       setError({
         title: "Missing Information",
         message: "Please provide text and define a topic first."
@@ -62,9 +75,9 @@ const QuizGenerator = () => {
     try {
       // Generate all three types of content
       const [quizResult, summaryResult, glossaryResult] = await Promise.all([
-        generateQuiz(inputText, topic, "medium"),
-        generateSummary(inputText, topic),
-        generateGlossary(inputText, topic)
+        generateQuiz(inputText, topic, "medium", documentId),
+        generateSummary(inputText, topic, documentId),
+        generateGlossary(inputText, topic, documentId)
       ]);
 
       if (!quizResult || !quizResult.questions) {
@@ -116,9 +129,15 @@ const QuizGenerator = () => {
           <textarea
             className="styled-textarea"
             rows="6"
-            placeholder="Paste your study notes or textbook content here (up to 2000 words)..."
+            placeholder={documentId
+              ? "Using your uploaded PDF. Type here to use your own text instead."
+              : "Paste your study notes or textbook content here (up to 2000 words)..."}
             value={inputText}
-            onChange={(e) => setInputText(e.target.value)}
+            onChange={(e) => {
+              // Typing replaces the uploaded PDF as the source
+              setDocumentId(null);
+              setInputText(e.target.value);
+            }}
           />
         </div>
 
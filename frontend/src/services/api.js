@@ -1,19 +1,35 @@
 const API_BASE_URL = import.meta.env.VITE_API_URL || "http://127.0.0.1:8000";
 
 
-export const generateQuiz = async (contextText, topic, difficulty) => {
+// Uploaded PDFs are referenced by id so their text is not re-sent with every request
+const sourceFields = (contextText, documentId) =>
+  documentId ? { document_id: documentId } : { context_text: contextText };
+
+// Large pasted texts are sent gzip-compressed when the browser supports it
+const GZIP_MIN_BYTES = 64 * 1024;
+
+const jsonRequest = async (payload) => {
+  const body = JSON.stringify(payload);
+  if (body.length < GZIP_MIN_BYTES || typeof CompressionStream === "undefined") {
+    return { headers: { "Content-Type": "application/json" }, body };
+  }
+  const stream = new Blob([body]).stream().pipeThrough(new CompressionStream("gzip"));
+  return {
+    headers: { "Content-Type": "application/json", "Content-Encoding": "gzip" },
+    body: await new Response(stream).blob(),
+  };
+};
+
+export const generateQuiz = async (contextText, topic, difficulty, documentId = null) => {
   try {
     const response = await fetch(`${API_BASE_URL}/api/generate-quiz`, {
       method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify({
-        context_text: contextText,
+      ...(await jsonRequest({
+        ...sourceFields(contextText, documentId),
         topic: topic,
         difficulty: difficulty,
         num_questions: 5,
-      }),
+      })),
     });
 
     if (!response.ok) {
@@ -32,17 +48,14 @@ export const generateQuiz = async (contextText, topic, difficulty) => {
   }
 };
 
-export const generateSummary = async (contextText, topic) => {
+export const generateSummary = async (contextText, topic, documentId = null) => {
   try {
     const response = await fetch(`${API_BASE_URL}/api/generate-summary`, {
       method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify({
-        context_text: contextText,
+      ...(await jsonRequest({
+        ...sourceFields(contextText, documentId),
         topic: topic,
-      }),
+      })),
     });
 
     if (!response.ok) {
@@ -61,17 +74,14 @@ export const generateSummary = async (contextText, topic) => {
   }
 };
 
-export const generateGlossary = async (contextText, topic) => {
+export const generateGlossary = async (contextText, topic, documentId = null) => {
   try {
     const response = await fetch(`${API_BASE_URL}/api/generate-glossary`, {
       method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify({
-        context_text: contextText,
+      ...(await jsonRequest({
+        ...sourceFields(contextText, documentId),
         topic: topic,
-      }),
+      })),
     });
 
     if (!response.ok) {
@@ -95,7 +105,7 @@ export const uploadPDF = async (file) => {
     const formData = new FormData();
     formData.append('file', file);
 
-    const response = await fetch(`${API_BASE_URL}/api/upload-pdf`, {
+    const response = await fetch(`${API_BASE_URL}/api/upload-pdf?include_text=false`, {
       method: "POST",
       body: formData,
     });
@@ -109,4 +119,45 @@ export const uploadPDF = async (file) => {
   } catch (error) {
     throw error;
   }
+};
+
+// Streams extraction progress: onPage({ page, chars }) fires as each page is
+// extracted, and the final "done" record (document_id, page_count) is returned.
+// Page texts are not requested, since later requests reference the document by id.
+export const uploadPDFStream = async (file, onPage = () => {}, topic = null) => {
+  const formData = new FormData();
+  formData.append('file', file);
+  const params = new URLSearchParams({ include_text: "false" });
+  // The topic lets the server pre-generate the summary and glossary (when enabled)
+  if (topic) params.set("topic", topic);
+
+  const response = await fetch(`${API_BASE_URL}/api/upload-pdf/stream?${params}`, {
+    method: "POST",
+    body: formData,
+  });
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(errorData.detail || "Failed to upload PDF");
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffered = "";
+  let done = null;
+  for (;;) {
+    const { value, done: finished } = await reader.read();
+    if (value) buffered += value;
+    const lines = finished ? [buffered] : buffered.split("\n");
+    buffered = finished ? "" : lines.pop();
+    for (const line of lines) {
+      if (!line.trim()) continue;
+      const record = JSON.parse(line);
+      if (record.type === "page") onPage({ page: record.page, chars: record.chars });
+      else if (record.type === "error") throw new Error(record.detail);
+      else if (record.type === "done") done = record;
+    }
+    if (finished) break;
+  }
+  if (!done) throw new Error("PDF upload ended before extraction finished");
+  return { success: true, ...done };
 };
\ No newline at end of file
@@ -1,8 +1,12 @@
 import os
 import re
 import json
+import threading
+import time
 from pathlib import Path
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from dotenv import load_dotenv
 
 # Add the parent directory to the path to ensure imports work correctly
@@ -15,10 +19,14 @@ if str(src_dir) not in sys.path:
 try:
     from providers.gemini_provider import GeminiProvider
     from providers.mock_provider import MockProvider
+    from providers.local_openai_provider import LocalOpenAIProvider
+    from providers.extractive_provider import ExtractiveProvider
 except ImportError:
     # Fallback to src.providers if running from different context
     from src.providers.gemini_provider import GeminiProvider
     from src.providers.mock_provider import MockProvider
+    from src.providers.local_openai_provider import LocalOpenAIProvider
+    from src.providers.extractive_provider import ExtractiveProvider
 
 # Import the telemetry tracker your team built in Week 9
 try:
@@ -31,8 +39,92 @@ except ImportError:
             def decorator(f): return f
             return decorator
 
+try:
+    from utils.shared_cache import get_shared_cache, make_cache_key
+    from utils.budget_ledger import get_budget_ledger, BudgetExceededError
+    from utils.document_store import DocumentNotFoundError, get_document_store
+    from utils.document_index import (chunk_text, context_for_topic, document_sections, document_terms,
+                                      format_chunks, group_chunks, split_text)
+    from utils.question_dedup import DEFAULT_THRESHOLD, dedupe_questions, is_valid_question
+    from utils.json_repair import parse_llm_json
+    from utils.text_utils import estimate_tokens
+    from utils.tracing import span, traced
+    from utils.routing import RoutingPolicy
+    from utils.question_bank import EXCLUDE_LIMIT, bank_key, get_question_bank
+    from utils.document_store import document_id_for
+    from utils.glossary_index import TermIndex
+    from utils.extractive import candidate_terms
+    from utils.artifact_store import get_artifact_store
+except ImportError:
+    from src.utils.shared_cache import get_shared_cache, make_cache_key
+    from src.utils.budget_ledger import get_budget_ledger, BudgetExceededError
+    from src.utils.document_store import DocumentNotFoundError, get_document_store
+    from src.utils.document_index import (chunk_text, context_for_topic, document_sections, document_terms,
+                                          format_chunks, group_chunks, split_text)
+    from src.utils.question_dedup import DEFAULT_THRESHOLD, dedupe_questions, is_valid_question
+    from src.utils.json_repair import parse_llm_json
+    from src.utils.text_utils import estimate_tokens
+    from src.utils.tracing import span, traced
+    from src.utils.routing import RoutingPolicy
+    from src.utils.question_bank import EXCLUDE_LIMIT, bank_key, get_question_bank
+    from src.utils.document_store import document_id_for
+    from src.utils.glossary_index import TermIndex
+    from src.utils.extractive import candidate_terms
+    from src.utils.artifact_store import get_artifact_store
+
 load_dotenv()
 
+# Fewer locally found candidates than this and the glossary is generated from the text
+MIN_GLOSSARY_CANDIDATES = 5
+
+
+class Usage:
+    """Token usage in the shape track_cost expects (OpenAI-style field names)."""
+    def __init__(self, prompt_tokens=0, completion_tokens=0):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+
+class ResponseWrapper:
+    """Object wrapper for team compatibility (Beka's UI and Daviti's backend)."""
+    def __init__(self, d, cached=False):
+        self.data = d
+        self.cached = cached
+        # Filled in from the provider response so track_cost can price the call
+        self.usage = None
+        self.model = "unknown"
+        # True when an over-budget user was served by a free provider
+        self.downgraded = False
+        # Set on quizzes that needed a top-up call (see _top_up_quiz)
+        self.topup = None
+        # Set when malformed model JSON was repaired (see _process_and_wrap)
+        self.repair = None
+        # Set on quizzes generated as parallel sub-requests (see _generate_split_quiz)
+        self.split = None
+        # Provider routing decision, when there was more than one provider to choose from
+        self.routing = None
+        # False when produced by a fallback provider whose content must not be reused
+        self.cacheable = True
+        # Question-bank outcome for quizzes (served from the bank, or questions deposited)
+        self.bank = None
+        # Set on summaries/glossaries generated per document section (see _generate_sections)
+        self.incremental = None
+        # Cache key of the final result (what speculation tracks hits on)
+        self.cache_key = None
+        # True when load shedding sent the request straight to the fallback providers
+        self.shed = False
+        # Set on glossaries generated from locally extracted candidate terms
+        self.candidates = None
+        self.set_data(d)
+
+    def set_data(self, d):
+        self.data = d
+        # Supports the legacy .choices[0].message.content pattern
+        self.choices = [type('Choice', (), {
+            'message': type('Msg', (), {'content': json.dumps(d)})()
+        })()]
+
+
 class ProductionFunctionCaller:
     """
     COGNIFY AI ENGINE (Final Production Version)
@@ -40,6 +132,62 @@ class ProductionFunctionCaller:
     """
     def __init__(self):
         self.providers = []
+        # Shared across all uvicorn workers on the host (None when disabled)
+        self.cache = get_shared_cache()
+        # Per-user spend, checked in memory before every generation
+        self.ledger = get_budget_ledger()
+        # Generated quiz questions, reused for later quizzes on the same material (None when disabled)
+        self.bank = get_question_bank()
+        # Every generated quiz, summary and glossary, kept for history views and re-downloads
+        self.artifacts = get_artifact_store()
+        # Stored documents longer than this are reduced to their top-k chunks for the topic
+        self.retrieval_min_chars = int(os.getenv("COGNIFY_RETRIEVAL_MIN_CHARS", 12000))
+        self.retrieval_top_k = int(os.getenv("COGNIFY_RETRIEVAL_TOP_K", 6))
+        self.retrieval_max_chars = int(os.getenv("COGNIFY_RETRIEVAL_MAX_CHARS", 12000))
+        # Quiz questions at least this similar count as duplicates; missing ones are topped up
+        self.dedup_threshold = float(os.getenv("COGNIFY_DEDUP_THRESHOLD", DEFAULT_THRESHOLD))
+        self.topup_rounds = int(os.getenv("COGNIFY_QUIZ_TOPUP_ROUNDS", 1))
+        # Quizzes of at least this many questions over at least split_min_chars of
+        # context are split into concurrent sub-requests over different parts of
+        # the text (0 disables; a request can also opt in or out explicitly)
+        self.split_min_questions = int(os.getenv("COGNIFY_QUIZ_SPLIT_MIN_QUESTIONS", 10))
+        self.split_min_chars = int(os.getenv("COGNIFY_QUIZ_SPLIT_MIN_CHARS", 4000))
+        self.split_parts = int(os.getenv("COGNIFY_QUIZ_SPLIT_PARTS", 3))
+        # Summaries/glossaries of stored documents of at least this many chars are
+        # generated per section, so a revised document only regenerates the sections
+        # that changed (0 disables)
+        self.incremental_min_chars = int(os.getenv("COGNIFY_INCREMENTAL_MIN_CHARS", 6000))
+        self.section_chars = int(os.getenv("COGNIFY_SECTION_CHARS", 4000))
+        self.glossary_max_terms = int(os.getenv("COGNIFY_GLOSSARY_MAX_TERMS", 20))
+        # Glossaries cover stored documents whole up to this many chars (summaries stop at
+        # retrieval_min_chars), and inline text of at least glossary_chunk_min_chars is
+        # also extracted per section (0 disables; a request can opt in or out explicitly)
+        self.glossary_whole_chars = int(os.getenv("COGNIFY_GLOSSARY_WHOLE_CHARS", 60000))
+        self.glossary_chunk_min_chars = int(os.getenv("COGNIFY_GLOSSARY_CHUNK_MIN_CHARS", 6000))
+        # Glossaries of texts of at least this many chars send the model only candidate
+        # terms found locally (at ingestion for stored documents) and the sentences
+        # that mention them, instead of the whole text (0 candidates disables)
+        self.glossary_candidates = int(os.getenv("COGNIFY_GLOSSARY_CANDIDATES", 40))
+        self.glossary_candidates_min_chars = int(os.getenv("COGNIFY_GLOSSARY_CANDIDATES_MIN_CHARS", 3000))
+        # Section requests in flight at once per summary/glossary
+        self.section_concurrency = int(os.getenv("COGNIFY_SECTION_CONCURRENCY", 8))
+        # SpeculativeGenerator told about cache hits, when speculation is enabled
+        self.speculation = None
+        # Orders the providers per request by estimated cost within the latency SLO
+        self.router = RoutingPolicy.from_env()
+        # With this many provider chains already in flight, further requests are served by
+        # the extractive engine instead of queueing behind the models (0 disables)
+        self.shed_max_inflight = int(os.getenv("COGNIFY_SHED_MAX_INFLIGHT", 0))
+        self._inflight = 0
+        self._inflight_lock = threading.Lock()
+
+        # On-prem OpenAI-compatible model server (free, so routed first while it meets the SLO)
+        if os.getenv("COGNIFY_LOCAL_LLM_URL"):
+            try:
+                self.providers.append(LocalOpenAIProvider.from_env())
+                print("[OK] Local model provider initialized.")
+            except Exception as e:
+                print(f"[WARNING] Failed to init local model provider: {e}")
 
         api_key = os.getenv("GOOGLE_API_KEY")
         if api_key and not api_key.startswith("your_actual"):
@@ -49,29 +197,123 @@ class ProductionFunctionCaller:
             except Exception as e:
                 print(f"[WARNING] Failed to init Gemini: {e}")
 
+        # Degraded mode: summaries, glossaries and cloze quizzes extracted from the text itself
+        if os.getenv("COGNIFY_EXTRACTIVE_ENABLED", "1") != "0":
+            self.providers.append(ExtractiveProvider())
+            print("[OK] Extractive Provider initialized.")
+
         # Emergency Fallback (Requirement for Lab 11)
-        self.providers.append(MockProvider())
+        self.providers.append(MockProvider.from_env())
         print("[OK] Mock Provider initialized.")
 
-    def _execute_provider_chain(self, prompt: str):
-        """Internal helper to handle the fallback routing logic."""
-        for provider in self.providers:
+    def _run_provider_chain(self, prompt: str, providers=None, mode=None):
+        """Internal helper to handle the fallback routing logic. Returns (provider, response)."""
+        for attempt, provider in enumerate(self.providers if providers is None else providers):
             provider_name = type(provider).__name__
             print(f"[ROUTING] to {provider_name}...")
 
-            response = provider.generate(prompt)
+            with span("provider" if attempt == 0 else "fallback", provider=provider_name) as attrs:
+                start = time.perf_counter()
+                response = provider.generate(prompt)
+                if attrs is not None:
+                    attrs["status"] = response.status
+            if mode is not None:
+                self.router.observe(provider, mode, time.perf_counter() - start, response.status == "success",
+                               response.output_tokens, prompt)
 
             if response.status == "success":
                 print(f"[SUCCESS] {provider_name} returned content")
-                return response.content
+                return provider, response
             else:
                 print(f"[ERROR] {provider_name} failed. Trying next provider...")
                 continue
-        return None
+        return None, None
 
-    @track_cost(query_type="generate_quiz")
-    def generate_quiz(self, context_text: str, topic: str, difficulty: str, num_questions: int = 5):
-        prompt = f"""Generate a {num_questions}-question multiple choice quiz about {topic} based on this text: {context_text}
+    def _execute_provider_chain(self, prompt: str):
+        """Runs the fallback chain and returns only the raw content."""
+        _, response = self._run_provider_chain(prompt)
+        return response.content if response else None
+
+    def _resolve_context(self, context_text, document_id, topic):
+        """Inline text wins; a document_id is resolved through the chunk index."""
+        if context_text is not None:
+            return context_text
+        with span("retrieval", document_id=document_id):
+            return context_for_topic(get_document_store(), document_id, topic, self.retrieval_min_chars,
+                                     self.retrieval_top_k, self.retrieval_max_chars)
+
+    def _generate(self, prompt: str, mode: str, user_id=None):
+        """Serves from the shared cache when possible, otherwise runs the provider chain."""
+        key = make_cache_key(mode, prompt)
+        if self.cache is not None:
+            with span("cache", mode=mode) as attrs:
+                cached = self.cache.get(key)
+                if attrs is not None:
+                    attrs["hit"] = cached is not None
+            if cached is not None:
+                print(f"[CACHE] Hit for {mode}")
+                if self.speculation is not None:
+                    self.speculation.record_hit(key)
+                return ResponseWrapper(json.loads(cached), cached=True)
+
+        # Budget check happens after the cache: cached results are free.
+        # Raises BudgetExceededError under the "reject" policy.
+        over_budget = self.ledger is not None and self.ledger.check(user_id)
+        providers = None
+        if over_budget:
+            providers = [p for p in self.providers if getattr(p, "cost_tier", "paid") == "free"]
+            if not providers:
+                raise BudgetExceededError(user_id or "anonymous", self.ledger.spent(user_id),
+                                          self.ledger.limit_for(user_id))
+            print(f"[BUDGET] {user_id or 'anonymous'} is over budget, downgrading to free providers")
+
+        shed = False
+        with self._inflight_lock:
+            if self.shed_max_inflight and self._inflight >= self.shed_max_inflight:
+                shed = True
+            else:
+                self._inflight += 1
+        if shed:
+            # Saturated: answer from the fallback providers now rather than queue for a model
+            providers = [p for p in self.providers if getattr(p, "fallback_only", False)]
+            print(f"[SHED] {self.shed_max_inflight} provider chains in flight, serving {mode} in degraded mode")
+            decision = None
+        else:
+            providers, decision = self.router.order(self.providers if providers is None else providers,
+                                                    prompt, mode)
+        if decision is not None:
+            print(f"[ROUTING] {mode}: chose {decision['chosen']} "
+                  f"(~{decision['est_input_tokens']}+{decision['est_output_tokens']} tokens, "
+                  f"SLO {decision['slo_ms']}ms)")
+        try:
+            provider, response = self._run_provider_chain(prompt, providers, mode)
+        finally:
+            if not shed:
+                with self._inflight_lock:
+                    self._inflight -= 1
+        if response is None:
+            return None
+        result = self._process_and_wrap(response.content, mode)
+        if result is not None:
+            result.usage = Usage(response.input_tokens, response.output_tokens)
+            result.model = response.model
+            result.downgraded = over_budget
+            result.cacheable = getattr(provider, "cacheable", True)
+            result.shed = shed
+            if decision is not None:
+                result.routing = {**decision, "served": type(provider).__name__}
+
+        # Fallback content (e.g. MockProvider) must never be served from cache
+        if result is not None and self.cache is not None and getattr(provider, "cacheable", True):
+            self.cache.set(key, json.dumps(result.data))
+        return result
+
+    def _quiz_prompt(self, context_text: str, topic: str, num_questions: int, exclude=None):
+        avoid = ""
+        if exclude:
+            listed = "\n".join(f"- {q['question']}" for q in exclude)
+            avoid = f"\n\nDo not repeat or paraphrase any of these existing questions:\n{listed}"
+        return f"""Generate a {num_questions}-question multiple choice quiz about {topic} based on this text: {context_text}{avoid}
 
 Return ONLY valid JSON in this EXACT format (no markdown, no extra text):
 {{
@@ -86,24 +328,163 @@ Return ONLY valid JSON in this EXACT format (no markdown, no extra text):
     }}
   ]
 }}"""
-        raw_result = self._execute_provider_chain(prompt)
-        return self._process_and_wrap(raw_result, "quiz")
 
-    @track_cost(query_type="generate_summary")
-    def generate_summary(self, context_text: str, topic: str):
-        prompt = f"""Summarize the following text about {topic}: {context_text}
+    def _top_up_quiz(self, result, prompt, context_text, topic, num_questions, user_id):
+        """
+        Drops invalid and near-duplicate questions, then asks only for the
+        missing count (listing the kept questions to exclude) instead of
+        regenerating the whole quiz.
+        """
+        questions = result.data.get("questions")
+        if not isinstance(questions, list):
+            return
+        kept = dedupe_questions(questions, self.dedup_threshold)
+        dropped = len(questions) - len(kept)
+        requested = max(num_questions - len(kept), 0)
+        topup_tokens = 0
+        for _ in range(self.topup_rounds):
+            missing = num_questions - len(kept)
+            if missing <= 0:
+                break
+            print(f"[DEDUP] {len(kept)}/{num_questions} usable questions, requesting {missing} more")
+            topup_prompt = self._quiz_prompt(context_text, topic, missing, exclude=kept)
+            extra = self._generate(topup_prompt, "quiz", user_id)
+            if extra is None or not isinstance(extra.data, dict):
+                break
+            added = dedupe_questions(extra.data.get("questions") or [], self.dedup_threshold, existing=kept)
+            kept.extend(added[:missing])
+            topup_tokens += estimate_tokens(topup_prompt) + estimate_tokens(json.dumps(extra.data))
+            if extra.usage is not None:
+                usage = result.usage or Usage()
+                result.usage = Usage(usage.prompt_tokens + extra.usage.prompt_tokens,
+                                     usage.completion_tokens + extra.usage.completion_tokens)
+            result.cached = result.cached and extra.cached
+            result.cacheable = result.cacheable and extra.cacheable
+            result.shed = result.shed or extra.shed
+            result.downgraded = result.downgraded or extra.downgraded
+
+        if dropped or requested:
+            kept = kept[:num_questions]
+            for i, question in enumerate(kept, start=1):
+                question["id"] = i
+            result.set_data({**result.data, "questions": kept})
+        if requested:
+            # What regenerating the full quiz would have cost instead: the
+            # original prompt again plus output for every question
+            per_question = estimate_tokens(json.dumps(questions)) / max(len(questions), 1)
+            full_tokens = estimate_tokens(prompt) + int(per_question * num_questions)
+            result.topup = {"dropped": dropped, "requested": requested,
+                            "added": len(kept) - (num_questions - requested),
+                            "tokens_used": topup_tokens, "tokens_saved": full_tokens - topup_tokens}
+            print(f"[DEDUP] Top-up used ~{topup_tokens} tokens, ~{full_tokens - topup_tokens} fewer "
+                  f"than regenerating the quiz")
+
+    def _split_plan(self, context_text: str, num_questions: int, parallel=None):
+        """[(section, question_count), ...] for a split quiz, or None to generate it in one call."""
+        if parallel is False:
+            return None
+        if parallel is None and (not self.split_min_questions or num_questions < self.split_min_questions
+                                 or len(context_text) < self.split_min_chars):
+            return None
+        sections = split_text(context_text, min(self.split_parts, num_questions))
+        if len(sections) < 2:
+            return None
+        base, extra = divmod(num_questions, len(sections))
+        return [(section, base + (i < extra)) for i, section in enumerate(sections)]
+
+    def _generate_split_quiz(self, plan, topic: str, user_id=None, exclude=None):
+        """
+        Runs one smaller quiz request per section concurrently and merges them,
+        so latency follows the slowest part rather than the full output length.
+        Duplicates across parts are left to _top_up_quiz.
+        """
+        prompts = [self._quiz_prompt(section, topic, count, exclude=exclude) for section, count in plan]
+        print(f"[SPLIT] Quiz split into {len(prompts)} parallel requests of "
+              f"{'/'.join(str(count) for _, count in plan)} questions")
+        # Each part runs in a copy of the request context so its spans join the trace
+        contexts = [copy_context() for _ in prompts]
+        with ThreadPoolExecutor(max_workers=len(prompts)) as pool:
+            parts = list(pool.map(lambda context, prompt: context.run(self._generate, prompt, "quiz", user_id),
+                                  contexts, prompts))
+
+        usable = [(part, count) for part, (_, count) in zip(parts, plan)
+                  if part is not None and isinstance(part.data, dict)]
+        if not usable:
+            return None
+        questions = []
+        for part, count in usable:
+            part_questions = part.data.get("questions")
+            if isinstance(part_questions, list):
+                questions.extend(part_questions[:count])
+        for i, question in enumerate(questions, start=1):
+            if isinstance(question, dict):
+                question["id"] = i
+
+        results = [part for part, _ in usable]
+        merged = ResponseWrapper({**results[0].data, "questions": questions},
+                                 cached=all(part.cached for part in results))
+        merged.usage = Usage(sum(part.usage.prompt_tokens for part in results if part.usage),
+                             sum(part.usage.completion_tokens for part in results if part.usage))
+        merged.model = results[0].model
+        merged.routing = results[0].routing
+        merged.cacheable = all(part.cacheable for part in results)
+        merged.shed = any(part.shed for part in results)
+        merged.downgraded = any(part.downgraded for part in results)
+        repairs = [part.repair for part in results if part.repair]
+        if repairs:
+            merged.repair = {"fixes": sorted({fix for repair in repairs for fix in repair["fixes"]}),
+                             "items_recovered": sum(repair["items_recovered"] for repair in repairs),
+                             "items_dropped": sum(repair["items_dropped"] for repair in repairs)}
+        merged.split = {"parts": len(plan), "questions": [count for _, count in plan],
+                        "failed": len(plan) - len(usable)}
+        return merged
+
+    @track_cost(query_type="generate_quiz")
+    def generate_quiz(self, context_text: str, topic: str, difficulty: str, num_questions: int = 5,
+                      user_id=None, document_id=None, parallel=None, fresh=False):
+        key = None
+        document_hash = document_id_for(context_text) if context_text is not None else document_id
+        if self.bank is not None:
+            key = bank_key(document_hash, topic)
+            if not fresh:
+                questions = self.bank.sample(key, num_questions)
+                if questions is not None:
+                    print(f"[BANK] Served {num_questions} questions from the question bank")
+                    result = ResponseWrapper({"topic": topic, "questions": questions}, cached=True)
+                    result.model = "question-bank"
+                    result.bank = {"served": True, "bank_size": self.bank.size(key)}
+                    self._save_artifact("quiz", result, topic, user_id, document_hash)
+                    return result
+
+        context_text = self._resolve_context(context_text, document_id, topic)
+        # Replenishing: ask for questions the bank does not have yet
+        exclude = self.bank.questions(key, EXCLUDE_LIMIT) if key is not None else None
+        prompt = self._quiz_prompt(context_text, topic, num_questions, exclude=exclude)
+        plan = self._split_plan(context_text, num_questions, parallel)
+        if plan:
+            result = self._generate_split_quiz(plan, topic, user_id, exclude)
+        else:
+            result = self._generate(prompt, "quiz", user_id)
+        if result is not None and isinstance(result.data, dict):
+            self._top_up_quiz(result, prompt, context_text, topic, num_questions, user_id)
+            # Fallback content (e.g. MockProvider) never enters the bank
+            if key is not None and result.cacheable:
+                added = self.bank.deposit(key, result.data.get("questions") or [])
+                result.bank = {"served": False, "deposited": added, "bank_size": self.bank.size(key)}
+        self._save_artifact("quiz", result, topic, user_id, document_hash)
+        return result
+
+    def _summary_prompt(self, context_text: str, topic: str):
+        return f"""Summarize the following text about {topic}: {context_text}
 
 Return ONLY valid JSON in this EXACT format (no markdown, no extra text):
 {{
   "topic": "{topic}",
   "summary": "Your comprehensive summary here in 3-5 bullet points or paragraphs"
 }}"""
-        raw_result = self._execute_provider_chain(prompt)
-        return self._process_and_wrap(raw_result, "summary")
 
-    @track_cost(query_type="generate_glossary")
-    def generate_glossary(self, context_text: str, topic: str):
-        prompt = f"""Extract 5-10 key terms and their definitions from this text about {topic}: {context_text}
+    def _glossary_prompt(self, context_text: str, topic: str):
+        return f"""Extract 5-10 key terms and their definitions from this text about {topic}: {context_text}
 
 Return ONLY valid JSON in this EXACT format (no markdown, no extra text):
 {{
@@ -113,9 +494,240 @@ Return ONLY valid JSON in this EXACT format (no markdown, no extra text):
     {{"term": "Term 2", "definition": "Definition of term 2"}}
   ]
 }}"""
-        raw_result = self._execute_provider_chain(prompt)
-        return self._process_and_wrap(raw_result, "glossary")
 
+    def _candidate_glossary_prompt(self, candidates, topic: str):
+        # Excerpts are listed once and referenced by number, since terms share sentences
+        excerpts, refs = {}, []
+        for candidate in candidates:
+            numbers = [excerpts.setdefault(sentence, len(excerpts) + 1) for sentence in candidate["excerpts"]]
+            refs.append(f"- {candidate['term']} [{', '.join(map(str, numbers))}]")
+        listed = "\n".join(f"[{number}] {sentence}" for sentence, number in excerpts.items())
+        terms = "\n".join(refs)
+        return f"""Define the key terms of a text about {topic}. These candidate terms were found in the text, each with the numbers of the excerpts that mention it. Keep the 5-{self.glossary_max_terms} terms most important to {topic}, skip any that are not real terms of the subject, and define each from its excerpts.
+
+Excerpts:
+{listed}
+
+Candidate terms:
+{terms}
+
+Return ONLY valid JSON in this EXACT format (no markdown, no extra text):
+{{
+  "topic": "{topic}",
+  "terms": [
+    {{"term": "Term 1", "definition": "Definition of term 1"}},
+    {{"term": "Term 2", "definition": "Definition of term 2"}}
+  ]
+}}"""
+
+    def _combine_summaries_prompt(self, summaries, topic: str):
+        listed = "\n\n".join(f"Section {i}: {summary}" for i, summary in enumerate(summaries, start=1))
+        return f"""Summarize these section summaries of a text about {topic} as one summary: {listed}
+
+Return ONLY valid JSON in this EXACT format (no markdown, no extra text):
+{{
+  "topic": "{topic}",
+  "summary": "Your comprehensive summary here in 3-5 bullet points or paragraphs"
+}}"""
+
+    def _document_prompt(self, mode: str, context_text: str, topic: str):
+        return {"summary": self._summary_prompt, "glossary": self._glossary_prompt}[mode](context_text, topic)
+
+    def _sections(self, context_text, document_id, topic, mode="summary", parallel=None):
+        """
+        Section texts for per-section generation, or None for a single call.
+        Stored documents are sectioned from their chunk index; inline text
+        only for glossaries (parallel=True forces sectioning, False disables it).
+        """
+        if parallel is False:
+            return None
+        if context_text is not None:
+            if mode != "glossary" or not (parallel or (self.glossary_chunk_min_chars
+                                                      and len(context_text) >= self.glossary_chunk_min_chars)):
+                return None
+            groups = group_chunks(chunk_text(context_text), self.section_chars)
+            sections = [format_chunks(group, pages=False) for group in groups]
+            return sections if len(sections) > 1 else None
+        if document_id is None or not (parallel or self.incremental_min_chars):
+            return None
+        whole_chars = self.retrieval_min_chars
+        if mode == "glossary":
+            whole_chars = max(whole_chars, self.glossary_whole_chars)
+        with span("retrieval", document_id=document_id):
+            sections = document_sections(get_document_store(), document_id, topic,
+                                         0 if parallel else self.incremental_min_chars, whole_chars,
+                                         self.retrieval_top_k, self.retrieval_max_chars, self.section_chars)
+        return sections if len(sections) > 1 else None
+
+    def _generate_sections(self, sections, topic: str, mode: str, user_id=None):
+        """
+        One summary/glossary request per section, run concurrently. Each goes
+        through the shared cache on its own, so when a revised document
+        changes one section only that section is regenerated. Summaries are
+        then combined by one small request over the section summaries;
+        glossary terms are merged through a TermIndex without a model call.
+        """
+        prompts = [self._document_prompt(mode, section, topic) for section in sections]
+        contexts = [copy_context() for _ in prompts]
+        with ThreadPoolExecutor(max_workers=max(1, min(len(prompts), self.section_concurrency))) as pool:
+            parts = list(pool.map(lambda context, prompt: context.run(self._generate, prompt, mode, user_id),
+                                  contexts, prompts))
+        usable = [part for part in parts if part is not None and isinstance(part.data, dict)]
+        if not usable:
+            return None
+        reused = sum(part.cached for part in usable)
+        print(f"[INCREMENTAL] {mode}: {len(sections)} section(s), {reused} reused from cache")
+
+        final_key = make_cache_key(mode, prompts[0])
+        results = list(usable)
+        if mode == "summary":
+            summaries = [str(part.data.get("summary") or "") for part in usable]
+            combine_prompt = self._combine_summaries_prompt(summaries, topic)
+            combined = self._generate(combine_prompt, "summary", user_id)
+            if combined is not None and isinstance(combined.data, dict):
+                results.append(combined)
+                data = {"topic": topic, "summary": combined.data.get("summary", "")}
+                final_key = make_cache_key("summary", combine_prompt)
+            else:
+                data = {"topic": topic, "summary": "\n\n".join(summaries)}
+        else:
+            index = TermIndex()
+            for section, part in enumerate(usable):
+                index.extend(part.data.get("terms"), section)
+            data = {"topic": topic, "terms": index.ranked(self.glossary_max_terms)}
+
+        result = ResponseWrapper(data, cached=all(part.cached for part in results))
+        generated = [part for part in results if part.usage is not None]
+        result.usage = Usage(sum(part.usage.prompt_tokens for part in generated),
+                             sum(part.usage.completion_tokens for part in generated))
+        result.model = generated[0].model if generated else usable[0].model
+        result.routing = generated[0].routing if generated else None
+        result.downgraded = any(part.downgraded for part in results)
+        result.cacheable = all(part.cacheable for part in results)
+        result.shed = any(part.shed for part in results)
+        result.cache_key = final_key
+        result.incremental = {"sections": len(sections), "reused": reused,
+                              "generated": len(usable) - reused, "failed": len(sections) - len(usable)}
+        return result
+
+    def _glossary_candidates(self, context_text, document_id):
+        """
+        Locally extracted candidate terms for a glossary prompt (stored at
+        ingestion for documents), or None when the text is too short for
+        them to save anything or too few were found.
+        """
+        if not self.glossary_candidates:
+            return None
+        if context_text is not None:
+            if len(context_text) < self.glossary_candidates_min_chars:
+                return None
+            candidates = candidate_terms(context_text, self.glossary_candidates)
+        else:
+            store = get_document_store()
+            if not store.exists(document_id):
+                raise DocumentNotFoundError(document_id)
+            chars = store.get_metadata(document_id).get("chars")
+            if chars is not None and chars < self.glossary_candidates_min_chars:
+                return None
+            candidates = document_terms(store, document_id)[:self.glossary_candidates]
+        return candidates if len(candidates) >= MIN_GLOSSARY_CANDIDATES else None
+
+    def _generate_document(self, mode: str, context_text, topic: str, user_id=None, document_id=None,
+                           parallel=None):
+        """
+        Summary or glossary: per section for long documents, otherwise one
+        request. Glossaries of long texts define locally found candidate
+        terms instead, unless sections are asked for explicitly.
+        """
+        candidates = None
+        if mode == "glossary" and not parallel:
+            candidates = self._glossary_candidates(context_text, document_id)
+        if candidates:
+            prompt = self._candidate_glossary_prompt(candidates, topic)
+            result = self._generate(prompt, mode, user_id)
+            if result is not None:
+                result.cache_key = make_cache_key(mode, prompt)
+                result.candidates = {"terms": len(candidates), "prompt_tokens": estimate_tokens(prompt)}
+            return result
+        sections = self._sections(context_text, document_id, topic, mode, parallel)
+        if sections:
+            return self._generate_sections(sections, topic, mode, user_id)
+        context_text = self._resolve_context(context_text, document_id, topic)
+        prompt = self._document_prompt(mode, context_text, topic)
+        result = self._generate(prompt, mode, user_id)
+        if result is not None:
+            result.cache_key = make_cache_key(mode, prompt)
+        return result
+
+    def _save_artifact(self, mode: str, result, topic: str, user_id, document_hash: str):
+        """
+        Queues a successful result for the artifact store. Fallback output is
+        not kept, as it is not cached; the cache key is recorded only when the
+        result is exactly what the cache holds under it, so warm-up can restore it.
+        """
+        if self.artifacts is None or result is None or not result.cacheable or not isinstance(result.data, dict):
+            return
+        cache_key = result.cache_key if mode != "quiz" and result.incremental is None else None
+        self.artifacts.save(user_id, mode, topic, document_hash, result.data, result.model, cache_key)
+
+    @track_cost(query_type="generate_summary")
+    def generate_summary(self, context_text: str, topic: str, user_id=None, document_id=None):
+        result = self._generate_document("summary", context_text, topic, user_id, document_id)
+        if self.artifacts is not None:
+            document_hash = document_id_for(context_text) if context_text is not None else document_id
+            self._save_artifact("summary", result, topic, user_id, document_hash)
+        return result
+
+    @track_cost(query_type="generate_glossary")
+    def generate_glossary(self, context_text: str, topic: str, user_id=None, document_id=None, parallel=None):
+        result = self._generate_document("glossary", context_text, topic, user_id, document_id, parallel)
+        if self.artifacts is not None:
+            document_hash = document_id_for(context_text) if context_text is not None else document_id
+            self._save_artifact("glossary", result, topic, user_id, document_hash)
+        return result
+
+    @track_cost(query_type="speculative")
+    def prefetch(self, mode: str, document_id: str, topic: str, user_id=None):
+        """
+        Generates the summary or glossary a stored document is likely to be
+        asked for next, straight into the cache. Returns the result with its
+        `cache_key` set, or None when nothing was generated for the cache.
+        """
+        if self.cache is None:
+            return None
+        candidates = self._glossary_candidates(None, document_id) if mode == "glossary" else None
+        if candidates:
+            prompts = [self._candidate_glossary_prompt(candidates, topic)]
+        else:
+            sections = self._sections(None, document_id, topic, mode)
+            if sections is None:
+                sections = [self._resolve_context(None, document_id, topic)]
+            prompts = [self._document_prompt(mode, section, topic) for section in sections]
+        if all(self.cache.get(make_cache_key(mode, prompt)) is not None for prompt in prompts):
+            return None
+        result = self._generate_document(mode, None, topic, user_id, document_id)
+        # Fallback providers are not cached, so their output could never be served
+        if result is None or self.cache.get(result.cache_key) is None:
+            return None
+        return result
+
+    def _salvage_items(self, data, mode, fixes):
+        """Keeps only complete questions/terms from a repaired response and reports the counts."""
+        report = {"fixes": fixes, "items_recovered": 0, "items_dropped": 0}
+        key = {"quiz": "questions", "glossary": "terms"}.get(mode)
+        if key is None or not isinstance(data, dict) or not isinstance(data.get(key), list):
+            return report
+        if mode == "quiz":
+            valid = [q for q in data[key] if is_valid_question(q)]
+        else:
+            valid = [t for t in data[key] if isinstance(t, dict) and t.get("term") and t.get("definition")]
+        report["items_recovered"] = len(valid)
+        report["items_dropped"] = len(data[key]) - len(valid)
+        data[key] = valid
+        print(f"[REPAIR] Salvaged {len(valid)} {key}, dropped {report['items_dropped']} incomplete")
+        return report
+
+    @traced("parse")
     def _process_and_wrap(self, raw_content, mode):
         """Cleans JSON and standardizes keys for Beka (UI) and Daviti (Backend)."""
         if not raw_content:
@@ -134,7 +746,10 @@ Return ONLY valid JSON in this EXACT format (no markdown, no extra text):
             print(f"[DEBUG] Attempting to parse JSON for mode={mode}")
             print(f"[DEBUG] First 200 chars: {clean_text[:200]}")
 
-            data = json.loads(clean_text)
+            # Repairs prose, quoting and truncation instead of failing the request
+            data, fixes = parse_llm_json(clean_text)
+            if fixes:
+                print(f"[REPAIR] Repaired {mode} JSON: {', '.join(fixes)}")
             print(f"[OK] Successfully parsed JSON. Keys: {list(data.keys()) if isinstance(data, dict) else 'not a dict'}")
 
             # 2. Key Normalization (Ensures UI doesn't crash)
@@ -157,16 +772,11 @@ Return ONLY valid JSON in this EXACT format (no markdown, no extra text):
                     print(f"[DATA] Summary mode: Summary length: {len(data.get('summary', ''))}")
 
             # 3. Object Wrapper for Team Compatibility
-            class ResponseWrapper:
-                def __init__(self, d):
-                    self.data = d
-                    # Supports the legacy .choices[0].message.content pattern
-                    self.choices = [type('Choice', (), {
-                        'message': type('Msg', (), {'content': json.dumps(d)})()
-                    })()]
-
-            return ResponseWrapper(data)
-        except json.JSONDecodeError as e:
+            repair = self._salvage_items(data, mode, fixes) if fixes else None
+            wrapper = ResponseWrapper(data)
+            wrapper.repair = repair
+            return wrapper
+        except ValueError as e:
             print(f"[ERROR] JSON Decode error in {mode}: {e}")
             print(f"[ERROR] Raw content (first 500 chars): {raw_content[:500]}")
             return None
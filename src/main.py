@@ -5,15 +5,19 @@ Full Study Suite - Quiz, Summary, and Glossary Generation (Week 10/11)
 
 import os
 import sys
+import re
 import json
+import hashlib
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional, List
 
-from fastapi import FastAPI, HTTPException, status, UploadFile, File
+from fastapi import FastAPI, HTTPException, status, UploadFile, File, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, model_validator
 from dotenv import load_dotenv
-import fitz  # PyMuPDF
 
 # Load environment variables first
 load_dotenv()
@@ -50,12 +54,89 @@ else:
     from ai.production_caller import ProductionFunctionCaller
     print("[OK] Using ProductionFunctionCaller from docs/week-9/src/ai/")
 
+# Shared helpers always come from src/utils
+if str(Path(__file__).parent) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).parent))
+from utils.shared_cache import get_shared_cache, make_cache_key
+from utils.budget_ledger import BudgetExceededError
+from utils.pdf_extraction import extract_pdf_pages, iter_pdf_pages, PAGE_SEPARATOR
+from utils.request_recorder import RequestRecorderMiddleware
+from utils.document_store import get_document_store, DocumentNotFoundError
+from utils.document_index import index_document, PageChunker
+from utils.text_cleanup import PageCleaner, clean_pdf_pages
+from utils.text_utils import topic_from_filename
+from utils.speculation import LoadGauge, LoadGaugeMiddleware, SpeculativeGenerator
+from utils.tracing import DEFAULT_MAX_BYTES as TRACE_MAX_BYTES, TracedRoute, TracingMiddleware
+from utils.compression import CompressionMiddleware, RequestDecompressionMiddleware
+from utils.fast_json import FastJSONResponse, dumps as fast_dumps
+from utils.artifact_store import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, DEFAULT_WARMUP, get_artifact_store
+from utils.health import ProviderHealthMonitor, DEFAULT_INTERVAL_S, DEFAULT_TIMEOUT_S
+
+# Headers/footers, page numbers and layout whitespace are stripped from
+# extracted PDF text before it is stored (COGNIFY_PDF_CLEANUP=0 keeps it raw)
+PDF_CLEANUP = os.getenv("COGNIFY_PDF_CLEANUP", "1") != "0"
+
+# Summaries and glossaries restored from the artifact store into the shared cache
+# at startup, most recent first (0 disables)
+ARTIFACT_WARMUP = int(os.getenv("COGNIFY_ARTIFACTS_WARMUP", DEFAULT_WARMUP))
+
+
+def warm_cache_from_artifacts() -> int:
+    """Restores recently generated results the shared cache has lost (evicted, expired or cleared)."""
+    artifacts = get_artifact_store()
+    cache = get_shared_cache()
+    if artifacts is None or cache is None or not ARTIFACT_WARMUP:
+        return 0
+    warmed = artifacts.warm(cache, ARTIFACT_WARMUP, max_age_s=cache.ttl_seconds)
+    print(f"[ARTIFACTS] Warmed the cache with {warmed} stored result(s)")
+    return warmed
+
+
+# Each real provider is checked every COGNIFY_HEALTH_INTERVAL_S seconds (0 disables
+# probing) with a free ping, or a tiny generation for free models (paid ones only with
+# COGNIFY_HEALTH_PROBE_PAID=1); /health/ready answers from the last round's result.
+# COGNIFY_READY_REQUIRE_MODEL=1 reports not-ready while only fallbacks can answer.
+health_monitor = ProviderHealthMonitor(
+    interval_s=float(os.getenv("COGNIFY_HEALTH_INTERVAL_S", DEFAULT_INTERVAL_S)),
+    timeout_s=float(os.getenv("COGNIFY_HEALTH_TIMEOUT_S", DEFAULT_TIMEOUT_S)),
+    require_model=os.getenv("COGNIFY_READY_REQUIRE_MODEL", "0") == "1",
+    probe_paid=os.getenv("COGNIFY_HEALTH_PROBE_PAID", "0") == "1",
+)
+LIVENESS = fast_dumps({"status": "alive"})
+
+
+def start_health_monitor():
+    """Builds the engine once at startup and starts probing its providers."""
+    try:
+        engine = get_ai_engine()
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        health_monitor.fail(str(e))
+        return
+    health_monitor.start(engine.providers, router=engine.router)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(warm_cache_from_artifacts)
+    await run_in_threadpool(start_health_monitor)
+    yield
+    health_monitor.stop()
+    # Queued artifacts are written before the worker exits
+    artifacts = get_artifact_store()
+    if artifacts is not None:
+        await run_in_threadpool(artifacts.flush)
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Cognify API",
     description="AI-Powered Study Assistant - Full Study Suite (Quiz, Summary, Glossary)",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
+# Routes time validation, the endpoint and serialization separately on traced requests
+app.router.route_class = TracedRoute
 
 # CORS middleware for frontend integration
 app.add_middleware(
@@ -66,6 +147,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Optional traffic recording, replayable with src/tools/replay.py
+if os.getenv("COGNIFY_RECORD_REQUESTS"):
+    app.add_middleware(RequestRecorderMiddleware, path=os.getenv("COGNIFY_RECORD_REQUESTS"))
+
+# Content-Encoding: gzip request bodies are inflated before recording and routing,
+# and responses of at least COGNIFY_COMPRESSION_MIN_BYTES go out brotli/gzip compressed
+app.add_middleware(RequestDecompressionMiddleware,
+                   max_bytes=int(os.getenv("COGNIFY_MAX_REQUEST_BYTES", 64 * 1024 * 1024)))
+if os.getenv("COGNIFY_COMPRESSION_ENABLED", "1") != "0":
+    app.add_middleware(CompressionMiddleware,
+                       minimum_size=int(os.getenv("COGNIFY_COMPRESSION_MIN_BYTES", 1024)))
+
+# A sample of /api/ requests is traced: Server-Timing header plus a JSONL span log.
+# COGNIFY_TRACE_SAMPLE_RATE=0 disables it; "X-Cognify-Trace: <COGNIFY_TRACE_FORCE_SECRET>"
+# forces a trace (ignored when no secret is configured). The log is written off the event
+# loop and rotated at COGNIFY_TRACE_MAX_BYTES; an empty COGNIFY_TRACE_PATH turns it off.
+app.add_middleware(TracingMiddleware,
+                   path=os.getenv("COGNIFY_TRACE_PATH", str(project_logs / "traces.jsonl")) or None,
+                   sample_rate=float(os.getenv("COGNIFY_TRACE_SAMPLE_RATE", 0.05)),
+                   force_secret=os.getenv("COGNIFY_TRACE_FORCE_SECRET"),
+                   max_bytes=int(os.getenv("COGNIFY_TRACE_MAX_BYTES", TRACE_MAX_BYTES)))
+
+# In-flight /api/ requests; speculative work backs off while it is high
+load_gauge = LoadGauge()
+app.add_middleware(LoadGaugeMiddleware, gauge=load_gauge)
+
+# Opt-in speculative pre-generation: the summary and glossary for an upload are
+# generated in the background so the follow-up requests are cache hits
+SPECULATE = os.getenv("COGNIFY_SPECULATE", "0") == "1"
+_speculator: Optional[SpeculativeGenerator] = None
+
 # Initialize ProductionFunctionCaller (singleton pattern)
 _ai_engine: Optional[ProductionFunctionCaller] = None
 
@@ -86,16 +198,63 @@ def get_ai_engine() -> ProductionFunctionCaller:
     return _ai_engine
 
 
+def get_speculator() -> SpeculativeGenerator:
+    """Get or create the speculative generator (and attach it to the engine for hit tracking)."""
+    global _speculator
+    if _speculator is None:
+        _speculator = SpeculativeGenerator(
+            load_gauge,
+            workers=int(os.getenv("COGNIFY_SPECULATE_WORKERS", 1)),
+            max_in_flight=int(os.getenv("COGNIFY_SPECULATE_MAX_IN_FLIGHT", 4)),
+        )
+        get_ai_engine().speculation = _speculator
+    return _speculator
+
+
+def speculate_after_upload(document_id: str, filename: str, topic: Optional[str], speculate: Optional[bool]):
+    """Queues summary and glossary pre-generation for a freshly uploaded document."""
+    if not (SPECULATE if speculate is None else speculate):
+        return
+    engine = get_ai_engine()
+    speculator = get_speculator()
+    topic = topic or topic_from_filename(filename)
+    for mode in ("summary", "glossary"):
+        speculator.schedule(f"{mode} of {document_id} ({topic})",
+                            lambda mode=mode: engine.prefetch(mode, document_id, topic))
+
+
 # =====================================================
 # Request/Response Models
 # =====================================================
 
-class QuizGenerationRequest(BaseModel):
+class DocumentSourceRequest(BaseModel):
+    """Base for requests that take either inline text or an uploaded document."""
+    context_text: Optional[str] = Field(default=None, description="The text content to use.")
+    document_id: Optional[str] = Field(
+        default=None, description="Id returned by /api/upload-pdf, used in place of context_text."
+    )
+
+    @model_validator(mode="after")
+    def check_source(self):
+        if self.context_text is None and self.document_id is None:
+            raise ValueError("Either context_text or document_id is required.")
+        return self
+
+
+class QuizGenerationRequest(DocumentSourceRequest):
     """Request model for quiz generation."""
-    context_text: str = Field(..., description="The text content to generate quiz questions from.")
     topic: str = Field(..., description="The topic or subject of the quiz.")
     difficulty: str = Field(default="medium", description="Difficulty level: easy, medium, or hard")
     num_questions: int = Field(default=5, ge=1, le=15, description="Number of questions to generate (1-15)")
+    user_id: Optional[str] = Field(default=None, description="User or tenant id charged for the request.")
+    parallel: Optional[bool] = Field(
+        default=None, description="Generate the quiz as concurrent sub-requests over different parts of the "
+                                  "text. Defaults to the server setting (large quizzes over long texts)."
+    )
+    fresh: bool = Field(
+        default=False, description="Always generate new questions instead of assembling the quiz from the "
+                                   "question bank."
+    )
 
 
 class QuizQuestionResponse(BaseModel):
@@ -116,10 +275,10 @@ class QuizGenerationResponse(BaseModel):
     message: Optional[str] = None
 
 
-class SummaryGenerationRequest(BaseModel):
+class SummaryGenerationRequest(DocumentSourceRequest):
     """Request model for summary generation."""
-    context_text: str = Field(..., description="The text content to summarize.")
     topic: str = Field(..., description="The topic or subject of the content.")
+    user_id: Optional[str] = Field(default=None, description="User or tenant id charged for the request.")
 
 
 class SummaryGenerationResponse(BaseModel):
@@ -130,10 +289,14 @@ class SummaryGenerationResponse(BaseModel):
     message: Optional[str] = None
 
 
-class GlossaryGenerationRequest(BaseModel):
+class GlossaryGenerationRequest(DocumentSourceRequest):
     """Request model for glossary generation."""
-    context_text: str = Field(..., description="The text content to extract glossary terms from.")
     topic: str = Field(..., description="The topic or subject of the content.")
+    user_id: Optional[str] = Field(default=None, description="User or tenant id charged for the request.")
+    parallel: Optional[bool] = Field(
+        default=None, description="Extract terms from each section of the text concurrently and merge them. "
+                                  "Defaults to the server setting (long texts)."
+    )
 
 
 class GlossaryTerm(BaseModel):
@@ -154,16 +317,124 @@ class GlossaryGenerationResponse(BaseModel):
 class PDFUploadResponse(BaseModel):
     """Response model for PDF upload."""
     success: bool
-    extracted_text: str
+    document_id: Optional[str] = None
+    extracted_text: Optional[str] = None
     page_count: int
     message: Optional[str] = None
+    cleanup: Optional[dict] = None
+    pages_reused: Optional[int] = None
+    revision: Optional[dict] = None
+
+
+def _result_message(result, default: str) -> str:
+    """
+    Tells the client when an over-budget request was served by a fallback
+    provider, a quiz by the bank, or a request by the extractive engine.
+    """
+    if getattr(result, "downgraded", False):
+        return "Budget limit reached: served by the fallback provider"
+    if getattr(result, "shed", False):
+        return "High load: extracted from the text without an AI model"
+    if getattr(result, "model", None) == "extractive":
+        return "AI service unavailable: extracted from the text without an AI model"
+    if (getattr(result, "bank", None) or {}).get("served"):
+        return "Quiz assembled from the question bank"
+    return default
+
+
+def normalize_quiz_data(quiz_data, default_topic: str):
+    """
+    Transforms the engine's quiz data into (topic, [QuizQuestionResponse]).
+    Handles the different response structures the AI produces.
+    """
+    questions_data = []
+    topic = default_topic
+
+    if isinstance(quiz_data, list):
+        # AI returned a list of questions directly
+        questions_data = quiz_data
+    elif isinstance(quiz_data, dict):
+        # AI returned a dictionary - check for questions key
+        if 'questions' in quiz_data:
+            questions_data = quiz_data['questions']
+        elif 'question' in quiz_data or 'id' in quiz_data:
+            # Single question dict at the root level, wrap it in a list
+            questions_data = [quiz_data]
+        else:
+            # Try to find any list-like structure
+            for key, value in quiz_data.items():
+                if isinstance(value, list) and len(value) > 0:
+                    # Check if it looks like questions
+                    if isinstance(value[0], dict) and ('question' in value[0] or 'id' in value[0]):
+                        questions_data = value
+                        break
+
+        # Extract topic if available
+        topic = quiz_data.get('topic', default_topic)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Unexpected response format from AI engine: {type(quiz_data)}. Expected dict or list."
+        )
+
+    # Transform questions to match our response model
+    questions = []
+    for idx, q in enumerate(questions_data):
+        # Handle both dict and object-like structures
+        if isinstance(q, dict):
+            questions.append(QuizQuestionResponse(
+                id=q.get('id', idx + 1),
+                question=q.get('question', ''),
+                options=q.get('options', []),
+                answer=q.get('answer', ''),
+                explanation=q.get('explanation', '')
+            ))
+        else:
+            questions.append(QuizQuestionResponse(
+                id=getattr(q, 'id', idx + 1),
+                question=getattr(q, 'question', ''),
+                options=getattr(q, 'options', []),
+                answer=getattr(q, 'answer', ''),
+                explanation=getattr(q, 'explanation', '')
+            ))
+    return topic, questions
+
+
+def normalize_glossary_data(glossary_data, default_topic: str):
+    """Transforms the engine's glossary data into (topic, [GlossaryTerm])."""
+    if isinstance(glossary_data, dict):
+        terms_data = glossary_data.get('terms', [])
+        topic = glossary_data.get('topic', default_topic)
+    elif isinstance(glossary_data, list):
+        terms_data = glossary_data
+        topic = default_topic
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Unexpected response format from AI engine: {type(glossary_data)}"
+        )
+
+    terms = []
+    for term_item in terms_data:
+        if isinstance(term_item, dict):
+            terms.append(GlossaryTerm(
+                term=term_item.get('term', ''),
+                definition=term_item.get('definition', '')
+            ))
+        else:
+            # Handle object-like structures
+            terms.append(GlossaryTerm(
+                term=getattr(term_item, 'term', ''),
+                definition=getattr(term_item, 'definition', '')
+            ))
+    return topic, terms
 
 
 # =====================================================
 # API Routes
 # =====================================================
 
-@app.get("/")
+@app.get("/", response_class=FastJSONResponse)
 async def root():
     """Root endpoint - health check."""
     return {
@@ -176,21 +447,21 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    try:
-        # Check if AI engine can be initialized
-        engine = get_ai_engine()
-        return {
-            "status": "healthy",
-            "ai_engine": "initialized",
-            "model": "gemini-flash-latest (with fallback)",
-            "features": ["quiz", "summary", "glossary"]
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "error": str(e)
-        }
+    """Health check endpoint (provider state from the last background probe round)."""
+    return Response(content=health_monitor.health(), media_type="application/json")
+
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is serving requests."""
+    return Response(content=LIVENESS, media_type="application/json")
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: 200 while some provider can answer, 503 otherwise."""
+    status_code, body = health_monitor.readiness()
+    return Response(content=body, status_code=status_code, media_type="application/json")
 
 
 @app.post("/api/generate-quiz", response_model=QuizGenerationResponse)
@@ -205,12 +476,17 @@ async def generate_quiz(request: QuizGenerationRequest):
         # Get AI engine instance
         engine = get_ai_engine()
         
-        # Call the production function caller
-        result = engine.generate_quiz(
+        # Call the production function caller (blocking, so keep it off the event loop)
+        result = await run_in_threadpool(
+            engine.generate_quiz,
             context_text=request.context_text,
+            document_id=request.document_id,
             topic=request.topic,
             difficulty=request.difficulty,
-            num_questions=request.num_questions
+            num_questions=request.num_questions,
+            user_id=request.user_id,
+            parallel=request.parallel,
+            fresh=request.fresh
         )
         
         if result is None:
@@ -227,68 +503,7 @@ async def generate_quiz(request: QuizGenerationRequest):
         if isinstance(quiz_data, (dict, list)):
             print(f"DEBUG: quiz_data preview: {json.dumps(quiz_data, indent=2)[:500]}")
         
-        # Transform the data to match our response model
-        # Handle different possible response structures from the AI
-        questions_data = []
-        topic = request.topic
-        
-        if isinstance(quiz_data, list):
-            # AI returned a list of questions directly
-            questions_data = quiz_data
-        elif isinstance(quiz_data, dict):
-            # AI returned a dictionary - check for questions key
-            if 'questions' in quiz_data:
-                questions_data = quiz_data['questions']
-            elif 'question' in quiz_data or 'id' in quiz_data:
-                # Single question wrapped in dict, or questions at root level
-                # Check if it's a single question or a list structure
-                if isinstance(quiz_data.get('questions'), list):
-                    questions_data = quiz_data['questions']
-                else:
-                    # Might be a single question dict, wrap it in a list
-                    questions_data = [quiz_data]
-            else:
-                # Try to find any list-like structure
-                for key, value in quiz_data.items():
-                    if isinstance(value, list) and len(value) > 0:
-                        # Check if it looks like questions
-                        if isinstance(value[0], dict) and ('question' in value[0] or 'id' in value[0]):
-                            questions_data = value
-                            break
-                
-                # If still no questions found, try to use the dict itself as a single question
-                if not questions_data and ('question' in quiz_data or 'id' in quiz_data):
-                    questions_data = [quiz_data]
-            
-            # Extract topic if available
-            topic = quiz_data.get('topic', request.topic)
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Unexpected response format from AI engine: {type(quiz_data)}. Expected dict or list."
-            )
-        
-        # Transform questions to match our response model
-        questions = []
-        for idx, q in enumerate(questions_data):
-            # Handle both dict and object-like structures
-            if isinstance(q, dict):
-                questions.append(QuizQuestionResponse(
-                    id=q.get('id', idx + 1),
-                    question=q.get('question', ''),
-                    options=q.get('options', []),
-                    answer=q.get('answer', ''),
-                    explanation=q.get('explanation', '')
-                ))
-            else:
-                # Handle object-like structures
-                questions.append(QuizQuestionResponse(
-                    id=getattr(q, 'id', idx + 1),
-                    question=getattr(q, 'question', ''),
-                    options=getattr(q, 'options', []),
-                    answer=getattr(q, 'answer', ''),
-                    explanation=getattr(q, 'explanation', '')
-                ))
+        topic, questions = normalize_quiz_data(quiz_data, request.topic)
         
         if not questions:
             raise HTTPException(
@@ -301,9 +516,15 @@ async def generate_quiz(request: QuizGenerationRequest):
             topic=topic,
             questions=questions,
             total=len(questions),
-            message="Quiz generated successfully"
+            message=_result_message(result, "Quiz generated successfully")
         )
             
+    except HTTPException:
+        raise
+    except DocumentNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except BudgetExceededError as e:
+        raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail=str(e))
     except ValueError as e:
         # Handle missing API key or configuration errors
         raise HTTPException(
@@ -329,9 +550,12 @@ async def generate_summary(request: SummaryGenerationRequest):
     try:
         engine = get_ai_engine()
         
-        result = engine.generate_summary(
+        result = await run_in_threadpool(
+            engine.generate_summary,
             context_text=request.context_text,
-            topic=request.topic
+            document_id=request.document_id,
+            topic=request.topic,
+            user_id=request.user_id
         )
         
         if result is None:
@@ -362,9 +586,15 @@ async def generate_summary(request: SummaryGenerationRequest):
             success=True,
             topic=topic,
             summary=summary_text,
-            message="Summary generated successfully"
+            message=_result_message(result, "Summary generated successfully")
         )
         
+    except HTTPException:
+        raise
+    except DocumentNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except BudgetExceededError as e:
+        raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail=str(e))
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -388,9 +618,13 @@ async def generate_glossary(request: GlossaryGenerationRequest):
     try:
         engine = get_ai_engine()
         
-        result = engine.generate_glossary(
+        result = await run_in_threadpool(
+            engine.generate_glossary,
             context_text=request.context_text,
-            topic=request.topic
+            document_id=request.document_id,
+            topic=request.topic,
+            user_id=request.user_id,
+            parallel=request.parallel
         )
         
         if result is None:
@@ -401,33 +635,8 @@ async def generate_glossary(request: GlossaryGenerationRequest):
         
         glossary_data = result.data
         
-        # Extract glossary terms
-        if isinstance(glossary_data, dict):
-            terms_data = glossary_data.get('terms', [])
-            topic = glossary_data.get('topic', request.topic)
-        elif isinstance(glossary_data, list):
-            terms_data = glossary_data
-            topic = request.topic
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Unexpected response format from AI engine: {type(glossary_data)}"
-            )
-        
-        # Transform terms to match our response model
-        terms = []
-        for term_item in terms_data:
-            if isinstance(term_item, dict):
-                terms.append(GlossaryTerm(
-                    term=term_item.get('term', ''),
-                    definition=term_item.get('definition', '')
-                ))
-            else:
-                # Handle object-like structures
-                terms.append(GlossaryTerm(
-                    term=getattr(term_item, 'term', ''),
-                    definition=getattr(term_item, 'definition', '')
-                ))
+        # Extract glossary terms and transform them to match our response model
+        topic, terms = normalize_glossary_data(glossary_data, request.topic)
         
         if not terms:
             raise HTTPException(
@@ -440,9 +649,15 @@ async def generate_glossary(request: GlossaryGenerationRequest):
             topic=topic,
             terms=terms,
             total=len(terms),
-            message="Glossary generated successfully"
+            message=_result_message(result, "Glossary generated successfully")
         )
         
+    except HTTPException:
+        raise
+    except DocumentNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except BudgetExceededError as e:
+        raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail=str(e))
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -456,12 +671,21 @@ async def generate_glossary(request: GlossaryGenerationRequest):
 
 
 @app.post("/api/upload-pdf", response_model=PDFUploadResponse)
-async def upload_pdf(file: UploadFile = File(...)):
+async def upload_pdf(
+    file: UploadFile = File(...),
+    include_text: bool = Query(default=True, description="Return extracted_text in the response. "
+                               "Clients that only use document_id can pass false."),
+    topic: Optional[str] = Query(default=None, description="Topic the follow-up summary/glossary requests "
+                                 "will use, for speculative pre-generation. Defaults to the file name."),
+    speculate: Optional[bool] = Query(default=None, description="Pre-generate the summary and glossary in the "
+                                      "background. Defaults to the server setting (COGNIFY_SPECULATE).")
+):
     """
     Upload and extract text from a PDF file.
     
     This endpoint accepts a PDF file, extracts its text content using PyMuPDF,
-    and returns the extracted text for use with other endpoints.
+    stores it in the document store and returns a document_id that the
+    generate endpoints accept in place of context_text.
     """
     try:
         # Validate file type
@@ -473,34 +697,76 @@ async def upload_pdf(file: UploadFile = File(...)):
         
         # Read file content
         file_content = await file.read()
+        store = get_document_store()
+
+        # Identical PDFs are extracted once per host, whichever worker sees them first
+        pdf_cache = get_shared_cache()
+        pdf_key = make_cache_key("pdf", hashlib.sha256(file_content).hexdigest(), PDF_CLEANUP)
+        cached = pdf_cache.get(pdf_key) if pdf_cache is not None else None
+        if cached is not None:
+            cached_pdf = json.loads(cached)
+            if store.exists(cached_pdf["document_id"]):
+                speculate_after_upload(cached_pdf["document_id"], file.filename, topic, speculate)
+                cached_meta = store.get_metadata(cached_pdf["document_id"]) or {}
+                return PDFUploadResponse(
+                    success=True,
+                    document_id=cached_pdf["document_id"],
+                    extracted_text=store.get_text(cached_pdf["document_id"]) if include_text else None,
+                    page_count=cached_pdf["page_count"],
+                    message=f"Successfully extracted text from {cached_pdf['page_count']} page(s)",
+                    cleanup=cached_meta.get("cleanup"),
+                    pages_reused=cached_meta.get("pages_reused"),
+                    revision=cached_meta.get("revision")
+                )
         
         # Extract text using PyMuPDF
         try:
-            doc = fitz.open(stream=file_content, filetype="pdf")
-            extracted_text = ""
-            page_count = len(doc)
-            
-            for page_num in range(page_count):
-                page = doc[page_num]
-                extracted_text += page.get_text()
-                if page_num < page_count - 1:
-                    extracted_text += "\n\n"  # Add spacing between pages
-            
-            doc.close()
+            # Pages already extracted for an earlier revision come from the page cache
+            pages = await run_in_threadpool(extract_pdf_pages, file_content, pdf_cache)
+            cleanup = await run_in_threadpool(clean_pdf_pages, pages) if PDF_CLEANUP else None
+            extracted_text = PAGE_SEPARATOR.join(page["text"] for page in pages)
+            page_count = len(pages)
             
             if not extracted_text.strip():
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="PDF appears to be empty or contains no extractable text."
                 )
+
+            page_hashes = [page["hash"] for page in pages]
+            pages_reused = sum(page["reused"] for page in pages)
+            revision = revision_of(file.filename, page_hashes)
+            metadata = {"filename": file.filename, "page_count": page_count, "page_hashes": page_hashes,
+                        "pages_reused": pages_reused}
+            if cleanup is not None:
+                metadata["cleanup"] = cleanup
+            if revision is not None:
+                metadata["revision"] = revision
+            document_id = await run_in_threadpool(store.put, extracted_text, metadata)
+            # Chunk and index once at ingestion, using the page layout for headings
+            await run_in_threadpool(index_document, store, document_id, pages)
+
+            if pdf_cache is not None:
+                pdf_cache.set(pdf_key, json.dumps({
+                    "document_id": document_id,
+                    "page_count": page_count
+                }))
+                pdf_cache.set(make_cache_key("pdfname", file.filename), document_id)
+            speculate_after_upload(document_id, file.filename, topic, speculate)
             
             return PDFUploadResponse(
                 success=True,
-                extracted_text=extracted_text,
+                document_id=document_id,
+                extracted_text=extracted_text if include_text else None,
                 page_count=page_count,
-                message=f"Successfully extracted text from {page_count} page(s)"
+                message=f"Successfully extracted text from {page_count} page(s)",
+                cleanup=cleanup,
+                pages_reused=pages_reused,
+                revision=revision
             )
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -516,6 +782,201 @@ async def upload_pdf(file: UploadFile = File(...)):
         )
 
 
+def _ndjson(record: dict) -> bytes:
+    return fast_dumps(record) + b"\n"
+
+
+def revision_of(filename: str, page_hashes) -> Optional[dict]:
+    """
+    Pages that differ from the previous upload under the same file name, or
+    None for a first upload. Only informational: unchanged pages are reused
+    through the page cache whatever the file is called.
+    """
+    pdf_cache = get_shared_cache()
+    if pdf_cache is None:
+        return None
+    previous = pdf_cache.get(make_cache_key("pdfname", filename))
+    store = get_document_store()
+    if previous is None or not store.exists(previous):
+        return None
+    known = set(store.get_metadata(previous).get("page_hashes") or [])
+    changed = [number for number, page_hash in enumerate(page_hashes, start=1) if page_hash not in known]
+    print(f"[REVISION] {filename}: {len(changed)} of {len(page_hashes)} page(s) changed since {previous}")
+    return {"previous_document_id": previous, "changed_pages": changed}
+
+
+def stream_pdf_records(pages, filename: str, pdf_key: str, topic=None, speculate=None, include_text=False):
+    """
+    Yields one NDJSON record per extracted page (with its text when
+    `include_text`), then a "done" record with the document_id. Pages go
+    straight to the document store and the chunker, so the full text is
+    never assembled as one string.
+    """
+    store = get_document_store()
+    writer = store.open_writer()
+    chunker = PageChunker()
+    # Streaming cleanup learns headers/footers as pages arrive
+    cleaner = PageCleaner() if PDF_CLEANUP else None
+    page_count = 0
+    page_hashes = []
+    pages_reused = 0
+    has_text = False
+    try:
+        for page_number, page in pages:
+            page_hashes.append(page["hash"])
+            reused = page["reused"]
+            pages_reused += reused
+            if cleaner is not None:
+                page = {"text": cleaner.clean_page(page["text"]),
+                        "blocks": cleaner.clean_blocks(page["blocks"])}
+            if page_number > 1:
+                writer.write(PAGE_SEPARATOR)
+            writer.write(page["text"])
+            chunker.add_page(page_number, page["blocks"])
+            page_count = page_number
+            has_text = has_text or bool(page["text"].strip())
+            record = {"type": "page", "page": page_number, "chars": len(page["text"]), "reused": reused}
+            if include_text:
+                record["text"] = page["text"]
+            yield _ndjson(record)
+
+        if not has_text:
+            writer.abort()
+            yield _ndjson({"type": "error", "detail": "PDF appears to be empty or contains no extractable text."})
+            return
+        metadata = {"filename": filename, "page_count": page_count, "page_hashes": page_hashes,
+                    "pages_reused": pages_reused}
+        if cleaner is not None:
+            metadata["cleanup"] = cleaner.report()
+        revision = revision_of(filename, page_hashes)
+        if revision is not None:
+            metadata["revision"] = revision
+        document_id = writer.commit(metadata)
+        index_document(store, document_id, chunks=chunker.finish())
+        pdf_cache = get_shared_cache()
+        if pdf_cache is not None:
+            pdf_cache.set(pdf_key, json.dumps({"document_id": document_id, "page_count": page_count}))
+            pdf_cache.set(make_cache_key("pdfname", filename), document_id)
+        speculate_after_upload(document_id, filename, topic, speculate)
+        yield _ndjson({"type": "done", "document_id": document_id, "page_count": page_count,
+                       "chars": writer.chars, "cleanup": metadata.get("cleanup"),
+                       "pages_reused": pages_reused, "revision": revision})
+    except Exception as e:
+        writer.abort()
+        yield _ndjson({"type": "error", "detail": f"Error extracting text from PDF: {str(e)}"})
+
+
+@app.post("/api/upload-pdf/stream")
+async def upload_pdf_stream(
+    file: UploadFile = File(...),
+    topic: Optional[str] = Query(default=None, description="Topic the follow-up summary/glossary requests "
+                                 "will use, for speculative pre-generation. Defaults to the file name."),
+    speculate: Optional[bool] = Query(default=None, description="Pre-generate the summary and glossary in the "
+                                      "background. Defaults to the server setting (COGNIFY_SPECULATE)."),
+    include_text: bool = Query(default=False, description="Include each page's extracted text in its "
+                               "record. Off by default: the document is referenced by document_id.")
+):
+    """
+    Streaming variant of /api/upload-pdf.
+
+    Responds with NDJSON as extraction proceeds: one
+    {"type": "page", "page", "chars", "reused"} record per page ("text" too
+    with include_text=true), then
+    {"type": "done", "document_id", "page_count", "chars", "cleanup", "pages_reused",
+    "revision"}. Failures after
+    the first byte arrive as a final {"type": "error", "detail"} record.
+    """
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be a PDF (.pdf)"
+        )
+    file_content = await file.read()
+    pdf_key = make_cache_key("pdf", hashlib.sha256(file_content).hexdigest(), PDF_CLEANUP)
+    try:
+        # Opening validates the PDF while an error status can still be sent
+        pages = await run_in_threadpool(iter_pdf_pages, file_content, get_shared_cache())
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not open PDF: {str(e)}"
+        )
+    # A sync generator: Starlette pulls each page from the threadpool
+    return StreamingResponse(stream_pdf_records(pages, file.filename, pdf_key, topic, speculate, include_text),
+                             media_type="application/x-ndjson")
+
+
+@app.get("/api/speculation", response_class=FastJSONResponse)
+async def speculation_stats():
+    """Speculative pre-generation metrics: hit rate, cancellations and wasted spend."""
+    if _speculator is None:
+        return {"enabled": SPECULATE, "started": False}
+    return {"enabled": SPECULATE, "started": True, **_speculator.report()}
+
+
+@app.get("/api/question-bank", response_class=FastJSONResponse)
+async def question_bank_stats():
+    """Question bank size and how many quizzes were served from it."""
+    bank = get_ai_engine().bank
+    if bank is None:
+        return {"enabled": False}
+    return {"enabled": True, **bank.stats()}
+
+
+@app.get("/api/artifacts", response_class=FastJSONResponse)
+async def list_artifacts(
+    user_id: Optional[str] = Query(default=None, description="Whose artifacts to list (default: anonymous)."),
+    document_id: Optional[str] = Query(default=None, description="List every artifact generated from this "
+                                       "document (or inline text with this content hash) instead."),
+    mode: Optional[str] = Query(default=None, description="Only quiz, summary or glossary artifacts."),
+    topic: Optional[str] = Query(default=None, description="Only artifacts on this topic (with document_id)."),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[int] = Query(default=None, description="next_before from the previous page.")
+):
+    """
+    Previously generated quizzes, summaries and glossaries, newest first and
+    without their content (GET /api/artifacts/{id} returns it).
+    """
+    artifacts = get_artifact_store()
+    if artifacts is None:
+        return {"enabled": False, "artifacts": [], "next_before": None}
+    if document_id is not None:
+        page, next_before = await run_in_threadpool(artifacts.list_for_document, document_id, mode, topic,
+                                                    limit, before)
+    else:
+        page, next_before = await run_in_threadpool(artifacts.list_for_user, user_id, limit, before, mode)
+    return {"enabled": True, "artifacts": page, "next_before": next_before}
+
+
+@app.get("/api/artifacts/stats", response_class=FastJSONResponse)
+async def artifact_stats():
+    """Artifact store size, write queue and cache warm-up counts."""
+    artifacts = get_artifact_store()
+    if artifacts is None:
+        return {"enabled": False}
+    return {"enabled": True, **artifacts.stats()}
+
+
+@app.get("/api/artifacts/{artifact_id}", response_class=FastJSONResponse)
+async def get_artifact(
+    artifact_id: int,
+    user_id: str = Query(..., description="Owner of the artifact; other users' artifacts are not found."),
+):
+    """One of the user's stored artifacts with its content, for re-downloads without generating it again."""
+    artifacts = get_artifact_store()
+    artifact = await run_in_threadpool(artifacts.get, artifact_id, user_id) if artifacts is not None else None
+    if artifact is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Artifact {artifact_id} not found")
+    return artifact
+
+
+@app.get("/api/routing", response_class=FastJSONResponse)
+async def routing_stats():
+    """Provider routing state: SLOs, output-size estimates and observed latency per provider."""
+    engine = get_ai_engine()
+    return {"configured": [type(p).__name__ for p in engine.providers], **engine.router.report()}
+
+
 if __name__ == "__main__":
     import uvicorn
     
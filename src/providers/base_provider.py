@@ -5,6 +5,9 @@ from dataclasses import dataclass
 class ProviderResponse:
     content: str
     status: str  # "success" or "error"
+    model: str = "unknown"
+    input_tokens: int = 0
+    output_tokens: int = 0
 
 class LLMProvider(ABC):
     @abstractmethod
@@ -0,0 +1,105 @@
+import json
+import re
+try:
+    from .base_provider import LLMProvider, ProviderResponse
+except ImportError:
+    from base_provider import LLMProvider, ProviderResponse
+
+try:
+    from utils.extractive import cloze_questions, glossary, summarize
+except ImportError:
+    from src.utils.extractive import cloze_questions, glossary, summarize
+
+_QUIZ_RE = re.compile(r"^Generate an? (\d+)-question multiple choice quiz about (.*?) based on this text: ", re.DOTALL)
+_SUMMARY_RE = re.compile(r"^Summarize the following text about (.*?): ", re.DOTALL)
+_COMBINE_RE = re.compile(r"^Summarize these section summaries of a text about (.*?) as one summary: ", re.DOTALL)
+_GLOSSARY_RE = re.compile(r"^Extract (?:\d+-\d+ )?key terms and their definitions from this text about (.*?): ",
+                          re.DOTALL)
+_CANDIDATES_RE = re.compile(r"^Define the key terms of a text about (.*?)\. These candidate terms", re.DOTALL)
+_CANDIDATE_LIMIT_RE = re.compile(r"Keep the \d+-(\d+) terms")
+_EXCERPT_RE = re.compile(r"^\[(\d+)\] (.*)$", re.MULTILINE)
+_CANDIDATE_RE = re.compile(r"^- (.+) \[([\d, ]+)\]$", re.MULTILINE)
+_SECTION_LABEL_RE = re.compile(r"(?:^|\n\n)Section \d+: ")
+_EXCLUDE_HEADER = "\n\nDo not repeat or paraphrase any of these existing questions:\n"
+_FORMAT_HEADER = "\n\nReturn ONLY"
+
+
+def _body(prompt: str, start: int) -> str:
+    """The source text of a prompt: from `start` up to the exclusion list or output instructions."""
+    text = prompt[start:]
+    for header in (_EXCLUDE_HEADER, _FORMAT_HEADER):
+        text = text.split(header, 1)[0]
+    return text
+
+
+def _defined_candidates(prompt: str):
+    """Candidate-term glossary prompt: each candidate defined by its first excerpt."""
+    body = prompt.split(_FORMAT_HEADER, 1)[0]
+    excerpts = dict(_EXCERPT_RE.findall(body))
+    limit = _CANDIDATE_LIMIT_RE.search(body)
+    terms = []
+    for term, numbers in _CANDIDATE_RE.findall(body):
+        first = numbers.split(",")[0].strip()
+        if first in excerpts:
+            terms.append({"term": term, "definition": excerpts[first]})
+    return terms[:int(limit.group(1))] if limit else terms
+
+
+def _excluded(prompt: str):
+    _, found, rest = prompt.partition(_EXCLUDE_HEADER)
+    if not found:
+        return []
+    return [line[2:] for line in rest.split(_FORMAT_HEADER, 1)[0].splitlines() if line.startswith("- ")]
+
+
+class ExtractiveProvider(LLMProvider):
+    """
+    Degraded-mode provider that needs no model: summaries, glossaries and
+    cloze quizzes extracted from the prompt's own source text on the CPU
+    (see utils.extractive). Output is real and document-derived, unlike
+    MockProvider's, but plainer than a model's, so it is never cached or
+    banked and is only routed to after every real provider, or when the
+    caller sheds load.
+    """
+    # Plainer than a model's output: a real provider should replace it once available
+    cacheable = False
+    # Costs nothing, so it stays available to users who are over budget
+    cost_tier = "free"
+    # Never chosen by the routing policy ahead of a real model
+    fallback_only = True
+    model_id = "extractive"
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        quiz = _QUIZ_RE.match(prompt)
+        summary = _SUMMARY_RE.match(prompt)
+        combine = _COMBINE_RE.match(prompt)
+        terms = _GLOSSARY_RE.match(prompt)
+        candidates = _CANDIDATES_RE.match(prompt)
+        if quiz:
+            topic = quiz.group(2)
+            questions = cloze_questions(_body(prompt, quiz.end()), int(quiz.group(1)), _excluded(prompt))
+            data = {"topic": topic, "questions": questions} if questions else None
+        elif summary or combine:
+            match = summary or combine
+            text = _body(prompt, match.end())
+            if combine:
+                text = _SECTION_LABEL_RE.sub("\n\n", text)
+            summary_text = summarize(text)
+            data = {"topic": match.group(1), "summary": summary_text} if summary_text else None
+        elif terms:
+            extracted = glossary(_body(prompt, terms.end()))
+            data = {"topic": terms.group(1), "terms": extracted} if extracted else None
+        elif candidates:
+            defined = _defined_candidates(prompt)
+            data = {"topic": candidates.group(1), "terms": defined} if defined else None
+        else:
+            data = None
+
+        if data is None:
+            # Unknown prompt or too little text to extract from: let the next provider answer
+            print(f"[EXTRACTIVE] Nothing to extract (prompt length: {len(prompt)})")
+            return ProviderResponse(content="", status="error", model="extractive")
+        content = json.dumps(data)
+        print(f"[EXTRACTIVE] Returning {len(content)} chars of JSON")
+        return ProviderResponse(content=content, status="success", model="extractive",
+                                input_tokens=len(prompt) // 4, output_tokens=len(content) // 4)
@@ -13,7 +13,22 @@ class GeminiProvider(LLMProvider):
         try:
             response = self.client.models.generate_content(model=self.model_id, contents=prompt)
             print(f"[OK] Gemini response received (length: {len(response.text)})")
-            return ProviderResponse(content=response.text, status="success")
+            usage = getattr(response, "usage_metadata", None)
+            return ProviderResponse(
+                content=response.text,
+                status="success",
+                model=self.model_id,
+                input_tokens=getattr(usage, "prompt_token_count", 0) or 0,
+                output_tokens=getattr(usage, "candidates_token_count", 0) or 0,
+            )
         except Exception as e:
             print(f"[ERROR] Gemini error: {e}")
-            return ProviderResponse(content=str(e), status="error")
\ No newline at end of file
+            return ProviderResponse(content=str(e), status="error")
+
+    def ping(self) -> ProviderResponse:
+        """Model metadata lookup: shows the API and key work without a billed generation."""
+        try:
+            self.client.models.get(model=self.model_id)
+            return ProviderResponse(content="", status="success", model=self.model_id)
+        except Exception as e:
+            return ProviderResponse(content=str(e), status="error", model=self.model_id)
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""
+Provider for a local OpenAI-compatible model server (vLLM, llama.cpp
+server, Ollama, LM Studio, ...).
+
+All requests share one pooled keep-alive httpx client, so concurrent
+generate() calls from the threadpool reuse warm connections, and the
+server's continuous batching groups them on the GPU.
+
+With `batch_endpoint="completions"` and `batch_window_ms` > 0, prompts that
+arrive within the window are instead sent together as one /completions
+request with a list prompt. That endpoint applies no chat template, so it
+suits base models or servers whose completions endpoint templates prompts
+itself; the default keeps every prompt on /chat/completions so batched and
+single requests see the same template. A server that rejects list prompts
+(Ollama, for one) or returns choices that cannot be matched to their
+prompts gets the batch again as concurrent chat requests, and after a
+rejection list prompts are not tried again.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import httpx
+
+try:
+    from .base_provider import LLMProvider, ProviderResponse
+except ImportError:
+    from base_provider import LLMProvider, ProviderResponse
+
+DEFAULT_MODEL = "local-model"
+DEFAULT_MAX_CONNECTIONS = 16
+DEFAULT_MAX_BATCH = 8
+BATCH_ENDPOINTS = ("chat", "completions")
+
+
+class BatchRejectedError(Exception):
+    """The server does not accept list prompts on /completions."""
+
+
+class LocalOpenAIProvider(LLMProvider):
+    """LLMProvider for an on-prem OpenAI-compatible endpoint (base_url ends in /v1)."""
+    # On-prem compute has no per-token bill, so it stays available to users over budget
+    cost_tier = "free"
+
+    def __init__(self, base_url: str, model: str = DEFAULT_MODEL, api_key=None, timeout_s: float = 120.0,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS, batch_window_ms: float = 0.0,
+                 max_batch: int = DEFAULT_MAX_BATCH, max_tokens: int = 2048, temperature: float = 0.2,
+                 batch_endpoint: str = "chat"):
+        if batch_endpoint not in BATCH_ENDPOINTS:
+            raise ValueError(f"batch_endpoint must be one of {BATCH_ENDPOINTS}, not {batch_endpoint!r}")
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.batch_window_s = batch_window_ms / 1000.0
+        self.max_batch = max_batch
+        self.batch_endpoint = batch_endpoint
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.Client(
+            base_url=self.base_url, headers=headers, timeout=timeout_s,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._queue = None
+        if self.batch_window_s > 0 and batch_endpoint == "completions":
+            self._queue = queue.Queue()
+            # Batches are sent concurrently, so a slow batch does not hold up the next one
+            self._senders = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="local-llm")
+            threading.Thread(target=self._batch_loop, name="local-llm-batcher", daemon=True).start()
+
+    @property
+    def model_id(self) -> str:
+        """Model name as reported in responses (and priced by cost_tracking)."""
+        return f"local/{self.model}"
+
+    @classmethod
+    def from_env(cls):
+        """Builds the provider from COGNIFY_LOCAL_LLM_* variables (COGNIFY_LOCAL_LLM_URL is required)."""
+        return cls(
+            base_url=os.environ["COGNIFY_LOCAL_LLM_URL"],
+            model=os.getenv("COGNIFY_LOCAL_LLM_MODEL", DEFAULT_MODEL),
+            api_key=os.getenv("COGNIFY_LOCAL_LLM_API_KEY"),
+            timeout_s=float(os.getenv("COGNIFY_LOCAL_LLM_TIMEOUT_S", 120)),
+            max_connections=int(os.getenv("COGNIFY_LOCAL_LLM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+            batch_window_ms=float(os.getenv("COGNIFY_LOCAL_LLM_BATCH_WINDOW_MS", 0)),
+            max_batch=int(os.getenv("COGNIFY_LOCAL_LLM_MAX_BATCH", DEFAULT_MAX_BATCH)),
+            batch_endpoint=os.getenv("COGNIFY_LOCAL_LLM_BATCH_ENDPOINT", "chat"),
+        )
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        if self._queue is None or self.batch_endpoint != "completions":
+            return self._chat(prompt)
+        future = Future()
+        self._queue.put((prompt, future))
+        return future.result()
+
+    def ping(self) -> ProviderResponse:
+        """GET /models: the server is up and answering, without running the model."""
+        try:
+            self.client.get("/models").raise_for_status()
+            return ProviderResponse(content="", status="success", model=self.model_id)
+        except httpx.HTTPError as e:
+            return ProviderResponse(content=str(e), status="error", model=self.model_id)
+
+    def _error(self, e) -> ProviderResponse:
+        print(f"[ERROR] Local model error: {e}")
+        return ProviderResponse(content=str(e), status="error", model=self.model_id)
+
+    def _chat(self, prompt: str) -> ProviderResponse:
+        try:
+            response = self.client.post("/chat/completions", json={
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": self.max_tokens,
+                "temperature": self.temperature,
+            })
+            response.raise_for_status()
+            data = response.json()
+            usage = data.get("usage") or {}
+            return ProviderResponse(
+                content=data["choices"][0]["message"]["content"],
+                status="success",
+                model=f"local/{data.get('model') or self.model}",
+                input_tokens=usage.get("prompt_tokens", 0),
+                output_tokens=usage.get("completion_tokens", 0),
+            )
+        except (httpx.HTTPError, ValueError, KeyError, IndexError, TypeError) as e:
+            return self._error(e)
+
+    # ---------- micro-batching ----------
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if len(batch) > 1 and self.batch_endpoint == "completions":
+                self._senders.submit(self._send_batch, batch)
+            else:
+                self._send_as_chat(batch)
+
+    def _answer(self, prompt, future):
+        future.set_result(self._chat(prompt))
+
+    def _send_as_chat(self, batch):
+        """One concurrent /chat/completions request per prompt, over the pooled client."""
+        for prompt, future in batch:
+            self._senders.submit(self._answer, prompt, future)
+
+    def _send_batch(self, batch):
+        prompts = [prompt for prompt, _ in batch]
+        try:
+            results = self._complete(prompts)
+        except BatchRejectedError as e:
+            print(f"[WARNING] Local model server rejected a batched request ({e}); using chat requests")
+            self.batch_endpoint = "chat"
+            return self._send_as_chat(batch)
+        except (KeyError, ValueError, TypeError) as e:
+            print(f"[WARNING] Unusable batched response ({e}); resending as chat requests")
+            return self._send_as_chat(batch)
+        except Exception as e:
+            results = [self._error(e)] * len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _complete(self, prompts):
+        """
+        One /completions call for a list of prompts; usage is split by prompt and
+        output length. Raises BatchRejectedError when the server refuses list
+        prompts, and KeyError/ValueError when a choice cannot be matched to its prompt.
+        """
+        try:
+            response = self.client.post("/completions", json={
+                "model": self.model,
+                "prompt": prompts,
+                "max_tokens": self.max_tokens,
+                "temperature": self.temperature,
+            })
+        except httpx.HTTPError as e:
+            return [self._error(e)] * len(prompts)
+        if response.status_code in (400, 404, 405, 415, 422, 501):
+            raise BatchRejectedError(f"HTTP {response.status_code}")
+        try:
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            return [self._error(e)] * len(prompts)
+
+        data = response.json()
+        texts = [None] * len(prompts)
+        for choice in data["choices"]:
+            index = choice.get("index")
+            # A missing index would silently hand every text to the first prompt
+            if not isinstance(index, int) or not 0 <= index < len(prompts) or texts[index] is not None:
+                raise ValueError(f"Batched choice has index {index!r}")
+            texts[index] = choice["text"]
+        if None in texts:
+            raise ValueError("Batched response is missing choices")
+
+        usage = data.get("usage") or {}
+        model = f"local/{data.get('model') or self.model}"
+        prompt_chars = sum(len(p) for p in prompts) or 1
+        output_chars = sum(len(t) for t in texts) or 1
+        results = [ProviderResponse(
+            content=text,
+            status="success",
+            model=model,
+            input_tokens=round(usage.get("prompt_tokens", 0) * len(prompt) / prompt_chars),
+            output_tokens=round(usage.get("completion_tokens", 0) * len(text) / output_chars),
+        ) for prompt, text in zip(prompts, texts)]
+        print(f"[LOCAL] Batched {len(prompts)} prompts into one request")
+        return results
+
+    def close(self):
+        self.client.close()
+        if self._queue is not None:
+            self._senders.shutdown(wait=False)
@@ -1,21 +1,115 @@
 import json
+import os
+import random
+import re
+import threading
+import time
 try:
     from .base_provider import LLMProvider, ProviderResponse
 except ImportError:
     from base_provider import LLMProvider, ProviderResponse
 
+DISTRIBUTIONS = ("fixed", "normal", "lognormal", "exponential")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def _source_sentences(prompt: str):
+    """Distinct sentences of the source text, so sample questions differ like real ones."""
+    _, _, text = prompt.partition("based on this text:")
+    text = re.split(r"\n\n(?:Do not repeat|Return ONLY)", text)[0]
+    seen = []
+    for sentence in _SENTENCE_RE.split(" ".join(text.split())):
+        sentence = sentence.strip().rstrip(".!?")
+        if len(sentence) >= 20 and sentence not in seen:
+            seen.append(sentence)
+    return seen
+
+
 class MockProvider(LLMProvider):
+    """
+    Fallback provider with canned content.
+
+    By default it answers instantly, as before. For load tests it can
+    simulate a real backend: a latency distribution with jitter, an injected
+    error rate, quiz output sized to the requested number of questions and
+    a per-output-token generation time. A seed makes a run reproducible.
+    """
+    # Canned fallback content must never populate the response cache
+    cacheable = False
+    # Costs nothing, so it stays available to users who are over budget
+    cost_tier = "free"
+    # Never chosen by the routing policy ahead of a real model, however cheap or fast
+    fallback_only = True
+    model_id = "mock"
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, distribution: str = "fixed",
+                 error_rate: float = 0.0, seed=None, ms_per_output_token: float = 0.0):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.ms_per_output_token = ms_per_output_token
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Builds a MockProvider from COGNIFY_MOCK_* variables (instant when unset)."""
+        seed = os.getenv("COGNIFY_MOCK_SEED")
+        return cls(
+            latency_ms=float(os.getenv("COGNIFY_MOCK_LATENCY_MS", 0)),
+            jitter_ms=float(os.getenv("COGNIFY_MOCK_JITTER_MS", 0)),
+            distribution=os.getenv("COGNIFY_MOCK_DISTRIBUTION", "fixed"),
+            error_rate=float(os.getenv("COGNIFY_MOCK_ERROR_RATE", 0)),
+            seed=int(seed) if seed else None,
+            ms_per_output_token=float(os.getenv("COGNIFY_MOCK_MS_PER_OUTPUT_TOKEN", 0)),
+        )
+
+    def _sample_latency_s(self) -> float:
+        if self.latency_ms <= 0 and self.jitter_ms <= 0:
+            return 0.0
+        with self._rng_lock:
+            if self.distribution == "normal":
+                ms = self._rng.gauss(self.latency_ms, self.jitter_ms)
+            elif self.distribution == "lognormal":
+                # latency_ms is the median; jitter_ms sets the spread (capped so a
+                # large jitter on a small median can't produce minute-long tails)
+                sigma = min(self.jitter_ms / self.latency_ms, 1.0) if self.latency_ms else 0.0
+                ms = self.latency_ms * self._rng.lognormvariate(0.0, sigma)
+            elif self.distribution == "exponential":
+                ms = self._rng.expovariate(1.0 / self.latency_ms) if self.latency_ms else 0.0
+            else:
+                ms = self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(ms, 0.0) / 1000.0
+
+    def _should_fail(self) -> bool:
+        if self.error_rate <= 0:
+            return False
+        with self._rng_lock:
+            return self._rng.random() < self.error_rate
+
     def generate(self, prompt: str) -> ProviderResponse:
         print(f"[MOCK] MockProvider activated (prompt length: {len(prompt)})")
 
-        # Determine the type of request based on the prompt
-        if "summary" in prompt.lower() or "summarize" in prompt.lower():
+        delay = self._sample_latency_s()
+        if delay:
+            time.sleep(delay)
+        if self._should_fail():
+            print(f"[MOCK] Injected error after {delay * 1000:.0f}ms")
+            return ProviderResponse(content="Mock injected error", status="error", model="mock")
+
+        # Determine the type of request from the instruction at the start of the
+        # prompt (the document text that follows may mention any of these words)
+        head = prompt[:120].lower()
+        if "summary" in head or "summarize" in head:
             mock_data = {
                 "topic": "Study Material",
                 "summary": "This is a mock summary. The AI service is currently unavailable or at capacity. This is sample content to demonstrate the summary feature."
             }
             print(f"[MOCK] Returning mock SUMMARY")
-        elif "glossary" in prompt.lower() or "terms" in prompt.lower() or "extract" in prompt.lower():
+        elif "glossary" in head or "terms" in head or "extract" in head:
             mock_data = {
                 "topic": "Study Material",
                 "terms": [
@@ -46,8 +140,35 @@ class MockProvider(LLMProvider):
                     }
                 ]
             }
+            # Size the output like a real model would when a count is requested
+            match = re.search(r"Generate an? (\d+)-question", prompt)
+            if match:
+                wanted = int(match.group(1))
+                questions = mock_data["questions"]
+                sentences = _source_sentences(prompt)
+                for i in range(len(questions), wanted):
+                    if i - 2 < len(sentences):
+                        sentence = sentences[i - 2]
+                        question = f"True or false: {sentence}?"
+                        options = ["True", "False", "Partly true", "Not stated"]
+                    else:
+                        question = f"Sample question {i + 1} (AI service at capacity)"
+                        options = ["Option A", "Option B", "Option C", "Option D"]
+                    questions.append({
+                        "id": i + 1,
+                        "question": question,
+                        "options": options,
+                        "answer": f"A. {options[0]}",
+                        "explanation": "This is a mock quiz. The AI service is currently unavailable or at capacity."
+                    })
+                del questions[wanted:]
             print(f"[MOCK] Returning mock QUIZ with {len(mock_data['questions'])} questions")
 
         json_string = json.dumps(mock_data, indent=2)
+        output_tokens = len(json_string) // 4
+        if self.ms_per_output_token > 0:
+            # Real models decode token by token, so long outputs take longer
+            time.sleep(output_tokens * self.ms_per_output_token / 1000.0)
         print(f"[MOCK] Returning {len(json_string)} chars of JSON")
-        return ProviderResponse(content=json_string, status="success")
\ No newline at end of file
+        return ProviderResponse(content=json_string, status="success", model="mock",
+                                input_tokens=len(prompt) // 4, output_tokens=output_tokens)
@@ -0,0 +1,118 @@
+"""
+Shared fixtures.
+
+Every test runs against its own state: the engine's SQLite stores, the
+document store and the cost audit log are pointed at the test's tmp_path
+before anything is built, so a test run never writes to cache/ or logs/.
+"""
+
+import logging
+import sys
+
+import pytest
+
+# Store locations the engine reads from the environment, relative to the test's state directory
+STORE_PATHS = {
+    "COGNIFY_CACHE_PATH": "cache.db",
+    "COGNIFY_BANK_PATH": "question_bank.db",
+    "COGNIFY_ARTIFACTS_PATH": "artifacts.db",
+    "COGNIFY_BUDGET_PATH": "budget_ledger.db",
+    "COGNIFY_DOCUMENT_STORE_PATH": "documents",
+}
+# Process-wide instances, per module (loaded as utils.* or src.utils.*, depending on sys.path)
+SINGLETONS = {
+    "shared_cache": "_shared_cache",
+    "question_bank": "_question_bank",
+    "artifact_store": "_artifact_store",
+    "budget_ledger": "_ledger",
+    "document_store": "_document_store",
+}
+# Stores make_caller builds the engine without; a test passes in the ones it uses
+ENGINE_STORES = ("COGNIFY_CACHE_ENABLED", "COGNIFY_BANK_ENABLED", "COGNIFY_ARTIFACTS_ENABLED",
+                 "COGNIFY_BUDGET_ENABLED")
+
+
+def _reset_singletons():
+    for prefix in ("utils.", "src.utils."):
+        for module_name, attribute in SINGLETONS.items():
+            module = sys.modules.get(prefix + module_name)
+            if module is not None:
+                setattr(module, attribute, None)
+
+
+def _build_caller(monkeypatch, caller_class, providers, attributes):
+    for variable in ENGINE_STORES:
+        monkeypatch.setenv(variable, "0")
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.delenv("COGNIFY_LOCAL_LLM_URL", raising=False)
+    caller = caller_class()
+    caller.providers = list(providers)
+    for name, value in attributes.items():
+        setattr(caller, name, value)
+    return caller
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    """Stores and the cost audit log under tmp_path/state, with fresh singletons."""
+    state = tmp_path / "state"
+    state.mkdir()
+    for name, filename in STORE_PATHS.items():
+        monkeypatch.setenv(name, str(state / filename))
+    # The ledger's flusher thread and cost listener outlive a test: tests that need one build it
+    monkeypatch.setenv("COGNIFY_BUDGET_ENABLED", "0")
+    _reset_singletons()
+
+    # Entries go to the test's log and stop there. A filter rather than a handler swap: a
+    # cost_tracking copy first imported during the test adds its logs/ handler to the logger
+    handler = logging.FileHandler(state / "cost_audit.jsonl")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def to_test_log(record):
+        handler.handle(record)
+        return False
+
+    monkeypatch.setattr(logging.getLogger("cost_tracker"), "filters", [to_test_log])
+    yield state
+    handler.close()
+    _reset_singletons()
+
+
+@pytest.fixture
+def document_store(isolated_state):
+    """The document store the engine resolves document_ids against in this test."""
+    from src.utils.document_store import DocumentStore
+    return DocumentStore(isolated_state / STORE_PATHS["COGNIFY_DOCUMENT_STORE_PATH"])
+
+
+@pytest.fixture
+def make_caller(isolated_state, monkeypatch):
+    """
+    Builds a ProductionFunctionCaller over the given providers. The cache,
+    question bank, artifact store and budget ledger are off unless passed in
+    (e.g. `make_caller(provider, cache=SharedCache(...))`); other keyword
+    arguments override attributes such as `glossary_candidates`.
+    """
+    def make(*providers, **attributes):
+        from src.ai.production_caller import ProductionFunctionCaller
+        return _build_caller(monkeypatch, ProductionFunctionCaller, providers, attributes)
+
+    return make
+
+
+@pytest.fixture
+def api_client(isolated_state, monkeypatch):
+    """
+    TestClient for the app in src/main.py. Its engine is built like
+    make_caller's, from the classes main imported (so the app's except
+    clauses match what it raises), over the extractive and mock providers.
+    """
+    # Read when main is first imported: no trace log from test requests
+    monkeypatch.setenv("COGNIFY_TRACE_SAMPLE_RATE", "0")
+    from fastapi.testclient import TestClient
+    from src import main
+
+    engine_module = sys.modules[main.ProductionFunctionCaller.__module__]
+    providers = (engine_module.ExtractiveProvider(), engine_module.MockProvider())
+    monkeypatch.setattr(main, "_ai_engine", _build_caller(monkeypatch, main.ProductionFunctionCaller, providers, {}))
+    return TestClient(main.app)
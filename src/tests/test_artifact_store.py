@@ -0,0 +1,137 @@
+import json
+import threading
+import time
+
+from src.providers.base_provider import LLMProvider, ProviderResponse
+from src.providers.extractive_provider import ExtractiveProvider
+from src.utils.artifact_store import ArtifactStore
+from src.utils.document_store import document_id_for
+from src.utils.shared_cache import SharedCache, make_cache_key
+
+TEXT = "Mitochondria produce most of the ATP a cell needs. Ribosomes synthesize proteins."
+
+
+class StudyProvider(LLMProvider):
+    """Answers every prompt with a fixed quiz, summary or glossary and counts the calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        self.calls += 1
+        if prompt.startswith("Generate"):
+            data = {"topic": "Cells", "questions": [
+                {"id": 1, "question": "Which organelle produces ATP?", "options": ["Mitochondria", "Ribosome"],
+                 "answer": "A. Mitochondria", "explanation": ""}]}
+        elif prompt.startswith("Summarize"):
+            data = {"topic": "Cells", "summary": "Mitochondria make ATP."}
+        else:
+            data = {"topic": "Cells", "terms": [{"term": "Ribosome", "definition": "Makes proteins."}]}
+        content = json.dumps(data)
+        return ProviderResponse(content=content, status="success", model="gpt-4o-mini",
+                                input_tokens=len(prompt) // 4, output_tokens=len(content) // 4)
+
+
+class TestArtifactStore:
+
+    def test_user_history_pages_newest_first(self, tmp_path):
+        store = ArtifactStore(path=tmp_path / "artifacts.db", background=False)
+        for i in range(5):
+            store.save("ana", "summary", f"Topic {i}", "doc-a", {"summary": str(i)}, "gpt-4o-mini")
+        store.save("ben", "quiz", "Topic 0", "doc-a", {"questions": []})
+
+        first, next_before = store.list_for_user("ana", limit=2)
+        second, _ = store.list_for_user("ana", limit=2, before=next_before)
+        last, end = store.list_for_user("ana", limit=2, before=second[-1]["id"])
+
+        assert [a["topic"] for a in first + second + last] == [f"Topic {i}" for i in range(4, -1, -1)]
+        assert end is None and "data" not in first[0]
+        assert store.get(first[0]["id"], "ana")["data"] == {"summary": "4"}
+        assert store.get(first[0]["id"], "ben") is None and store.get(10_000, "ana") is None
+
+    def test_document_lookup_matches_mode_and_normalized_topic(self, tmp_path):
+        store = ArtifactStore(path=tmp_path / "artifacts.db", background=False)
+        store.save("ana", "summary", "Cell  Biology", "doc-a", {"summary": "a"})
+        store.save("ben", "glossary", "cell biology", "doc-a", {"terms": []})
+        store.save("ben", "summary", "Genetics", "doc-a", {"summary": "b"})
+        store.save("ben", "summary", "cell biology", "doc-b", {"summary": "c"})
+
+        found, _ = store.list_for_document("doc-a", mode="summary", topic="CELL BIOLOGY")
+        assert [(a["user_id"], a["mode"]) for a in found] == [("ana", "summary")]
+        assert len(store.list_for_document("doc-a")[0]) == 3
+
+    def test_background_writer_persists_concurrent_saves(self, tmp_path):
+        store = ArtifactStore(path=tmp_path / "artifacts.db")
+        threads = [threading.Thread(target=lambda u=u: [store.save(f"user-{u}", "quiz", "Cells", "doc", {"n": i})
+                                                        for i in range(20)]) for u in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.flush()
+
+        assert store.stats()["artifacts"] == 80 and store.stats()["dropped"] == 0
+        assert len(store.list_for_user("user-2", limit=100)[0]) == 20
+
+    def test_warm_up_restores_only_missing_recent_entries(self, tmp_path):
+        store = ArtifactStore(path=tmp_path / "artifacts.db", background=False)
+        cache = SharedCache(path=tmp_path / "cache.db")
+        store.save("ana", "summary", "Cells", "doc", {"summary": "old"}, cache_key="k1")
+        store.save("ana", "summary", "Cells", "doc", {"summary": "new"}, cache_key="k1")
+        store.save("ana", "glossary", "Cells", "doc", {"terms": []}, cache_key="k2")
+        store.save("ana", "quiz", "Cells", "doc", {"questions": []})
+        cache.set("k2", "kept")
+
+        assert store.warm(cache) == 1
+        assert json.loads(cache.get("k1")) == {"summary": "new"} and cache.get("k2") == "kept"
+        cache.clear()
+        time.sleep(0.01)
+        assert store.warm(cache, max_age_s=0.001) == 0
+
+
+class TestEngineArtifacts:
+
+    def test_generations_are_saved_and_warm_the_cache_again(self, tmp_path, make_caller):
+        provider = StudyProvider()
+        caller = make_caller(provider, cache=SharedCache(path=tmp_path / "cache.db"),
+                             artifacts=ArtifactStore(path=tmp_path / "artifacts.db"))
+
+        caller.generate_quiz(TEXT, "Cells", "easy", num_questions=1, user_id="ana")
+        summary = caller.generate_summary(TEXT, "Cells", user_id="ana")
+        caller.artifacts.flush()
+        history, _ = caller.artifacts.list_for_user("ana")
+
+        assert [a["mode"] for a in history] == ["summary", "quiz"]
+        assert {a["document_hash"] for a in history} == {document_id_for(TEXT)}
+        assert caller.artifacts.get(history[0]["id"], "ana")["data"] == summary.data
+
+        # A wiped cache is refilled from the store, so the summary is not generated again
+        caller.cache.clear()
+        assert caller.artifacts.warm(caller.cache) == 1
+        calls = provider.calls
+        assert caller.generate_summary(TEXT, "Cells", user_id="ana").cached
+        assert provider.calls == calls
+        assert caller.cache.get(make_cache_key("summary", caller._summary_prompt(TEXT, "Cells"))) is not None
+
+    def test_artifacts_are_only_served_to_their_owner(self, api_client, monkeypatch):
+        from src import main
+
+        monkeypatch.setenv("COGNIFY_ARTIFACTS_ENABLED", "1")
+        store = main.get_artifact_store()
+        store.save("ana", "summary", "Cells", "doc-a", {"summary": "Mitochondria make ATP."})
+        store.flush()
+        (artifact,), _ = store.list_for_user("ana")
+        url = f"/api/artifacts/{artifact['id']}"
+
+        assert api_client.get(url, params={"user_id": "ana"}).json()["data"] == {"summary": "Mitochondria make ATP."}
+        assert api_client.get(url, params={"user_id": "ben"}).status_code == 404
+        assert api_client.get(url).status_code == 422
+
+    def test_fallback_output_is_not_saved(self, tmp_path, make_caller):
+        caller = make_caller(ExtractiveProvider(), cache=SharedCache(path=tmp_path / "cache.db"),
+                             artifacts=ArtifactStore(path=tmp_path / "artifacts.db"))
+        lecture = " ".join(f"Osmosis moves water across membrane number {i}. The cell uses ATP." for i in range(8))
+
+        assert caller.generate_summary(lecture, "Cells", user_id="ana").model == "extractive"
+        caller.artifacts.flush()
+        assert caller.artifacts.list_for_user("ana") == ([], None)
@@ -0,0 +1,98 @@
+import pytest
+
+from src.providers.base_provider import LLMProvider, ProviderResponse
+from src.utils.budget_ledger import BudgetLedger, BudgetExceededError
+
+
+class PaidProvider(LLMProvider):
+    calls = 0
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        PaidProvider.calls += 1
+        return ProviderResponse(content='{"summary": "paid"}', status="success", model="paid")
+
+
+class TestBudgetLedger:
+
+    def test_records_and_detects_over_budget(self, tmp_path):
+        ledger = BudgetLedger(path=tmp_path / "ledger.db", default_limit_usd=0.05, autoflush=False)
+        ledger.record("alice", 0.03)
+        assert not ledger.is_over_budget("alice")
+
+        ledger.on_cost_entry({"user_id": "alice", "cost_usd": 0.03})
+        assert ledger.is_over_budget("alice")
+        assert not ledger.is_over_budget("bob")
+
+    def test_anonymous_is_limited_unless_opted_out(self, tmp_path):
+        ledger = BudgetLedger(path=tmp_path / "ledger.db", default_limit_usd=0.01, autoflush=False)
+        ledger.record(None, 0.02)
+        assert ledger.is_over_budget(None)
+        assert ledger.is_over_budget("anonymous")
+
+        unlimited = BudgetLedger(path=tmp_path / "other.db", default_limit_usd=0.01,
+                                 limits={"anonymous": None}, autoflush=False)
+        unlimited.record(None, 5.0)
+        assert not unlimited.is_over_budget(None)
+
+    def test_reject_policy_raises(self, tmp_path):
+        ledger = BudgetLedger(path=tmp_path / "ledger.db", default_limit_usd=0.01,
+                              policy="reject", autoflush=False)
+        ledger.record("alice", 0.02)
+
+        with pytest.raises(BudgetExceededError):
+            ledger.check("alice")
+
+    def test_flush_merges_spend_across_workers(self, tmp_path):
+        path = tmp_path / "ledger.db"
+        worker_a = BudgetLedger(path=path, autoflush=False)
+        worker_b = BudgetLedger(path=path, autoflush=False)
+
+        worker_a.record("alice", 0.25)
+        worker_b.record("alice", 0.50)
+        worker_a.flush()
+        worker_b.flush()
+        worker_a.flush()
+
+        assert worker_a.spent("alice") == pytest.approx(0.75)
+        assert worker_b.spent("alice") == pytest.approx(0.75)
+
+    def test_user_id_is_recorded_however_it_is_passed(self, monkeypatch):
+        from src.utils import cost_tracking
+
+        class Result:
+            model = "gpt-4o"
+            usage = None
+
+        entries = []
+        monkeypatch.setattr(cost_tracking, "_cost_listeners", [entries.append])
+
+        @cost_tracking.track_cost(query_type="generate_summary")
+        def generate(text, topic, user_id=None, **options):
+            return Result()
+
+        @cost_tracking.track_cost(query_type="generate_glossary")
+        def generate_with_options(text, **options):
+            return Result()
+
+        generate("Cells.", "Biology", "ana")
+        generate("Cells.", "Biology", user_id="ben")
+        generate("Cells.", "Biology")
+        generate_with_options("Cells.", user_id="cy")
+        assert [e["user_id"] for e in entries] == ["ana", "ben", None, "cy"]
+
+    def test_caller_downgrades_to_free_provider(self, tmp_path, make_caller):
+        from src.providers.mock_provider import MockProvider
+
+        caller = make_caller(PaidProvider(), MockProvider(),
+                             ledger=BudgetLedger(path=tmp_path / "ledger.db", default_limit_usd=0.01,
+                                                 autoflush=False))
+        caller.ledger.record("alice", 0.02)
+
+        PaidProvider.calls = 0
+        result = caller._generate("Summarize this text", "summary", user_id="alice")
+
+        assert PaidProvider.calls == 0
+        assert result.downgraded is True
+
+        caller._generate("Summarize this text", "summary", user_id="bob")
+        assert PaidProvider.calls == 1
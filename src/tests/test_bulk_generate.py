@@ -0,0 +1,109 @@
+import argparse
+import json
+
+import fitz
+
+from src.providers.base_provider import LLMProvider, ProviderResponse
+
+LECTURE = ("Mitochondria are organelles that produce most of the ATP a cell needs. "
+           "Ribosomes are small structures that synthesize proteins. ") * 4
+
+
+class PackProvider(LLMProvider):
+    """Answers quiz, summary and glossary prompts and counts the calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        self.calls += 1
+        data = {"topic": "Cells", "summary": "Mitochondria make ATP.",
+                "terms": [{"term": "Ribosome", "definition": "Makes proteins."}],
+                "questions": [{"id": 1, "question": "Which organelle produces ATP?",
+                               "options": ["Mitochondria", "Ribosome"], "answer": "A. Mitochondria",
+                               "explanation": ""}]}
+        content = json.dumps(data)
+        return ProviderResponse(content=content, status="success", model="gpt-4o-mini",
+                                input_tokens=len(prompt) // 4, output_tokens=len(content) // 4)
+
+
+def _pdf(path, pages=2):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    doc = fitz.open()
+    for number in range(pages):
+        doc.new_page().insert_textbox(fitz.Rect(50, 50, 550, 800), f"Part {number}\n{LECTURE}", fontsize=11)
+    doc.save(str(path))
+    doc.close()
+
+
+def _args(tmp_path, **overrides):
+    args = dict(input_dir=tmp_path / "courses", out=tmp_path / "packs", modes=["quiz", "summary", "glossary"],
+                topic=None, difficulty="easy", num_questions=1, user_id="bulk", budget_usd=None, extract_workers=2,
+                concurrency=2, allow_fallback=False, no_cleanup=False, restart=False)
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+def _tool(make_caller, provider):
+    """(bulk_generate module, engine); both use the test's document store, without a cache."""
+    engine = make_caller(provider)
+    # Imported here: the tool puts src/ on sys.path, like the engine does
+    from src.tools import bulk_generate
+    return bulk_generate, engine
+
+
+class TestBulkGenerate:
+
+    def test_packs_are_written_and_a_rerun_skips_finished_documents(self, tmp_path, make_caller):
+        _pdf(tmp_path / "courses" / "cell_biology.pdf")
+        _pdf(tmp_path / "courses" / "term2" / "genetics.pdf", pages=3)
+        provider = PackProvider()
+        bulk_generate, engine = _tool(make_caller, provider)
+
+        report = bulk_generate.run(_args(tmp_path), engine)
+        pack = json.loads((tmp_path / "packs" / "term2" / "genetics.json").read_text())
+
+        assert report["completed"] == 2 and report["failed"] == 0 and report["docs_per_minute"] > 0
+        assert pack["topic"] == "genetics" and pack["page_count"] == 3 and pack["errors"] == {}
+        assert {"quiz", "summary", "glossary"} <= set(pack)
+        calls = provider.calls
+
+        _pdf(tmp_path / "courses" / "cell_biology.pdf", pages=4)  # edited since the last run
+        report = bulk_generate.run(_args(tmp_path), engine)
+
+        assert report["skipped"] == 1 and report["completed"] == 1
+        assert provider.calls == calls + 3
+
+    def test_fallback_output_leaves_the_document_for_a_rerun(self, tmp_path, make_caller):
+        from src.providers.extractive_provider import ExtractiveProvider
+
+        _pdf(tmp_path / "courses" / "cells.pdf")
+        bulk_generate, engine = _tool(make_caller, ExtractiveProvider())
+
+        report = bulk_generate.run(_args(tmp_path, modes=["summary"]), engine)
+        records = [json.loads(line) for line in (tmp_path / "packs" / "checkpoint.jsonl").read_text().splitlines()]
+
+        assert report["failed"] == 1 and records[0]["failed"] == ["summary"]
+        assert bulk_generate.run(_args(tmp_path, modes=["summary"], allow_fallback=True), engine)["completed"] == 1
+        assert bulk_generate.run(_args(tmp_path, modes=["summary"]), engine)["skipped"] == 1
+
+    def test_run_user_is_only_limited_by_budget_usd(self, tmp_path, make_caller):
+        from src.providers.extractive_provider import ExtractiveProvider
+        from src.utils.budget_ledger import BudgetLedger
+
+        _pdf(tmp_path / "courses" / "cells.pdf")
+        provider = PackProvider()
+        ledger = BudgetLedger(path=tmp_path / "ledger.db", default_limit_usd=0.01, autoflush=False)
+        ledger.record("bulk", 5.0)
+        bulk_generate, engine = _tool(make_caller, provider)
+        engine.providers.append(ExtractiveProvider())
+        engine.ledger = ledger
+
+        report = bulk_generate.run(_args(tmp_path, modes=["summary"], budget_usd=1.0), engine)
+        record = json.loads((tmp_path / "packs" / "checkpoint.jsonl").read_text().splitlines()[0])
+
+        assert report["failed"] == 1 and report["over_budget"] == 1 and provider.calls == 0
+        assert record["over_budget"] is True
+
+        report = bulk_generate.run(_args(tmp_path, modes=["summary"]), engine)
+        assert report["completed"] == 1 and report["over_budget"] == 0 and provider.calls == 1
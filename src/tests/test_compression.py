@@ -0,0 +1,74 @@
+import gzip
+import zlib
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.utils.compression import CompressionMiddleware, RequestDecompressionMiddleware, choose_encoding
+
+
+def _app(max_bytes=1_000_000):
+    app = FastAPI()
+
+    @app.get("/text")
+    def text(size: int):
+        return {"text": "photosynthesis " * size}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f'{{"line": {i}}}\n' for i in range(200)), media_type="application/x-ndjson")
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        body = await request.body()
+        return {"bytes": len(body), "encoding": request.headers.get("content-encoding")}
+
+    app.add_middleware(RequestDecompressionMiddleware, max_bytes=max_bytes)
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def _raw(response):
+    return b"".join(response.iter_raw())
+
+
+class TestCompression:
+
+    def test_choose_encoding_respects_q_values(self):
+        assert choose_encoding("gzip, deflate") == "gzip"
+        assert choose_encoding("gzip;q=0") is None
+        assert choose_encoding("identity") is None
+        assert choose_encoding("*") in ("br", "gzip")
+
+    def test_large_responses_are_compressed_small_ones_are_not(self):
+        client = _app()
+        with client.stream("GET", "/text?size=1000", headers={"Accept-Encoding": "gzip"}) as large:
+            raw = _raw(large)
+            assert large.headers["content-encoding"] == "gzip"
+            assert len(raw) < 1000 and b"photosynthesis" in gzip.decompress(raw)
+
+        small = client.get("/text?size=2", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in small.headers
+
+    def test_streamed_responses_compress_chunk_by_chunk(self):
+        with _app().stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+            raw = _raw(response)
+            assert response.headers["content-encoding"] == "gzip"
+        lines = zlib.decompress(raw, 31).decode().splitlines()
+        assert len(lines) == 200
+
+    def test_gzip_request_bodies_are_inflated(self):
+        payload = b'{"context_text": "' + b"a" * 50_000 + b'"}'
+        response = _app().post("/echo", content=gzip.compress(payload),
+                               headers={"Content-Encoding": "gzip", "Content-Type": "application/json"})
+
+        assert response.json() == {"bytes": len(payload), "encoding": None}
+
+    def test_request_inflation_is_capped(self):
+        client = _app(max_bytes=10_000)
+        too_big = client.post("/echo", content=gzip.compress(b"a" * 20_000), headers={"Content-Encoding": "gzip"})
+        corrupt = client.post("/echo", content=b"not gzip", headers={"Content-Encoding": "gzip"})
+
+        assert too_big.status_code == 413
+        assert corrupt.status_code == 400
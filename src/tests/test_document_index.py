@@ -0,0 +1,161 @@
+import json
+
+import fitz
+import pytest
+
+from src.utils.document_index import (DocumentIndex, PageChunker, chunk_pdf_pages, chunk_text,
+                                      context_for_topic, document_sections, group_chunks, index_document,
+                                      load_document_index, split_text)
+from src.utils.document_store import DocumentNotFoundError, DocumentStore
+from src.utils.pdf_extraction import extract_pdf_pages, iter_pdf_pages
+
+SECTIONS = {
+    "Photosynthesis": "Chlorophyll absorbs light in the chloroplast. Light reactions split water "
+                      "and the Calvin cycle fixes carbon dioxide into glucose.",
+    "Cell Respiration": "Mitochondria oxidize glucose through glycolysis and the Krebs cycle, "
+                        "producing ATP with oxygen as the final electron acceptor.",
+    "Genetics": "Mendel crossed pea plants and found dominant and recessive alleles that "
+                "segregate independently during meiosis.",
+}
+
+
+def _lecture_pdf(sections=SECTIONS):
+    doc = fitz.open()
+    for heading, body in sections.items():
+        page = doc.new_page()
+        page.insert_text((72, 72), heading, fontsize=20)
+        page.insert_textbox(fitz.Rect(72, 100, 520, 400), body, fontsize=11)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class DictCache(dict):
+    def set(self, key, value):
+        self[key] = value
+
+
+class TestDocumentIndex:
+
+    def test_revised_pdf_only_reextracts_changed_pages(self):
+        cache = DictCache()
+        first = extract_pdf_pages(_lecture_pdf(), page_cache=cache)
+        revised = {**SECTIONS, "Genetics": "Morgan mapped genes on fruit fly chromosomes."}
+        second = [page for _, page in iter_pdf_pages(_lecture_pdf(revised), page_cache=cache)]
+
+        assert [p["reused"] for p in first] == [False, False, False]
+        assert [p["reused"] for p in second] == [True, True, False]
+        assert [p["hash"] for p in second[:2]] == [p["hash"] for p in first[:2]]
+        assert second[0]["text"] == first[0]["text"] and "Morgan" in second[2]["text"]
+
+    def test_pages_drawn_through_form_xobjects_are_told_apart(self):
+        def imposed(text):
+            # show_pdf_page wraps the source page in a form XObject, as pdfpages does
+            source = fitz.open()
+            source.new_page().insert_text((72, 72), text, fontsize=11)
+            doc = fitz.open()
+            doc.new_page().show_pdf_page(fitz.Rect(0, 0, 595, 842), source, 0)
+            data = doc.tobytes()
+            doc.close()
+            return data
+
+        cache = DictCache()
+        first = extract_pdf_pages(imposed("Photosynthesis converts light."), page_cache=cache)
+        second = extract_pdf_pages(imposed("Meiosis halves the chromosomes."), page_cache=cache)
+        again = extract_pdf_pages(imposed("Meiosis halves the chromosomes."), page_cache=cache)
+
+        assert first[0]["hash"] != second[0]["hash"] and not second[0]["reused"]
+        assert "Meiosis" in second[0]["text"] and "Photosynthesis" not in second[0]["text"]
+        assert again[0]["reused"] and again[0]["hash"] == second[0]["hash"]
+
+    def test_sections_outside_an_edit_keep_their_text(self, tmp_path):
+        paragraphs = [f"Paragraph {i} about topic {i} " + "with supporting detail. " * 60 for i in range(12)]
+        edited = list(paragraphs)
+        edited[5] = "A rewritten paragraph five. " * 30
+        before = [[c["text"] for c in group] for group in group_chunks(chunk_text("\n\n".join(paragraphs)))]
+        after = [[c["text"] for c in group] for group in group_chunks(chunk_text("\n\n".join(edited)))]
+
+        assert len(before) > 3
+        assert sum(group not in before for group in after) <= 2
+
+        store = DocumentStore(tmp_path)
+        document_id = store.put("\n\n".join(paragraphs))
+        sections = document_sections(store, document_id, "topic", min_chars=1000, whole_chars=100_000)
+        assert len(sections) == len(before) and "Paragraph 0" in sections[0]
+        assert document_sections(store, document_id, "topic", min_chars=10**6, whole_chars=10**6) == []
+
+    def test_pdf_chunks_follow_headings_and_pages(self):
+        chunks = chunk_pdf_pages(extract_pdf_pages(_lecture_pdf()))
+
+        assert [c["heading"] for c in chunks] == list(SECTIONS)
+        assert [c["pages"] for c in chunks] == [[1, 1], [2, 2], [3, 3]]
+
+    def test_streamed_pages_chunk_like_whole_document(self):
+        chunker = PageChunker()
+        for page_number, page in iter_pdf_pages(_lecture_pdf()):
+            chunker.add_page(page_number, page["blocks"])
+
+        assert chunker.finish() == chunk_pdf_pages(extract_pdf_pages(_lecture_pdf()))
+
+    def test_text_chunks_respect_max_chars(self):
+        text = "\n\n".join(f"Paragraph {i}. " + "word " * 60 for i in range(20))
+        chunks = chunk_text(text, max_chars=1000)
+
+        assert len(chunks) > 1
+        assert all(len(c["text"]) <= 1000 for c in chunks)
+        assert [c["id"] for c in chunks] == list(range(len(chunks)))
+
+    def test_split_text_balances_contiguous_parts(self):
+        text = "\n\n".join(f"Paragraph {i}." + " word" * 50 for i in range(9))
+        parts = split_text(text, 3)
+
+        assert len(parts) == 3
+        assert "\n\n".join(parts) == text
+        assert split_text("One sentence here. Another one there.", 2) == [
+            "One sentence here.", "Another one there."]
+
+    def test_search_ranks_matching_section_first(self):
+        index = DocumentIndex.build(chunk_pdf_pages(extract_pdf_pages(_lecture_pdf())))
+
+        (best, _), *_ = index.search("krebs cycle mitochondria", k=2)
+        assert best["heading"] == "Cell Respiration"
+        assert index.search("quantum chromodynamics") == []
+
+    def test_index_round_trips_through_store(self, tmp_path):
+        store = DocumentStore(tmp_path)
+        pages = extract_pdf_pages(_lecture_pdf())
+        document_id = store.put("\n\n".join(p["text"] for p in pages))
+        built = index_document(store, document_id, pages)
+
+        loaded = DocumentIndex.from_dict(built.to_dict())
+        assert loaded.search("meiosis alleles")[0][0]["heading"] == "Genetics"
+        assert load_document_index(store, document_id) is built
+        assert store.get_metadata(document_id)["chunks"] == 3
+
+    def test_context_for_topic_selects_chunks_for_long_documents(self, tmp_path):
+        store = DocumentStore(tmp_path)
+        pages = extract_pdf_pages(_lecture_pdf())
+        document_id = store.put("\n\n".join(p["text"] for p in pages))
+        index_document(store, document_id, pages)
+
+        whole = context_for_topic(store, document_id, "Genetics", min_chars=100_000)
+        focused = context_for_topic(store, document_id, "Genetics", min_chars=0, k=1)
+
+        assert "Chlorophyll" in whole and "Mendel" in whole
+        assert focused.startswith("[Genetics | p. 3]") and "Chlorophyll" not in focused
+        with pytest.raises(DocumentNotFoundError):
+            context_for_topic(store, "doc_" + "0" * 32, "Genetics", min_chars=0)
+
+    def test_streamed_upload_sends_page_text_only_on_request(self, api_client):
+        def upload(query=""):
+            response = api_client.post(f"/api/upload-pdf/stream{query}",
+                                       files={"file": ("lecture.pdf", _lecture_pdf(), "application/pdf")})
+            return [json.loads(line) for line in response.text.splitlines()]
+
+        records = upload()
+        pages = [r for r in records if r["type"] == "page"]
+        assert [r["page"] for r in pages] == [1, 2, 3] and all("text" not in r for r in pages)
+        assert records[-1]["type"] == "done" and records[-1]["page_count"] == 3
+
+        pages = [r for r in upload("?include_text=true") if r["type"] == "page"]
+        assert "Mendel" in pages[2]["text"] and pages[2]["chars"] == len(pages[2]["text"])
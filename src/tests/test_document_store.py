@@ -0,0 +1,40 @@
+import pytest
+
+from src.utils.document_store import DocumentStore, document_id_for
+
+
+class TestDocumentStore:
+
+    def test_put_is_content_addressed(self, tmp_path):
+        store = DocumentStore(tmp_path)
+        first = store.put("The French Revolution began in 1789.", {"filename": "a.pdf"})
+        second = store.put("The French Revolution began in 1789.", {"filename": "b.pdf"})
+
+        assert first == second == document_id_for("The French Revolution began in 1789.")
+        assert store.get_text(first) == "The French Revolution began in 1789."
+        assert store.get_metadata(first)["filename"] == "b.pdf"
+
+    def test_unknown_document_returns_none(self, tmp_path):
+        store = DocumentStore(tmp_path)
+
+        assert store.get_text("doc_" + "0" * 32) is None
+        assert not store.exists("doc_" + "0" * 32)
+
+    def test_rejects_malformed_ids(self, tmp_path):
+        store = DocumentStore(tmp_path)
+
+        assert not store.exists("../../etc/passwd")
+        with pytest.raises(ValueError):
+            store.path_for("../../etc/passwd", "text.txt")
+
+    def test_streamed_writer_matches_put(self, tmp_path):
+        store = DocumentStore(tmp_path)
+        writer = store.open_writer()
+        for piece in ("Page one text.", "\n\n", "Page two text."):
+            writer.write(piece)
+        document_id = writer.commit({"page_count": 2})
+
+        assert document_id == document_id_for("Page one text.\n\nPage two text.")
+        assert store.get_text(document_id) == "Page one text.\n\nPage two text."
+        assert store.get_metadata(document_id)["chars"] == len("Page one text.\n\nPage two text.")
+        assert not any((tmp_path / ".incoming").iterdir())
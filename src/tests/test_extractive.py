@@ -0,0 +1,114 @@
+import json
+import threading
+
+from src.providers.base_provider import LLMProvider, ProviderResponse
+from src.providers.extractive_provider import ExtractiveProvider
+from src.providers.mock_provider import MockProvider
+from src.utils.extractive import BLANK, cloze_questions, glossary, key_terms, summarize
+from src.utils.question_dedup import is_valid_question
+
+LECTURE = """[Cell Biology | p. 1]
+The cell is the basic unit of life. Every living organism is made of one or more cells.
+The cell membrane is a thin layer that controls what enters and leaves the cell. The cell membrane is made of a phospholipid bilayer.
+
+Mitochondria are organelles that produce most of the ATP a cell needs. ATP is the energy currency of the cell.
+The nucleus is the organelle that stores genetic material. Genetic material in the nucleus is organized into chromosomes.
+Ribosomes are small structures that synthesize proteins. Proteins made by ribosomes are packaged by the Golgi apparatus.
+In plants, chloroplasts capture light energy through photosynthesis. Water moves into root cells by a process called osmosis.
+The cytoplasm is a gel that fills the cell and holds the organelles in place."""
+
+
+class DownProvider(LLMProvider):
+    def generate(self, prompt: str) -> ProviderResponse:
+        return ProviderResponse(content="", status="error", model="gpt-4o-mini")
+
+
+class BlockingProvider(LLMProvider):
+    """Holds every call until released, so requests pile up in flight."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        self.started.set()
+        self.release.wait(5)
+        content = json.dumps({"topic": "Cells", "summary": "Model summary."})
+        return ProviderResponse(content=content, status="success", model="gpt-4o-mini",
+                                input_tokens=100, output_tokens=10)
+
+
+class TestExtractiveEngine:
+
+    def test_summary_keeps_central_sentences_in_document_order(self):
+        summary = summarize(LECTURE, max_sentences=3).splitlines()
+        sentences = [line[2:] for line in summary]
+
+        assert len(summary) == 3 and all(line.startswith("- ") for line in summary)
+        assert sorted(sentences, key=LECTURE.index) == sentences
+        assert not any("Cell Biology" in sentence for sentence in sentences)
+
+    def test_glossary_terms_use_their_defining_sentence(self):
+        terms = {t["term"].lower(): t["definition"] for t in glossary(LECTURE, limit=12)}
+
+        assert terms["mitochondria"].startswith("Mitochondria are organelles")
+        assert terms["cell membrane"].startswith("The cell membrane is a thin layer")
+        assert terms["osmosis"] == "Water moves into root cells by a process called osmosis."
+        assert "every living organism" not in terms and "made" not in terms
+        assert key_terms(LECTURE, limit=3) == key_terms(LECTURE, limit=3)
+
+    def test_cloze_questions_blank_a_term_that_is_the_answer(self):
+        questions = cloze_questions(LECTURE, 4)
+        again = cloze_questions(LECTURE, 4, exclude=[questions[0]["question"]])
+
+        assert len(questions) == 4 and all(is_valid_question(q) for q in questions)
+        for q in questions:
+            letter, answer = q["answer"].split(". ", 1)
+            assert q["options"]["ABCD".index(letter)] == answer and len(set(q["options"])) == len(q["options"])
+            sentence = q["explanation"].removeprefix("From the text: ")
+            blanked = q["question"].removeprefix("Fill in the blank: ")
+            head, tail = blanked.split(BLANK)
+            assert sentence.startswith(head) and sentence.endswith(tail)
+            assert sentence[len(head):len(sentence) - len(tail)].lower().startswith(answer.lower())
+        assert questions[0]["question"] not in {q["question"] for q in again}
+        assert cloze_questions(LECTURE, 4) == questions
+
+
+class TestDegradedMode:
+
+    def test_provider_chain_falls_back_to_the_extractive_engine(self, make_caller):
+        caller = make_caller(DownProvider(), ExtractiveProvider(), MockProvider())
+
+        summary = caller.generate_summary(LECTURE, "Cells")
+        quiz = caller.generate_quiz(LECTURE, "Cells", "easy", num_questions=3)
+        terms = caller.generate_glossary(LECTURE, "Cells")
+
+        assert summary.model == "extractive" and not summary.cacheable
+        assert "ATP is the energy currency of the cell." in summary.data["summary"]
+        assert quiz.model == "extractive" and len(quiz.data["questions"]) == 3
+        assert all(q["question"].startswith("Fill in the blank") for q in quiz.data["questions"])
+        assert terms.data["terms"] and terms.data["topic"] == "Cells"
+
+    def test_unparseable_prompts_fall_through_to_the_mock(self, make_caller):
+        response = ExtractiveProvider().generate("Tell me a joke")
+        assert response.status == "error"
+        caller = make_caller(ExtractiveProvider(), MockProvider())
+        assert caller.generate_summary("Too short.", "Cells").model == "mock"
+
+    def test_requests_over_the_inflight_limit_are_shed(self, make_caller):
+        blocking = BlockingProvider()
+        caller = make_caller(blocking, ExtractiveProvider(), MockProvider())
+        caller.shed_max_inflight = 1
+        results = {}
+
+        first = threading.Thread(target=lambda: results.setdefault(
+            "first", caller.generate_summary("Mitochondria produce ATP.", "Cells")))
+        first.start()
+        assert blocking.started.wait(5)
+        shed = caller.generate_summary(LECTURE, "Cells")
+        blocking.release.set()
+        first.join(5)
+
+        assert shed.shed and shed.model == "extractive"
+        assert results["first"].model == "gpt-4o-mini" and not results["first"].shed
+        assert caller._inflight == 0
@@ -0,0 +1,109 @@
+import json
+
+from src.providers.base_provider import LLMProvider, ProviderResponse
+from src.providers.extractive_provider import ExtractiveProvider
+from src.utils.document_index import TERMS_FILE, document_terms, index_document
+from src.utils.document_store import DocumentStore
+from src.utils.extractive import candidate_terms, chunk_candidate_terms
+from src.utils.text_utils import estimate_tokens
+
+CORE = """The cell is the basic unit of life. The cell membrane is a thin layer that controls what enters the cell.
+Mitochondria are organelles that produce most of the ATP a cell needs. The mitochondria of muscle cells are numerous.
+The Golgi apparatus packages proteins for export. Proteins leave the Golgi apparatus in small vesicles.
+Ribosomes are small structures that synthesize proteins. Free ribosomes float in the cytoplasm.
+Water moves into root cells by a process called osmosis. Osmosis depends on the concentration of solutes."""
+# Narrative sentences: long, but with nothing worth defining
+FILLER = " ".join(f"On day {i} the group wrote up page {i} of its notebook before lunch at {i % 12 + 1} o'clock."
+                  for i in range(60))
+LECTURE = CORE + "\n\n" + FILLER
+
+
+class GlossaryRecorder(LLMProvider):
+    """Records glossary prompts and defines every candidate it is given."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        self.prompts.append(prompt)
+        content = json.dumps({"topic": "Cells", "terms": [{"term": "Cell", "definition": "Unit of life."}]})
+        return ProviderResponse(content=content, status="success", model="gpt-4o-mini",
+                                input_tokens=estimate_tokens(prompt), output_tokens=20)
+
+
+class TestCandidateTerms:
+
+    def test_defined_and_capitalized_terms_rank_high_with_their_excerpts(self):
+        candidates = {c["term"].lower(): c for c in candidate_terms(CORE, limit=8)}
+
+        assert {"mitochondria", "golgi apparatus", "osmosis", "ribosomes"} <= set(candidates)
+        assert candidates["mitochondria"]["excerpts"][0].startswith("Mitochondria are organelles")
+        assert candidates["osmosis"]["excerpts"] == [
+            "Water moves into root cells by a process called osmosis.",
+            "Osmosis depends on the concentration of solutes."]
+        assert all(len(c["excerpts"]) <= 2 for c in candidates.values())
+
+    def test_chunks_are_read_one_at_a_time_with_the_same_result(self):
+        # A repeated sentence in a later chunk is counted once, as in the joined text
+        chunks = CORE.split("\n") + ["Osmosis depends on the concentration of solutes.", FILLER]
+
+        assert chunk_candidate_terms(iter(chunks)) == candidate_terms("\n\n".join(chunks))
+
+    def test_candidates_are_stored_at_ingestion(self, tmp_path):
+        store = DocumentStore(tmp_path / "docs")
+        indexed = store.put(LECTURE)
+        index_document(store, indexed)
+        legacy = store.put(CORE)
+
+        assert store.path_for(indexed, TERMS_FILE).exists()
+        assert store.get_metadata(indexed)["candidate_terms"] == len(document_terms(store, indexed))
+        # Documents stored before candidates existed get them on first use
+        assert not store.path_for(legacy, TERMS_FILE).exists()
+        assert document_terms(store, legacy) and store.path_for(legacy, TERMS_FILE).exists()
+
+
+class TestCandidateGlossary:
+
+    def test_glossary_prompt_sends_candidates_instead_of_the_text(self, make_caller, document_store):
+        provider = GlossaryRecorder()
+        caller = make_caller(provider)
+        document_id = document_store.put(LECTURE)
+        index_document(document_store, document_id)
+
+        result = caller.generate_glossary(None, "Cells", document_id=document_id)
+        full_prompt = caller._glossary_prompt(LECTURE, "Cells")
+
+        prompt = provider.prompts[0]
+        assert prompt.startswith("Define the key terms of a text about Cells.")
+        assert "- Golgi apparatus [" in prompt and "[1] " in prompt
+        assert "notebook before lunch at 5 o'clock" not in prompt
+        assert result.candidates["terms"] >= 5
+        assert result.usage.prompt_tokens < estimate_tokens(full_prompt) / 2
+
+    def test_short_texts_and_explicit_sections_skip_candidates(self, make_caller):
+        provider = GlossaryRecorder()
+        caller = make_caller(provider)
+
+        caller.generate_glossary(CORE, "Cells")
+        caller.generate_glossary(LECTURE, "Cells", parallel=True)
+
+        assert provider.prompts[0].startswith("Extract 5-10 key terms")
+        assert all(p.startswith("Extract 5-10 key terms") for p in provider.prompts[1:])
+        assert len(provider.prompts) > 2
+
+    def test_extractive_provider_defines_candidates_from_their_excerpts(self, make_caller):
+        caller = make_caller(ExtractiveProvider())
+
+        result = caller.generate_glossary(LECTURE, "Cells")
+        terms = {t["term"].lower(): t["definition"] for t in result.data["terms"]}
+
+        assert result.model == "extractive" and result.candidates is not None
+        assert terms["mitochondria"].startswith("Mitochondria are organelles")
+        assert len(terms) <= caller.glossary_max_terms
+
+    def test_unknown_and_malformed_document_ids_are_not_found(self, api_client, document_store):
+        document_store.put(LECTURE)
+
+        for document_id in ("doc_" + "0" * 32, "../../etc/passwd"):
+            response = api_client.post("/api/generate-glossary", json={"document_id": document_id, "topic": "Cells"})
+            assert response.status_code == 404 and "Unknown document_id" in response.json()["detail"]
@@ -0,0 +1,93 @@
+import json
+import re
+import threading
+import time
+
+from src.providers.base_provider import LLMProvider, ProviderResponse
+from src.utils.glossary_index import TermIndex, normalize_term
+
+PARAGRAPHS = [f"Lecture point {i} covers organelle {i}. " + f"Detail {i} is explained further. " * 28
+              for i in range(12)]
+
+
+class ConcurrentGlossaryProvider(LLMProvider):
+    """Returns one term per lecture point plus shared terms, tracking how many calls overlap."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        points = re.findall(r"Lecture point (\d+)", prompt)
+        terms = [{"term": f"Organelle {p}", "definition": f"Point {p}."} for p in points]
+        terms += [{"term": "cells", "definition": "Unit."},
+                  {"term": "The Cell", "definition": "The basic unit of life " * len(points)}]
+        content = json.dumps({"topic": "Cells", "terms": terms})
+        return ProviderResponse(content=content, status="success", model="gpt-4o-mini",
+                                input_tokens=len(prompt) // 4, output_tokens=len(content) // 4)
+
+
+class TestTermIndex:
+
+    def test_case_plural_and_whitespace_variants_share_a_key(self):
+        assert normalize_term("Cell  Membranes") == normalize_term("the cell membrane") == "cell membrane"
+        assert normalize_term("Cell membrane (plasma membrane)") == "cell membrane"
+        assert normalize_term("Golgi bodies") == "golgi body"
+        assert normalize_term("Osmosis") == "osmosis" and normalize_term("Virus") == "virus"
+        assert normalize_term("ATP") == "atp" and normalize_term("  ") == ""
+
+    def test_longest_definition_wins_and_widespread_terms_rank_first(self):
+        index = TermIndex()
+        index.extend([{"term": "Ribosome", "definition": "Makes proteins."},
+                      {"term": "Cell", "definition": "Unit."}], section=0)
+        index.extend([{"term": "cells", "definition": "The smallest unit of life."},
+                      {"term": "Nucleus", "definition": "Holds DNA."},
+                      {"term": "", "definition": "Nameless."}], section=1)
+        index.extend([{"term": "Cell", "definition": "Unit of life."}], section=2)
+
+        ranked = index.ranked()
+
+        assert len(index) == 3
+        assert ranked[0] == {"term": "Cell", "definition": "The smallest unit of life."}
+        assert [t["term"] for t in ranked[1:]] == ["Ribosome", "Nucleus"]
+        assert len(index.ranked(limit=2)) == 2
+
+
+class TestChunkedGlossary:
+
+    def test_long_inline_text_is_extracted_per_section_concurrently(self, monkeypatch, make_caller):
+        monkeypatch.setenv("COGNIFY_GLOSSARY_MAX_TERMS", "50")
+        provider = ConcurrentGlossaryProvider()
+        caller = make_caller(provider, glossary_candidates=0)
+
+        result = caller.generate_glossary("\n\n".join(PARAGRAPHS), "Cells")
+        terms = result.data["terms"]
+
+        sections = result.incremental["sections"]
+        assert sections > 2 and provider.calls == sections and provider.peak > 1
+        assert sum(normalize_term(t["term"]) == "cell" for t in terms) == 1
+        # Found in every section, so ranked first, with the longest definition given
+        assert normalize_term(terms[0]["term"]) == "cell"
+        assert terms[0]["definition"].startswith("The basic unit of life") and len(terms[0]["definition"]) > 50
+        assert {f"Organelle {i}" for i in range(12)} <= {t["term"] for t in terms}
+
+    def test_parallel_flag_overrides_the_length_threshold(self, make_caller):
+        provider = ConcurrentGlossaryProvider(delay=0)
+        caller = make_caller(provider, glossary_candidates=0)
+        text = "\n\n".join(PARAGRAPHS)
+
+        assert caller.generate_glossary(text, "Cells", parallel=False).incremental is None
+        assert provider.calls == 1
+        caller.glossary_chunk_min_chars = 0
+        assert caller.generate_glossary(text, "Cells").incremental is None
+        assert caller.generate_glossary(text, "Cells", parallel=True).incremental["sections"] > 1
@@ -0,0 +1,157 @@
+import json
+import sys
+import threading
+
+from src.providers.base_provider import LLMProvider, ProviderResponse
+from src.providers.extractive_provider import ExtractiveProvider
+from src.utils.health import PROBE_USER, ProviderHealthMonitor
+from src.utils.routing import RoutingPolicy
+
+
+class UpProvider(LLMProvider):
+    model_id = "up-model"
+
+    def __init__(self):
+        self.pings = 0
+        self.calls = 0
+
+    def ping(self) -> ProviderResponse:
+        self.pings += 1
+        return ProviderResponse(content="", status="success", model=self.model_id)
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        self.calls += 1
+        return ProviderResponse(content='{"ok": true}', status="success", model=self.model_id)
+
+
+class DownProvider(LLMProvider):
+    model_id = "down-model"
+
+    def ping(self) -> ProviderResponse:
+        return ProviderResponse(content="503 Service Unavailable", status="error", model=self.model_id)
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        return self.ping()
+
+
+class HangingProvider(LLMProvider):
+    """Blocks until released, like a provider that accepts the connection and never answers."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.pings = 0
+
+    def ping(self) -> ProviderResponse:
+        self.pings += 1
+        self.release.wait()
+        return ProviderResponse(content="", status="success", model="hanging")
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        return self.ping()
+
+
+class PaidProvider(LLMProvider):
+    """A billed model with no free ping: only probed by opt-in, through cost tracking."""
+    model_id = "gpt-4o"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        self.calls += 1
+        return ProviderResponse(content='{"ok": true}', status="success", model=self.model_id,
+                                input_tokens=15, output_tokens=5)
+
+
+def _ready(monitor):
+    status, body = monitor.readiness()
+    return status, json.loads(body)
+
+
+class TestProviderHealthMonitor:
+
+    def test_readiness_follows_the_probed_providers(self):
+        up, down = UpProvider(), DownProvider()
+        monitor = ProviderHealthMonitor(interval_s=3600)
+        assert _ready(monitor)[0] == 503 and _ready(monitor)[1]["status"] == "starting"
+
+        monitor._stop.set()  # one round only
+        monitor.start([down, up, ExtractiveProvider()])._thread.join(5)
+        status, body = _ready(monitor)
+
+        assert status == 200 and body["status"] == "ready" and (up.pings, up.calls) == (1, 0)
+        assert body["providers"]["DownProvider"]["available"] is False
+        assert body["providers"]["DownProvider"]["consecutive_failures"] == 1
+        assert body["providers"]["ExtractiveProvider"] == {"available": True, "probed": False,
+                                                           "model": "extractive"}
+        health = json.loads(monitor.health())
+        assert health["status"] == "healthy" and health["model"] == "up-model"
+
+    def test_only_fallbacks_left_is_degraded(self):
+        down = DownProvider()
+        monitor = ProviderHealthMonitor(interval_s=3600)
+        monitor._stop.set()
+        monitor.start([down, ExtractiveProvider()])._thread.join(5)
+
+        assert _ready(monitor)[0] == 200 and _ready(monitor)[1]["status"] == "degraded"
+        assert json.loads(monitor.health())["status"] == "degraded"
+        monitor.require_model = True
+        monitor.check()
+        assert _ready(monitor)[0] == 503
+        assert _ready(monitor)[1]["providers"]["DownProvider"]["consecutive_failures"] == 2
+
+        monitor.fail("Failed to initialize AI engine")
+        assert _ready(monitor)[0] == 503 and _ready(monitor)[1]["status"] == "unavailable"
+        assert json.loads(monitor.health())["status"] == "unhealthy"
+
+    def test_hanging_provider_times_out_and_is_not_probed_twice(self):
+        hanging, up = HangingProvider(), UpProvider()
+        monitor = ProviderHealthMonitor(interval_s=3600, timeout_s=0.05)
+        monitor._stop.set()
+        monitor.start([hanging, up])._thread.join(5)
+
+        body = _ready(monitor)[1]
+        assert body["status"] == "ready" and up.pings == 1
+        assert body["providers"]["HangingProvider"]["error"].startswith("timeout")
+        assert body["providers"]["UpProvider"]["latency_ms"] < 50
+
+        monitor.check()
+        assert hanging.pings == 1 and up.pings == 2
+        hanging.release.set()
+        monitor.stop()
+
+    def test_paid_generation_probes_are_opt_in_and_cost_tracked(self, monkeypatch):
+        from src.utils import health
+
+        # The cost_tracking module health imported (utils.* or src.utils.*, depending on sys.path)
+        cost_tracking = sys.modules[health.track_cost.__module__]
+        entries = []
+        monkeypatch.setattr(cost_tracking, "_cost_listeners", [entries.append])
+        paid = PaidProvider()
+        skipped = ProviderHealthMonitor(interval_s=3600)
+        skipped._stop.set()
+        skipped.start([paid])._thread.join(5)
+
+        assert paid.calls == 0 and entries == []
+        assert _ready(skipped)[1]["providers"]["PaidProvider"]["probed"] is False
+
+        monitor = ProviderHealthMonitor(interval_s=3600, probe_paid=True)
+        monitor._stop.set()
+        monitor.start([paid])._thread.join(5)
+
+        assert paid.calls == 1 and _ready(monitor)[1]["providers"]["PaidProvider"]["available"]
+        assert [(e["query_type"], e["user_id"], e["model"]) for e in entries] == [
+            ("health_probe", PROBE_USER, "gpt-4o")]
+        assert entries[0]["cost_usd"] > 0
+
+    def test_probe_outcomes_reach_the_router(self):
+        router = RoutingPolicy(explore_every=0)
+        down, up = DownProvider(), UpProvider()
+        monitor = ProviderHealthMonitor(interval_s=3600)
+        monitor._stop.set()
+        monitor.start([down, up], router=router)._thread.join(5)
+        monitor.check()
+
+        providers = router.report()["providers"]
+        assert providers["down-model/summary"]["error_rate"] > 0.3 and providers["up-model/quiz"]["error_rate"] == 0
+        assert providers["down-model/summary"]["calls"] == 0
@@ -0,0 +1,79 @@
+import json
+import re
+
+import pytest
+
+from src.providers.base_provider import LLMProvider, ProviderResponse
+from src.utils.shared_cache import SharedCache
+
+PARAGRAPHS = [f"Lecture point {i} covers organelle {i}. " + f"Detail {i} is explained further. " * 28
+              for i in range(12)]
+
+
+class SectionEchoProvider(LLMProvider):
+    """Answers with the lecture point numbers found in each prompt, recording the prompts."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        self.prompts.append(prompt)
+        points = re.findall(r"Lecture point (\d+)", prompt)
+        if prompt.startswith("Extract"):
+            data = {"topic": "Cells", "terms": [{"term": f"Organelle {p}", "definition": f"Point {p}."}
+                                                for p in points] + [{"term": "Cell", "definition": "Unit."}]}
+        else:
+            data = {"topic": "Cells", "summary": f"Covers points {', '.join(points)}."}
+        content = json.dumps(data)
+        return ProviderResponse(content=content, status="success", model="gpt-4o-mini",
+                                input_tokens=len(prompt) // 4, output_tokens=len(content) // 4)
+
+
+@pytest.fixture
+def caller(make_caller, tmp_path):
+    # Glossaries here are generated per section, not from candidate terms
+    return make_caller(SectionEchoProvider(), cache=SharedCache(path=tmp_path / "cache.db"), glossary_candidates=0)
+
+
+class TestIncrementalGeneration:
+
+    def test_revised_document_only_regenerates_changed_sections(self, caller, document_store):
+        store = document_store
+        provider = caller.providers[0]
+        original = store.put("\n\n".join(PARAGRAPHS))
+        revised_paragraphs = list(PARAGRAPHS)
+        revised_paragraphs[7] = "Lecture point 7 was rewritten this week. " * 20
+        revised = store.put("\n\n".join(revised_paragraphs))
+
+        first = caller.generate_summary(None, "Cells", document_id=original)
+        first_calls = len(provider.prompts)
+        second = caller.generate_summary(None, "Cells", document_id=revised)
+        second_calls = len(provider.prompts) - first_calls
+
+        sections = first.incremental["sections"]
+        assert sections > 2 and first_calls == sections + 1
+        assert first.incremental["reused"] == 0 and not first.cached
+        # Changed section(s) plus the combining call
+        assert second.incremental["reused"] >= sections - 2 and second_calls <= 3
+        assert second.usage.prompt_tokens < first.usage.prompt_tokens
+        assert provider.prompts[-1].startswith("Summarize these section summaries")
+
+    def test_glossary_terms_are_merged_across_sections(self, caller, document_store):
+        store = document_store
+        document_id = store.put("\n\n".join(PARAGRAPHS))
+
+        result = caller.generate_glossary(None, "Cells", document_id=document_id)
+        terms = [term["term"] for term in result.data["terms"]]
+
+        assert terms.count("Cell") == 1
+        # "Cell" is found in every section, so it ranks first
+        assert terms[0] == "Cell" and {f"Organelle {i}" for i in range(12)} <= set(terms)
+        assert caller.generate_glossary(None, "Cells", document_id=document_id).cached
+
+    def test_short_documents_use_a_single_request(self, caller, document_store):
+        store = document_store
+        document_id = store.put(PARAGRAPHS[0])
+
+        result = caller.generate_summary(None, "Cells", document_id=document_id)
+
+        assert result.incremental is None and len(caller.providers[0].prompts) == 1
@@ -0,0 +1,48 @@
+import pytest
+
+from src.utils.json_repair import parse_llm_json
+
+
+class TestJsonRepair:
+
+    def test_valid_json_needs_no_fixes(self):
+        assert parse_llm_json('{"topic": "X", "terms": []}') == ({"topic": "X", "terms": []}, [])
+
+    def test_prose_trailing_commas_and_literals(self):
+        data, fixes = parse_llm_json(
+            'Sure! Here is the quiz:\n{"topic": "X", "done": True, "questions": [{"id": 1,\n  },\n]}\nEnjoy.')
+
+        assert data == {"topic": "X", "done": True, "questions": [{"id": 1}]}
+        assert {"leading_text", "trailing_text", "trailing_commas", "python_literals"} <= set(fixes)
+
+    def test_single_quotes_and_raw_newlines(self):
+        data, fixes = parse_llm_json("{'term': 'ATP', 'definition': 'The cell's\nenergy currency'}")
+
+        assert data == {"term": "ATP", "definition": "The cell's\nenergy currency"}
+        assert {"single_quotes", "control_characters"} <= set(fixes)
+
+    def test_truncated_array_keeps_complete_items(self):
+        data, fixes = parse_llm_json(
+            '{"topic": "X", "questions": [{"id": 1, "question": "Q1?"}, {"id": 2, "question": "Q2?"}, '
+            '{"id": 3, "question": "Why is the sky')
+
+        assert fixes == ["truncated"]
+        assert data["questions"][:2] == [{"id": 1, "question": "Q1?"}, {"id": 2, "question": "Q2?"}]
+        assert data["questions"][2] == {"id": 3}
+
+    def test_unrecoverable_raises(self):
+        with pytest.raises(ValueError):
+            parse_llm_json("The AI service is unavailable.")
+
+    def test_caller_salvages_complete_questions(self):
+        from src.ai.production_caller import ProductionFunctionCaller
+
+        raw = ('{"topic": "Cells", "questions": ['
+               '{"id": 1, "question": "Q1?", "options": ["a", "b"], "answer": "a"},'
+               '{"id": 2, "question": "Q2?", "options": ["a", "b"], "answer": "b"},'
+               '{"id": 3, "question": "Q3?", "options": ["a", "')
+        caller = ProductionFunctionCaller.__new__(ProductionFunctionCaller)  # no providers needed
+        result = caller._process_and_wrap(raw, "quiz")
+
+        assert [q["id"] for q in result.data["questions"]] == [1, 2]
+        assert result.repair == {"fixes": ["truncated"], "items_recovered": 2, "items_dropped": 1}
@@ -0,0 +1,36 @@
+import argparse
+
+import pytest
+
+from src.tools.load_test import parse_mix, percentile, summarize
+
+
+class TestPercentile:
+
+    def test_nearest_rank_on_one_to_one_hundred(self):
+        values = list(range(100, 0, -1))  # unsorted input
+        assert [percentile(values, pct) for pct in (1, 7, 50, 95, 99, 100)] == [1, 7, 50, 95, 99, 100]
+
+    def test_small_and_empty_samples(self):
+        assert percentile([], 95) == 0.0
+        assert percentile([42.0], 99) == 42.0
+        assert [percentile([10, 20, 30, 40], pct) for pct in (0, 25, 26, 50, 75, 100)] == [10, 10, 20, 20, 30, 40]
+
+
+class TestSummarize:
+
+    def test_per_endpoint_and_overall_rows(self):
+        samples = [("quiz", i / 1000, i % 10 != 0) for i in range(1, 101)]
+        samples += [("summary", 0.5, True), ("summary", 1.5, False)]
+
+        report = summarize(samples, elapsed_s=10.0)
+
+        assert report["quiz"] == {"requests": 100, "throughput_rps": 10.0, "p50_ms": 50.0, "p95_ms": 95.0,
+                                  "p99_ms": 99.0, "error_rate": 0.1}
+        assert report["summary"]["p50_ms"] == 500.0 and report["summary"]["error_rate"] == 0.5
+        assert report["ALL"]["requests"] == 102 and report["ALL"]["p99_ms"] == 500.0
+
+    def test_parse_mix_rejects_unknown_endpoints(self):
+        assert parse_mix("quiz=3,summary") == {"quiz": 3.0, "summary": 1.0}
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_mix("quiz,flashcards")
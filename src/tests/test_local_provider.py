@@ -0,0 +1,96 @@
+import json
+import threading
+
+import pytest
+
+from src.providers.local_openai_provider import LocalOpenAIProvider
+from src.tools.llm_stub_server import start_stub_server
+from src.utils.cost_tracking import calculate_cost
+
+
+@pytest.fixture
+def stub():
+    server = start_stub_server(latency_ms=50)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _generate_concurrently(provider, prompts):
+    results = [None] * len(prompts)
+
+    def run(i):
+        results[i] = provider.generate(prompts[i])
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(prompts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestLocalOpenAIProvider:
+
+    def test_chat_completion_round_trip(self, stub):
+        provider = LocalOpenAIProvider(stub.base_url, model="llama")
+        response = provider.generate("Generate a 3-question multiple choice quiz about cells")
+
+        assert response.status == "success"
+        assert len(json.loads(response.content)["questions"]) == 3
+        assert response.model == "local/llama"
+        assert response.input_tokens > 0 and response.output_tokens > 0
+        assert calculate_cost(response.model, response.input_tokens, response.output_tokens) == 0.0
+        provider.close()
+
+    def test_concurrent_requests_reuse_pooled_connections(self, stub):
+        provider = LocalOpenAIProvider(stub.base_url, max_connections=4)
+        for _ in range(3):
+            results = _generate_concurrently(provider, ["Summarize the following text: x"] * 4)
+            assert all(r.status == "success" for r in results)
+
+        assert stub.requests == 12
+        assert stub.connections <= 4
+        provider.close()
+
+    def test_micro_batching_combines_queued_prompts(self, stub):
+        provider = LocalOpenAIProvider(stub.base_url, batch_window_ms=30, max_batch=8, batch_endpoint="completions")
+        prompts = [f"Generate a {n}-question multiple choice quiz about cells" for n in range(1, 9)]
+        results = _generate_concurrently(provider, prompts)
+
+        # Each caller gets the answer to its own prompt
+        assert [len(json.loads(r.content)["questions"]) for r in results] == list(range(1, 9))
+        assert stub.prompts == 8 and stub.requests < 8
+        provider.close()
+
+    def test_default_batching_stays_on_chat_completions(self, stub):
+        provider = LocalOpenAIProvider(stub.base_url, batch_window_ms=30, max_batch=8)
+        results = _generate_concurrently(provider, ["Summarize the following text: x"] * 4)
+
+        assert all(r.status == "success" for r in results)
+        assert stub.requests == 4 and stub.paths == {"/v1/chat/completions"}
+        provider.close()
+
+    @pytest.mark.parametrize("settings", [{"list_prompts": False}, {"choice_index": False}])
+    def test_rejected_or_unmatched_batches_are_resent_as_chat(self, settings):
+        server = start_stub_server(latency_ms=20, **settings)
+        provider = LocalOpenAIProvider(server.base_url, batch_window_ms=30, max_batch=8,
+                                       batch_endpoint="completions")
+        prompts = [f"Generate a {n}-question multiple choice quiz about cells" for n in range(1, 5)]
+        results = _generate_concurrently(provider, prompts)
+
+        assert [len(json.loads(r.content)["questions"]) for r in results] == [1, 2, 3, 4]
+        # Only a server that refused list prompts is switched to chat for good
+        assert provider.batch_endpoint == ("chat" if "list_prompts" in settings else "completions")
+        provider.close()
+        server.shutdown()
+        server.server_close()
+
+    def test_server_errors_become_error_responses(self):
+        server = start_stub_server(fail_every=1)
+        provider = LocalOpenAIProvider(server.base_url)
+
+        assert provider.generate("Summarize the following text: x").status == "error"
+        unreachable = LocalOpenAIProvider("http://127.0.0.1:9/v1", timeout_s=1)
+        assert unreachable.generate("Summarize the following text: x").status == "error"
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,52 @@
+import json
+import time
+
+from src.providers.mock_provider import MockProvider
+
+
+class TestMockProvider:
+
+    def test_default_is_instant_and_successful(self):
+        provider = MockProvider()
+        start = time.perf_counter()
+        response = provider.generate("Summarize the following text about Python: ...")
+
+        assert response.status == "success"
+        assert time.perf_counter() - start < 0.05
+
+    def test_quiz_output_scales_with_num_questions(self):
+        provider = MockProvider()
+        for wanted in (1, 2, 7, 15):
+            response = provider.generate(f"Generate a {wanted}-question multiple choice quiz about X")
+            assert len(json.loads(response.content)["questions"]) == wanted
+
+    def test_seeded_latency_is_deterministic(self):
+        a = MockProvider(latency_ms=100, jitter_ms=50, distribution="lognormal", seed=7)
+        b = MockProvider(latency_ms=100, jitter_ms=50, distribution="lognormal", seed=7)
+
+        assert [a._sample_latency_s() for _ in range(20)] == [b._sample_latency_s() for _ in range(20)]
+
+    def test_error_rate_injects_failures(self):
+        always = MockProvider(error_rate=1.0, seed=1)
+        never = MockProvider(error_rate=0.0, seed=1)
+
+        assert always.generate("Generate a 3-question quiz").status == "error"
+        assert never.generate("Generate a 3-question quiz").status == "success"
+
+    def test_generation_time_scales_with_output_length(self):
+        provider = MockProvider(ms_per_output_token=0.1)
+
+        start = time.perf_counter()
+        provider.generate("Generate a 1-question multiple choice quiz about X")
+        short = time.perf_counter() - start
+        start = time.perf_counter()
+        provider.generate("Generate a 15-question multiple choice quiz about X")
+        assert time.perf_counter() - start > 3 * short
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv("COGNIFY_MOCK_LATENCY_MS", "250")
+        monkeypatch.setenv("COGNIFY_MOCK_DISTRIBUTION", "exponential")
+        provider = MockProvider.from_env()
+
+        assert provider.latency_ms == 250
+        assert provider.distribution == "exponential"
@@ -0,0 +1,101 @@
+import json
+import random
+import re
+
+from src.providers.base_provider import LLMProvider, ProviderResponse
+from src.providers.mock_provider import MockProvider
+from src.utils.question_bank import QuestionBank, bank_key, shuffle_options
+
+FACTS = [
+    ("Which organelle produces most ATP?", "Mitochondria"),
+    ("Which organelle synthesizes proteins?", "Ribosome"),
+    ("Where is genetic material stored?", "Nucleus"),
+    ("Which organelle packages proteins for export?", "Golgi apparatus"),
+    ("Which pigment absorbs red light in plants?", "Chlorophyll"),
+    ("Which structure controls what enters a cell?", "Membrane"),
+    ("Which organelle digests worn-out parts?", "Lysosome"),
+    ("What gel fills the inside of a cell?", "Cytoplasm"),
+]
+
+
+def _question(text, answer):
+    options = sorted({answer, "Vacuole", "Centriole", "Cell wall"})
+    return {"question": text, "options": options, "answer": f"{'ABCD'[options.index(answer)]}. {answer}",
+            "explanation": ""}
+
+
+class BankProvider(LLMProvider):
+    """Hands out the next facts as quiz questions and records the prompts."""
+
+    def __init__(self):
+        self.prompts = []
+        self.next = 0
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        self.prompts.append(prompt)
+        count = int(re.search(r"Generate an? (\d+)-question", prompt).group(1))
+        questions = [_question(*fact) for fact in FACTS[self.next:self.next + count]]
+        self.next += count
+        content = json.dumps({"topic": "Cells", "questions": questions})
+        return ProviderResponse(content=content, status="success", model="gpt-4o-mini",
+                                input_tokens=len(prompt) // 4, output_tokens=len(content) // 4)
+
+
+class TestQuestionBank:
+
+    def test_shuffled_options_keep_the_correct_answer(self):
+        rng = random.Random(3)
+        question = _question("Which organelle produces most ATP?", "Mitochondria")
+        for _ in range(10):
+            shuffled = shuffle_options(question, rng)
+            letter, text = shuffled["answer"].split(". ", 1)
+            assert text == "Mitochondria" and shuffled["options"]["ABCD".index(letter)] == "Mitochondria"
+            assert sorted(shuffled["options"]) == sorted(question["options"])
+
+        positional = {**question, "options": ["Nucleus", "Ribosome", "Mitochondria", "All of the above"],
+                      "answer": "D. All of the above"}
+        assert shuffle_options(positional, rng)["options"] == positional["options"]
+
+    def test_deposit_rejects_invalid_and_duplicate_questions(self, tmp_path):
+        bank = QuestionBank(path=tmp_path / "bank.db")
+        key = bank_key("doc_x", "Cells")
+        first = [_question(*FACTS[0]), {"question": "No options?", "answer": "A"}]
+        again = [_question(*FACTS[0]), _question(*FACTS[1])]
+
+        assert bank.deposit(key, first) == 1
+        assert bank.deposit(key, again) == 1
+        assert bank.size(key) == 2 and bank.size(bank_key("doc_x", "Genetics")) == 0
+        assert bank_key("doc_x", "  cells ") == key
+
+    def test_quizzes_are_served_from_the_bank_once_it_is_large_enough(self, tmp_path, make_caller):
+        provider = BankProvider()
+        caller = make_caller(provider, bank=QuestionBank(path=tmp_path / "bank.db", seed=7))
+        text = "Cells contain organelles with distinct jobs."
+
+        first = caller.generate_quiz(text, "Cells", "easy", num_questions=2)
+        second = caller.generate_quiz(text, "Cells", "easy", num_questions=2)
+        third = caller.generate_quiz(text, "Cells", "easy", num_questions=2)
+        fourth = caller.generate_quiz(text, "Cells", "easy", num_questions=2)
+
+        # Replenishing prompts exclude what the bank already holds
+        assert len(provider.prompts) == 2
+        assert "Which organelle produces most ATP?" in provider.prompts[1]
+        assert first.bank == {"served": False, "deposited": 2, "bank_size": 2}
+        assert second.bank["bank_size"] == 4
+        assert third.bank["served"] and third.cached and third.model == "question-bank"
+        assert [q["id"] for q in third.data["questions"]] == [1, 2]
+        # Least-served questions go first, so two bank quizzes cover all four
+        served = {q["question"] for q in third.data["questions"] + fourth.data["questions"]}
+        assert served == {text for text, _ in FACTS[:4]}
+        assert caller.generate_quiz(text, "Cells", "easy", num_questions=2, fresh=True).bank["served"] is False
+
+        stats = caller.bank.stats()
+        assert stats["hits"] == 2 and stats["misses"] == 2 and stats["questions"] == 6
+
+    def test_fallback_questions_are_not_banked(self, tmp_path, make_caller):
+        caller = make_caller(MockProvider(), bank=QuestionBank(path=tmp_path / "bank.db", seed=7))
+
+        result = caller.generate_quiz("Cells contain organelles.", "Cells", "easy", num_questions=2)
+
+        assert result.model == "mock" and result.bank is None
+        assert caller.bank.stats()["questions"] == 0
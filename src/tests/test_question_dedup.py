@@ -0,0 +1,155 @@
+import json
+import re
+import time
+
+from src.providers.base_provider import LLMProvider, ProviderResponse
+from src.utils.question_dedup import dedupe_questions, is_valid_question
+
+ORGANELLES = ["Nucleus", "Mitochondria", "Ribosome", "Golgi apparatus"]
+
+
+def _question(text, options=ORGANELLES, answer="B. Mitochondria"):
+    return {"question": text, "options": list(options), "answer": answer, "explanation": ""}
+
+
+class ScriptedProvider(LLMProvider):
+    """Returns queued quiz payloads and records the prompts it was sent."""
+
+    def __init__(self, *payloads):
+        self.payloads = list(payloads)
+        self.prompts = []
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        self.prompts.append(prompt)
+        content = json.dumps({"topic": "Cells", "questions": self.payloads.pop(0)})
+        return ProviderResponse(content=content, status="success", model="scripted",
+                                input_tokens=len(prompt) // 4, output_tokens=len(content) // 4)
+
+
+SECTIONS = ("Mitochondria", "Chloroplasts", "Lysosomes")
+DISTINCT_QUESTIONS = [
+    "Which organelle produces most ATP?", "What gas is consumed in respiration?",
+    "Where does glycolysis happen?", "Which cycle releases carbon dioxide?", "What carries electrons to the chain?",
+    "Which pigment absorbs red light?", "What splits during the light reactions?",
+    "Where is the Calvin cycle located?", "Which enzyme fixes carbon?", "What sugar does photosynthesis make?",
+    "Which organelle digests worn-out parts?", "What pH do lysosomes keep?",
+    "Which disease stems from enzyme deficiency?", "How are hydrolases delivered?", "What triggers autophagy?",
+]
+
+
+class SectionProvider(LLMProvider):
+    """Answers each quiz prompt after a delay with distinct questions for its text section."""
+
+    def __init__(self, delay_s):
+        self.delay_s = delay_s
+        self.prompts = []
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        self.prompts.append(prompt)
+        time.sleep(self.delay_s)
+        count = int(re.search(r"Generate an? (\d+)-question", prompt).group(1))
+        section = SECTIONS.index(re.search(r"based on this text: (\w+)", prompt).group(1))
+        questions = [_question(text) for text in DISTINCT_QUESTIONS[section * 5:section * 5 + count]]
+        content = json.dumps({"topic": "Cells", "questions": questions})
+        return ProviderResponse(content=content, status="success", model="scripted",
+                                input_tokens=len(prompt) // 4, output_tokens=len(content) // 4)
+
+
+class TestQuestionDedup:
+
+    def test_drops_paraphrases_keeps_distinct(self):
+        questions = [
+            _question("What is the powerhouse of the cell?"),
+            _question("Which organelle is known as the powerhouse of the cell?"),
+            _question("Which organelle is called the cell's powerhouse?"),
+            _question("Which organelle synthesizes proteins?", answer="C. Ribosome"),
+            _question("In what year did the French Revolution begin?", ["1789", "1776", "1804", "1815"], "A. 1789"),
+        ]
+        kept = dedupe_questions(questions)
+
+        assert [q["question"] for q in kept] == [
+            "What is the powerhouse of the cell?",
+            "Which organelle synthesizes proteins?",
+            "In what year did the French Revolution begin?",
+        ]
+
+    def test_near_miss_questions_with_different_facts_are_kept(self):
+        true_false = ["True", "False"]
+        questions = [
+            _question("Which organelle produces ATP?"),
+            _question("Which organelle produces proteins?", answer="C. Ribosome"),
+            _question("True or false: mitochondria produce ATP.", true_false, "A. True"),
+            _question("True or false: ribosomes produce ATP.", true_false, "B. False"),
+            _question("True or false: chloroplasts produce ATP.", true_false, "A. True"),
+            _question("Which organelle synthesizes lipids?", answer="D. Golgi apparatus"),
+        ]
+        assert dedupe_questions(questions) == questions
+
+    def test_paraphrase_with_shuffled_options_is_dropped(self):
+        first = _question("Which organelle produces most of the cell's ATP?")
+        shuffled = _question("Most of a cell's ATP is produced by which organelle?", ORGANELLES[::-1], "C")
+
+        assert dedupe_questions([first, shuffled]) == [first]
+
+    def test_invalid_questions_are_dropped(self):
+        assert not is_valid_question({"question": "No options?", "answer": "A"})
+        assert not is_valid_question({"question": "", "options": ["a", "b"], "answer": "a"})
+        assert dedupe_questions([{"question": "Missing answer", "options": ["a", "b"]}]) == []
+
+    def test_existing_questions_exclude_new_duplicates(self):
+        existing = [_question("What is the powerhouse of the cell?")]
+        new = [_question("Which organelle is known as the powerhouse of the cell?"),
+               _question("Which organelle synthesizes proteins?", answer="C. Ribosome")]
+
+        assert [q["question"] for q in dedupe_questions(new, existing=existing)] == [
+            "Which organelle synthesizes proteins?"]
+
+    def test_caller_tops_up_only_missing_questions(self):
+        from src.ai.production_caller import ProductionFunctionCaller
+
+        provider = ScriptedProvider(
+            [_question("What is the powerhouse of the cell?"),
+             _question("Which organelle is known as the powerhouse of the cell?"),
+             _question("Which organelle synthesizes proteins?", answer="C. Ribosome")],
+            [_question("Which organelle stores genetic material?", answer="A. Nucleus")],
+        )
+        caller = ProductionFunctionCaller()
+        caller.providers = [provider]
+        caller.cache = None
+        caller.bank = None
+        caller.artifacts = None
+        caller.ledger = None
+
+        result = caller.generate_quiz("Cells contain organelles.", "Cells", "easy", num_questions=3)
+
+        assert len(provider.prompts) == 2
+        assert provider.prompts[1].startswith("Generate a 1-question")
+        assert "- What is the powerhouse of the cell?" in provider.prompts[1]
+        assert [q["id"] for q in result.data["questions"]] == [1, 2, 3]
+        assert result.topup["dropped"] == 1 and result.topup["added"] == 1
+        assert result.topup["tokens_saved"] > 0
+
+    def test_caller_splits_large_quiz_into_parallel_parts(self):
+        from src.ai.production_caller import ProductionFunctionCaller
+
+        provider = SectionProvider(delay_s=0.2)
+        caller = ProductionFunctionCaller()
+        caller.providers = [provider]
+        caller.cache = None
+        caller.bank = None
+        caller.artifacts = None
+        caller.ledger = None
+        context = "\n\n".join(f"{name} " + "text about the organelle. " * 200
+                               for name in SECTIONS)
+
+        start = time.perf_counter()
+        result = caller.generate_quiz(context, "Cells", "easy", num_questions=15, parallel=True)
+        elapsed = time.perf_counter() - start
+
+        assert len(provider.prompts) == 3
+        assert all(p.startswith("Generate a 5-question") for p in provider.prompts)
+        assert elapsed < 0.5
+        assert [q["id"] for q in result.data["questions"]] == list(range(1, 16))
+        assert [q["question"] for q in result.data["questions"]] == DISTINCT_QUESTIONS
+        assert result.split == {"parts": 3, "questions": [5, 5, 5], "failed": 0}
+        assert caller.generate_quiz(context, "Cells", "easy", num_questions=15, parallel=False).split is None
@@ -0,0 +1,83 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI, UploadFile
+from fastapi.testclient import TestClient
+
+from src.tools.replay import compare_reports, load_trace, replay_against, schedule
+from src.tools.load_test import summarize
+from src.utils.request_recorder import RequestRecorderMiddleware
+
+
+def _app(recording=None):
+    app = FastAPI()
+
+    @app.post("/api/generate-summary")
+    def summary(body: dict):
+        return {"topic": body.get("topic"), "summary": "Cells make ATP."}
+
+    @app.post("/api/generate-quiz")
+    def quiz(body: dict):
+        return {"questions": [], "requested": body.get("num_questions")}
+
+    @app.post("/api/upload-pdf")
+    async def upload(file: UploadFile):
+        return {"bytes": len(await file.read())}
+
+    if recording is not None:
+        app.add_middleware(RequestRecorderMiddleware, path=str(recording))
+    return app
+
+
+class TestRequestRecorder:
+
+    def test_records_api_posts_and_replays_them(self, tmp_path):
+        recording = tmp_path / "traffic.jsonl"
+        with TestClient(_app(recording)) as client:
+            client.post("/api/generate-summary", json={"context_text": "Cells.", "topic": "Cells"})
+            client.post("/api/generate-quiz", json={"context_text": "Cells.", "num_questions": 4})
+            client.post("/api/upload-pdf", files={"file": ("notes.pdf", b"%PDF-1.4 stub")})
+            client.get("/docs")
+        # Leaving the client runs the lifespan shutdown, which flushes the writer thread
+        records = [json.loads(line) for line in recording.read_text().splitlines()]
+
+        assert [r["path"] for r in records] == ["/api/generate-summary", "/api/generate-quiz", "/api/upload-pdf"]
+        assert records[1]["body"] == {"context_text": "Cells.", "num_questions": 4} and records[1]["status"] == 200
+        assert "body" not in records[2] and records[2]["body_bytes"] > 0
+
+        trace = load_trace(recording, context_text="unused")
+        assert [name for _, name, _, _ in trace] == ["summary", "quiz"]
+        samples, elapsed = asyncio.run(replay_against(_app(), schedule(trace, speed=100, max_gap_s=1), 10))
+        report = summarize(samples, elapsed)
+        assert report["ALL"]["requests"] == 2 and report["ALL"]["error_rate"] == 0.0
+
+
+class TestReplay:
+
+    def test_audit_log_records_get_synthesized_bodies_and_scaled_gaps(self, tmp_path):
+        start = datetime(2026, 10, 1, 9, 0, 0)
+        log = tmp_path / "cost_audit.jsonl"
+        rows = [(start + timedelta(seconds=10), "generate_quiz", "ana"),
+                (start, "generate_summary", None),
+                (start + timedelta(hours=8), "generate_glossary", None),
+                (start + timedelta(seconds=5), "unknown_call", None)]
+        log.write_text("\n".join(json.dumps({"timestamp": ts.isoformat(), "query_type": q, "user_id": u})
+                                 for ts, q, u in rows) + "\nnot json\n")
+
+        trace = load_trace(log, context_text="Mitochondria make ATP.", topic="Cells")
+        assert [(offset, name) for offset, name, _, _ in trace] == [(0.0, "summary"), (10.0, "quiz"),
+                                                                     (8 * 3600.0, "glossary")]
+        assert trace[1][3] == {"context_text": "Mitochondria make ATP.", "topic": "Cells",
+                               "difficulty": "medium", "num_questions": 5, "user_id": "ana"}
+
+        # 10x faster, the overnight gap capped at 5 replay seconds
+        assert [at for at, _, _, _ in schedule(trace, speed=10, max_gap_s=5)] == [0.0, 1.0, 6.0]
+
+    def test_compare_reports_only_shared_endpoints(self):
+        before = {"quiz": {"p50_ms": 100, "p95_ms": 200, "p99_ms": 300, "error_rate": 0.1, "throughput_rps": 5},
+                  "summary": {"p50_ms": 50, "p95_ms": 60, "p99_ms": 70, "error_rate": 0, "throughput_rps": 2}}
+        after = {"quiz": {"p50_ms": 80, "p95_ms": 250, "p99_ms": 300, "error_rate": 0.05, "throughput_rps": 6}}
+
+        assert compare_reports(before, after) == {"quiz": {"p50_ms": -20, "p95_ms": 50, "p99_ms": 0,
+                                                           "error_rate": -0.05, "throughput_rps": 1}}
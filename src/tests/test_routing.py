@@ -0,0 +1,143 @@
+import json
+
+from src.providers.base_provider import LLMProvider, ProviderResponse
+from src.providers.mock_provider import MockProvider
+from src.utils.cost_tracking import calculate_cost, price_for
+from src.utils.routing import RoutingPolicy
+
+SUMMARY_PROMPT = "Summarize the following text about Cells: " + "Mitochondria produce ATP. " * 40
+
+
+class PricedProvider(LLMProvider):
+    """Provider reporting a fixed model, so the price table applies."""
+
+    def __init__(self, model_id, status="success"):
+        self.model_id = model_id
+        self.status = status
+        self.calls = 0
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        self.calls += 1
+        content = json.dumps({"topic": "Cells", "summary": "Cells make ATP."})
+        return ProviderResponse(content=content, status=self.status, model=self.model_id,
+                                input_tokens=300, output_tokens=80)
+
+
+def _names(providers):
+    return [p.model_id for p in providers]
+
+
+class TestPricing:
+
+    def test_longest_prefix_wins(self):
+        assert price_for("gpt-4o-mini-2024-07-18") == (0.15, 0.60)
+        assert price_for("gpt-4o") == (2.50, 10.00)
+        assert price_for("gemini-2.0-flash-exp") == (0.10, 0.40)
+        assert calculate_cost("local/llama-3.1-8b", 10_000, 10_000) == 0.0
+        assert calculate_cost("some-new-model", 1_000_000, 0) == 2.50
+
+
+class TestRoutingPolicy:
+
+    def test_cheapest_provider_first_and_mock_last(self):
+        router = RoutingPolicy()
+        mock = MockProvider()
+        providers = [mock, PricedProvider("gpt-4o"), PricedProvider("gemini-2.0-flash"),
+                     PricedProvider("gpt-4o-mini")]
+
+        ordered, decision = router.order(providers, SUMMARY_PROMPT, "summary")
+
+        assert _names(ordered) == ["gemini-2.0-flash", "gpt-4o-mini", "gpt-4o", "mock"]
+        assert decision["chosen"] == "PricedProvider" and decision["est_input_tokens"] > 0
+        assert decision["candidates"][0]["est_cost_usd"] < decision["candidates"][2]["est_cost_usd"]
+
+    def test_slow_provider_is_passed_over_until_nothing_meets_the_slo(self):
+        router = RoutingPolicy(slo_ms={"summary": 1000})
+        cheap, fast = PricedProvider("gemini-2.0-flash"), PricedProvider("gpt-4o")
+        out = router.estimate_output_tokens(SUMMARY_PROMPT, "summary")
+        router.observe(cheap, "summary", 3.0, True, out)
+        router.observe(fast, "summary", 0.5, True, out)
+
+        ordered, decision = router.order([cheap, fast], SUMMARY_PROMPT, "summary")
+        assert ordered == [fast, cheap]
+        assert [c["meets_slo"] for c in decision["candidates"]] == [True, False]
+
+        # Once neither meets the SLO, the faster one goes first
+        router.observe(fast, "summary", 10.0, True, out)
+        router.observe(fast, "summary", 10.0, True, out)
+        ordered, decision = router.order([cheap, fast], SUMMARY_PROMPT, "summary")
+        assert ordered == [cheap, fast]
+        assert not any(c["meets_slo"] for c in decision["candidates"])
+
+    def test_cold_start_sample_ages_out_and_exploration_remeasures(self):
+        now = [0.0]
+        router = RoutingPolicy(slo_ms={"summary": 1000}, half_life_s=300, explore_every=10, clock=lambda: now[0])
+        local, paid = PricedProvider("local/llama-3.1-8b"), PricedProvider("gpt-4o")
+        out = router.estimate_output_tokens(SUMMARY_PROMPT, "summary")
+        router.observe(local, "summary", 25.0, True, out)  # cold start
+        router.observe(paid, "summary", 0.5, True, out)
+
+        orders = [router.order([local, paid], SUMMARY_PROMPT, "summary") for _ in range(10)]
+        assert all(ordered[0] is paid for ordered, _ in orders[:9])
+        # Every tenth request re-measures the demoted provider
+        assert orders[9][0][0] is local and orders[9][1]["explore"] is True
+        router.observe(local, "summary", 0.3, True, out)
+        router.observe(local, "summary", 0.3, True, out)
+        router.observe(local, "summary", 0.3, True, out)
+        assert router.order([local, paid], SUMMARY_PROMPT, "summary")[0][0] is local
+
+        # Slow samples nobody re-measures stop counting after a half-life
+        for _ in range(3):
+            router.observe(local, "summary", 25.0, True, out)
+        assert router.order([local, paid], SUMMARY_PROMPT, "summary")[0][0] is paid
+        now[0] += 301
+        ordered, decision = router.order([local, paid], SUMMARY_PROMPT, "summary")
+        assert ordered[0] is local and decision["candidates"][0]["est_latency_ms"] is None
+
+    def test_failing_provider_recovers_through_decay_and_health_probes(self):
+        now = [0.0]
+        router = RoutingPolicy(half_life_s=60, explore_every=0, clock=lambda: now[0])
+        cheap, paid = PricedProvider("gemini-2.0-flash"), PricedProvider("gpt-4o")
+        for _ in range(5):
+            router.observe(cheap, "summary", 0.1, False)
+        assert router.order([cheap, paid], SUMMARY_PROMPT, "summary")[0][0] is paid
+
+        now[0] += 120  # two half-lives without traffic
+        assert router.order([cheap, paid], SUMMARY_PROMPT, "summary")[0][0] is cheap
+
+        # Failing probes demote a provider before users reach it; passing ones let it back
+        for _ in range(4):
+            router.observe_health(cheap, False)
+        assert router.order([cheap, paid], SUMMARY_PROMPT, "summary")[0][0] is paid
+        assert router.order([cheap, paid], SUMMARY_PROMPT, "quiz")[0][0] is paid
+        for _ in range(4):
+            router.observe_health(cheap, True)
+        assert router.order([cheap, paid], SUMMARY_PROMPT, "summary")[0][0] is cheap
+        assert router.report()["providers"]["gemini-2.0-flash/summary"]["calls"] == 5
+
+    def test_quiz_output_estimate_scales_with_question_count(self):
+        router = RoutingPolicy()
+        five = router.estimate_output_tokens("Generate a 5-question multiple choice quiz", "quiz")
+        twenty = router.estimate_output_tokens("Generate a 20-question multiple choice quiz", "quiz")
+        assert twenty == 4 * five
+
+    def test_fixed_routing_keeps_configured_order(self, monkeypatch):
+        monkeypatch.setenv("COGNIFY_ROUTING", "fixed")
+        providers = [PricedProvider("gpt-4o"), PricedProvider("gemini-2.0-flash")]
+        ordered, decision = RoutingPolicy.from_env().order(providers, SUMMARY_PROMPT, "summary")
+        assert ordered == providers and decision is None
+
+
+class TestCallerRouting:
+
+    def test_decision_is_recorded_and_failures_fall_through(self, make_caller):
+        broken, paid = PricedProvider("gemini-2.0-flash", status="error"), PricedProvider("gpt-4o")
+        caller = make_caller(paid, broken, MockProvider())
+
+        result = caller.generate_summary("Mitochondria produce ATP.", "Cells")
+
+        assert broken.calls == 1 and paid.calls == 1
+        assert result.model == "gpt-4o"
+        assert result.routing["chosen"] == "PricedProvider" and result.routing["served"] == "PricedProvider"
+        assert [c["model"] for c in result.routing["candidates"]] == ["gemini-2.0-flash", "gpt-4o", "mock"]
+        assert caller.router.report()["providers"]["gpt-4o/summary"]["calls"] == 1
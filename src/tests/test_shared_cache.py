@@ -0,0 +1,76 @@
+import multiprocessing as mp
+import sqlite3
+
+from src.utils.shared_cache import SharedCache, make_cache_key
+
+
+def _write_from_child(db_path):
+    SharedCache(path=db_path).set("from-child", "hello")
+
+
+class TestSharedCache:
+
+    def test_get_set_roundtrip(self, tmp_path):
+        cache = SharedCache(path=tmp_path / "cache.db")
+        key = make_cache_key("quiz", "prompt")
+
+        assert cache.get(key) is None
+        cache.set(key, '{"questions": []}')
+
+        assert cache.get(key) == '{"questions": []}'
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_eviction_by_entries(self, tmp_path):
+        cache = SharedCache(path=tmp_path / "cache.db", max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", "3")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.get("c") == "3"
+        assert cache.stats()["entries"] == 2
+
+    def test_get_does_not_take_the_write_lock(self, tmp_path):
+        db_path = tmp_path / "cache.db"
+        cache = SharedCache(path=db_path, touch_seconds=60)
+        cache.set("a", "1")
+        writer = sqlite3.connect(str(db_path), isolation_level=None)
+        writer.execute("BEGIN IMMEDIATE")
+        try:
+            accessed = writer.execute("SELECT accessed FROM cache WHERE key = 'a'").fetchone()[0]
+            assert cache.get("a") == "1"
+        finally:
+            writer.execute("ROLLBACK")
+            writer.close()
+
+        # The read reaches the LRU order with the next batch of touches
+        cache.flush_touches()
+        assert cache._conn().execute("SELECT accessed FROM cache WHERE key = 'a'").fetchone()[0] > accessed
+
+    def test_eviction_by_bytes(self, tmp_path):
+        cache = SharedCache(path=tmp_path / "cache.db", max_bytes=10)
+        cache.set("a", "x" * 6)
+        cache.set("b", "y" * 6)
+
+        assert cache.get("a") is None
+        assert cache.stats()["bytes"] == 6
+
+    def test_ttl_expiry(self, tmp_path):
+        cache = SharedCache(path=tmp_path / "cache.db", ttl_seconds=-1)
+        cache.set("a", "1")
+
+        assert cache.get("a") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_visible_across_processes(self, tmp_path):
+        db_path = tmp_path / "cache.db"
+        cache = SharedCache(path=db_path)
+
+        proc = mp.get_context("spawn").Process(target=_write_from_child, args=(db_path,))
+        proc.start()
+        proc.join()
+
+        assert cache.get("from-child") == "hello"
@@ -0,0 +1,83 @@
+import json
+import threading
+
+import pytest
+
+from src.providers.base_provider import LLMProvider, ProviderResponse
+from src.utils.shared_cache import SharedCache
+from src.utils.speculation import LoadGauge, SpeculativeGenerator
+
+
+class PaidProvider(LLMProvider):
+    """Cacheable provider billed at gpt-4o rates."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt: str) -> ProviderResponse:
+        self.calls += 1
+        data = ({"topic": "Cells", "summary": "Cells make ATP."} if prompt.startswith("Summarize")
+                else {"topic": "Cells", "terms": [{"term": "ATP", "definition": "Energy carrier."}]})
+        return ProviderResponse(content=json.dumps(data), status="success", model="gpt-4o",
+                                input_tokens=1000, output_tokens=200)
+
+
+@pytest.fixture
+def caller(make_caller, tmp_path):
+    return make_caller(PaidProvider(), cache=SharedCache(path=tmp_path / "cache.db"))
+
+
+@pytest.fixture
+def document_id(document_store):
+    return document_store.put("Mitochondria produce ATP through respiration.")
+
+
+class TestSpeculation:
+
+    def test_prefetched_results_are_served_from_cache(self, caller, document_id):
+        speculator = SpeculativeGenerator()
+        caller.speculation = speculator
+        for mode in ("summary", "glossary"):
+            speculator.schedule(mode, lambda mode=mode: caller.prefetch(mode, document_id, "Cells"))
+        speculator.wait()
+
+        summary = caller.generate_summary(None, "Cells", document_id=document_id)
+        other_topic = caller.generate_summary(None, "Genetics", document_id=document_id)
+        report = speculator.report()
+
+        assert summary.cached and not other_topic.cached
+        assert caller.providers[0].calls == 3
+        assert report["completed"] == 2 and report["hits"] == 1 and report["hit_rate"] == 0.5
+        assert report["spend_usd"] > 0 and report["pending_spend_usd"] == report["spend_usd"] / 2
+
+    def test_prefetch_skips_documents_already_cached(self, caller, document_id):
+        caller.generate_glossary(None, "Cells", document_id=document_id)
+
+        assert caller.prefetch("glossary", document_id, "Cells") is None
+        assert caller.providers[0].calls == 1
+
+    def test_queued_work_is_dropped_under_load(self):
+        gauge = LoadGauge()
+        speculator = SpeculativeGenerator(gauge, max_in_flight=2)
+        ran = threading.Event()
+        gauge.enter()
+        gauge.enter()
+        speculator.schedule("busy", ran.set)
+        speculator.wait()
+
+        assert not ran.is_set()
+        assert speculator.report()["cancelled_under_load"] == 1
+
+    def test_unrequested_results_count_as_wasted_spend(self):
+        class Result:
+            cache_key = "key"
+            model = "gpt-4o"
+            usage = type("Usage", (), {"prompt_tokens": 1_000_000, "completion_tokens": 0})()
+
+        speculator = SpeculativeGenerator(ttl_s=0)
+        speculator.schedule("never used", lambda: Result())
+        speculator.wait()
+        report = speculator.report()
+
+        assert report["expired_unused"] == 1 and report["wasted_spend_usd"] == 2.5
+        assert report["hit_rate"] == 0.0
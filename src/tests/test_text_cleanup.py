@@ -0,0 +1,69 @@
+from src.utils.text_cleanup import PageCleaner
+
+
+def _page(number, body):
+    return "\n".join(["Intro to Biology - Spring 2026", "", *body, "", f"Page {number} of 6"])
+
+
+PAGES = [_page(i, [f"Lecture {i} covers cellular respiration and the role of",
+                   "the mito-",
+                   "chondria   in producing ATP.",
+                   "Oxygen is the final electron acceptor."]) for i in range(1, 7)]
+
+
+class TestTextCleanup:
+
+    def test_strips_running_headers_and_page_numbers(self):
+        cleaned = PageCleaner().clean_pages(PAGES)
+
+        assert all("Intro to Biology" not in page for page in cleaned)
+        assert all("Page " not in page for page in cleaned)
+        assert cleaned[2].startswith("Lecture 3 covers")
+
+    def test_joins_hyphenated_words_and_collapses_whitespace(self):
+        cleaned = PageCleaner().clean_pages(PAGES)
+
+        assert "the mitochondria in producing ATP." in cleaned[0]
+        assert "  " not in cleaned[0]
+
+    def test_keeps_lines_that_do_not_repeat(self):
+        pages = ["Chapter One\nThe story begins.", "A middle page.\n12", "Epilogue\nThe end."]
+        cleaned = PageCleaner().clean_pages(pages)
+
+        assert cleaned == ["Chapter One\nThe story begins.", "A middle page.", "Epilogue\nThe end."]
+
+    def test_streaming_learns_boilerplate_as_pages_arrive(self):
+        cleaner = PageCleaner()
+        cleaned = [cleaner.clean_page(page) for page in PAGES]
+
+        assert cleaned[0].startswith("Intro to Biology")
+        assert all(not page.startswith("Intro to Biology") for page in cleaned[2:])
+
+    def test_streaming_keeps_edge_lines_that_recur_on_few_pages(self):
+        pages = [_page(i, [f"Body text of page {i}."]) for i in range(1, 21)]
+        for i in (11, 15, 19):
+            pages[i] = pages[i].replace(f"Body text of page {i + 1}.", "Recall: ATP is the energy currency.")
+        cleaner = PageCleaner()
+        cleaned = [cleaner.clean_page(page) for page in pages]
+
+        assert all("Recall: ATP" in cleaned[i] for i in (11, 15, 19))
+        assert all("Intro to Biology" not in page for page in cleaned[2:])
+
+    def test_keeps_the_hyphen_in_compounds_broken_at_a_line_end(self):
+        pages = ["A well-\nknown result.",
+                 "The mito-\nchondria is a state-of-the-\nart example of a long-\nterm store, long-term."]
+        cleaner = PageCleaner()
+        cleaned = cleaner.clean_pages(pages)
+
+        assert cleaned[0] == "A well-known result."
+        assert cleaned[1] == "The mitochondria is a state-of-the-art example of a long-term store, long-term."
+        assert cleaner.report()["hyphens_joined"] == 1
+
+    def test_report_counts_token_savings(self):
+        cleaner = PageCleaner()
+        cleaner.clean_pages(PAGES)
+        report = cleaner.report()
+
+        assert report["pages"] == 6
+        assert report["hyphens_joined"] == 6
+        assert report["tokens_saved"] == report["tokens_before"] - report["tokens_after"] > 0
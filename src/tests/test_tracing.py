@@ -0,0 +1,100 @@
+import json
+import threading
+
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from src.utils.jsonl_writer import JsonlWriter
+from src.utils.tracing import TracedRoute, TracingMiddleware, span
+
+
+class Echo(BaseModel):
+    text: str
+
+
+def _blocking_work(text):
+    with span("provider", provider="Stub"):
+        with span("parse"):
+            return text.upper()
+
+
+def _app(tmp_path, sample_rate, force_secret=None):
+    app = FastAPI()
+    app.router.route_class = TracedRoute
+
+    @app.post("/api/echo", response_model=Echo)
+    async def echo(request: Echo):
+        return Echo(text=await run_in_threadpool(_blocking_work, request.text))
+
+    app.add_middleware(TracingMiddleware, path=str(tmp_path / "traces.jsonl"), sample_rate=sample_rate,
+                       force_secret=force_secret)
+    return TestClient(app)
+
+
+class TestTracing:
+
+    def test_span_is_a_no_op_outside_a_trace(self):
+        with span("provider") as attrs:
+            assert attrs is None
+
+    def test_sampled_request_gets_server_timing_and_trace_record(self, tmp_path):
+        # Leaving the client runs the lifespan shutdown, which flushes the trace writer
+        with _app(tmp_path, sample_rate=1.0) as client:
+            response = client.post("/api/echo", json={"text": "atp"})
+
+        assert response.json() == {"text": "ATP"}
+        metrics = [m.split(";")[0] for m in response.headers["server-timing"].split(", ")]
+        assert set(metrics) == {"validate", "endpoint", "serialize", "provider", "parse", "total"}
+
+        record = json.loads((tmp_path / "traces.jsonl").read_text())
+        assert record["trace_id"] == response.headers["x-trace-id"]
+        spans = {s["name"]: s for s in record["spans"]}
+        # Spans follow the request into the threadpool and nest there
+        assert spans["provider"]["parent"] == spans["endpoint"]["id"]
+        assert spans["parse"]["parent"] == spans["provider"]["id"]
+        assert spans["provider"]["provider"] == "Stub"
+
+    def test_unsampled_requests_are_untouched_unless_forced(self, tmp_path):
+        with _app(tmp_path, sample_rate=0.0, force_secret="s3cret") as client:
+            assert "server-timing" not in client.post("/api/echo", json={"text": "a"}).headers
+            assert "server-timing" not in client.post("/api/echo", json={"text": "a"},
+                                                      headers={"X-Cognify-Trace": "1"}).headers
+            assert "server-timing" in client.post("/api/echo", json={"text": "a"},
+                                                  headers={"X-Cognify-Trace": "s3cret"}).headers
+        assert len((tmp_path / "traces.jsonl").read_text().splitlines()) == 1
+
+    def test_force_header_is_ignored_without_a_secret(self, tmp_path):
+        with _app(tmp_path, sample_rate=0.0) as client:
+            for value in ("1", "true", ""):
+                assert "server-timing" not in client.post("/api/echo", json={"text": "a"},
+                                                          headers={"X-Cognify-Trace": value}).headers
+        assert not (tmp_path / "traces.jsonl").exists()
+
+    def test_trace_file_is_rotated_at_its_size_cap(self, tmp_path):
+        writer = JsonlWriter(tmp_path / "traces.jsonl", lambda item: f"{item}\n", max_bytes=4)
+        for item in ("one", "two", "three"):
+            writer.put(item)
+            writer.flush()
+
+        # Each append found the file at the cap: the previous line moved to .1, older ones are gone
+        assert (tmp_path / "traces.jsonl").read_text() == "three\n"
+        assert (tmp_path / "traces.jsonl.1").read_text() == "two\n"
+        assert writer.rotations == 2 and writer.written == 3
+
+    def test_full_writer_queue_drops_and_counts(self, tmp_path):
+        release = threading.Event()
+
+        def slow_line(item):
+            release.wait()
+            return json.dumps(item) + "\n"
+
+        writer = JsonlWriter(tmp_path / "out.jsonl", slow_line, max_queue=2)
+        accepted = [writer.put(i) for i in range(5)]
+        release.set()
+        writer.flush()
+
+        # The thread holds the first item; two more fit in the queue
+        assert accepted.count(False) == writer.dropped >= 2
+        assert writer.written == accepted.count(True)
@@ -0,0 +1,311 @@
+"""
+Offline bulk generation of study packs.
+
+Walks a directory of course PDFs and, for each one, extracts the text in a
+process pool (PyMuPDF, cleaned and chunk-indexed into the document store
+exactly like /api/upload-pdf), then generates its quiz, summary and
+glossary through ProductionFunctionCaller, a bounded number of documents at
+a time. Each study pack is written to the output directory as soon as its
+document is done and recorded in a checkpoint, so an interrupted run picks
+up where it stopped. Results also land in the shared cache and the artifact
+store, so the API serves them later without generating them again.
+
+Generations are booked to --user-id in the budget ledger, but that user has
+no daily limit unless --budget-usd sets one; documents a run leaves
+incomplete because the budget ran out are reported as such.
+
+Usage:
+    python src/tools/bulk_generate.py courses/ --out data/study_packs \\
+        --extract-workers 4 --concurrency 8
+    # Interrupted? Run the same command again: finished documents are skipped.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+PROJECT_ROOT = SRC_DIR.parent
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from load_test import app_output  # noqa: E402
+from utils.document_index import index_document  # noqa: E402
+from utils.document_store import atomic_write, get_document_store  # noqa: E402
+from utils.pdf_extraction import PAGE_SEPARATOR, extract_pdf_pages  # noqa: E402
+from utils.shared_cache import get_shared_cache, make_cache_key  # noqa: E402
+from utils.text_cleanup import clean_pdf_pages  # noqa: E402
+from utils.text_utils import topic_from_filename  # noqa: E402
+
+MODES = ("quiz", "summary", "glossary")
+DEFAULT_OUT = PROJECT_ROOT / "data" / "study_packs"
+CHECKPOINT_FILE = "checkpoint.jsonl"
+
+
+def find_pdfs(root: Path):
+    """Every PDF under `root`, in a stable order."""
+    return sorted(path for path in root.rglob("*") if path.is_file() and path.suffix.lower() == ".pdf")
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """
+    Append-only JSONL of finished documents, keyed by relative path and
+    content hash: a document edited since it was generated is done again.
+    Each record is flushed to disk before the next document is reported.
+    """
+
+    def __init__(self, path: Path, restart: bool = False):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if restart and self.path.exists():
+            self.path.unlink()
+        self.done = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # a record cut short by the interruption
+                    if record.get("complete"):
+                        self.done[(record["path"], record["sha256"])] = record
+        self._lock = threading.Lock()
+
+    def is_done(self, rel_path: str, sha256: str) -> bool:
+        return (rel_path, sha256) in self.done
+
+    def record(self, record: dict):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if record.get("complete"):
+                self.done[(record["path"], record["sha256"])] = record
+
+
+def extract_document(path: str, cleanup: bool = True):
+    """
+    Process-pool worker: (pages, cleanup report) for one PDF. Pages
+    unchanged since an earlier revision come from the shared page cache.
+    """
+    pages = extract_pdf_pages(Path(path).read_bytes(), get_shared_cache())
+    report = clean_pdf_pages(pages) if cleanup else None
+    return pages, report
+
+
+def store_document(pages, filename: str, sha256: str, cleanup_report, cleanup: bool = True) -> str:
+    """Stores and indexes extracted pages like /api/upload-pdf; returns the document_id."""
+    store = get_document_store()
+    metadata = {"filename": filename, "page_count": len(pages), "page_hashes": [page["hash"] for page in pages],
+                "pages_reused": sum(page["reused"] for page in pages)}
+    if cleanup_report is not None:
+        metadata["cleanup"] = cleanup_report
+    document_id = store.put(PAGE_SEPARATOR.join(page["text"] for page in pages), metadata)
+    index_document(store, document_id, pages)
+    pdf_cache = get_shared_cache()
+    if pdf_cache is not None:
+        # A later upload of the same file is answered without extracting it again
+        pdf_cache.set(make_cache_key("pdf", sha256, cleanup),
+                      json.dumps({"document_id": document_id, "page_count": len(pages)}))
+    return document_id
+
+
+def over_budget(engine, args) -> bool:
+    return engine.ledger is not None and engine.ledger.is_over_budget(args.user_id)
+
+
+def generate_pack(engine, document_id: str, topic: str, args):
+    """({mode: data}, {mode: error}) for one stored document."""
+    calls = {
+        "quiz": lambda: engine.generate_quiz(None, topic, args.difficulty, args.num_questions,
+                                             user_id=args.user_id, document_id=document_id),
+        "summary": lambda: engine.generate_summary(None, topic, user_id=args.user_id, document_id=document_id),
+        "glossary": lambda: engine.generate_glossary(None, topic, user_id=args.user_id, document_id=document_id),
+    }
+    generated, errors = {}, {}
+    for mode in args.modes:
+        try:
+            result = calls[mode]()
+        except Exception as e:
+            # Under the "reject" policy an exhausted budget raises
+            errors[mode] = f"over budget: {e}" if over_budget(engine, args) else str(e)
+            continue
+        if result is None or not isinstance(result.data, dict):
+            errors[mode] = "no usable output from any provider"
+        elif not result.cacheable and not args.allow_fallback:
+            # Left for a rerun rather than shipping placeholder or extractive output
+            reason = "over budget, so " if result.downgraded else ""
+            errors[mode] = f"{reason}only a fallback provider answered ({result.model})"
+        else:
+            generated[mode] = result.data
+    return generated, errors
+
+
+def process_document(engine, item, pages, cleanup_report, args, checkpoint):
+    """Stores one extracted document, generates its pack and checkpoints it. Runs on a generation thread."""
+    start = time.perf_counter()
+    rel_path, path, sha256 = item
+    topic = args.topic or topic_from_filename(path.name)
+    document_id = store_document(pages, path.name, sha256, cleanup_report, not args.no_cleanup)
+    generated, errors = generate_pack(engine, document_id, topic, args)
+
+    pack_path = args.out / Path(rel_path).with_suffix(".json")
+    pack_path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(pack_path, json.dumps({"source": rel_path, "sha256": sha256, "document_id": document_id,
+                                        "topic": topic, "page_count": len(pages), **generated,
+                                        "errors": errors}, indent=2))
+    record = {"path": rel_path, "sha256": sha256, "document_id": document_id, "pack": str(pack_path),
+              "complete": not errors, "failed": sorted(errors),
+              "over_budget": any(error.startswith("over budget") for error in errors.values()),
+              "seconds": round(time.perf_counter() - start, 3)}
+    checkpoint.record(record)
+    return record
+
+
+def log(message: str):
+    """Progress goes to stderr, which stays visible while the engine's own output is silenced."""
+    print(message, file=sys.stderr, flush=True)
+
+
+def run(args, engine=None):
+    """Processes every unfinished PDF under args.input_dir; returns the run report."""
+    args.out = Path(args.out)
+    checkpoint = Checkpoint(args.out / CHECKPOINT_FILE, restart=args.restart)
+    todo, skipped = [], 0
+    for path in find_pdfs(Path(args.input_dir)):
+        rel_path = path.relative_to(args.input_dir).as_posix()
+        sha256 = file_sha256(path)
+        if checkpoint.is_done(rel_path, sha256):
+            skipped += 1
+        else:
+            todo.append((rel_path, path, sha256))
+    log(f"[BULK] {len(todo)} document(s) to generate, {skipped} already done per {checkpoint.path}")
+    if engine is None:
+        from ai.production_caller import ProductionFunctionCaller
+        engine = ProductionFunctionCaller()
+    if engine.ledger is not None:
+        # Spend is still booked to the run's user; only --budget-usd caps it
+        engine.ledger.limits[args.user_id] = args.budget_usd
+
+    # Extracted documents waiting for generation are held in memory, so only
+    # this many are extracted ahead of the generation threads
+    window = args.extract_workers + args.concurrency
+    pending = list(reversed(todo))
+    completed, failed, budget_failed = 0, 0, 0
+    start = time.perf_counter()
+    extract_pool = ProcessPoolExecutor(max_workers=args.extract_workers)
+    generate_pool = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="bulk-generate")
+    extracting, generating = {}, {}
+    interrupted = False
+    try:
+        while pending or extracting or generating:
+            while pending and len(extracting) + len(generating) < window:
+                item = pending.pop()
+                extracting[extract_pool.submit(extract_document, str(item[1]), not args.no_cleanup)] = item
+            done, _ = wait([*extracting, *generating], return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in extracting:
+                    item = extracting.pop(future)
+                    try:
+                        pages, cleanup_report = future.result()
+                    except Exception as e:
+                        failed += 1
+                        log(f"[BULK] {item[0]}: extraction failed: {e}")
+                        continue
+                    generating[generate_pool.submit(process_document, engine, item, pages, cleanup_report,
+                                                    args, checkpoint)] = item
+                    continue
+                item = generating.pop(future)
+                try:
+                    record = future.result()
+                except Exception as e:
+                    failed += 1
+                    log(f"[BULK] {item[0]}: failed: {e}")
+                    continue
+                completed += record["complete"]
+                failed += not record["complete"]
+                budget_failed += record["over_budget"]
+                elapsed_min = (time.perf_counter() - start) / 60
+                failed_modes = ", ".join(record["failed"]) + (", over budget" if record["over_budget"] else "")
+                status = "done" if record["complete"] else f"incomplete ({failed_modes})"
+                log(f"[BULK] {completed + failed}/{len(todo)} {item[0]}: {status} in {record['seconds']:.1f}s "
+                    f"({(completed + failed) / elapsed_min:.1f} docs/min)")
+    except KeyboardInterrupt:
+        interrupted = True
+        log("[BULK] Interrupted: letting documents in flight finish; rerun the same command to resume")
+    finally:
+        extract_pool.shutdown(wait=not interrupted, cancel_futures=True)
+        # Documents already being generated finish and are checkpointed
+        generate_pool.shutdown(wait=True, cancel_futures=True)
+        if engine.artifacts is not None:
+            engine.artifacts.flush()
+
+    elapsed = time.perf_counter() - start
+    report = {"documents": len(todo), "completed": completed, "failed": failed, "skipped": skipped,
+              "over_budget": budget_failed, "interrupted": interrupted, "elapsed_s": round(elapsed, 2),
+              "docs_per_minute": round((completed + failed) / (elapsed / 60), 2) if elapsed else 0.0}
+    log(f"[BULK] {completed} done, {failed} failed, {skipped} skipped in {elapsed:.1f}s "
+        f"({report['docs_per_minute']} docs/min)")
+    if budget_failed:
+        log(f"[BULK] {budget_failed} document(s) left incomplete because {args.user_id} went over its daily "
+            f"budget of ${args.budget_usd:.2f}; rerun with a higher --budget-usd, or without it for no limit")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate study packs for a directory of PDFs")
+    parser.add_argument("input_dir", type=Path, help="Directory searched recursively for PDFs")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT,
+                        help="Where study packs (one JSON per PDF) and the checkpoint are written")
+    parser.add_argument("--modes", type=lambda text: [m for m in text.split(",") if m], default=list(MODES),
+                        help="Comma-separated subset of quiz,summary,glossary")
+    parser.add_argument("--topic", help="Topic for every document (default: from each file name)")
+    parser.add_argument("--difficulty", default="medium")
+    parser.add_argument("--num-questions", type=int, default=10)
+    parser.add_argument("--user-id", default="bulk", help="User the generations are booked to")
+    parser.add_argument("--budget-usd", type=float,
+                        help="Daily budget for --user-id (default: no limit for this run)")
+    parser.add_argument("--extract-workers", type=int, default=os.cpu_count() or 2,
+                        help="Processes extracting PDF text")
+    parser.add_argument("--concurrency", type=int, default=4, help="Documents being generated at once")
+    parser.add_argument("--allow-fallback", action="store_true",
+                        help="Accept extractive/mock output instead of leaving the document for a rerun")
+    parser.add_argument("--no-cleanup", action="store_true", help="Store the raw extracted text")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and redo everything")
+    parser.add_argument("--json", help="Also write the run report to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the engine's own log output")
+    args = parser.parse_args()
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(sorted(unknown))}")
+
+    args.input_dir, args.out = args.input_dir.resolve(), args.out.resolve()
+    if args.json:
+        args.json = Path(args.json).resolve()
+    os.chdir(PROJECT_ROOT)  # cost_tracking logs relative to the project root
+    with app_output(args):
+        report = run(args)
+    if args.json:
+        Path(args.json).write_text(json.dumps({"config": vars(args), "report": report}, indent=2, default=str))
+        log(f"[BULK] Report written to {args.json}")
+    if report["interrupted"]:
+        sys.exit(130)
+
+if __name__ == "__main__":
+    main()
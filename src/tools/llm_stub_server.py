@@ -0,0 +1,173 @@
+"""
+Stub OpenAI-compatible model server.
+
+Serves `/v1/chat/completions`, `/v1/completions` (with list prompts, the
+batched form) and `/v1/models` on a local port with canned quiz, summary or
+glossary JSON, after a configurable delay. A batched request costs the
+base latency once plus a small per-prompt increment, the way an inference
+server batches on the GPU. Used by the LocalOpenAIProvider tests and
+benchmarks, and handy for trying the provider without a model.
+
+Usage:
+    python src/tools/llm_stub_server.py --port 8081 --latency-ms 200 --batch-latency-ms 10
+"""
+
+import argparse
+import json
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_MODEL = "stub-model"
+
+
+def canned_content(prompt: str) -> str:
+    """Valid JSON in the shape the prompt asks for (quiz sized to its question count)."""
+    head = prompt[:120].lower()
+    if "summarize" in head:
+        return json.dumps({"topic": "Stub", "summary": "Stub summary of the provided text."})
+    if "key terms" in head:
+        return json.dumps({"topic": "Stub", "terms": [
+            {"term": f"Term {i}", "definition": f"Stub definition {i}."} for i in range(1, 6)]})
+    match = re.search(r"Generate an? (\d+)-question", prompt)
+    count = int(match.group(1)) if match else 5
+    return json.dumps({"topic": "Stub", "questions": [
+        {"id": i, "question": f"Stub question {i}?",
+         "options": ["A", "B", "C", "D"], "answer": "A. A", "explanation": "Stub."}
+        for i in range(1, count + 1)]})
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with the stub's settings and request counters."""
+    daemon_threads = True
+    # The default backlog of 5 drops connection bursts (1 s SYN retransmits)
+    request_queue_size = 128
+
+    def __init__(self, address, latency_ms=0.0, batch_latency_ms=0.0, fail_every=0, list_prompts=True,
+                 choice_index=True):
+        super().__init__(address, _Handler)
+        self.latency_ms = latency_ms
+        self.batch_latency_ms = batch_latency_ms
+        # Every Nth request answers 500 (0: never)
+        self.fail_every = fail_every
+        # False: /completions answers 400 to list prompts, as Ollama does
+        self.list_prompts = list_prompts
+        # False: /completions choices come without their "index"
+        self.choice_index = choice_index
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.prompts = 0
+        self.connections = 0
+        self.paths = set()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, so pooled clients reuse their connections
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this, Nagle plus
+        # delayed ACKs add ~40 ms to every keep-alive response
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/v1/models":
+            return self._send_json(200, {"object": "list", "data": [{"id": STUB_MODEL, "object": "model"}]})
+        self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": {"message": "Invalid JSON"}})
+
+        if self.path == "/v1/chat/completions":
+            prompts = [request.get("messages", [{}])[-1].get("content", "")]
+        elif self.path == "/v1/completions":
+            prompt = request.get("prompt", "")
+            if isinstance(prompt, list) and not self.server.list_prompts:
+                return self._send_json(400, {"error": {"message": "prompt must be a string"}})
+            prompts = prompt if isinstance(prompt, list) else [prompt]
+        else:
+            return self._send_json(404, {"error": {"message": "Not found"}})
+
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.paths.add(self.path)
+            server.prompts += len(prompts)
+            failing = server.fail_every and server.requests % server.fail_every == 0
+        delay_ms = server.latency_ms + server.batch_latency_ms * (len(prompts) - 1)
+        if delay_ms:
+            time.sleep(delay_ms / 1000.0)
+        if failing:
+            return self._send_json(500, {"error": {"message": "Stub injected failure"}})
+
+        texts = [canned_content(prompt) for prompt in prompts]
+        usage = {"prompt_tokens": sum(len(p) // 4 for p in prompts),
+                 "completion_tokens": sum(len(t) // 4 for t in texts)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        if self.path == "/v1/chat/completions":
+            choices = [{"index": 0, "message": {"role": "assistant", "content": texts[0]},
+                        "finish_reason": "stop"}]
+            kind = "chat.completion"
+        else:
+            choices = [{"index": i, "text": text, "finish_reason": "stop"} for i, text in enumerate(texts)]
+            if not server.choice_index:
+                for choice in choices:
+                    del choice["index"]
+            kind = "text_completion"
+        self._send_json(200, {"id": f"stub-{server.requests}", "object": kind,
+                              "model": request.get("model", STUB_MODEL), "choices": choices, "usage": usage})
+
+
+def start_stub_server(host="127.0.0.1", port=0, **settings) -> StubLLMServer:
+    """Starts the stub on a background thread (port 0 picks a free port); call .shutdown() to stop."""
+    server = StubLLMServer((host, port), **settings)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, name="llm-stub",
+                     daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible model server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Delay per request")
+    parser.add_argument("--batch-latency-ms", type=float, default=10.0,
+                        help="Extra delay per additional prompt in a batched request")
+    args = parser.parse_args()
+
+    server = StubLLMServer((args.host, args.port), latency_ms=args.latency_ms,
+                           batch_latency_ms=args.batch_latency_ms)
+    print(f"Stub model server on {server.base_url} (model {STUB_MODEL!r})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+In-process load generator for the Cognify API.
+
+Drives the FastAPI app through an ASGI transport (no network, no uvicorn) at
+a target request rate using an open-loop schedule: requests are started on
+time whether or not earlier ones have finished, so queueing shows up in the
+latency numbers the way it would in production. The AI engine runs against
+MockProvider with a configurable latency distribution and error rate.
+
+Usage:
+    python src/tools/load_test.py --rps 20 --duration 30 \\
+        --mock-latency-ms 1500 --mock-jitter-ms 500 --mock-distribution lognormal
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+PROJECT_ROOT = SRC_DIR.parent
+
+SAMPLE_TEXT = (
+    "Photosynthesis is the process by which green plants convert light energy into chemical "
+    "energy. Chlorophyll in the chloroplasts absorbs light, and the light reactions split water "
+    "to release oxygen. The Calvin cycle then fixes carbon dioxide into glucose. Stomata regulate "
+    "gas exchange, balancing carbon dioxide intake against water loss through transpiration. "
+) * 8
+
+ENDPOINTS = {
+    "quiz": ("/api/generate-quiz", lambda rng: {
+        "context_text": SAMPLE_TEXT, "topic": "Photosynthesis",
+        "difficulty": rng.choice(["easy", "medium", "hard"]), "num_questions": rng.randint(3, 10),
+    }),
+    "summary": ("/api/generate-summary", lambda rng: {
+        "context_text": SAMPLE_TEXT, "topic": "Photosynthesis",
+    }),
+    "glossary": ("/api/generate-glossary", lambda rng: {
+        "context_text": SAMPLE_TEXT, "topic": "Photosynthesis",
+    }),
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    # pct * n / 100 rather than pct / 100 * n: 7 / 100 * 100 is 7.000000000000001, which would round up
+    rank = max(0, min(len(values) - 1, math.ceil(pct * len(values) / 100.0) - 1))
+    return values[rank]
+
+
+def summarize(samples, elapsed_s):
+    """
+    Aggregates (name, latency_s, ok) samples into per-name stats:
+    count, throughput, p50/p95/p99 latency in ms and error rate.
+    """
+    by_name = {}
+    for name, latency, ok in samples:
+        by_name.setdefault(name, []).append((latency, ok))
+    by_name["ALL"] = [(latency, ok) for _, latency, ok in samples]
+
+    report = {}
+    for name, rows in by_name.items():
+        latencies = [latency * 1000 for latency, _ in rows]
+        errors = sum(1 for _, ok in rows if not ok)
+        report[name] = {
+            "requests": len(rows),
+            "throughput_rps": round(len(rows) / elapsed_s, 2) if elapsed_s else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1),
+            "error_rate": round(errors / len(rows), 4) if rows else 0.0,
+        }
+    return report
+
+
+def print_report(report, title="Load test report"):
+    print(f"\n{title}")
+    print(f"{'endpoint':<12}{'requests':>9}{'rps':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    for name, row in report.items():
+        print(f"{name:<12}{row['requests']:>9}{row['throughput_rps']:>8}{row['p50_ms']:>10}"
+              f"{row['p95_ms']:>10}{row['p99_ms']:>10}{row['error_rate']:>9.1%}")
+
+
+def load_app():
+    """Imports the FastAPI app after the environment has been configured."""
+    sys.path.insert(0, str(SRC_DIR))
+    import main
+    return main.app
+
+
+async def send(client, name, path, payload, samples):
+    start = time.perf_counter()
+    try:
+        response = await client.post(path, json=payload)
+        ok = response.status_code < 400
+    except Exception as e:
+        print(f"[ERROR] {name} request failed: {e}")
+        ok = False
+    samples.append((name, time.perf_counter() - start, ok))
+
+
+async def run_load(app, rps, duration_s, mix, seed=None):
+    """Open-loop load at `rps` for `duration_s`; returns (samples, elapsed_s)."""
+    import httpx
+
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    total = int(rps * duration_s)
+    samples = []
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://cognify.local",
+                                 timeout=None) as client:
+        start = time.perf_counter()
+        tasks = []
+        for i in range(total):
+            delay = start + i / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = rng.choices(names, weights=weights)[0]
+            path, make_payload = ENDPOINTS[name]
+            tasks.append(asyncio.create_task(send(client, name, path, make_payload(rng), samples)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    return samples, elapsed
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}' (choose from {list(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def add_mock_arguments(parser):
+    """Options for the simulated provider, shared with the replay tool."""
+    parser.add_argument("--mock-latency-ms", type=float, default=1000.0)
+    parser.add_argument("--mock-jitter-ms", type=float, default=250.0)
+    parser.add_argument("--mock-distribution", default="lognormal",
+                        choices=["fixed", "normal", "lognormal", "exponential"])
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache", action="store_true", help="Keep the shared response cache on")
+    parser.add_argument("--verbose", action="store_true", help="Show the app's own log output")
+
+
+def configure_mock_environment(args):
+    """Routes everything to the simulated provider; no real spend, no budget interference."""
+    os.environ.pop("GOOGLE_API_KEY", None)
+    # The extractive engine would answer before the simulated provider could
+    os.environ["COGNIFY_EXTRACTIVE_ENABLED"] = "0"
+    os.environ["COGNIFY_MOCK_LATENCY_MS"] = str(args.mock_latency_ms)
+    os.environ["COGNIFY_MOCK_JITTER_MS"] = str(args.mock_jitter_ms)
+    os.environ["COGNIFY_MOCK_DISTRIBUTION"] = args.mock_distribution
+    os.environ["COGNIFY_MOCK_ERROR_RATE"] = str(args.mock_error_rate)
+    os.environ["COGNIFY_MOCK_SEED"] = str(args.seed)
+    os.environ["COGNIFY_BUDGET_ENABLED"] = "0"
+    if not args.cache:
+        os.environ["COGNIFY_CACHE_ENABLED"] = "0"
+    os.chdir(PROJECT_ROOT)  # cost_tracking logs relative to the project root
+
+
+def app_output(args):
+    """Context manager that silences the app's logging unless --verbose."""
+    if args.verbose:
+        return contextlib.nullcontext()
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process load generator for the Cognify API")
+    parser.add_argument("--rps", type=float, default=10.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("quiz=1,summary=1,glossary=1"),
+                        help="Endpoint weights, e.g. quiz=2,summary=1,glossary=1")
+    parser.add_argument("--json", help="Also write the report to this file")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    configure_mock_environment(args)
+
+    print(f"[LOAD] {args.rps} rps for {args.duration}s, mix={args.mix}")
+    with app_output(args):
+        app = load_app()
+        samples, elapsed = asyncio.run(run_load(app, args.rps, args.duration, args.mix, args.seed))
+    report = summarize(samples, elapsed)
+    print_report(report)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"config": vars(args), "report": report}, indent=2,
+                                              default=str))
+        print(f"[LOAD] Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Traffic replay for the Cognify API.
+
+Reads recorded traffic (JSONL) and replays it with the original inter-arrival
+times, at 1x or accelerated speed, against a running server or the app
+in-process (MockProvider with a configurable latency distribution). Reports
+per-endpoint latency and error rates, and the deltas between two builds.
+
+Accepted record formats, one JSON object per line:
+  * Request recordings from COGNIFY_RECORD_REQUESTS:
+        {"timestamp": ..., "path": "/api/generate-quiz", "body": {...}}
+  * Cost audit logs (logs/cost_audit.jsonl):
+        {"timestamp": ..., "query_type": "generate_quiz", ...}
+    These carry no request body, so one is synthesized from --context-file.
+
+Usage:
+    # In-process at 10x speed, saving the report
+    python src/tools/replay.py run logs/cost_audit.jsonl --speed 10 --out before.json
+
+    # Two running builds, same trace, deltas printed at the end
+    python src/tools/replay.py run traffic.jsonl --base-url http://127.0.0.1:8000 \\
+        --candidate-url http://127.0.0.1:8001
+
+    # Compare two saved reports
+    python src/tools/replay.py compare before.json after.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from load_test import (SAMPLE_TEXT, add_mock_arguments, app_output,  # noqa: E402
+                       configure_mock_environment, load_app, print_report, summarize)
+
+QUERY_TYPE_PATHS = {
+    "generate_quiz": "/api/generate-quiz",
+    "generate_summary": "/api/generate-summary",
+    "generate_glossary": "/api/generate-glossary",
+}
+PATH_NAMES = {path: query_type.replace("generate_", "") for query_type, path in QUERY_TYPE_PATHS.items()}
+
+
+def load_trace(path, context_text, topic="Study Material", limit=None):
+    """Parses a recording into (offset_s, name, path, body) tuples, sorted by time."""
+    events = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                ts = datetime.fromisoformat(record["timestamp"]).timestamp()
+            except (ValueError, KeyError):
+                continue
+
+            api_path = record.get("path") or QUERY_TYPE_PATHS.get(record.get("query_type"))
+            if api_path not in PATH_NAMES:
+                continue
+            body = record.get("body")
+            if not isinstance(body, dict):
+                body = {"context_text": context_text, "topic": topic}
+                if api_path == QUERY_TYPE_PATHS["generate_quiz"]:
+                    body.update({"difficulty": "medium", "num_questions": 5})
+                if record.get("user_id"):
+                    body["user_id"] = record["user_id"]
+            events.append((ts, PATH_NAMES[api_path], api_path, body))
+
+    events.sort(key=lambda e: e[0])
+    if limit:
+        events = events[:limit]
+    if not events:
+        return []
+    first = events[0][0]
+    return [(ts - first, name, api_path, body) for ts, name, api_path, body in events]
+
+
+def schedule(trace, speed, max_gap_s):
+    """
+    Converts recorded offsets into replay offsets: divided by `speed`, with
+    idle gaps longer than `max_gap_s` (e.g. overnight) clamped.
+    """
+    scheduled = []
+    previous_recorded = 0.0
+    replay_at = 0.0
+    for offset, name, api_path, body in trace:
+        gap = (offset - previous_recorded) / speed
+        if max_gap_s is not None:
+            gap = min(gap, max_gap_s)
+        replay_at += gap
+        previous_recorded = offset
+        scheduled.append((replay_at, name, api_path, body))
+    return scheduled
+
+
+async def _send(client, name, api_path, body, samples):
+    start = time.perf_counter()
+    try:
+        response = await client.post(api_path, json=body)
+        ok = response.status_code < 400
+    except Exception as e:
+        print(f"[ERROR] {name} request failed: {e}")
+        ok = False
+    samples.append((name, time.perf_counter() - start, ok))
+
+
+async def replay(client, scheduled):
+    """Fires each request at its scheduled offset; returns (samples, elapsed_s)."""
+    samples = []
+    tasks = []
+    start = time.perf_counter()
+    for at, name, api_path, body in scheduled:
+        delay = start + at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(_send(client, name, api_path, body, samples)))
+    await asyncio.gather(*tasks)
+    return samples, time.perf_counter() - start
+
+
+async def replay_against(target, scheduled, timeout_s):
+    import httpx
+
+    if isinstance(target, str):
+        client = httpx.AsyncClient(base_url=target, timeout=timeout_s)
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=target),
+                                   base_url="http://cognify.local", timeout=timeout_s)
+    async with client:
+        return await replay(client, scheduled)
+
+
+def compare_reports(before, after):
+    """Per-endpoint deltas (after - before) for latency percentiles and error rate."""
+    deltas = {}
+    for name in sorted(set(before) | set(after)):
+        if name not in before or name not in after:
+            continue
+        deltas[name] = {
+            key: round(after[name][key] - before[name][key], 4)
+            for key in ("p50_ms", "p95_ms", "p99_ms", "error_rate", "throughput_rps")
+        }
+    return deltas
+
+
+def print_deltas(deltas, before_label="before", after_label="after"):
+    print(f"\nDelta ({after_label} - {before_label})")
+    print(f"{'endpoint':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>10}{'rps':>8}")
+    for name, row in deltas.items():
+        print(f"{name:<12}{row['p50_ms']:>+10.1f}{row['p95_ms']:>+10.1f}{row['p99_ms']:>+10.1f}"
+              f"{row['error_rate']:>+10.1%}{row['throughput_rps']:>+8.2f}")
+
+
+def read_context(path):
+    if not path:
+        return SAMPLE_TEXT
+    path = Path(path)
+    if path.suffix.lower() == ".pdf":
+        sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+        from utils.pdf_extraction import extract_pdf_text
+        return extract_pdf_text(path.read_bytes())[0]
+    return path.read_text(encoding="utf-8")
+
+
+def cmd_run(args):
+    out_path = Path(args.out).resolve() if args.out else None
+    trace = load_trace(args.trace, read_context(args.context_file), limit=args.limit)
+    if not trace:
+        print(f"[REPLAY] No replayable records in {args.trace}")
+        return 1
+    scheduled = schedule(trace, args.speed, args.max_gap)
+    print(f"[REPLAY] {len(scheduled)} requests over {scheduled[-1][0]:.1f}s "
+          f"(speed {args.speed}x, gaps capped at {args.max_gap}s)")
+
+    targets = []
+    if args.base_url:
+        targets.append(("baseline", args.base_url))
+        if args.candidate_url:
+            targets.append(("candidate", args.candidate_url))
+    else:
+        configure_mock_environment(args)
+        with app_output(args):
+            targets.append(("in-process", load_app()))
+
+    reports = {}
+    for label, target in targets:
+        with app_output(args):
+            samples, elapsed = asyncio.run(replay_against(target, scheduled, args.timeout))
+        reports[label] = summarize(samples, elapsed)
+        print_report(reports[label], title=f"Replay report: {label}")
+
+    if len(reports) == 2:
+        print_deltas(compare_reports(reports["baseline"], reports["candidate"]), "baseline", "candidate")
+
+    if out_path:
+        out_path.write_text(json.dumps({
+            "trace": str(args.trace), "speed": args.speed, "requests": len(scheduled),
+            "reports": reports,
+        }, indent=2))
+        print(f"[REPLAY] Report written to {out_path}")
+    return 0
+
+
+def cmd_compare(args):
+    def first_report(path):
+        reports = json.loads(Path(path).read_text())["reports"]
+        return next(iter(reports.values()))
+
+    print_deltas(compare_reports(first_report(args.before), first_report(args.after)),
+                 Path(args.before).name, Path(args.after).name)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Cognify traffic")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Replay a recorded trace")
+    run.add_argument("trace", help="JSONL recording or cost_audit.jsonl")
+    run.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier")
+    run.add_argument("--max-gap", type=float, default=5.0,
+                     help="Cap idle gaps at this many replay seconds (default 5)")
+    run.add_argument("--limit", type=int, help="Replay only the first N requests")
+    run.add_argument("--context-file", help="Text or PDF used for records without a body")
+    run.add_argument("--base-url", help="Replay against a running server instead of in-process")
+    run.add_argument("--candidate-url", help="Second server; prints deltas against --base-url")
+    run.add_argument("--timeout", type=float, default=120.0)
+    run.add_argument("--out", help="Write the report(s) to this JSON file")
+    add_mock_arguments(run)
+    run.set_defaults(func=cmd_run)
+
+    compare = sub.add_parser("compare", help="Deltas between two saved replay reports")
+    compare.add_argument("before")
+    compare.add_argument("after")
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+Persistent store of generated study materials (SQLite WAL, shared by every
+worker on the host).
+
+A quiz, summary or glossary used to exist only in its response, so showing
+a user's history or downloading a result again meant generating it again.
+Every successful `generate_*` result is now saved with its user, mode,
+topic and the content hash of its document. Saving happens on a background
+writer thread, in batches, so the request never waits on the disk. Reads
+page through a user's artifacts newest first by id (an index seek per page,
+however long the history), and at startup the most recent summaries and
+glossaries are written back into the shared cache if it lost them.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_ARTIFACT_PATH = PROJECT_ROOT / "cache" / "artifacts.db"
+
+DEFAULT_MAX_QUEUE = 1000
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+DEFAULT_WARMUP = 200
+ANONYMOUS = "anonymous"
+# Columns of a listed artifact; the content itself is only returned by get()
+_SUMMARY_COLUMNS = "id, user_id, mode, topic, document_hash, model, created"
+
+
+def topic_key(topic: str) -> str:
+    """Topics are matched case- and whitespace-insensitively."""
+    return " ".join(str(topic).lower().split())
+
+
+def _row(columns: str, row) -> dict:
+    record = dict(zip((c.strip() for c in columns.split(",")), row))
+    if "data" in record:
+        record["data"] = json.loads(record["data"])
+    return record
+
+
+class ArtifactStore:
+    """
+    Generated quizzes, summaries and glossaries, indexed by user and by
+    (document hash, mode, topic). With `background=True` saves are queued
+    for a writer thread (dropped, and counted, when the queue is full);
+    otherwise they are written before `save` returns.
+    """
+
+    def __init__(self, path=None, background: bool = True, max_queue: int = DEFAULT_MAX_QUEUE):
+        self.path = Path(path) if path else DEFAULT_ARTIFACT_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.saved = 0
+        self.dropped = 0
+        self.warmed = 0
+        self._init_schema()
+
+        self._queue = None
+        if background:
+            self._queue = queue.Queue(maxsize=max_queue)
+            threading.Thread(target=self._write_loop, name="artifact-writer", daemon=True).start()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread and per process (connections must not cross a fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self):
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " user_id TEXT NOT NULL,"
+            " mode TEXT NOT NULL,"
+            " topic TEXT NOT NULL,"
+            " topic_key TEXT NOT NULL,"
+            " document_hash TEXT NOT NULL,"
+            " model TEXT,"
+            # Set when `data` is exactly what the shared cache holds under this key
+            " cache_key TEXT,"
+            " data TEXT NOT NULL,"
+            " created REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_user ON artifacts(user_id, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_document "
+                     "ON artifacts(document_hash, mode, topic_key, id)")
+
+    # ---------- writes ----------
+
+    def save(self, user_id: Optional[str], mode: str, topic: str, document_hash: str, data,
+             model: Optional[str] = None, cache_key: Optional[str] = None):
+        """Records one generated artifact (queued for the writer thread when running in the background)."""
+        row = (user_id or ANONYMOUS, mode, str(topic), topic_key(topic), document_hash, model, cache_key,
+               json.dumps(data), time.time())
+        if self._queue is None:
+            self._write([row])
+            return
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+
+    def _write(self, rows):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO artifacts (user_id, mode, topic, topic_key, document_hash, model, cache_key, "
+                "data, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._stats_lock:
+            self.saved += len(rows)
+
+    def _write_loop(self):
+        while True:
+            rows = [self._queue.get()]
+            # Whatever queued up behind the first row goes in the same transaction
+            while True:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(rows)
+            except Exception as e:
+                with self._stats_lock:
+                    self.dropped += len(rows)
+                print(f"[WARNING] Artifact store write failed: {e}")
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Blocks until every queued artifact has been written (tests, shutdown)."""
+        if self._queue is not None:
+            self._queue.join()
+
+    # ---------- reads ----------
+
+    def get(self, artifact_id: int, user_id: Optional[str]) -> Optional[dict]:
+        """One of the user's artifacts with its content, or None (also when it is someone else's)."""
+        columns = f"{_SUMMARY_COLUMNS}, data"
+        row = self._conn().execute(f"SELECT {columns} FROM artifacts WHERE id = ? AND user_id = ?",
+                                   (artifact_id, user_id or ANONYMOUS)).fetchone()
+        return _row(columns, row) if row is not None else None
+
+    def list_for_user(self, user_id: Optional[str], limit: int = DEFAULT_PAGE_SIZE,
+                      before: Optional[int] = None, mode: Optional[str] = None):
+        """
+        (artifacts, next_before): a page of the user's artifacts, newest
+        first, without their content. Pass `next_before` back as `before`
+        for the next page; it is None on the last page.
+        """
+        return self._page("user_id = ?", [user_id or ANONYMOUS], limit, before, mode)
+
+    def list_for_document(self, document_hash: str, mode: Optional[str] = None, topic: Optional[str] = None,
+                          limit: int = DEFAULT_PAGE_SIZE, before: Optional[int] = None):
+        """Like list_for_user, for every artifact generated from one document (optionally one topic)."""
+        where, params = "document_hash = ?", [document_hash]
+        if topic is not None:
+            where += " AND topic_key = ?"
+            params.append(topic_key(topic))
+        return self._page(where, params, limit, before, mode)
+
+    def _page(self, where: str, params, limit, before, mode):
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        if mode is not None:
+            where += " AND mode = ?"
+            params = [*params, mode]
+        if before is not None:
+            where += " AND id < ?"
+            params = [*params, before]
+        # Keyset paging: each page is one seek into the index, not an OFFSET scan
+        rows = self._conn().execute(
+            f"SELECT {_SUMMARY_COLUMNS} FROM artifacts WHERE {where} ORDER BY id DESC LIMIT ?",
+            [*params, limit + 1]).fetchall()
+        artifacts = [_row(_SUMMARY_COLUMNS, row) for row in rows[:limit]]
+        return artifacts, (artifacts[-1]["id"] if len(rows) > limit else None)
+
+    # ---------- cache warm-up ----------
+
+    def warm(self, cache, limit: int = DEFAULT_WARMUP, max_age_s: Optional[float] = None) -> int:
+        """
+        Writes the `limit` most recent cacheable artifacts (younger than
+        `max_age_s`, when given) that the shared cache no longer holds back
+        into it, oldest first so the newest end up most recently used.
+        Returns how many were written.
+        """
+        if cache is None or limit <= 0:
+            return 0
+        since = time.time() - max_age_s if max_age_s else 0
+        rows = self._conn().execute(
+            "SELECT cache_key, data FROM artifacts WHERE cache_key IS NOT NULL AND created >= ? "
+            "ORDER BY id DESC LIMIT ?", (since, limit)).fetchall()
+        latest = {}
+        for key, data in rows:
+            latest.setdefault(key, data)
+        missing = cache.missing(list(latest))
+        for key in reversed([key for key in latest if key in missing]):
+            cache.set(key, latest[key])
+        with self._stats_lock:
+            self.warmed += len(missing)
+        return len(missing)
+
+    def clear(self):
+        self._conn().execute("DELETE FROM artifacts")
+
+    def stats(self) -> dict:
+        artifacts, users = self._conn().execute(
+            "SELECT COUNT(*), COUNT(DISTINCT user_id) FROM artifacts").fetchone()
+        with self._stats_lock:
+            return {
+                "path": str(self.path),
+                "artifacts": artifacts,
+                "users": users,
+                "saved": self.saved,
+                "dropped": self.dropped,
+                "queued": self._queue.qsize() if self._queue is not None else 0,
+                "warmed": self.warmed,
+            }
+
+
+_artifact_store: Optional[ArtifactStore] = None
+_artifact_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> Optional[ArtifactStore]:
+    """
+    Process-wide artifact store configured from the environment, or None
+    when disabled with COGNIFY_ARTIFACTS_ENABLED=0.
+    """
+    global _artifact_store
+    if os.getenv("COGNIFY_ARTIFACTS_ENABLED", "1") == "0":
+        return None
+    if _artifact_store is None:
+        with _artifact_store_lock:
+            if _artifact_store is None:
+                _artifact_store = ArtifactStore(
+                    path=os.getenv("COGNIFY_ARTIFACTS_PATH") or None,
+                    max_queue=int(os.getenv("COGNIFY_ARTIFACTS_MAX_QUEUE", DEFAULT_MAX_QUEUE)),
+                )
+    return _artifact_store
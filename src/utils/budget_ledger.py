@@ -0,0 +1,238 @@
+"""
+Per-user / per-tenant spending ledger.
+
+The week-8 caller enforced `cost_limit_usd` per session; this brings the same
+control to the production engine without a database round-trip per request.
+Spend is accumulated in memory from the `track_cost` log entries and checked
+with a dict lookup on the hot path. A background thread periodically flushes
+the unflushed deltas into a SQLite file (atomic `spent = spent + delta`
+upserts) and reloads the merged totals, so every uvicorn worker converges on
+the same view of each user's spend.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_LEDGER_PATH = PROJECT_ROOT / "cache" / "budget_ledger.db"
+
+DEFAULT_USER_BUDGET_USD = 1.00
+DEFAULT_FLUSH_INTERVAL_S = 5.0
+ANONYMOUS = "anonymous"
+
+
+class BudgetExceededError(Exception):
+    """Raised when a user is over budget and the policy is 'reject'."""
+    def __init__(self, user_id: str, spent: float, limit: float):
+        self.user_id = user_id
+        self.spent = spent
+        self.limit = limit
+        super().__init__(
+            f"Budget exceeded for '{user_id}': spent ${spent:.4f} of ${limit:.2f} this period."
+        )
+
+
+def _current_period() -> str:
+    """Budgets reset daily (UTC)."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+class BudgetLedger:
+    """
+    In-memory cost ledger with periodic durable flush.
+
+    `limits` maps a user or tenant id to its budget, or to None for no
+    limit; ids not listed get `default_limit_usd`. Requests without a user id
+    are booked to "anonymous" and share its budget: the id comes from the
+    request body, so leaving it out must not escape the limit. Unlimited
+    anonymous use is opted into with `{"anonymous": None}`.
+    """
+
+    def __init__(self, path=None, default_limit_usd: float = DEFAULT_USER_BUDGET_USD,
+                 limits: Optional[dict] = None, policy: str = "downgrade",
+                 flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S, autoflush: bool = True):
+        if policy not in ("downgrade", "reject"):
+            raise ValueError(f"Unknown budget policy: {policy}")
+        self.path = Path(path) if path else DEFAULT_LEDGER_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.default_limit_usd = default_limit_usd
+        self.limits = dict(limits or {})
+        self.policy = policy
+        self.flush_interval_s = flush_interval_s
+
+        self._period = _current_period()
+        self._spent = {}     # user -> merged total (durable + local unflushed)
+        self._pending = {}   # user -> local delta not yet flushed
+        self._lock = threading.Lock()
+
+        self._init_schema()
+        self._reload()
+
+        self._stop = threading.Event()
+        self._flusher = None
+        if autoflush:
+            self._flusher = threading.Thread(target=self._flush_loop, name="budget-ledger-flush",
+                                             daemon=True)
+            self._flusher.start()
+
+    # ---------- hot path (memory only) ----------
+
+    def limit_for(self, user_id: Optional[str]) -> Optional[float]:
+        return self.limits.get(user_id or ANONYMOUS, self.default_limit_usd)
+
+    def spent(self, user_id: Optional[str]) -> float:
+        self._roll_period()
+        return self._spent.get(user_id or ANONYMOUS, 0.0)
+
+    def is_over_budget(self, user_id: Optional[str]) -> bool:
+        limit = self.limit_for(user_id)
+        return limit is not None and self.spent(user_id) >= limit
+
+    def check(self, user_id: Optional[str]):
+        """Raises BudgetExceededError under the 'reject' policy; returns True if over budget."""
+        if not self.is_over_budget(user_id):
+            return False
+        if self.policy == "reject":
+            raise BudgetExceededError(user_id or ANONYMOUS, self.spent(user_id),
+                                      self.limit_for(user_id))
+        return True
+
+    def record(self, user_id: Optional[str], cost_usd: float):
+        if not cost_usd:
+            return
+        self._roll_period()
+        key = user_id or ANONYMOUS
+        with self._lock:
+            self._spent[key] = self._spent.get(key, 0.0) + cost_usd
+            self._pending[key] = self._pending.get(key, 0.0) + cost_usd
+
+    def on_cost_entry(self, entry: dict):
+        """`track_cost` listener: books each logged call against its user."""
+        self.record(entry.get("user_id"), entry.get("cost_usd", 0.0))
+
+    # ---------- durable flush ----------
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_schema(self):
+        conn = self._conn()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ledger ("
+                " period TEXT NOT NULL,"
+                " user_id TEXT NOT NULL,"
+                " spent_usd REAL NOT NULL,"
+                " updated REAL NOT NULL,"
+                " PRIMARY KEY (period, user_id))"
+            )
+        finally:
+            conn.close()
+
+    def _roll_period(self):
+        period = _current_period()
+        if period != self._period:
+            self.flush()
+            with self._lock:
+                self._period = period
+                self._spent = {}
+                self._pending = {}
+
+    def _reload(self):
+        conn = self._conn()
+        try:
+            rows = conn.execute("SELECT user_id, spent_usd FROM ledger WHERE period = ?",
+                                (self._period,)).fetchall()
+        finally:
+            conn.close()
+        with self._lock:
+            merged = {user: spent for user, spent in rows}
+            for user, delta in self._pending.items():
+                merged[user] = merged.get(user, 0.0) + delta
+            self._spent = merged
+
+    def flush(self):
+        """Writes unflushed deltas and picks up spend recorded by other workers."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            period = self._period
+        conn = self._conn()
+        try:
+            if pending:
+                now = time.time()
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT INTO ledger (period, user_id, spent_usd, updated) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(period, user_id) DO UPDATE SET "
+                    "spent_usd = spent_usd + excluded.spent_usd, updated = excluded.updated",
+                    [(period, user, delta, now) for user, delta in pending.items()],
+                )
+                conn.execute("COMMIT")
+        except Exception as e:
+            # Keep the deltas for the next attempt rather than losing spend
+            with self._lock:
+                for user, delta in pending.items():
+                    self._pending[user] = self._pending.get(user, 0.0) + delta
+            print(f"[WARNING] Budget ledger flush failed: {e}")
+            return
+        finally:
+            conn.close()
+        self._reload()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval_s):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+    def snapshot(self) -> dict:
+        self._roll_period()
+        return {
+            "period": self._period,
+            "policy": self.policy,
+            "default_limit_usd": self.default_limit_usd,
+            "users": {user: round(spent, 6) for user, spent in self._spent.items()},
+        }
+
+
+_ledger: Optional[BudgetLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_budget_ledger() -> Optional[BudgetLedger]:
+    """
+    Process-wide ledger configured from the environment, or None when
+    disabled with COGNIFY_BUDGET_ENABLED=0. The ledger subscribes itself to
+    the cost tracker when it is created.
+    """
+    global _ledger
+    if os.getenv("COGNIFY_BUDGET_ENABLED", "1") == "0":
+        return None
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                try:
+                    from utils.cost_tracking import register_cost_listener
+                except ImportError:
+                    from src.utils.cost_tracking import register_cost_listener
+                _ledger = BudgetLedger(
+                    path=os.getenv("COGNIFY_BUDGET_PATH") or None,
+                    default_limit_usd=float(os.getenv("COGNIFY_USER_BUDGET_USD",
+                                                      DEFAULT_USER_BUDGET_USD)),
+                    limits=json.loads(os.getenv("COGNIFY_BUDGET_LIMITS", "{}")),
+                    policy=os.getenv("COGNIFY_BUDGET_POLICY", "downgrade"),
+                    flush_interval_s=float(os.getenv("COGNIFY_BUDGET_FLUSH_SECONDS",
+                                                     DEFAULT_FLUSH_INTERVAL_S)),
+                )
+                register_cost_listener(_ledger.on_cost_entry)
+    return _ledger
@@ -0,0 +1,209 @@
+"""
+HTTP body compression (ASGI middleware).
+
+`CompressionMiddleware` compresses responses above a size threshold with
+the best encoding the client accepts: brotli when the optional `brotli`
+package is installed, otherwise gzip. `RequestDecompressionMiddleware`
+accepts `Content-Encoding: gzip` request bodies, so a client can send a
+large `context_text` compressed.
+"""
+
+import json
+import zlib
+
+import anyio
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_MINIMUM_SIZE = 1024
+# Level 4 keeps ~90% of level 6's savings on prose at a fraction of the CPU
+DEFAULT_GZIP_LEVEL = 4
+# Bodies above this are compressed in a worker thread (zlib releases the GIL)
+# so a book-sized response does not stall the event loop
+OFFLOAD_BYTES = 256 * 1024
+DEFAULT_MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+_COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def supported_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str):
+    """Picks the supported encoding with the highest q-value (brotli wins ties)."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding, gzip_level, brotli_quality):
+        self.brotli = encoding == "br"
+        if self.brotli:
+            self._impl = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._impl = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        return self._impl.process(data) if self.brotli else self._impl.compress(data)
+
+    def flush(self) -> bytes:
+        """Emits everything buffered so far without ending the stream."""
+        return self._impl.flush() if self.brotli else self._impl.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._impl.finish() if self.brotli else self._impl.flush()
+
+
+def _set_header(headers, name: bytes, value):
+    headers[:] = [(k, v) for k, v in headers if k.lower() != name]
+    if value is not None:
+        headers.append((name, value))
+
+
+async def _compress(compressor, body: bytes, final: bool) -> bytes:
+    def run():
+        # Streamed chunks are flushed so each line reaches the client promptly
+        return compressor.compress(body) + (compressor.finish() if final else compressor.flush())
+    if len(body) > OFFLOAD_BYTES:
+        return await anyio.to_thread.run_sync(run)
+    return run()
+
+
+class CompressionMiddleware:
+    """Compresses responses of at least `minimum_size` bytes (streamed ones chunk by chunk)."""
+
+    def __init__(self, app, minimum_size: int = DEFAULT_MINIMUM_SIZE, gzip_level: int = DEFAULT_GZIP_LEVEL,
+                 brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope.get("headers") or [])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        state = {"start": None, "compressor": None, "passthrough": False}
+
+        async def compressing_send(message):
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether to compress
+                state["start"] = message
+                return
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                return await send(message)
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if state["compressor"] is None:
+                start = state["start"]
+                response_headers = dict(start.get("headers") or [])
+                content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+                if (b"content-encoding" in response_headers
+                        or not content_type.startswith(_COMPRESSIBLE_TYPES)
+                        or (not more and len(body) < self.minimum_size)):
+                    state["passthrough"] = True
+                    await send(start)
+                    return await send(message)
+                state["compressor"] = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                raw_headers = list(start.get("headers") or [])
+                _set_header(raw_headers, b"content-encoding", encoding.encode())
+                _set_header(raw_headers, b"content-length", None)
+                vary = response_headers.get(b"vary")
+                _set_header(raw_headers, b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding")
+                if not more:
+                    compressed = await _compress(state["compressor"], body, final=True)
+                    _set_header(raw_headers, b"content-length", str(len(compressed)).encode())
+                    await send({**start, "headers": raw_headers})
+                    return await send({"type": "http.response.body", "body": compressed})
+                await send({**start, "headers": raw_headers})
+
+            chunk = await _compress(state["compressor"], body, final=not more)
+            await send({"type": "http.response.body", "body": chunk, "more_body": more})
+
+        await self.app(scope, receive, compressing_send)
+
+
+class RequestDecompressionMiddleware:
+    """
+    Inflates gzip request bodies before the app sees them. The inflated size
+    is capped (413) so a small compressed body cannot expand without limit.
+    """
+
+    def __init__(self, app, max_bytes: int = DEFAULT_MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = list(scope.get("headers") or [])
+        encoding = dict(headers).get(b"content-encoding", b"").decode("latin-1").strip().lower()
+        if encoding in ("", "identity"):
+            return await self.app(scope, receive, send)
+        if encoding != "gzip":
+            return await _plain_error(send, 415, f"Unsupported Content-Encoding: {encoding}")
+
+        inflater = zlib.decompressobj(31)
+        parts, size = [], 0
+        try:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                chunk = inflater.decompress(message.get("body", b""), self.max_bytes + 1 - size)
+                parts.append(chunk)
+                size += len(chunk)
+                if size > self.max_bytes or inflater.unconsumed_tail:
+                    return await _plain_error(send, 413, "Decompressed request body too large")
+                if not message.get("more_body", False):
+                    break
+            parts.append(inflater.flush())
+            if not inflater.eof:
+                raise zlib.error("truncated gzip stream")
+        except zlib.error:
+            return await _plain_error(send, 400, "Invalid gzip request body")
+
+        body = b"".join(parts)
+        _set_header(headers, b"content-encoding", None)
+        _set_header(headers, b"content-length", str(len(body)).encode())
+        delivered = False
+
+        async def inflated_receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app({**scope, "headers": headers}, inflated_receive, send)
+
+
+async def _plain_error(send, status_code: int, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send({"type": "http.response.start", "status": status_code,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
@@ -1,5 +1,7 @@
+import inspect
 import logging
 import json
+import os
 import time
 from datetime import datetime
 from functools import wraps
@@ -11,22 +13,87 @@ handler = logging.FileHandler("logs/cost_audit.jsonl")
 handler.setFormatter(logging.Formatter('%(message)s'))
 cost_logger.addHandler(handler)
 
-# 2025 Pricing Constants (gpt-4o-mini)
-PRICE_INPUT_1M = 0.15
-PRICE_OUTPUT_1M = 0.60
+# Callbacks fed with every cost entry (e.g. the per-user budget ledger)
+_cost_listeners = []
+
+
+def register_cost_listener(listener):
+    """Subscribe a callable to receive each cost log entry as a dict."""
+    if listener not in _cost_listeners:
+        _cost_listeners.append(listener)
+
+
+# USD per 1M (input, output) tokens, matched on the longest model-name prefix.
+# COGNIFY_PRICE_TABLE can point at a JSON file of {"prefix": [input, output]}
+# entries to add or override prices without a deploy.
+PRICE_TABLE = {
+    "mock": (0.0, 0.0),        # canned fallback content
+    "extractive": (0.0, 0.0),  # degraded mode, computed on the CPU
+    "local/": (0.0, 0.0),      # on-prem models carry no per-token charge
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-flash": (0.10, 0.40),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+# Unknown models are priced like GPT-4o, so a missing entry over- rather than under-reports
+DEFAULT_PRICE = (2.50, 10.00)
+
+
+def _load_price_overrides():
+    path = os.getenv("COGNIFY_PRICE_TABLE")
+    if not path:
+        return
+    try:
+        with open(path, encoding="utf-8") as f:
+            overrides = json.load(f)
+        PRICE_TABLE.update({prefix: tuple(prices) for prefix, prices in overrides.items()})
+    except (OSError, ValueError, TypeError) as e:
+        print(f"[WARNING] Could not load price table {path}: {e}")
+
+
+_load_price_overrides()
+
+
+def price_for(model):
+    """(input, output) USD per 1M tokens for a model name."""
+    best = None
+    for prefix in PRICE_TABLE:
+        if model.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return PRICE_TABLE[best] if best is not None else DEFAULT_PRICE
+
 
 def calculate_cost(model, input_tokens, output_tokens):
-    """Calculate cost based on OpenAI 2025 pricing."""
-    if "mini" in model:
-        in_cost = (input_tokens / 1_000_000) * PRICE_INPUT_1M
-        out_cost = (output_tokens / 1_000_000) * PRICE_OUTPUT_1M
-        return in_cost + out_cost
-    # Fallback for standard GPT-4o
-    return (input_tokens / 1_000_000) * 2.50 + (output_tokens / 1_000_000) * 10.00
+    """Calculate cost from the per-model price table."""
+    price_in, price_out = price_for(model)
+    return (input_tokens / 1_000_000) * price_in + (output_tokens / 1_000_000) * price_out
+
+def _user_id(signature, args, kwargs):
+    """`user_id` however it was passed: by keyword, positionally or left at its default."""
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError:
+        return kwargs.get("user_id")
+    bound.apply_defaults()
+    if "user_id" in bound.arguments:
+        return bound.arguments["user_id"]
+    # Functions taking **kwargs receive it there
+    for name, param in signature.parameters.items():
+        if param.kind is inspect.Parameter.VAR_KEYWORD:
+            return bound.arguments.get(name, {}).get("user_id")
+    return None
+
 
 def track_cost(query_type="unknown"):
     """Decorator to track cost and latency of LLM calls."""
     def decorator(func):
+        signature = inspect.signature(func)
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             start = time.time()
@@ -53,6 +120,7 @@ def track_cost(query_type="unknown"):
                 log_entry = {
                     "timestamp": datetime.now().isoformat(),
                     "query_type": query_type,
+                    "user_id": _user_id(signature, args, kwargs),
                     "model": model,
                     "latency_ms": round(latency * 1000, 2),
                     "input_tokens": input_tok,
@@ -66,7 +134,21 @@ def track_cost(query_type="unknown"):
                     log_entry['cost_usd'] = 0.0
                     log_entry['status'] = "cache_hit"
 
+                # Quiz top-ups (tokens saved versus regenerating), repaired
+                # responses (items salvaged), split quizzes, the provider
+                # routing decision, question-bank use and per-section
+                # (incremental) generation are recorded with the call
+                for detail in ('topup', 'repair', 'split', 'routing', 'bank', 'incremental', 'shed', 'candidates'):
+                    if getattr(result, detail, None):
+                        log_entry[detail] = getattr(result, detail)
+
                 cost_logger.info(json.dumps(log_entry))
+
+                for listener in _cost_listeners:
+                    try:
+                        listener(log_entry)
+                    except Exception as listener_error:
+                        print(f"[WARNING] Cost listener failed: {listener_error}")
                 
         return wrapper
     return decorator
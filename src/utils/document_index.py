@@ -0,0 +1,407 @@
+"""
+Chunked, indexed representation of uploaded documents.
+
+Documents are chunked once at ingestion (heading- and page-aware for PDFs,
+using PyMuPDF font sizes) and stored next to their text with a BM25 inverted
+index and per-chunk stats. A topic-focused request then scores only the
+query terms' postings and returns the top-k chunks, instead of sending or
+re-tokenizing the whole document per request.
+"""
+
+import json
+import math
+import threading
+import zlib
+from collections import Counter, OrderedDict
+
+try:
+    from utils.text_utils import tokenize, split_sentences
+    from utils.document_store import DocumentNotFoundError, atomic_write
+    from utils.extractive import chunk_candidate_terms
+except ImportError:
+    from src.utils.text_utils import tokenize, split_sentences
+    from src.utils.document_store import DocumentNotFoundError, atomic_write
+    from src.utils.extractive import chunk_candidate_terms
+
+DEFAULT_CHUNK_CHARS = 2000
+DEFAULT_SECTION_CHARS = 4000
+# A section also ends after a chunk whose text hash is divisible by this (content-defined boundaries)
+SECTION_BOUNDARY_ODDS = 2
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+TERMS_FILE = "terms.json"
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+HEADING_WEIGHT = 2  # heading terms count this many times in a chunk's term frequency
+
+_HEADING_MAX_CHARS = 120
+_HEADING_SIZE_RATIO = 1.15
+
+
+def _body_font_size(pages):
+    """Most common font size by character count: the document's body text."""
+    sizes = Counter()
+    for page in pages:
+        for block in page["blocks"]:
+            sizes[block["size"]] += block["chars"]
+    return sizes.most_common(1)[0][0] if sizes else 0.0
+
+
+def _is_heading(block, body_size):
+    text = block["text"]
+    if len(text) > _HEADING_MAX_CHARS or text.endswith((".", ",", ";")):
+        return False
+    return block["bold"] or (body_size and block["size"] >= body_size * _HEADING_SIZE_RATIO)
+
+
+def _split_long(text, max_chars):
+    """Splits an oversized block on sentence boundaries."""
+    pieces, current = [], ""
+    for sentence in split_sentences(text):
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces or [text[:max_chars]]
+
+
+class _ChunkBuilder:
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.chunks = []
+        self.heading = None
+        self.parts = []
+        self.size = 0
+        self.first_page = None
+        self.last_page = None
+
+    def flush(self):
+        if self.parts:
+            self.chunks.append({
+                "id": len(self.chunks),
+                "heading": self.heading,
+                "pages": [self.first_page, self.last_page] if self.first_page else None,
+                "text": "\n".join(self.parts),
+            })
+        self.parts, self.size, self.first_page = [], 0, None
+
+    def add(self, text, page=None):
+        for piece in ([text] if len(text) <= self.max_chars else _split_long(text, self.max_chars)):
+            if self.parts and self.size + len(piece) > self.max_chars:
+                self.flush()
+            if self.first_page is None:
+                self.first_page = page
+            self.last_page = page
+            self.parts.append(piece)
+            self.size += len(piece) + 1
+
+    def start_section(self, heading):
+        self.flush()
+        self.heading = heading
+
+
+class PageChunker:
+    """
+    Incremental heading/page-aware chunking, one page at a time. Without a
+    known body font size it uses the running estimate over the pages seen
+    so far, so a streamed document never has to be held in full.
+    """
+
+    def __init__(self, max_chars=DEFAULT_CHUNK_CHARS, body_size=None):
+        self._builder = _ChunkBuilder(max_chars)
+        self._body_size = body_size
+        self._sizes = Counter()
+
+    def add_page(self, page_number, blocks):
+        if self._body_size is None:
+            for block in blocks:
+                self._sizes[block["size"]] += block["chars"]
+        body_size = self._body_size or (self._sizes.most_common(1)[0][0] if self._sizes else 0.0)
+        for block in blocks:
+            if _is_heading(block, body_size):
+                self._builder.start_section(" ".join(block["text"].split()))
+            else:
+                self._builder.add(block["text"], page_number)
+
+    def finish(self):
+        self._builder.flush()
+        return self._builder.chunks
+
+
+def chunk_pdf_pages(pages, max_chars=DEFAULT_CHUNK_CHARS):
+    """Chunks `extract_pdf_pages` output, starting a new chunk at every heading."""
+    chunker = PageChunker(max_chars, body_size=_body_font_size(pages))
+    for page_number, page in enumerate(pages, start=1):
+        chunker.add_page(page_number, page["blocks"])
+    return chunker.finish()
+
+
+def chunk_text(text, max_chars=DEFAULT_CHUNK_CHARS):
+    """Chunks plain text on paragraph boundaries (no layout information)."""
+    builder = _ChunkBuilder(max_chars)
+    for paragraph in text.split("\n\n"):
+        paragraph = paragraph.strip()
+        if paragraph:
+            builder.add(paragraph)
+    builder.flush()
+    return builder.chunks
+
+
+def split_text(text, parts):
+    """
+    Splits text into at most `parts` contiguous pieces of similar length, on
+    paragraph boundaries (sentence boundaries when there are too few
+    paragraphs).
+    """
+    units, separator = [p.strip() for p in text.split("\n\n") if p.strip()], "\n\n"
+    if len(units) < parts:
+        units, separator = split_sentences(text), " "
+    target = sum(len(unit) for unit in units) / max(parts, 1)
+    pieces, current, size = [], [], 0
+    for unit in units:
+        current.append(unit)
+        size += len(unit)
+        if size >= target and len(pieces) < parts - 1:
+            pieces.append(separator.join(current))
+            current, size = [], 0
+    if current:
+        pieces.append(separator.join(current))
+    return pieces
+
+
+class DocumentIndex:
+    """BM25 inverted index over a document's chunks."""
+
+    def __init__(self, chunks, postings, lengths):
+        self.chunks = chunks
+        self.postings = postings      # term -> [[chunk_id, tf], ...]
+        self.lengths = lengths        # chunk_id -> token count
+        self.avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    @classmethod
+    def build(cls, chunks):
+        postings = {}
+        lengths = []
+        for chunk in chunks:
+            counts = Counter(tokenize(chunk["text"]))
+            for term in tokenize(chunk["heading"] or ""):
+                counts[term] += HEADING_WEIGHT
+            chunk["tokens"] = sum(counts.values())
+            lengths.append(chunk["tokens"])
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append([chunk["id"], tf])
+        return cls(chunks, postings, lengths)
+
+    def search(self, query, k=5):
+        """Top-k (chunk, score) pairs for the query, best first."""
+        n = len(self.chunks)
+        if not n:
+            return []
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[chunk_id] / (self.avg_length or 1))
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.chunks[chunk_id], score) for chunk_id, score in best]
+
+    def to_dict(self):
+        return {"version": INDEX_VERSION, "chunks": self.chunks, "postings": self.postings,
+                "lengths": self.lengths}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["chunks"], data["postings"], data["lengths"])
+
+
+# Documents are content-addressed and immutable, so loaded indexes never go stale
+_loaded = OrderedDict()
+_loaded_lock = threading.Lock()
+_LOADED_MAX = 32
+
+
+def save_document_index(store, document_id, index):
+    atomic_write(store.path_for(document_id, INDEX_FILE), json.dumps(index.to_dict()))
+    with _loaded_lock:
+        _loaded[(str(store.root), document_id)] = index
+
+
+def load_document_index(store, document_id):
+    """Returns the stored index (memoized), or None if the document has none."""
+    key = (str(store.root), document_id)
+    with _loaded_lock:
+        if key in _loaded:
+            _loaded.move_to_end(key)
+            return _loaded[key]
+    path = store.path_for(document_id, INDEX_FILE)
+    if not path.exists():
+        return None
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("version") != INDEX_VERSION:
+        return None
+    index = DocumentIndex.from_dict(data)
+    with _loaded_lock:
+        _loaded[key] = index
+        while len(_loaded) > _LOADED_MAX:
+            _loaded.popitem(last=False)
+    return index
+
+
+def index_document(store, document_id, pages=None, max_chars=DEFAULT_CHUNK_CHARS, chunks=None):
+    """
+    Chunks and indexes a stored document once. `pages` (from
+    extract_pdf_pages) enables heading/page-aware chunking, as do `chunks`
+    already built by a PageChunker; otherwise the stored text is chunked by
+    paragraph.
+    """
+    if chunks is None and pages:
+        chunks = chunk_pdf_pages(pages, max_chars)
+    elif chunks is None:
+        chunks = chunk_text(store.get_text(document_id) or "", max_chars)
+    index = DocumentIndex.build(chunks)
+    save_document_index(store, document_id, index)
+    terms = extract_document_terms(store, document_id, chunks)
+    meta = store.get_metadata(document_id)
+    meta["chunks"] = len(chunks)
+    meta["candidate_terms"] = len(terms)
+    store.put_metadata(document_id, meta)
+    return index
+
+
+def extract_document_terms(store, document_id, chunks):
+    """Glossary candidates (see extractive.candidate_terms) of the chunks' text, stored with the document."""
+    terms = chunk_candidate_terms(chunk["text"] for chunk in chunks)
+    atomic_write(store.path_for(document_id, TERMS_FILE), json.dumps(terms))
+    return terms
+
+
+def document_terms(store, document_id):
+    """
+    The glossary candidates stored at ingestion; extracted now for documents
+    stored before candidates were.
+    """
+    if not store.exists(document_id):
+        raise DocumentNotFoundError(document_id)
+    path = store.path_for(document_id, TERMS_FILE)
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))
+    index = load_document_index(store, document_id)
+    if index is None:
+        index = index_document(store, document_id)
+        return json.loads(path.read_text(encoding="utf-8"))
+    return extract_document_terms(store, document_id, index.chunks)
+
+
+def retrieve_chunks(store, document_id, query, k=5, max_chars=None):
+    """
+    Top-k chunks for `query`, trimmed to `max_chars` and returned in document
+    order. Indexes the document on first use if it was stored without one.
+    """
+    index = load_document_index(store, document_id)
+    if index is None:
+        index = index_document(store, document_id)
+    selected, used = [], 0
+    for chunk, _ in index.search(query, k):
+        if max_chars is not None and selected and used + len(chunk["text"]) > max_chars:
+            break
+        selected.append(chunk)
+        used += len(chunk["text"])
+    return sorted(selected, key=lambda chunk: chunk["id"])
+
+
+def format_chunks(chunks, pages=True):
+    """Joins chunks into prompt context, labelled with their heading and (optionally) pages."""
+    parts = []
+    for chunk in chunks:
+        label = []
+        if chunk.get("heading"):
+            label.append(chunk["heading"])
+        if pages and chunk.get("pages"):
+            first, last = chunk["pages"]
+            label.append(f"p. {first}" if first == last else f"pp. {first}-{last}")
+        header = f"[{' | '.join(label)}]\n" if label else ""
+        parts.append(header + chunk["text"])
+    return "\n\n".join(parts)
+
+
+def _topic_chunks(store, document_id, topic, k, max_chars):
+    """Top-k chunks for `topic`, or the leading chunks when none matches it."""
+    chunks = retrieve_chunks(store, document_id, topic, k, max_chars)
+    if not chunks:
+        index = load_document_index(store, document_id)
+        used = 0
+        for chunk in index.chunks[:k]:
+            if max_chars is not None and chunks and used + len(chunk["text"]) > max_chars:
+                break
+            chunks.append(chunk)
+            used += len(chunk["text"])
+    return chunks
+
+
+def context_for_topic(store, document_id, topic, min_chars, k=5, max_chars=None):
+    """
+    Prompt context for a stored document. Short documents are returned whole;
+    longer ones are reduced to the top-k chunks for `topic`, falling back to
+    the leading chunks when no chunk matches the topic.
+    """
+    if not store.exists(document_id):
+        raise DocumentNotFoundError(document_id)
+    chars = store.get_metadata(document_id).get("chars")
+    if chars is not None and chars <= min_chars:
+        return store.get_text(document_id)
+
+    chunks = _topic_chunks(store, document_id, topic, k, max_chars)
+    print(f"[RETRIEVAL] {document_id}: {len(chunks)} chunk(s) for topic {topic!r}")
+    return format_chunks(chunks)
+
+
+def group_chunks(chunks, max_chars=DEFAULT_SECTION_CHARS):
+    """
+    Consecutive chunks grouped into sections of up to `max_chars`. Besides
+    the size limit, a section ends after any chunk whose text hash hits
+    SECTION_BOUNDARY_ODDS, so boundaries follow content rather than offsets:
+    an edited chunk moves at most the boundaries next to it, and every other
+    section keeps exactly the same text.
+    """
+    groups, current, size = [], [], 0
+    for chunk in chunks:
+        length = len(chunk["text"])
+        if current and size + length > max_chars:
+            groups.append(current)
+            current, size = [], 0
+        current.append(chunk)
+        size += length
+        if zlib.crc32(chunk["text"].encode("utf-8", "surrogatepass")) % SECTION_BOUNDARY_ODDS == 0:
+            groups.append(current)
+            current, size = [], 0
+    if current:
+        groups.append(current)
+    return groups
+
+
+def document_sections(store, document_id, topic, min_chars, whole_chars, k=5, max_chars=None,
+                      section_chars=DEFAULT_SECTION_CHARS):
+    """
+    The context of context_for_topic split into sections for per-section
+    generation (texts of at most about `section_chars`). Returns [] for
+    documents shorter than `min_chars`. Page labels are left out, so
+    inserting a page does not change the text of the sections after it.
+    """
+    if not store.exists(document_id):
+        raise DocumentNotFoundError(document_id)
+    chars = store.get_metadata(document_id).get("chars")
+    if chars is not None and chars < min_chars:
+        return []
+    if chars is not None and chars <= whole_chars:
+        index = load_document_index(store, document_id) or index_document(store, document_id)
+        chunks = index.chunks
+    else:
+        chunks = _topic_chunks(store, document_id, topic, k, max_chars)
+    return [format_chunks(group, pages=False) for group in group_chunks(chunks, section_chars)]
@@ -0,0 +1,169 @@
+"""
+Local content-addressed document store.
+
+`/api/upload-pdf` persists the extracted text here and returns a
+`document_id` (as in the week-5 `SummaryResult` model), so the generate
+endpoints can reference the document instead of re-sending megabytes of
+`context_text` with every call. The id is derived from the text itself,
+so uploading the same content twice yields the same id and a single copy.
+
+Layout: <root>/<2-char shard>/<document_id>/text.txt + meta.json, plus any
+derived artifacts other modules store next to the text.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_STORE_PATH = PROJECT_ROOT / "data" / "documents"
+
+DOCUMENT_ID_PREFIX = "doc_"
+_DOCUMENT_ID_RE = re.compile(r"^doc_[0-9a-f]{32}$")
+
+
+class DocumentNotFoundError(LookupError):
+    """Raised when a request references a document_id that is not in the store."""
+    def __init__(self, document_id):
+        self.document_id = document_id
+        super().__init__(f"Unknown document_id: {document_id}. Upload the PDF again.")
+
+
+def document_id_for(text: str) -> str:
+    """Content address of a document: 128 bits of its SHA-256."""
+    digest = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+    return DOCUMENT_ID_PREFIX + digest[:32]
+
+
+def is_valid_document_id(document_id: str) -> bool:
+    return bool(document_id) and _DOCUMENT_ID_RE.match(document_id) is not None
+
+
+def atomic_write(path: Path, data, mode: str = "w"):
+    """Write to a temp file and rename, so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class DocumentStore:
+    """Stores extracted document text by content hash."""
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root else DEFAULT_STORE_PATH
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _dir(self, document_id: str) -> Path:
+        if not is_valid_document_id(document_id):
+            # Also guards against path traversal through user-supplied ids
+            raise ValueError(f"Invalid document_id: {document_id!r}")
+        digest = document_id[len(DOCUMENT_ID_PREFIX):]
+        return self.root / digest[:2] / document_id
+
+    def path_for(self, document_id: str, name: str) -> Path:
+        """Location of a derived artifact (chunks, index, ...) stored with the document."""
+        return self._dir(document_id) / name
+
+    def exists(self, document_id: str) -> bool:
+        return is_valid_document_id(document_id) and self.path_for(document_id, "text.txt").exists()
+
+    def put(self, text: str, metadata: Optional[dict] = None) -> str:
+        """Stores the text (idempotent) and returns its document_id."""
+        document_id = document_id_for(text)
+        text_path = self.path_for(document_id, "text.txt")
+        if not text_path.exists():
+            atomic_write(text_path, text)
+        self._record(document_id, len(text), metadata)
+        return document_id
+
+    def open_writer(self) -> "DocumentWriter":
+        """Streams a document in piece by piece; see DocumentWriter."""
+        return DocumentWriter(self)
+
+    def _record(self, document_id: str, chars: int, metadata: Optional[dict]):
+        meta = self.get_metadata(document_id)
+        meta.setdefault("created", time.time())
+        meta.update({"document_id": document_id, "chars": chars})
+        meta.update(metadata or {})
+        self.put_metadata(document_id, meta)
+
+    def get_text(self, document_id: str) -> Optional[str]:
+        if not self.exists(document_id):
+            return None
+        return self.path_for(document_id, "text.txt").read_text(encoding="utf-8")
+
+    def get_metadata(self, document_id: str) -> dict:
+        meta_path = self.path_for(document_id, "meta.json")
+        if not meta_path.exists():
+            return {}
+        return json.loads(meta_path.read_text(encoding="utf-8"))
+
+    def put_metadata(self, document_id: str, metadata: dict):
+        atomic_write(self.path_for(document_id, "meta.json"), json.dumps(metadata))
+
+
+class DocumentWriter:
+    """
+    Writes a document to the store incrementally, hashing as it goes, so the
+    full text never has to be held as one string. `commit` yields the same
+    document_id that `put` would for the concatenated text.
+    """
+
+    def __init__(self, store: DocumentStore):
+        self.store = store
+        self.chars = 0
+        self._hash = hashlib.sha256()
+        incoming = store.root / ".incoming"
+        incoming.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(dir=str(incoming), prefix=".tmp-")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, text: str):
+        data = text.encode("utf-8", "surrogatepass")
+        self._hash.update(data)
+        self._file.write(data)
+        self.chars += len(text)
+
+    def commit(self, metadata: Optional[dict] = None) -> str:
+        self._file.close()
+        document_id = DOCUMENT_ID_PREFIX + self._hash.hexdigest()[:32]
+        text_path = self.store.path_for(document_id, "text.txt")
+        if text_path.exists():
+            os.unlink(self._tmp)
+        else:
+            text_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self._tmp, text_path)
+        self.store._record(document_id, self.chars, metadata)
+        return document_id
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self._tmp):
+            os.unlink(self._tmp)
+
+
+_document_store: Optional[DocumentStore] = None
+_document_store_lock = threading.Lock()
+
+
+def get_document_store() -> DocumentStore:
+    """Process-wide store rooted at COGNIFY_DOCUMENT_STORE_PATH (default data/documents)."""
+    global _document_store
+    if _document_store is None:
+        with _document_store_lock:
+            if _document_store is None:
+                _document_store = DocumentStore(os.getenv("COGNIFY_DOCUMENT_STORE_PATH") or None)
+    return _document_store
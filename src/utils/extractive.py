@@ -0,0 +1,360 @@
+"""
+Extractive study material built from a document's own sentences.
+
+A CPU-only stand-in for a model, used when no model is available (or when
+the providers are saturated), and a source of glossary candidates computed
+at ingestion so the model only has to define them: TextRank picks the central sentences for a
+summary, TF-IDF over sentences picks key terms for a glossary (each defined
+by the sentence that defines it, when there is one), and cloze questions
+blank a key term out of a central sentence, with other key terms as the
+distractors. Everything is derived from the text itself, so the output is
+less fluent than a model's but never made up, and takes milliseconds.
+"""
+
+import math
+import random
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    from utils.glossary_index import normalize_term
+    from utils.text_utils import STOPWORDS, split_sentences, tokenize
+except ImportError:
+    from src.utils.glossary_index import normalize_term
+    from src.utils.text_utils import STOPWORDS, split_sentences, tokenize
+
+# TextRank input cap: the similarity matrix is quadratic in the sentence count
+MAX_SENTENCES = 400
+DAMPING = 0.85
+ITERATIONS = 30
+SUMMARY_SENTENCES = 5
+GLOSSARY_TERMS = 10
+MIN_SENTENCE_CHARS = 25
+MAX_SENTENCE_CHARS = 400
+MAX_TERM_WORDS = 3
+DEFINED_BONUS = 2.0
+# Share of a word's occurrences that must be next to its neighbour in a multi-word term
+COHESION = 0.5
+CAPITALIZED_BONUS = 1.5
+# Glossary candidates kept per document at ingestion, with this many sentences each
+CANDIDATE_TERMS = 40
+CANDIDATE_EXCERPTS = 2
+BLANK = "_____"
+
+# Chunk labels added by format_chunks ("[Heading | p. 3]") are not prose
+_LABEL_RE = re.compile(r"^\[[^\]\n]{0,200}\]$", re.MULTILINE)
+_FRAGMENT_RE = re.compile(r"[,;:()\[\]{}\"“”]|\s[-–—]\s")
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9'-]*[A-Za-z0-9]|[A-Za-z]")
+# Frequent in teaching material without being terms
+_GENERIC = frozenset("""
+also called chapter different example examples figure first following important include included
+includes including known lecture made make makes many much often page part parts point points second
+every section several table third type types use used uses using usually various way ways week weeks well
+""".split())
+_DEFINING = r"(?:is|are|was|were|refers? to|means|is defined as|are defined as|describes?|consists? of)"
+# The subject of a sentence that defines it ("Osmosis is ...", "The cell membrane (...) is ...")
+_DEFINED_RE = re.compile(r"^(?:(?:the|an?)\s+)?((?:[A-Za-z][\w'-]*\s+){0,2}[A-Za-z][\w'-]*)\s*(?:\([^)]*\)\s*)?,?\s+"
+                         + _DEFINING + r"\b", re.IGNORECASE)
+_CALLED_RE = re.compile(r"\b(?:called|known as|termed)\s+(?:(?:the|an?)\s+)?([A-Za-z][\w' -]*)", re.IGNORECASE)
+
+
+def source_sentences(text: str):
+    """Distinct prose sentences of a reasonable length, in document order."""
+    seen, sentences = set(), []
+    for sentence in split_sentences(_LABEL_RE.sub(" ", text)):
+        if MIN_SENTENCE_CHARS <= len(sentence) <= MAX_SENTENCE_CHARS and sentence not in seen:
+            seen.add(sentence)
+            sentences.append(sentence)
+    return sentences
+
+
+def textrank(sentences) -> np.ndarray:
+    """
+    TextRank centrality of each sentence: PageRank over a graph whose edges
+    are word overlaps normalized by sentence length (Mihalcea & Tarau).
+    """
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0)
+    vocab = {}
+    rows, cols = [], []
+    lengths = np.empty(n)
+    for row, sentence in enumerate(sentences):
+        words = set(tokenize(sentence))
+        lengths[row] = len(words)
+        for word in words:
+            rows.append(row)
+            cols.append(vocab.setdefault(word, len(vocab)))
+    incidence = np.zeros((n, max(len(vocab), 1)), dtype=np.float32)
+    incidence[rows, cols] = 1.0
+    log_lengths = np.log(np.maximum(lengths, 2.0))
+    weights = (incidence @ incidence.T) / (log_lengths[:, None] + log_lengths[None, :])
+    np.fill_diagonal(weights, 0.0)
+    out = weights.sum(axis=1, keepdims=True)
+    transition = np.divide(weights, out, out=np.zeros_like(weights), where=out > 0)
+    scores = np.full(n, 1.0 / n)
+    for _ in range(ITERATIONS):
+        scores = (1.0 - DAMPING) / n + DAMPING * (transition.T @ scores)
+    return scores
+
+
+def summarize(text: str, max_sentences: int = SUMMARY_SENTENCES) -> str:
+    """The most central sentences, in document order, one per line."""
+    sentences = source_sentences(text)[:MAX_SENTENCES]
+    if len(sentences) > max_sentences:
+        scores = textrank(sentences)
+        keep = sorted(np.argsort(-scores, kind="stable")[:max_sentences])
+        sentences = [sentences[i] for i in keep]
+    return "\n".join(f"- {sentence}" for sentence in sentences)
+
+
+_term_key = lru_cache(maxsize=65536)(normalize_term)
+
+
+def _is_content_word(lower: str) -> bool:
+    return len(lower) > 2 and lower not in STOPWORDS and lower not in _GENERIC
+
+
+def _candidates(sentence: str):
+    """Runs of up to MAX_TERM_WORDS content words, as (key, surface form) pairs."""
+    for fragment in _FRAGMENT_RE.split(sentence):
+        run = []
+        for word in _WORD_RE.findall(fragment) + [""]:
+            if word and _is_content_word(word.lower()):
+                run.append(word)
+                continue
+            for size in range(1, MAX_TERM_WORDS + 1):
+                for start in range(len(run) - size + 1):
+                    form = " ".join(run[start:start + size])
+                    yield _term_key(form), form
+            run = []
+
+
+def _subject_key(words: str):
+    """Key of a defined term: its leading content words (up to MAX_TERM_WORDS)."""
+    kept = []
+    for word in words.split()[:MAX_TERM_WORDS]:
+        if not _is_content_word(word.lower()):
+            break
+        kept.append(word)
+    return _term_key(" ".join(kept)) if kept else None
+
+
+def _defined_terms(sentence: str):
+    """Keys of the terms a sentence defines ("X is/are ...", "... called X")."""
+    keys = set()
+    match = _DEFINED_RE.match(sentence)
+    if match is not None and all(_is_content_word(w.lower()) for w in match.group(1).split()):
+        keys.add(_term_key(match.group(1)))
+    for match in _CALLED_RE.finditer(sentence):
+        keys.add(_subject_key(match.group(1)))
+    keys.discard(None)
+    return keys
+
+
+def _term_pattern(term: str):
+    return re.compile(r"\b" + r"\s+".join(re.escape(word) for word in term.split()) + r"(?:e?s)?\b",
+                      re.IGNORECASE)
+
+
+def _cohesive(counts, first: str, second: str) -> bool:
+    """
+    Whether two adjacent words form part of one term: most occurrences of
+    at least one of them are next to the other ("cell membrane" yes,
+    "synthase next" no).
+    """
+    pair = counts[f"{first} {second}"]
+    return pair >= COHESION * min(counts[_term_key(first)], counts[_term_key(second)])
+
+
+class _TermStats:
+    """
+    The per-sentence counts behind the key-term ranking. They only add up,
+    so a document can be fed a chunk at a time: memory follows the
+    vocabulary (plus `excerpts` sentences per term), not the text.
+    """
+
+    def __init__(self, excerpts=1):
+        self.excerpts = excerpts
+        self.counts, self.df, self.forms, self.defined, self.mentioned = Counter(), Counter(), {}, {}, {}
+        self.capitalized = set()
+        self.sentences = 0
+        # Hashes of the sentences added by add_text, which skips repeats like source_sentences does
+        self._seen = set()
+
+    def add(self, sentence: str):
+        self.sentences += 1
+        seen = set()
+        for key, form in _candidates(sentence):
+            self.counts[key] += 1
+            self.forms.setdefault(key, Counter())[form] += 1
+            if key not in seen:
+                seen.add(key)
+                found = self.mentioned.setdefault(key, [])
+                if len(found) < self.excerpts:
+                    found.append(sentence)
+            # Capitalized mid-sentence: a name or acronym ("Golgi apparatus", "ATP")
+            if form[0].isupper() and not sentence.startswith(form):
+                self.capitalized.add(key)
+        self.df.update(seen)
+        for key in _defined_terms(sentence) & seen:
+            self.defined.setdefault(key, sentence)
+
+    def add_text(self, text: str):
+        for sentence in source_sentences(text):
+            digest = hash(sentence)
+            if digest not in self._seen:
+                self._seen.add(digest)
+                self.add(sentence)
+        return self
+
+    def ranked(self, limit):
+        """
+        [(key, spelling, score, sentences)] of the top key terms (see
+        key_terms); `sentences` holds up to `excerpts` sentences mentioning
+        the term, the one defining it first.
+        """
+        counts, df, defined, excerpts = self.counts, self.df, self.defined, self.excerpts
+        n = max(self.sentences, 1)
+        scored = []
+        for key, count in counts.items():
+            if count < 2 and key not in defined:
+                continue
+            words = key.split()
+            if not all(_cohesive(counts, a, b) for a, b in zip(words, words[1:])):
+                continue
+            words = len(words)
+            # Sublinear tf: a phrase repeated in every sentence is boilerplate, not the key term
+            score = (1.0 + math.log(count)) * math.log(1.0 + n / df[key]) * (1.0 + 0.5 * (words - 1))
+            if key in defined:
+                score *= DEFINED_BONUS
+            if key in self.capitalized:
+                score *= CAPITALIZED_BONUS
+            scored.append((score, key))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+
+        chosen = []
+        for score, key in scored:
+            form = self.forms[key].most_common(1)[0][0]
+            # Keys and spellings both: "Krebs" keys as "kreb", which is not inside "krebs cycle"
+            padded = (f" {key} ", f" {form.lower()} ")
+            if any(p in f" {other} " or p in f" {spelling.lower()} " for other, spelling, *_ in chosen for p in padded):
+                continue
+            found = self.mentioned[key]
+            if key in defined:
+                found = [defined[key]] + [sentence for sentence in found if sentence != defined[key]][:excerpts - 1]
+            chosen.append((key, form, round(score, 3), found))
+            if len(chosen) >= limit:
+                break
+        return chosen
+
+
+def _ranked_terms(sentences, limit, excerpts=1):
+    """The top key terms of `sentences` (see _TermStats.ranked)."""
+    stats = _TermStats(excerpts)
+    for sentence in sentences:
+        stats.add(sentence)
+    return stats.ranked(limit)
+
+
+def key_terms(text: str, limit: int = GLOSSARY_TERMS, sentences=None):
+    """
+    Key terms by TF-IDF (sublinear tf), treating each sentence as a
+    document: terms used often, but not in nearly every sentence, score
+    highest. Terms a sentence
+    defines, capitalized terms and multi-word terms get a bonus; terms seen
+    once are dropped unless defined, and a term is skipped when it is part
+    of a higher-ranked one. Returns [(term, score)] in each term's most
+    frequent spelling.
+    """
+    sentences = source_sentences(text) if sentences is None else sentences
+    return [(form, score) for _, form, score, _ in _ranked_terms(sentences, limit)]
+
+
+def candidate_terms(text: str, limit: int = CANDIDATE_TERMS, excerpts: int = CANDIDATE_EXCERPTS):
+    """
+    Glossary candidates for a model to define: [{"term", "score",
+    "excerpts"}], the excerpts being the sentences that define or mention
+    the term. Cheap enough to run at ingestion.
+    """
+    return [{"term": form, "score": score, "excerpts": found}
+            for _, form, score, found in _ranked_terms(source_sentences(text), limit, excerpts)]
+
+
+def chunk_candidate_terms(texts, limit: int = CANDIDATE_TERMS, excerpts: int = CANDIDATE_EXCERPTS):
+    """
+    candidate_terms of a document given as its chunks' texts, read one at a
+    time instead of joined, so ingestion memory does not grow with the
+    document.
+    """
+    stats = _TermStats(excerpts)
+    for text in texts:
+        stats.add_text(text)
+    return [{"term": form, "score": score, "excerpts": found}
+            for _, form, score, found in stats.ranked(limit)]
+
+
+def glossary(text: str, limit: int = GLOSSARY_TERMS):
+    """
+    [{"term", "definition"}] for the top key terms, each defined by the
+    sentence that defines it ("X is/are/refers to ...", "... called X"),
+    else by the first sentence mentioning it.
+    """
+    sentences = source_sentences(text)
+    return [{"term": form, "definition": found[0]}
+            for _, form, _, found in _ranked_terms(sentences, limit)]
+
+
+def cloze_questions(text: str, num_questions: int, exclude=()):
+    """
+    Up to `num_questions` fill-in-the-blank questions: the most central
+    sentences with a key term blanked out, the other options drawn from
+    the remaining key terms. Questions in `exclude` are not repeated.
+    Option order is seeded by the sentence, so the output is reproducible.
+    """
+    sentences = source_sentences(text)[:MAX_SENTENCES]
+    terms = [term for term, _ in key_terms(text, max(num_questions * 2, 12), sentences)]
+    if len(terms) < 2:
+        return []
+    patterns = [_term_pattern(term) for term in terms]
+    excluded = {" ".join(str(q).lower().split()) for q in exclude}
+    scores = textrank(sentences)
+    questions, used = [], set()
+    for index in np.argsort(-scores, kind="stable"):
+        sentence = sentences[index]
+        matches = [(position, match) for position, pattern in enumerate(patterns)
+                   if (match := pattern.search(sentence)) is not None]
+        # Blank the highest-ranked unused term that is not part of a longer matched one
+        spans = [match.span() for _, match in matches]
+        candidates = [(position, match) for position, match in matches if terms[position] not in used
+                      and not any(s <= match.start() and match.end() <= e and (s, e) != match.span()
+                                  for s, e in spans)]
+        if not candidates:
+            continue
+        position, match = candidates[0]
+        term = terms[position]
+        question = f"Fill in the blank: {sentence[:match.start()]}{BLANK}{sentence[match.end():]}"
+        if " ".join(question.lower().split()) in excluded:
+            continue
+        rng = random.Random(zlib.crc32(sentence.encode("utf-8")))
+        matched = {p for p, _ in matches}
+        others = [t for i, t in enumerate(terms) if i not in matched]
+        if not others:
+            continue
+        options = [term] + rng.sample(others, min(3, len(others)))
+        rng.shuffle(options)
+        used.add(term)
+        questions.append({
+            "id": len(questions) + 1,
+            "question": question,
+            "options": options,
+            "answer": f"{'ABCD'[options.index(term)]}. {term}",
+            "explanation": f"From the text: {sentence}",
+        })
+        if len(questions) >= num_questions:
+            break
+    return questions
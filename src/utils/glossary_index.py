@@ -0,0 +1,96 @@
+"""
+Term index for merging glossaries extracted chunk by chunk.
+
+A long document's glossary is extracted per section, concurrently, and the
+per-section terms are merged here. Terms are keyed by a normalized form
+(case, whitespace, punctuation, leading articles, a trailing parenthetical
+and a plural last word folded away), so "Cell membranes", "the cell
+membrane" and "Cell Membrane (plasma membrane)" are one entry. Each entry
+keeps its best definition and the sections it was found in; the glossary is
+ranked by how many sections a term appears in, then by first appearance.
+"""
+
+import re
+
+# Definitions are compared by length up to this many chars: past it, longer is not better
+DEFINITION_MAX_CHARS = 300
+
+_PARENTHETICAL_RE = re.compile(r"\s*[(\[][^)\]]*[)\]]\s*$")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_ARTICLES = ("the ", "a ", "an ")
+# Singular words ending in "s" that must not lose it
+_KEEP_S = ("ss", "us", "is", "as", "os", "ys")
+
+
+def _singular(word: str) -> str:
+    if len(word) <= 3 or not word.endswith("s") or word.endswith(_KEEP_S):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "shes", "ches", "xes", "zes")):
+        return word[:-2]
+    return word[:-1]
+
+
+def normalize_term(term: str) -> str:
+    """Index key of a glossary term ("" for a blank term)."""
+    text = _PARENTHETICAL_RE.sub("", str(term)) or str(term)
+    text = _PUNCT_RE.sub(" ", text.casefold().replace("_", " "))
+    words = text.split()
+    if len(words) > 1 and f"{words[0]} " in _ARTICLES:
+        words = words[1:]
+    if words:
+        words[-1] = _singular(words[-1])
+    return " ".join(words)
+
+
+def definition_score(definition: str) -> int:
+    """How good a definition is: its length, capped at DEFINITION_MAX_CHARS."""
+    return min(len(definition.strip()), DEFINITION_MAX_CHARS)
+
+
+class TermIndex:
+    """Glossary terms merged by normalized name across the sections of a document."""
+
+    def __init__(self):
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, term, definition, section: int = 0) -> bool:
+        """Adds one term found in `section`; returns False when it has no usable name."""
+        term, definition = str(term or "").strip(), str(definition or "").strip()
+        key = normalize_term(term)
+        if not key:
+            return False
+        entry = self._entries.get(key)
+        if entry is None:
+            self._entries[key] = {"term": term, "definition": definition, "score": definition_score(definition),
+                                  "sections": {section}, "mentions": 1, "first": len(self._entries),
+                                  "forms": {term: 1}}
+            return True
+        entry["sections"].add(section)
+        entry["mentions"] += 1
+        entry["forms"][term] = entry["forms"].get(term, 0) + 1
+        score = definition_score(definition)
+        if score > entry["score"]:
+            entry["definition"], entry["score"] = definition, score
+        return True
+
+    def extend(self, terms, section: int = 0) -> int:
+        """Adds a provider's term list (dicts with "term" and "definition"); returns how many were usable."""
+        return sum(self.add(item.get("term"), item.get("definition"), section)
+                   for item in terms or [] if isinstance(item, dict))
+
+    def ranked(self, limit=None):
+        """
+        [{"term", "definition"}] ranked by the number of sections a term was
+        found in, then mentions, then first appearance. Each term is shown in
+        its most frequent spelling (the first one on a tie).
+        """
+        entries = sorted(self._entries.values(),
+                         key=lambda e: (-len(e["sections"]), -e["mentions"], e["first"]))
+        if limit is not None:
+            entries = entries[:limit]
+        return [{"term": max(e["forms"], key=e["forms"].get), "definition": e["definition"]} for e in entries]
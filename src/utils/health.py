@@ -0,0 +1,233 @@
+"""
+Liveness and readiness state, kept current by background provider probes.
+
+`/health` used to build the engine on every probe and answer "healthy"
+whatever state the model providers were in; a provider outage was only
+noticed when user requests started failing over. ProviderHealthMonitor
+instead checks each real provider every `interval_s` on a background
+thread and records its availability and latency. After each round it
+renders the readiness response to bytes once, so a probe from a load
+balancer or orchestrator is answered from memory without touching the
+engine. Fallback-only providers (extractive engine, MockProvider) run
+in-process and are reported without being probed.
+
+A provider with a `ping()` (Gemini's model lookup, the local server's
+/models) is checked with it, which costs nothing. Otherwise the check is a
+tiny generation: free providers always get it, paid ones only with
+`probe_paid`, and those calls go through cost tracking (as "health_probe"
+for PROBE_USER) so the spend shows up in the audit log and budget ledger.
+Probe outcomes are also reported to the engine's RoutingPolicy.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+try:
+    from utils.cost_tracking import calculate_cost, track_cost
+    from utils.fast_json import dumps
+except ImportError:
+    from src.utils.cost_tracking import calculate_cost, track_cost
+    from src.utils.fast_json import dumps
+
+DEFAULT_INTERVAL_S = 60.0
+DEFAULT_TIMEOUT_S = 10.0
+# A few tokens each way: enough to show the provider answers, cheap enough to send every minute
+PROBE_PROMPT = 'Reply with exactly this JSON and nothing else: {"ok": true}'
+
+# Budget ledger / audit log user that generation probes are booked to
+PROBE_USER = "system:health"
+
+# Statuses that should receive traffic (the rest answer 503)
+_SERVING = ("ready", "degraded")
+
+
+def _provider_name(provider) -> str:
+    return type(provider).__name__
+
+
+def _is_free(provider) -> bool:
+    return getattr(provider, "cost_tier", None) == "free" or \
+        calculate_cost(getattr(provider, "model_id", None) or "unknown", 1000, 1000) == 0
+
+
+class _Usage:
+    """Token usage in the shape track_cost expects."""
+
+    def __init__(self, prompt_tokens: int = 0, completion_tokens: int = 0):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+
+class _ProbeResult:
+    def __init__(self, response):
+        self.response = response
+        self.model = response.model
+        self.usage = _Usage(response.input_tokens, response.output_tokens)
+
+
+@track_cost(query_type="health_probe")
+def _generate_probe(provider, prompt: str, user_id: str = PROBE_USER) -> _ProbeResult:
+    return _ProbeResult(provider.generate(prompt))
+
+
+class ProviderHealthMonitor:
+    """
+    Probes providers in the background and serves precomputed readiness.
+
+    Readiness is "starting" until the first round has finished, "ready"
+    while at least one probed provider answers, "degraded" when only the
+    fallback providers can serve (200 unless `require_model`), and
+    "unavailable" when nothing can (or the engine failed to start).
+    With `interval_s` <= 0 nothing is probed and every provider is
+    reported available; so is a paid provider without `ping()` unless
+    `probe_paid` is set.
+    """
+
+    def __init__(self, interval_s: float = DEFAULT_INTERVAL_S, timeout_s: float = DEFAULT_TIMEOUT_S,
+                 require_model: bool = False, prompt: str = PROBE_PROMPT, probe_paid: bool = False):
+        self.interval_s = interval_s
+        self.timeout_s = timeout_s
+        self.require_model = require_model
+        self.prompt = prompt
+        self.probe_paid = probe_paid
+        self.router = None
+        self.providers = []
+        self._real = []
+        self._checked = []
+        self._pool = None
+        # Provider name -> probe still running past its timeout (not sent again until it returns)
+        self._stuck = {}
+        self._status = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.rounds = 0
+        self._publish("starting")
+
+    # ---------- precomputed responses ----------
+
+    def _publish(self, status: str, error=None):
+        """Renders the readiness and legacy /health bodies once; endpoints only read them."""
+        providers = {name: dict(state) for name, state in self._status.items()}
+        body = {"status": status, "providers": providers, "rounds": self.rounds,
+                "checked_at": max((s["checked_at"] for s in providers.values() if s.get("checked_at")),
+                                  default=None),
+                "interval_s": self.interval_s}
+        if error is not None:
+            body["error"] = error
+        serving = status in _SERVING and not (self.require_model and status == "degraded")
+        model = next((s.get("model") for s in providers.values() if s["available"]), None)
+        legacy = {"status": {"ready": "healthy", "degraded": "degraded"}.get(status, "unhealthy"),
+                  "ai_engine": "failed" if error is not None else "initialized",
+                  "model": model or "fallback", "readiness": status, "providers": providers,
+                  "features": ["quiz", "summary", "glossary"]}
+        if error is not None:
+            legacy["error"] = error
+        # One tuple, swapped in by a single assignment, so readers never see a half-updated state
+        self._responses = ((200 if serving else 503, dumps(body)), dumps(legacy))
+
+    def readiness(self):
+        """(HTTP status, JSON body bytes) for /health/ready."""
+        return self._responses[0]
+
+    def health(self) -> bytes:
+        """JSON body bytes for the legacy /health."""
+        return self._responses[1]
+
+    def fail(self, error: str):
+        """Marks the service unavailable, e.g. when the engine could not be initialized."""
+        self._publish("unavailable", error=error)
+
+    # ---------- probing ----------
+
+    def _probe(self, provider) -> dict:
+        start = time.perf_counter()
+        ping = getattr(provider, "ping", None)
+        try:
+            response = ping() if ping is not None else _generate_probe(provider, self.prompt, user_id=PROBE_USER).response
+            ok = response.status == "success"
+            error = None if ok else (response.content or "error")[:200]
+        except Exception as e:
+            ok, error = False, str(e)[:200]
+        return {"available": ok, "latency_ms": round((time.perf_counter() - start) * 1000, 1), "error": error}
+
+    def check(self):
+        """Runs one probe round (all providers concurrently) and republishes the state."""
+        futures = {}
+        for provider in (self._checked if self.interval_s > 0 else []):
+            name = _provider_name(provider)
+            if name in self._stuck and not self._stuck[name].done():
+                continue
+            futures[name] = self._pool.submit(self._probe, provider)
+        deadline = time.monotonic() + self.timeout_s
+        status = {}
+        for provider in self.providers:
+            name = _provider_name(provider)
+            previous = self._status.get(name, {})
+            if getattr(provider, "fallback_only", False) or self.interval_s <= 0 or \
+                    provider not in self._checked:
+                status[name] = {"available": True, "probed": False, "model": getattr(provider, "model_id", None)}
+                continue
+            future = futures.get(name)
+            if future is None:
+                result = {"available": False, "latency_ms": None,
+                          "error": f"previous probe still running after {self.timeout_s}s"}
+            else:
+                try:
+                    result = future.result(timeout=max(deadline - time.monotonic(), 0))
+                    self._stuck.pop(name, None)
+                except FutureTimeoutError:
+                    self._stuck[name] = future
+                    result = {"available": False, "latency_ms": None, "error": f"timeout after {self.timeout_s}s"}
+            if self.router is not None:
+                self.router.observe_health(provider, result["available"])
+            failures = 0 if result["available"] else previous.get("consecutive_failures", 0) + 1
+            status[name] = {**result, "probed": True, "model": getattr(provider, "model_id", None),
+                            "consecutive_failures": failures, "checked_at": time.time()}
+        self._status = status
+        self.rounds += 1
+
+        real = {_provider_name(p) for p in self._real}
+        if any(s["available"] for name, s in status.items() if name in real):
+            readiness = "ready"
+        elif any(s["available"] for s in status.values()):
+            readiness = "degraded"
+        else:
+            readiness = "unavailable"
+        self._publish(readiness)
+        return readiness
+
+    def _loop(self):
+        while True:
+            try:
+                self.check()
+            except Exception as e:
+                print(f"[WARNING] Health check round failed: {e}")
+            if self._stop.wait(self.interval_s):
+                return
+
+    def start(self, providers, router=None):
+        """
+        Starts probing the engine's providers in the background (first round
+        immediately), reporting each outcome to `router` when given.
+        """
+        if self._thread is not None:
+            return self
+        self.providers = list(providers)
+        self.router = router
+        self._real = [p for p in self.providers if not getattr(p, "fallback_only", False)]
+        # Providers that are actually sent probes: a free ping(), a free model, or paid ones by opt-in
+        self._checked = [p for p in self._real
+                         if getattr(p, "ping", None) is not None or self.probe_paid or _is_free(p)]
+        self._pool = ThreadPoolExecutor(max_workers=max(len(self._checked), 1), thread_name_prefix="health-probe")
+        if self.interval_s <= 0:
+            self.check()
+            return self
+        self._thread = threading.Thread(target=self._loop, name="health-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
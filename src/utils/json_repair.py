@@ -0,0 +1,160 @@
+"""
+Tolerant parsing of LLM JSON output.
+
+Models sometimes wrap the JSON in prose, use single quotes or Python
+literals, leave trailing commas or raw newlines in strings, or get cut off
+mid-array at the token limit. `parse_llm_json` repairs these in a single
+pass and, for truncated output, cuts back to the last complete element and
+closes the open containers, so every complete item is kept.
+"""
+
+import json
+import re
+
+_CLOSERS = {"{": "}", "[": "]"}
+_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+# Runs of characters that need no attention, copied in one step
+_PLAIN_IN_STRING = re.compile(r"[^\"'\\\x00-\x1f]+")
+_PLAIN_OUTSIDE = re.compile(r"[^\"'{}\[\],TFN]+")
+
+
+def _closes_string(text: str, i: int) -> bool:
+    """A quote ends a string only if a JSON delimiter (or the end) follows it."""
+    j = i + 1
+    while j < len(text) and text[j] in " \t\r\n":
+        j += 1
+    return j >= len(text) or text[j] in ",:}]"
+
+
+def _strip_trailing_comma(out) -> bool:
+    j = len(out) - 1
+    while j >= 0 and not out[j].strip():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j]
+        return True
+    return False
+
+
+def repair_json(text: str):
+    """
+    Rewrites malformed JSON into valid JSON text. Returns (repaired, fixes),
+    where fixes names each kind of repair applied.
+    """
+    fixes = []
+
+    def fixed(name):
+        if name not in fixes:
+            fixes.append(name)
+
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("No JSON object or array in the response")
+    start = min(starts)
+    if text[:start].strip():
+        fixed("leading_text")
+
+    out = []
+    stack = []
+    # Output length and open containers after the last complete element
+    checkpoint = None
+    quote = None
+    complete = False
+    i = start
+    while i < len(text):
+        ch = text[i]
+        plain = (_PLAIN_IN_STRING if quote else _PLAIN_OUTSIDE).match(text, i)
+        if plain:
+            out.append(plain.group())
+            i = plain.end()
+            continue
+        if quote:
+            if ch == "\\":
+                if i + 1 >= len(text):
+                    break
+                nxt = text[i + 1]
+                if nxt in '"\\/bfnrtu':
+                    out.append(ch + nxt)
+                elif nxt == "'":
+                    out.append("'")
+                else:
+                    out.append("\\\\" + nxt)
+                    fixed("invalid_escapes")
+                i += 2
+                continue
+            if ch == quote and _closes_string(text, i):
+                out.append('"')
+                quote = None
+            elif ch == '"':
+                out.append('\\"')
+                fixed("unescaped_quotes")
+            elif ch in _ESCAPES or ord(ch) < 0x20:
+                out.append(_ESCAPES.get(ch, f"\\u{ord(ch):04x}"))
+                fixed("control_characters")
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch in "\"'":
+            if ch == "'":
+                fixed("single_quotes")
+            quote = ch
+            out.append('"')
+        elif ch in "{[":
+            stack.append(ch)
+            out.append(ch)
+        elif ch in "}]":
+            if _strip_trailing_comma(out):
+                fixed("trailing_commas")
+            if not stack:
+                break
+            out.append(_CLOSERS[stack.pop()])
+            if not stack:
+                complete = True
+                break
+            checkpoint = (len(out), tuple(stack))
+        elif ch == ",":
+            checkpoint = (len(out), tuple(stack))
+            out.append(ch)
+        else:
+            literal = next((w for w in _LITERALS if text.startswith(w, i)), None)
+            if literal and not (out and (out[-1].isalnum() or out[-1] == "_")):
+                out.append(_LITERALS[literal])
+                fixed("python_literals")
+                i += len(literal)
+                continue
+            out.append(ch)
+        i += 1
+
+    if complete:
+        if text[i + 1:].strip():
+            fixed("trailing_text")
+    else:
+        # Truncated: keep everything up to the last complete element
+        fixed("truncated")
+        if checkpoint is None:
+            raise ValueError("Response was cut off before the first complete element")
+        length, open_containers = checkpoint
+        del out[length:]
+        _strip_trailing_comma(out)
+        out.extend(_CLOSERS[c] for c in reversed(open_containers))
+    return "".join(out), fixes
+
+
+def parse_llm_json(text: str):
+    """
+    Parses model output, repairing it if needed. Returns (data, fixes);
+    fixes is empty when the text was already valid JSON. Raises ValueError
+    when nothing can be recovered.
+    """
+    try:
+        return json.loads(text), []
+    except json.JSONDecodeError:
+        pass
+    repaired, fixes = repair_json(text)
+    try:
+        return json.loads(repaired), fixes
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Unrecoverable JSON ({', '.join(fixes) or 'no repair applied'}): {e}") from e
@@ -0,0 +1,89 @@
+"""
+Append-only JSONL files written off the event loop.
+
+Middleware that logs every request (request recording, traces) must not
+open and write a file on the event loop. JsonlWriter takes items on a
+bounded queue; a daemon thread formats everything queued since its last
+write and appends it in one go. When the writer falls `max_queue` items
+behind, new items are dropped and counted instead of blocking requests.
+With `max_bytes`, a file that has grown past it is rotated to `<path>.1`
+(replacing the previous one) before the next append, so at most about
+twice that is kept on disk.
+"""
+
+import asyncio
+import os
+import queue
+import threading
+
+DEFAULT_MAX_QUEUE = 10_000
+
+
+class JsonlWriter:
+    """
+    Background appender: `put(item)` never blocks, and `format(item)` (run
+    on the writer thread) returns the line to append, newline included.
+    """
+
+    def __init__(self, path, format, max_queue: int = DEFAULT_MAX_QUEUE, max_bytes=None, name="jsonl-writer"):
+        self.path = str(path)
+        self.format = format
+        self.max_bytes = max_bytes
+        self.name = name
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        threading.Thread(target=self._write_loop, name=name, daemon=True).start()
+
+    def put(self, item) -> bool:
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _rotate_if_full(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size >= self.max_bytes:
+            os.replace(self.path, self.path + ".1")
+            self.rotations += 1
+
+    def _write_loop(self):
+        while True:
+            items = [self._queue.get()]
+            # Whatever queued up behind the first item goes in the same append
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                lines = [self.format(item) for item in items]
+                if self.max_bytes:
+                    self._rotate_if_full()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+                self.written += len(lines)
+            except Exception as e:
+                self.dropped += len(items)
+                print(f"[WARNING] {self.name} write failed: {e}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Blocks until every queued item has been written (tests, shutdown)."""
+        self._queue.join()
+
+    def flushing_send(self, send):
+        """ASGI lifespan `send` that flushes before the server reports its shutdown complete."""
+        async def flushing_send(message):
+            if message["type"] == "lifespan.shutdown.complete":
+                await asyncio.to_thread(self.flush)
+            await send(message)
+        return flushing_send
@@ -0,0 +1,138 @@
+"""
+PDF text extraction (PyMuPDF).
+
+Shared by the upload route, the benchmarks and offline tooling so every path
+extracts text the same way.
+
+Layout extraction is the slow part, so the per-page functions take an
+optional `page_cache` (anything with string get/set, e.g. SharedCache)
+keyed by a fingerprint of everything the page draws: its content stream,
+the form XObjects and images it uses (at any depth) and its fonts. A
+revised PDF then only re-extracts the pages that actually changed.
+"""
+
+import hashlib
+import json
+
+import fitz  # PyMuPDF
+
+PAGE_SEPARATOR = "\n\n"
+_BOLD_FLAG = 16  # PyMuPDF span flag bit for bold text
+PAGE_CACHE_PREFIX = "pdfpage:"
+
+
+def extract_pdf_text(pdf_bytes: bytes):
+    """
+    Extracts the text of every page, separated by blank lines.
+    Returns (extracted_text, page_count).
+    """
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        # Join once instead of growing a string page by page (quadratic on long books)
+        pages = [page.get_text() for page in doc]
+    finally:
+        doc.close()
+    return PAGE_SEPARATOR.join(pages), len(pages)
+
+
+def _page_blocks(page):
+    """Text blocks of a page as dicts with their largest font size and boldness."""
+    blocks = []
+    for block in page.get_text("dict")["blocks"]:
+        if block.get("type") != 0:
+            continue
+        lines = []
+        max_size = 0.0
+        bold_chars = 0
+        total_chars = 0
+        for line in block["lines"]:
+            spans = line["spans"]
+            lines.append("".join(span["text"] for span in spans))
+            for span in spans:
+                n = len(span["text"].strip())
+                total_chars += n
+                if n:
+                    max_size = max(max_size, span["size"])
+                    if span["flags"] & _BOLD_FLAG:
+                        bold_chars += n
+        text = "\n".join(lines).strip()
+        if text:
+            blocks.append({
+                "text": text,
+                "size": round(max_size, 1),
+                "bold": total_chars > 0 and bold_chars / total_chars > 0.5,
+                "chars": total_chars,
+            })
+    return blocks
+
+
+def _stream_digest(doc, xref: int) -> str:
+    return hashlib.sha256(doc.xref_stream_raw(xref) or b"").hexdigest()
+
+
+def page_fingerprint(page) -> str:
+    """
+    Content hash of a page: its content stream, size, fonts, and the streams
+    of every form XObject and image it draws, nested ones included. Pages
+    imposed with show_pdf_page or pdfpages keep all their text inside a form
+    XObject, so the page's own content stream ("/fzFrm0 Do") is identical
+    across different pages. Resources are hashed by name and content, not
+    object number, which changes whenever the file is re-saved.
+    """
+    doc = page.parent
+    h = hashlib.sha256(page.read_contents())
+    h.update(repr(tuple(page.rect)).encode())
+    for font in sorted(page.get_fonts(), key=lambda f: f[4]):
+        h.update(repr(font[1:]).encode())
+    # get_xobjects lists nested forms too; both lists are sorted by content for a stable order
+    xobjects = sorted(f"{name}:{bbox}:{_stream_digest(doc, xref)}" for xref, name, _, bbox in page.get_xobjects())
+    images = sorted(f"{image[7]}:{image[2]}x{image[3]}:{_stream_digest(doc, image[0])}"
+                    for image in page.get_images(full=True))
+    h.update("\n".join(xobjects + images).encode())
+    return h.hexdigest()[:32]
+
+
+def _extract_page(page, page_cache=None):
+    """{"text", "blocks", "hash", "reused"} for one page, from the cache when its content is known."""
+    fingerprint = page_fingerprint(page)
+    if page_cache is not None:
+        cached = page_cache.get(PAGE_CACHE_PREFIX + fingerprint)
+        if cached is not None:
+            return {**json.loads(cached), "hash": fingerprint, "reused": True}
+    extracted = {"text": page.get_text(), "blocks": _page_blocks(page)}
+    if page_cache is not None:
+        page_cache.set(PAGE_CACHE_PREFIX + fingerprint, json.dumps(extracted))
+    return {**extracted, "hash": fingerprint, "reused": False}
+
+
+def extract_pdf_pages(pdf_bytes: bytes, page_cache=None):
+    """
+    Per-page extraction with layout hints, for ingestion-time chunking.
+    Returns a list of {"text": page.get_text(), "blocks": [...], "hash",
+    "reused"} dicts; each block carries its text, largest font size and
+    whether it is mostly bold. `hash` is the page fingerprint and `reused`
+    tells whether the page came from `page_cache`.
+    """
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return [_extract_page(page, page_cache) for page in doc]
+    finally:
+        doc.close()
+
+
+def iter_pdf_pages(pdf_bytes: bytes, page_cache=None):
+    """
+    Like extract_pdf_pages, but lazy: yields (page_number, page) as each
+    page is extracted. The document is opened eagerly, so an invalid PDF
+    raises here rather than on the first iteration.
+    """
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    return _iter_pages(doc, page_cache)
+
+
+def _iter_pages(doc, page_cache=None):
+    try:
+        for number, page in enumerate(doc, start=1):
+            yield number, _extract_page(page, page_cache)
+    finally:
+        doc.close()
@@ -0,0 +1,248 @@
+"""
+Reusable question bank (SQLite WAL, shared by every worker on the host).
+
+Students quizzing on the same material do not each need freshly generated
+questions. Every validated question a provider generates is deposited in a
+bank keyed by the document's content hash and the topic. Once a bank holds
+enough questions, `generate_quiz` assembles new quizzes from it: the least
+served questions are sampled, their order and options are shuffled, and no
+provider is called. Quizzes that cannot be served from the bank are
+generated as before, asking the model to avoid the questions already banked
+so every miss grows the bank with new material.
+"""
+
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+try:
+    from utils.question_dedup import DEFAULT_THRESHOLD, dedupe_questions, is_valid_question
+    from utils.shared_cache import make_cache_key
+except ImportError:
+    from src.utils.question_dedup import DEFAULT_THRESHOLD, dedupe_questions, is_valid_question
+    from src.utils.shared_cache import make_cache_key
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_BANK_PATH = PROJECT_ROOT / "cache" / "question_bank.db"
+
+# A quiz of n questions is served from a bank holding at least n * this many,
+# so consecutive students get different questions, not just a new order
+DEFAULT_MIN_FACTOR = 2.0
+DEFAULT_MAX_PER_BANK = 200
+# Banked questions listed in a replenishing prompt (keeps the prompt bounded)
+EXCLUDE_LIMIT = 30
+
+_LETTER_ANSWER_RE = re.compile(r"^([A-Za-z])\s*[.):]\s*(.*)$", re.DOTALL)
+_LETTERED_OPTION_RE = re.compile(r"^[A-Da-d]\s*[.)]\s")
+# Options whose meaning depends on their position must keep their order
+_POSITIONAL_RE = re.compile(r"\b(?:all|none|both) of the above\b|\bboth [a-d] and [a-d]\b", re.IGNORECASE)
+
+
+def bank_key(document_hash: str, topic: str) -> str:
+    """Bank identity: document content hash plus the normalized topic."""
+    return make_cache_key("bank", document_hash, " ".join(topic.lower().split()))
+
+
+def _answer_index(question) -> Optional[int]:
+    """Index of the correct option, or None when the answer cannot be matched to one."""
+    options = [str(option).strip() for option in question["options"]]
+    answer = str(question["answer"]).strip()
+    if answer in options:
+        return options.index(answer)
+    match = _LETTER_ANSWER_RE.match(answer)
+    if match is None:
+        return None
+    rest = match.group(2).strip()
+    if rest in options:
+        return options.index(rest)
+    index = ord(match.group(1).upper()) - ord("A")
+    return index if 0 <= index < len(options) else None
+
+
+def shuffle_options(question: dict, rng) -> dict:
+    """A copy of the question with its options shuffled and the answer letter updated."""
+    options = [str(option) for option in question["options"]]
+    index = _answer_index(question)
+    if index is None or any(_LETTERED_OPTION_RE.match(o) or _POSITIONAL_RE.search(o) for o in options):
+        return dict(question)
+    order = list(range(len(options)))
+    rng.shuffle(order)
+    shuffled = [options[i] for i in order]
+    position = order.index(index)
+    return {**question, "options": shuffled, "answer": f"{chr(ord('A') + position)}. {shuffled[position]}"}
+
+
+class QuestionBank:
+    """
+    Validated questions per (document hash, topic), with serve counts so
+    sampling favors questions fewer students have seen.
+    """
+
+    def __init__(self, path=None, min_factor: float = DEFAULT_MIN_FACTOR,
+                 max_per_bank: int = DEFAULT_MAX_PER_BANK, dedup_threshold: float = DEFAULT_THRESHOLD,
+                 seed=None):
+        self.path = Path(path) if path else DEFAULT_BANK_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.min_factor = min_factor
+        self.max_per_bank = max_per_bank
+        self.dedup_threshold = dedup_threshold
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.questions_served = 0
+        self.questions_deposited = 0
+        self.duplicates_rejected = 0
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread and per process (connections must not cross a fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self):
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS questions ("
+            " bank TEXT NOT NULL,"
+            " qhash TEXT NOT NULL,"
+            " question TEXT NOT NULL,"
+            " served INTEGER NOT NULL DEFAULT 0,"
+            " created REAL NOT NULL,"
+            " PRIMARY KEY (bank, qhash))"
+        )
+
+    def size(self, key: str) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM questions WHERE bank = ?", (key,)).fetchone()[0]
+
+    def questions(self, key: str, limit: Optional[int] = None):
+        """Banked questions, newest first."""
+        rows = self._conn().execute(
+            "SELECT question FROM questions WHERE bank = ? ORDER BY created DESC LIMIT ?",
+            (key, -1 if limit is None else limit)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def sample(self, key: str, num_questions: int):
+        """
+        A new quiz of `num_questions` from the bank (least served first, ties
+        broken at random, options shuffled), or None when the bank is too small.
+        """
+        conn = self._conn()
+        needed = max(math.ceil(num_questions * self.min_factor), num_questions)
+        if self.size(key) < needed:
+            with self._stats_lock:
+                self.misses += 1
+            return None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT qhash, question, served FROM questions WHERE bank = ?",
+                                (key,)).fetchall()
+            with self._rng_lock:
+                # Least served first; random order among equally served questions
+                rows.sort(key=lambda row: (row[2], self._rng.random()))
+            rows = rows[:num_questions]
+            conn.executemany("UPDATE questions SET served = served + 1 WHERE bank = ? AND qhash = ?",
+                             [(key, qhash) for qhash, _, _ in rows])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._rng_lock:
+            questions = [shuffle_options(json.loads(question), self._rng) for _, question, _ in rows]
+            self._rng.shuffle(questions)
+        for i, question in enumerate(questions, start=1):
+            question["id"] = i
+        with self._stats_lock:
+            self.hits += 1
+            self.questions_served += len(questions)
+        return questions
+
+    def deposit(self, key: str, questions) -> int:
+        """Adds the valid questions that are not near-duplicates of banked ones; returns how many."""
+        candidates = [q for q in questions if is_valid_question(q)]
+        if not candidates:
+            return 0
+        existing = self.questions(key)
+        room = self.max_per_bank - len(existing)
+        fresh = dedupe_questions(candidates, self.dedup_threshold, existing=existing)[:max(room, 0)]
+        now = time.time()
+        rows = []
+        for question in fresh:
+            stored = {k: v for k, v in question.items() if k != "id"}
+            rows.append((key, make_cache_key(stored["question"].strip().lower()), json.dumps(stored), now))
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO questions (bank, qhash, question, created) "
+                             "VALUES (?, ?, ?, ?)", rows)
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._stats_lock:
+            self.questions_deposited += added
+            self.duplicates_rejected += len(candidates) - added
+        return added
+
+    def clear(self):
+        self._conn().execute("DELETE FROM questions")
+
+    def stats(self) -> dict:
+        banks, questions = self._conn().execute(
+            "SELECT COUNT(DISTINCT bank), COUNT(*) FROM questions").fetchone()
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "path": str(self.path),
+                "banks": banks,
+                "questions": questions,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "questions_served": self.questions_served,
+                "questions_deposited": self.questions_deposited,
+                "duplicates_rejected": self.duplicates_rejected,
+                "min_factor": self.min_factor,
+            }
+
+
+_question_bank: Optional[QuestionBank] = None
+_question_bank_lock = threading.Lock()
+
+
+def get_question_bank() -> Optional[QuestionBank]:
+    """
+    Process-wide question bank configured from the environment, or None when
+    disabled with COGNIFY_BANK_ENABLED=0.
+    """
+    global _question_bank
+    if os.getenv("COGNIFY_BANK_ENABLED", "1") == "0":
+        return None
+    if _question_bank is None:
+        with _question_bank_lock:
+            if _question_bank is None:
+                _question_bank = QuestionBank(
+                    path=os.getenv("COGNIFY_BANK_PATH") or None,
+                    min_factor=float(os.getenv("COGNIFY_BANK_MIN_FACTOR", DEFAULT_MIN_FACTOR)),
+                    max_per_bank=int(os.getenv("COGNIFY_BANK_MAX_PER_BANK", DEFAULT_MAX_PER_BANK)),
+                    dedup_threshold=float(os.getenv("COGNIFY_DEDUP_THRESHOLD", DEFAULT_THRESHOLD)),
+                )
+    return _question_bank
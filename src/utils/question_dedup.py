@@ -0,0 +1,125 @@
+"""
+Near-duplicate detection for generated quiz questions.
+
+Models often paraphrase the same question twice in one quiz. Each question
+is turned into a hashed vector of its words plus character 4-gram shingles
+(so "cell's powerhouse" still matches "powerhouse of the cell"), and all
+pairwise cosine similarities come from matrix products.
+
+A paraphrase asks for the same fact, so the question text is compared
+together with its answer ("Which organelle produces ATP?" / Mitochondria
+and "...produces proteins?" / Ribosome share a template, not a fact), and
+questions whose answers differ are never duplicates. Options only lower
+the score: quizzes reuse the same option sets (True/False, four organelles)
+across distinct questions, so shared options are no evidence of a repeat.
+"""
+
+import re
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    from utils.text_utils import tokenize
+except ImportError:
+    from src.utils.text_utils import tokenize
+
+DEFAULT_THRESHOLD = 0.75
+VECTOR_DIM = 1024
+# Most of the score a pair with entirely different options loses
+OPTION_PENALTY = 0.25
+# Answers less similar than this make two questions distinct
+ANSWER_MATCH = 0.5
+# Answers that name no fact of their own, left out of the question text
+_GENERIC_ANSWERS = {"true", "false", "yes", "no", "all of the above", "none of the above"}
+_ANSWER_LETTER_RE = re.compile(r"^\s*([A-Za-z])\s*[.):]\s*(.*)$", re.S)
+
+
+def is_valid_question(question) -> bool:
+    """A usable multiple-choice item: question text, at least two options and an answer."""
+    if not isinstance(question, dict):
+        return False
+    options = question.get("options")
+    return (bool(str(question.get("question") or "").strip())
+            and isinstance(options, list) and len(options) >= 2
+            and bool(str(question.get("answer") or "").strip()))
+
+
+@lru_cache(maxsize=65536)
+def _word_buckets(word: str):
+    """Vector buckets of a word and its character 4-gram shingles."""
+    padded = f" {word} "
+    features = [word] + [padded[i:i + 4] for i in range(len(padded) - 3)]
+    # crc32 rather than hash(): stable across processes and workers
+    return tuple(zlib.crc32(f.encode("utf-8")) % VECTOR_DIM for f in features)
+
+
+def _vectors(texts):
+    """L2-normalized hashed feature-count vectors, one row per text."""
+    flat = []
+    for row, text in enumerate(texts):
+        offset = row * VECTOR_DIM
+        for token in tokenize(text):
+            flat.extend(offset + bucket for bucket in _word_buckets(token.split("'")[0]))
+    matrix = np.bincount(np.asarray(flat, dtype=np.int64), minlength=len(texts) * VECTOR_DIM)
+    matrix = matrix.reshape(len(texts), VECTOR_DIM).astype(np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def answer_text(question) -> str:
+    """The answer without its option letter ("B. Mitochondria" and a bare "B" both give "Mitochondria")."""
+    answer = str(question.get("answer") or "").strip()
+    options = question.get("options") or []
+    match = _ANSWER_LETTER_RE.match(answer)
+    if match and match.group(2).strip():
+        return match.group(2).strip()
+    letter = match.group(1) if match else answer
+    index = ord(letter.upper()) - ord("A") if len(letter) == 1 and letter.isalpha() else -1
+    if 0 <= index < len(options):
+        return str(options[index])
+    return answer
+
+
+def similarity_matrix(questions):
+    """
+    Pairwise similarity of questions in [0, 1]: question text plus answer,
+    reduced by differing options, and 0 where the answers differ.
+    """
+    answers = [answer_text(q) for q in questions]
+    n = len(questions)
+    # One vectorization pass for all three texts of every question
+    vectors = _vectors([str(q.get("question", "")) + ("" if a.lower() in _GENERIC_ANSWERS else " " + a)
+                        for q, a in zip(questions, answers)]
+                       + [" ".join(map(str, q.get("options") or [])) for q in questions] + answers)
+    facts, options, answer_vectors = vectors[:n], vectors[n:2 * n], vectors[2 * n:]
+    sims = (facts @ facts.T) * (1 - OPTION_PENALTY * (1 - options @ options.T))
+    same_answer = answer_vectors @ answer_vectors.T >= ANSWER_MATCH
+    # Answers without a word to vectorize ("4", "B") are compared as strings
+    blank = ~answer_vectors.any(axis=1)
+    if blank.any():
+        lowered = np.array([a.lower() for a in answers], dtype=object)
+        same_answer = np.where(blank[:, None] | blank[None, :], lowered[:, None] == lowered[None, :], same_answer)
+    return np.where(same_answer, sims, 0.0)
+
+
+def dedupe_questions(questions, threshold=DEFAULT_THRESHOLD, existing=None):
+    """
+    Returns the valid questions that are not near-duplicates, keeping the
+    first of each group. Questions similar to any in `existing` (already
+    accepted) are dropped too; `existing` itself is not returned.
+    """
+    existing = list(existing or [])
+    candidates = [q for q in questions if is_valid_question(q)]
+    if not candidates:
+        return []
+    pool = existing + candidates
+    sims = similarity_matrix(pool)
+    kept = np.zeros(len(pool), dtype=bool)
+    kept[:len(existing)] = True
+    for i in range(len(existing), len(pool)):
+        if not kept.any() or sims[i, kept].max() < threshold:
+            kept[i] = True
+    return [q for q, keep in zip(candidates, kept[len(existing):]) if keep]
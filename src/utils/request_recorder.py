@@ -0,0 +1,87 @@
+"""
+Opt-in request recorder (ASGI middleware).
+
+When COGNIFY_RECORD_REQUESTS points at a file, every POST to /api/* is
+appended to it as one JSON line with its arrival timestamp, path, JSON body,
+status and latency. `src/tools/replay.py` replays these files with the
+original traffic shape.
+
+Requests are only queued on the event loop; a JsonlWriter thread parses
+the bodies and appends everything queued since its last write in one go.
+"""
+
+import json
+import time
+from datetime import datetime
+
+try:
+    from utils.jsonl_writer import DEFAULT_MAX_QUEUE, JsonlWriter
+except ImportError:
+    from src.utils.jsonl_writer import DEFAULT_MAX_QUEUE, JsonlWriter
+
+
+class RequestRecorderMiddleware:
+    """
+    Pure ASGI middleware, so the body is observed without being consumed.
+    Records are dropped (and counted in `writer.dropped`) when the writer
+    falls `max_queue` behind.
+    """
+
+    def __init__(self, app, path: str, prefix: str = "/api/", max_queue: int = DEFAULT_MAX_QUEUE):
+        self.app = app
+        self.path = path
+        self.prefix = prefix
+        self.writer = JsonlWriter(path, lambda item: self._line(*item), max_queue=max_queue,
+                                  name="request-recorder")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.app(scope, receive, self.writer.flushing_send(send))
+        if scope["type"] != "http" or scope["method"] != "POST" \
+                or not scope["path"].startswith(self.prefix):
+            return await self.app(scope, receive, send)
+
+        timestamp = datetime.now().isoformat()
+        start = time.perf_counter()
+        chunks = []
+        status_holder = {}
+
+        async def recording_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+            return message
+
+        async def recording_send(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, recording_receive, recording_send)
+        finally:
+            self.writer.put((scope, timestamp, b"".join(chunks), status_holder.get("status", 500),
+                             time.perf_counter() - start))
+
+    def _line(self, scope, timestamp, raw_body, status_code, latency_s) -> str:
+        headers = dict(scope.get("headers") or [])
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        record = {
+            "timestamp": timestamp,
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "latency_ms": round(latency_s * 1000, 2),
+            "body_bytes": len(raw_body),
+        }
+        if content_type.startswith("application/json"):
+            try:
+                record["body"] = json.loads(raw_body or b"null")
+            except ValueError:
+                pass
+        # File uploads are not replayable from the log; only their size is kept
+        return json.dumps(record) + "\n"
+
+    def flush(self):
+        """Blocks until every queued request has been written (tests, shutdown)."""
+        self.writer.flush()
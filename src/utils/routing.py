@@ -0,0 +1,258 @@
+"""
+Cost- and latency-aware provider routing.
+
+For every generation the policy estimates the input tokens (from the
+prompt) and the output tokens (from what this mode has produced so far),
+prices the request on each provider with the cost_tracking price table and
+predicts its latency from that provider's observed latency. Providers that
+are expected to meet the endpoint's latency SLO are tried cheapest first;
+the ones that are not follow, fastest first, and fallback-only providers
+(ExtractiveProvider, MockProvider) always come last, in their configured
+order. The caller still falls through the whole
+ordered list on errors.
+
+A provider without observations is assumed to meet the SLO, so a new
+backend gets tried and measured instead of starved. Latency is the median
+of the last few samples younger than `half_life_s`, and error rates halve
+every `half_life_s` without new evidence, so one cold-start sample or a
+past outage does not demote a provider for good. A demoted provider would
+otherwise get no traffic and never be re-measured, so every
+`explore_every`-th routed request tries the demoted provider with the
+oldest observation first. The health monitor also reports its probe
+outcomes through `observe_health()`.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import deque
+
+try:
+    from utils.cost_tracking import calculate_cost
+    from utils.text_utils import estimate_tokens
+except ImportError:
+    from src.utils.cost_tracking import calculate_cost
+    from src.utils.text_utils import estimate_tokens
+
+# Per-endpoint latency SLOs (ms), overridable with COGNIFY_SLO_<MODE>_MS
+DEFAULT_SLO_MS = {"quiz": 20000, "summary": 10000, "glossary": 10000}
+# Output tokens assumed until a mode has been observed (quiz: per question)
+DEFAULT_OUTPUT_TOKENS = {"quiz": 110, "summary": 350, "glossary": 450}
+# Weight of the newest observation in the moving averages
+EWMA_ALPHA = 0.2
+# Providers failing more often than this are routed like SLO misses
+MAX_ERROR_RATE = 0.5
+# Observations lose half their weight per half-life without new evidence
+HALF_LIFE_S = 300.0
+# One routed request in this many re-measures a demoted provider (0 disables)
+EXPLORE_EVERY = 50
+# Latency is the median of this many recent samples, so one outlier does not move it
+LATENCY_WINDOW = 5
+
+_QUESTIONS_RE = re.compile(r"Generate an? (\d+)-question")
+
+
+def provider_name(provider) -> str:
+    return type(provider).__name__
+
+
+def _stats_key(provider) -> str:
+    # Latency belongs to the model, so two providers serving different models are tracked apart
+    return getattr(provider, "model_id", None) or provider_name(provider)
+
+
+def _ewma(previous, value, alpha):
+    return value if previous is None else previous + alpha * (value - previous)
+
+
+def _round(value):
+    return round(value, 3) if isinstance(value, float) else value
+
+
+def _decay(age_s: float, half_life_s: float) -> float:
+    return 0.5 ** (age_s / half_life_s) if half_life_s > 0 else 1.0
+
+
+class RoutingPolicy:
+    """
+    Orders providers per request. `observe()` feeds it the outcome of every
+    provider attempt; `order()` returns the providers to try and the
+    decision record that is attached to the result (and the audit log).
+    """
+
+    def __init__(self, slo_ms=None, alpha: float = EWMA_ALPHA, enabled: bool = True,
+                 half_life_s: float = HALF_LIFE_S, explore_every: int = EXPLORE_EVERY, clock=time.monotonic):
+        self.slo_ms = {**DEFAULT_SLO_MS, **(slo_ms or {})}
+        self.alpha = alpha
+        self.enabled = enabled
+        self.half_life_s = half_life_s
+        self.explore_every = explore_every
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._routed = 0
+        # (model id, mode) -> {"latencies": deque of (time, ms), "output_tokens", "error_rate", "calls", "updated"}
+        self._providers = {}
+        # mode -> observed output tokens (per question for quizzes)
+        self._output_tokens = dict(DEFAULT_OUTPUT_TOKENS)
+
+    @classmethod
+    def from_env(cls):
+        """
+        COGNIFY_ROUTING=fixed keeps the configured provider order; COGNIFY_SLO_<MODE>_MS set the SLOs,
+        COGNIFY_ROUTING_HALF_LIFE_S the observation half-life and COGNIFY_ROUTING_EXPLORE_EVERY the
+        exploration interval.
+        """
+        slo_ms = {mode: float(os.getenv(f"COGNIFY_SLO_{mode.upper()}_MS", default))
+                  for mode, default in DEFAULT_SLO_MS.items()}
+        return cls(slo_ms=slo_ms, enabled=os.getenv("COGNIFY_ROUTING", "cost") != "fixed",
+                   half_life_s=float(os.getenv("COGNIFY_ROUTING_HALF_LIFE_S", HALF_LIFE_S)),
+                   explore_every=int(os.getenv("COGNIFY_ROUTING_EXPLORE_EVERY", EXPLORE_EVERY)))
+
+    # ---------- estimates ----------
+
+    def estimate_output_tokens(self, prompt: str, mode: str) -> int:
+        per_unit = self._output_tokens.get(mode, DEFAULT_OUTPUT_TOKENS["summary"])
+        if mode == "quiz":
+            match = _QUESTIONS_RE.search(prompt[:200])
+            return int(per_unit * (int(match.group(1)) if match else 5))
+        return int(per_unit)
+
+    def predict_latency_ms(self, provider, mode: str, output_tokens: int, now=None):
+        """
+        Median recent latency for the mode, scaled by output length (None before
+        any observation, or once every sample is older than a half-life).
+        """
+        stats = self._providers.get((_stats_key(provider), mode))
+        latency_ms = self._latency_ms(stats, self._clock() if now is None else now) if stats is not None else None
+        if latency_ms is None:
+            return None
+        observed_tokens = stats["output_tokens"] or output_tokens
+        return latency_ms * output_tokens / max(observed_tokens, 1)
+
+    def _latency_ms(self, stats, now):
+        oldest = now - self.half_life_s if self.half_life_s > 0 else float("-inf")
+        fresh = sorted(ms for at, ms in stats["latencies"] if at >= oldest)
+        return fresh[len(fresh) // 2] if fresh else None
+
+    def _error_rate(self, stats, now) -> float:
+        return stats["error_rate"] * _decay(now - stats["updated"], self.half_life_s)
+
+    # ---------- routing ----------
+
+    def order(self, providers, prompt: str, mode: str):
+        """(providers in the order to try, decision dict or None when there was nothing to choose)."""
+        providers = list(providers)
+        if not self.enabled or len(providers) < 2:
+            return providers, None
+
+        slo_ms = self.slo_ms.get(mode)
+        input_tokens = estimate_tokens(prompt)
+        output_tokens = self.estimate_output_tokens(prompt, mode)
+        candidates = []
+        with self._lock:
+            now = self._clock()
+            self._routed += 1
+            explore = self.explore_every > 0 and self._routed % self.explore_every == 0
+            for index, provider in enumerate(providers):
+                model = getattr(provider, "model_id", "unknown")
+                latency_ms = self.predict_latency_ms(provider, mode, output_tokens, now)
+                stats = self._providers.get((_stats_key(provider), mode))
+                healthy = stats is None or self._error_rate(stats, now) <= MAX_ERROR_RATE
+                meets_slo = healthy and (latency_ms is None or slo_ms is None or latency_ms <= slo_ms)
+                candidates.append({
+                    "provider": provider_name(provider),
+                    "model": model,
+                    "est_cost_usd": round(calculate_cost(model, input_tokens, output_tokens), 8),
+                    "est_latency_ms": round(latency_ms, 1) if latency_ms is not None else None,
+                    "meets_slo": meets_slo,
+                    "_index": index,
+                    "_last": bool(getattr(provider, "fallback_only", False)),
+                    "_observed": stats["updated"] if stats is not None else None,
+                })
+
+        def rank(c):
+            # SLO-meeting providers by cost, then everything else by predicted latency
+            if c["_last"]:
+                return (True, 0, 0.0, 0.0, c["_index"])
+            if c["meets_slo"]:
+                return (c["_last"], 0, c["est_cost_usd"], c["est_latency_ms"] or 0.0, c["_index"])
+            latency = c["est_latency_ms"] if c["est_latency_ms"] is not None else float("inf")
+            return (c["_last"], 1, latency, c["est_cost_usd"], c["_index"])
+
+        candidates.sort(key=rank)
+        explored = None
+        if explore:
+            # The demoted model measured longest ago goes first; errors still fall through
+            demoted = [c for c in candidates[1:] if not c["_last"] and c["_observed"] is not None]
+            if demoted:
+                explored = min(demoted, key=lambda c: c["_observed"])
+                candidates.remove(explored)
+                candidates.insert(0, explored)
+        ordered = [providers[c["_index"]] for c in candidates]
+        for c in candidates:
+            del c["_index"], c["_last"], c["_observed"]
+        decision = {"mode": mode, "slo_ms": slo_ms, "est_input_tokens": input_tokens,
+                    "est_output_tokens": output_tokens, "chosen": candidates[0]["provider"],
+                    "candidates": candidates}
+        if explored is not None:
+            decision["explore"] = True
+        return ordered, decision
+
+    def observe(self, provider, mode: str, latency_s: float, success: bool, output_tokens: int = 0,
+                prompt: str = ""):
+        """Records one provider attempt."""
+        key = (_stats_key(provider), mode)
+        with self._lock:
+            now = self._clock()
+            stats = self._stats(key, now)
+            stats["calls"] += 1
+            self._observe_error(stats, success, now)
+            if not success:
+                return
+            stats["latencies"].append((now, latency_s * 1000))
+            if output_tokens:
+                stats["output_tokens"] = _ewma(stats["output_tokens"], output_tokens, self.alpha)
+                if getattr(provider, "fallback_only", False):
+                    # Canned output says nothing about real output lengths
+                    return
+                per_unit = output_tokens
+                if mode == "quiz":
+                    match = _QUESTIONS_RE.search(prompt[:200])
+                    per_unit = output_tokens / max(int(match.group(1)) if match else 5, 1)
+                self._output_tokens[mode] = _ewma(self._output_tokens.get(mode), per_unit, self.alpha)
+
+    def _stats(self, key, now):
+        return self._providers.setdefault(key, {"latencies": deque(maxlen=LATENCY_WINDOW), "output_tokens": None,
+                                                "error_rate": 0.0, "calls": 0, "updated": now})
+
+    def _observe_error(self, stats, success: bool, now):
+        stats["error_rate"] = _ewma(self._error_rate(stats, now), 0.0 if success else 1.0, self.alpha)
+        stats["updated"] = now
+
+    def observe_health(self, provider, success: bool):
+        """
+        Records a health probe. It says nothing about generation latency, so only
+        the error rate of every mode is updated: a failing probe demotes the
+        provider before users hit the outage, and a passing one lets it back in.
+        """
+        name = _stats_key(provider)
+        with self._lock:
+            now = self._clock()
+            modes = {mode for (key, mode) in self._providers if key == name} | set(DEFAULT_SLO_MS)
+            for mode in modes:
+                self._observe_error(self._stats((name, mode), now), success, now)
+
+    def report(self) -> dict:
+        """Observed latency, output size and error rate per model and mode."""
+        with self._lock:
+            now = self._clock()
+            providers = {f"{name}/{mode}": {"latency_ms": _round(self._latency_ms(stats, now)),
+                                             "output_tokens": _round(stats["output_tokens"]),
+                                             "error_rate": _round(self._error_rate(stats, now)),
+                                             "calls": stats["calls"],
+                                             "age_s": round(now - stats["updated"], 1)}
+                         for (name, mode), stats in self._providers.items()}
+            output_tokens = {mode: round(v, 1) for mode, v in self._output_tokens.items()}
+        return {"enabled": self.enabled, "slo_ms": self.slo_ms,
+                "est_output_tokens": output_tokens, "providers": providers}
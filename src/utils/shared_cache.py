@@ -0,0 +1,263 @@
+"""
+Cross-worker shared cache (SQLite WAL).
+
+Each uvicorn worker is a separate process, so an in-memory dict cache is
+duplicated per worker and only sees a quarter of the traffic at 4 workers.
+This cache lives in a single SQLite file opened in WAL mode: every worker on
+the host reads and writes the same entries, and each get/set is a single
+atomic statement/transaction. A get is a plain SELECT, so readers never take
+the write lock and never block the writer or each other. Reads still refresh
+LRU order: each process notes the entries it served and writes their access
+times in one batch, inside its next set() or after `touch_seconds`, so
+another worker's eviction sees a read at most that late.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_CACHE_PATH = PROJECT_ROOT / "cache" / "shared_cache.db"
+
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+DEFAULT_TOUCH_SECONDS = 5.0
+
+
+def make_cache_key(*parts) -> str:
+    """Stable SHA-256 key built from the given parts."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8", "surrogatepass"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+class SharedCache:
+    """
+    Size-bounded key/value cache shared by every process on the host.
+
+    Eviction is least-recently-used, bounded both by entry count and by the
+    total size of the stored values. Values are strings (callers store JSON).
+    """
+
+    def __init__(self, path=None, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES, ttl_seconds: Optional[float] = None,
+                 touch_seconds: float = DEFAULT_TOUCH_SECONDS):
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.touch_seconds = touch_seconds
+        self._touches = {}
+        self._touches_lock = threading.Lock()
+        self._touched_at = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread and per process (connections must not cross a fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self):
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed)")
+        # Running totals so eviction checks never scan the table
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_totals ("
+            " id INTEGER PRIMARY KEY CHECK (id = 0),"
+            " entries INTEGER NOT NULL,"
+            " bytes INTEGER NOT NULL)"
+        )
+        conn.execute("INSERT OR IGNORE INTO cache_totals (id, entries, bytes) "
+                     "SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM cache")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value or None. The read is recorded for the next batch of touches."""
+        now = time.time()
+        row = self._conn().execute("SELECT value, created FROM cache WHERE key = ?",
+                                   (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        value, created = row
+        if self.ttl_seconds is not None and now - created > self.ttl_seconds:
+            self.delete(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self._touches_lock:
+            self._touches[key] = now
+        if time.monotonic() - self._touched_at >= self.touch_seconds:
+            self.flush_touches()
+        return value
+
+    def _take_touches(self) -> list:
+        with self._touches_lock:
+            touches, self._touches = self._touches, {}
+            self._touched_at = time.monotonic()
+        return [(accessed, key) for key, accessed in touches.items()]
+
+    def _write_touches(self, conn: sqlite3.Connection, touches: list):
+        # MAX keeps a later set() from being moved back by an earlier read
+        conn.executemany("UPDATE cache SET accessed = MAX(accessed, ?) WHERE key = ?", touches)
+
+    def flush_touches(self):
+        """Write the access times of the entries read since the last batch, in one transaction."""
+        touches = self._take_touches()
+        if not touches:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._write_touches(conn, touches)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def missing(self, keys) -> set:
+        """The keys with no entry, without touching LRU order or hit counts."""
+        keys = list(keys)
+        present = set()
+        conn = self._conn()
+        # Batched to stay under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = conn.execute(f"SELECT key FROM cache WHERE key IN ({', '.join('?' * len(batch))})",
+                                batch).fetchall()
+            present.update(row[0] for row in rows)
+        return set(keys) - present
+
+    def set(self, key: str, value: str):
+        """Insert or replace a value, evicting least-recently-used entries if over budget."""
+        size = len(value.encode("utf-8", "surrogatepass"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._conn()
+        touches = self._take_touches()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Pending touches ride along in the write lock this set takes anyway
+            self._write_touches(conn, touches)
+            old = conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            if old is None:
+                conn.execute("UPDATE cache_totals SET entries = entries + 1, bytes = bytes + ? "
+                             "WHERE id = 0", (size,))
+            else:
+                conn.execute("UPDATE cache_totals SET bytes = bytes + ? WHERE id = 0",
+                             (size - old[0],))
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection):
+        entries, total_bytes = conn.execute(
+            "SELECT entries, bytes FROM cache_totals WHERE id = 0").fetchone()
+        if entries <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        # Walk the LRU index oldest-first until both bounds hold again
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed"):
+            if entries <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            victims.append((key,))
+            entries -= 1
+            total_bytes -= size
+        conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+        conn.execute("UPDATE cache_totals SET entries = ?, bytes = ? WHERE id = 0",
+                     (entries, total_bytes))
+
+    def delete(self, key: str):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("DELETE FROM cache WHERE key = ? RETURNING size", (key,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE cache_totals SET entries = entries - 1, bytes = bytes - ? "
+                             "WHERE id = 0", (row[0],))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM cache")
+        conn.execute("UPDATE cache_totals SET entries = 0, bytes = 0 WHERE id = 0")
+        conn.execute("COMMIT")
+
+    def stats(self) -> dict:
+        entries, total_bytes = self._conn().execute(
+            "SELECT entries, bytes FROM cache_totals WHERE id = 0").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "backend": "sqlite-wal",
+            "path": str(self.path),
+            "entries": entries,
+            "bytes": total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_shared_cache: Optional[SharedCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """
+    Process-wide cache instance configured from the environment, or None when
+    disabled with COGNIFY_CACHE_ENABLED=0.
+    """
+    global _shared_cache
+    if os.getenv("COGNIFY_CACHE_ENABLED", "1") == "0":
+        return None
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                ttl = os.getenv("COGNIFY_CACHE_TTL_SECONDS")
+                _shared_cache = SharedCache(
+                    path=os.getenv("COGNIFY_CACHE_PATH") or None,
+                    max_entries=int(os.getenv("COGNIFY_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                    max_bytes=int(os.getenv("COGNIFY_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+                    ttl_seconds=float(ttl) if ttl else None,
+                    touch_seconds=float(os.getenv("COGNIFY_CACHE_TOUCH_SECONDS", DEFAULT_TOUCH_SECONDS)),
+                )
+    return _shared_cache
@@ -0,0 +1,180 @@
+"""
+Speculative pre-generation.
+
+Almost every upload is followed within seconds by summary and glossary
+requests for the same document. `SpeculativeGenerator` runs those
+generations ahead of time on a small dedicated pool, so the follow-up
+requests are served from the response cache. Queued work is dropped while
+foreground traffic is high (`LoadGauge`), and every speculative result is
+tracked so the hit rate and the spend on results nobody asked for are
+visible.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+try:
+    from utils.cost_tracking import calculate_cost
+except ImportError:
+    from src.utils.cost_tracking import calculate_cost
+
+DEFAULT_WORKERS = 1
+DEFAULT_MAX_QUEUE = 16
+# Queued speculation is dropped while this many foreground requests are running
+DEFAULT_MAX_IN_FLIGHT = 4
+# A speculative result not requested within this window counts as wasted spend
+DEFAULT_TTL_S = 15 * 60
+_MAX_TRACKED = 4096
+
+
+class LoadGauge:
+    """Number of foreground API requests currently being served."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def enter(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class LoadGaugeMiddleware:
+    """Counts in-flight requests under `prefix` on a LoadGauge (ASGI middleware)."""
+
+    def __init__(self, app, gauge: LoadGauge, prefix: str = "/api/"):
+        self.app = app
+        self.gauge = gauge
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            return await self.app(scope, receive, send)
+        self.gauge.enter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.gauge.exit()
+
+
+class SpeculativeGenerator:
+    """
+    Low-priority background runner for speculative generations.
+
+    `schedule(label, task)` queues `task()`, which returns the generated
+    result (with `cache_key`, `usage` and `model` set) or None when nothing
+    was generated (already cached, or not cacheable). `record_hit(key)` is
+    called on every cache hit; hits on speculative keys feed the metrics.
+    """
+
+    def __init__(self, gauge: LoadGauge = None, workers: int = DEFAULT_WORKERS,
+                 max_queue: int = DEFAULT_MAX_QUEUE, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 ttl_s: float = DEFAULT_TTL_S):
+        self.gauge = gauge or LoadGauge()
+        self.max_queue = max_queue
+        self.max_in_flight = max_in_flight
+        self.ttl_s = ttl_s
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="speculate")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._futures = set()
+        # cache key -> {"cost_usd", "created", "hit"} for each speculative result
+        self._entries = OrderedDict()
+        self.stats = {"scheduled": 0, "dropped_queue_full": 0, "cancelled_under_load": 0,
+                      "skipped": 0, "completed": 0, "failed": 0, "hits": 0, "expired_unused": 0,
+                      "spend_usd": 0.0, "hit_spend_usd": 0.0, "wasted_spend_usd": 0.0}
+
+    def schedule(self, label: str, task) -> bool:
+        """Queues a speculative task; returns False when the queue is full."""
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self.stats["dropped_queue_full"] += 1
+                return False
+            self._queued += 1
+            self.stats["scheduled"] += 1
+        future = self._pool.submit(self._run, label, task)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._forget)
+        return True
+
+    def _forget(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def _run(self, label, task):
+        with self._lock:
+            self._queued -= 1
+        if self.gauge.in_flight >= self.max_in_flight:
+            with self._lock:
+                self.stats["cancelled_under_load"] += 1
+            print(f"[SPECULATE] Dropped {label}: {self.gauge.in_flight} requests in flight")
+            return
+        try:
+            result = task()
+        except Exception as e:
+            with self._lock:
+                self.stats["failed"] += 1
+            print(f"[SPECULATE] {label} failed: {e}")
+            return
+        key = getattr(result, "cache_key", None)
+        if key is None:
+            with self._lock:
+                self.stats["skipped"] += 1
+            return
+        usage = result.usage
+        cost = calculate_cost(result.model, usage.prompt_tokens, usage.completion_tokens) if usage else 0.0
+        with self._lock:
+            self.stats["completed"] += 1
+            self.stats["spend_usd"] += cost
+            self._entries[key] = {"cost_usd": cost, "created": time.monotonic(), "hit": False}
+            self._expire()
+        print(f"[SPECULATE] Pre-generated {label} (${cost:.6f})")
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry["created"] < self.ttl_s and len(self._entries) <= _MAX_TRACKED:
+                break
+            del self._entries[key]
+            if not entry["hit"]:
+                self.stats["expired_unused"] += 1
+                self.stats["wasted_spend_usd"] += entry["cost_usd"]
+
+    def record_hit(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["hit"]:
+                return
+            entry["hit"] = True
+            self.stats["hits"] += 1
+            self.stats["hit_spend_usd"] += entry["cost_usd"]
+
+    def report(self) -> dict:
+        """Counters plus the hit rate and the spend still waiting for a request."""
+        with self._lock:
+            self._expire()
+            report = dict(self.stats)
+            pending = [e for e in self._entries.values() if not e["hit"]]
+        report["hit_rate"] = round(report["hits"] / report["completed"], 4) if report["completed"] else 0.0
+        report["pending_results"] = len(pending)
+        report["pending_spend_usd"] = sum(e["cost_usd"] for e in pending)
+        for name in ("spend_usd", "hit_spend_usd", "wasted_spend_usd", "pending_spend_usd"):
+            report[name] = round(report[name], 6)
+        return report
+
+    def wait(self):
+        """Blocks until everything queued so far has run (tests, shutdown)."""
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
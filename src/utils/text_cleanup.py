@@ -0,0 +1,185 @@
+"""
+Prompt-token reduction for extracted PDF text.
+
+`page.get_text()` output repeats running headers and footers on every page,
+carries page numbers, splits words at line-end hyphens and keeps layout
+whitespace. All of it is paid for as input tokens on every generate call.
+PageCleaner strips lines that recur at the top or bottom of many pages,
+drops bare page numbers, rejoins hyphenated words and collapses whitespace,
+in time linear in the text size. A hyphen at a line end is kept when the
+word is a real compound: the same word appears hyphenated inside a line
+elsewhere in the document, it already has a hyphen ("state-of-the-art"),
+or its first part is a compound prefix ("well-", "self-").
+"""
+
+import re
+
+try:
+    from utils.text_utils import estimate_tokens
+except ImportError:
+    from src.utils.text_utils import estimate_tokens
+
+# Lines within this many non-empty lines of a page's top or bottom are header/footer
+# candidates; short pages get fewer (a quarter of their lines) so body text is never one
+EDGE_LINES = 3
+# A candidate is boilerplate if it recurs on at least this share of pages (and MIN_PAGES pages)
+MIN_FRACTION = 0.5
+MIN_PAGES = 3
+# First parts that form hyphenated compounds rather than syllable breaks ("well-known")
+COMPOUND_PREFIXES = frozenset({"all", "cross", "ex", "half", "non", "self", "well"})
+
+_DIGITS_RE = re.compile(r"\d+")
+_PAGE_NUMBER_RE = re.compile(
+    r"^(?:page\s*)?(?:\d+|(?=[ivxl])l?x{0,3}(?:ix|iv|v?i{0,3}))(?:\s*(?:of|/)\s*\d+)?$",
+    re.IGNORECASE)
+# Found from the "-\n" (a fast literal scan); the word before it is read backwards in _join_hyphens
+_HYPHEN_BREAK_RE = re.compile(r"-\n([a-z]+)")
+_HYPHENATED_RE = re.compile(r"\b[^\W\d_]+-[^\W\d_]+\b")
+_SPACES_RE = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def _signature(line: str) -> str:
+    """Header/footer identity: page-specific numbers ("Page 12 of 300") are masked."""
+    return _DIGITS_RE.sub("#", line.strip().lower())
+
+
+def _edge_indexes(lines):
+    nonempty = [i for i, line in enumerate(lines) if line.strip()]
+    edge = min(EDGE_LINES, max(1, len(nonempty) // 4))
+    return set(nonempty[:edge]) | set(nonempty[-edge:])
+
+
+class PageCleaner:
+    """
+    Two ways to use it, both linear:
+
+    * `clean_pages(texts)` learns the boilerplate from all pages first
+      (upload path).
+    * `clean_page(text)` learns as pages arrive (streaming path): a line is
+      stripped while it has recurred on MIN_PAGES pages and on `min_fraction`
+      of the pages so far, so only the first pages keep their header.
+    """
+
+    def __init__(self, min_fraction=MIN_FRACTION, min_pages=MIN_PAGES):
+        self.min_fraction = min_fraction
+        self.min_pages = min_pages
+        self._counts = {}
+        self._pages_seen = 0
+        self.boilerplate = set()
+        # Words seen hyphenated inside a line ("well-known"): their line-end breaks keep the hyphen
+        self.compounds = set()
+        self.stats = {"pages": 0, "chars_before": 0, "chars_after": 0, "tokens_before": 0,
+                      "tokens_after": 0, "boilerplate_lines_removed": 0, "page_numbers_removed": 0,
+                      "hyphens_joined": 0}
+
+    def _observe(self, lines):
+        self._pages_seen += 1
+        for signature in {_signature(lines[i]) for i in _edge_indexes(lines)}:
+            self._counts[signature] = self._counts.get(signature, 0) + 1
+        for line in lines:
+            if "-" in line:
+                self.compounds.update(word.lower() for word in _HYPHENATED_RE.findall(line))
+
+    def _is_boilerplate(self, signature: str) -> bool:
+        count = self._counts.get(signature, 0)
+        return count >= self.min_pages and count >= self.min_fraction * self._pages_seen
+
+    def fit(self, texts):
+        """Learns header/footer lines from every page before cleaning."""
+        for text in texts:
+            self._observe(text.split("\n"))
+        self.boilerplate = {s for s in self._counts if self._is_boilerplate(s)}
+        return self
+
+    def _join_hyphens(self, text: str):
+        """Rejoins words broken at a line-end hyphen; returns (text, number joined)."""
+        parts, joined, end = [], 0, 0
+        for match in _HYPHEN_BREAK_RE.finditer(text):
+            start = match.start()
+            if start == 0 or not (text[start - 1].isalnum() or text[start - 1] == "_"):
+                continue
+            head = start
+            while head > 0 and (text[head - 1].isalnum() or text[head - 1] in "-_"):
+                head -= 1
+            prefix = text[head:start].lower()
+            if "-" in prefix or prefix in COMPOUND_PREFIXES or f"{prefix}-{match.group(1)}" in self.compounds:
+                parts.append(text[end:start] + "-")
+            else:
+                parts.append(text[end:start])
+                joined += 1
+            end = match.start(1)
+        parts.append(text[end:])
+        return "".join(parts), joined
+
+    def _clean(self, lines, boilerplate):
+        before = "\n".join(lines)
+        kept = []
+        edges = _edge_indexes(lines)
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            if i in edges and stripped:
+                if _signature(line) in boilerplate:
+                    self.stats["boilerplate_lines_removed"] += 1
+                    continue
+                if _PAGE_NUMBER_RE.match(stripped):
+                    self.stats["page_numbers_removed"] += 1
+                    continue
+            kept.append(_SPACES_RE.sub(" ", stripped))
+        text, joined = self._join_hyphens("\n".join(kept))
+        text = _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+        self.stats["pages"] += 1
+        self.stats["hyphens_joined"] += joined
+        self.stats["chars_before"] += len(before)
+        self.stats["chars_after"] += len(text)
+        self.stats["tokens_before"] += estimate_tokens(before)
+        self.stats["tokens_after"] += estimate_tokens(text)
+        return text
+
+    def clean_pages(self, texts):
+        texts = list(texts)
+        self.fit(texts)
+        return [self._clean(text.split("\n"), self.boilerplate) for text in texts]
+
+    def clean_page(self, text: str) -> str:
+        lines = text.split("\n")
+        self._observe(lines)
+        candidates = {_signature(lines[i]) for i in _edge_indexes(lines)}
+        # Same test as fit(): a line repeated a few times in a long stream is body text, not a header
+        self.boilerplate = {s for s in self.boilerplate | candidates if self._is_boilerplate(s)}
+        return self._clean(lines, self.boilerplate)
+
+    def clean_block(self, text: str) -> str:
+        """Cleans a layout block (for chunking) against the boilerplate learned so far."""
+        lines = [line for line in text.split("\n")
+                 if _signature(line) not in self.boilerplate and not _PAGE_NUMBER_RE.match(line.strip())]
+        text, _ = self._join_hyphens("\n".join(_SPACES_RE.sub(" ", line.strip()) for line in lines))
+        return text.strip()
+
+    def clean_blocks(self, blocks):
+        """Layout blocks (see pdf_extraction) with their text cleaned; emptied blocks are dropped."""
+        cleaned = []
+        for block in blocks:
+            text = self.clean_block(block["text"])
+            if text:
+                cleaned.append({**block, "text": text, "chars": len(text)})
+        return cleaned
+
+    def report(self) -> dict:
+        """Per-document savings, as stored in the document metadata."""
+        report = dict(self.stats)
+        report["tokens_saved"] = report["tokens_before"] - report["tokens_after"]
+        return report
+
+
+def clean_pdf_pages(pages) -> dict:
+    """Cleans extracted pages in place (text and layout blocks); returns the savings report."""
+    cleaner = PageCleaner()
+    for page, text in zip(pages, cleaner.clean_pages([page["text"] for page in pages])):
+        page["text"] = text
+        page["blocks"] = cleaner.clean_blocks(page["blocks"])
+    report = cleaner.report()
+    print(f"[CLEANUP] {report['pages']} page(s): {report['tokens_before']} -> "
+          f"{report['tokens_after']} tokens ({report['tokens_saved']} saved)")
+    return report
@@ -0,0 +1,47 @@
+"""
+Small text helpers shared by the indexing and text-processing modules.
+Pure Python, no model downloads.
+"""
+
+import re
+from pathlib import Path
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before
+being below between both but by can could did do does doing down during each either few for
+from further had has have having he her here hers herself him himself his how however i if
+in into is it its itself just let may me might more most must my myself no nor not now of
+off on once only or other ought our ours ourselves out over own same shall she should so
+some such than that the their theirs them themselves then there these they this those
+through thus to too under until up upon us very was we were what when where which while who
+whom whose why will with within without would yet you your yours yourself yourselves
+""".split())
+
+
+def tokenize(text: str, keep_stopwords: bool = False):
+    """Lower-cased word tokens; stopwords and 1-char tokens dropped by default."""
+    tokens = _WORD_RE.findall(text.lower())
+    if keep_stopwords:
+        return tokens
+    return [t for t in tokens if len(t) > 1 and t not in STOPWORDS]
+
+
+def split_sentences(text: str):
+    """Rule-based sentence splitter, good enough for lecture and textbook prose."""
+    text = re.sub(r"\s+", " ", text).strip()
+    if not text:
+        return []
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about 4 characters per token for English)."""
+    return (len(text) + 3) // 4
+
+
+def topic_from_filename(filename: str) -> str:
+    """The topic assumed for an uploaded file when none is given ("cell_biology.pdf" -> "cell biology")."""
+    return re.sub(r"[_\-\s]+", " ", Path(filename).stem).strip() or "Study Material"
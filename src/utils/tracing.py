@@ -0,0 +1,237 @@
+"""
+Lightweight per-request tracing.
+
+A sampled request gets a Trace, and code on the request path wraps its
+phases in `span(name)`. Spans nest through context variables, so they
+follow the request into the threadpool. `TracingMiddleware` summarizes each
+trace in a `Server-Timing` response header and queues it for a JsonlWriter
+thread, which appends it to a size-capped JSONL trace file. For an
+unsampled request, `span` costs one context-variable lookup.
+
+Span names used by the app:
+    validate   request body parsing and Pydantic validation
+    endpoint   the route function
+    serialize  response model validation and JSON encoding
+    retrieval  chunk retrieval for a stored document
+    cache      shared-cache lookup
+    provider   first provider attempt (attrs: provider, status)
+    fallback   every later provider attempt
+    parse      JSON parsing/repair of the model output
+"""
+
+import contextvars
+import hmac
+import itertools
+import json
+import random
+import time
+import uuid
+from functools import wraps
+from typing import Optional
+
+from fastapi.routing import APIRoute
+
+try:
+    from utils.jsonl_writer import DEFAULT_MAX_QUEUE, JsonlWriter
+except ImportError:
+    from src.utils.jsonl_writer import DEFAULT_MAX_QUEUE, JsonlWriter
+
+DEFAULT_SAMPLE_RATE = 0.05
+# The trace file is rotated to <path>.1 once it reaches this size
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+# Forces a trace for one request, only when its value matches the middleware's force_secret
+FORCE_HEADER = b"x-cognify-trace"
+
+_current_trace = contextvars.ContextVar("cognify_trace", default=None)
+_current_span = contextvars.ContextVar("cognify_span", default=None)
+
+
+class Trace:
+    """Spans recorded for one request. Spans may be added from several threads."""
+
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.start = time.perf_counter()
+        self.spans = []
+        self._ids = itertools.count(1)
+        # Endpoint start/end, used by TracedRoute to derive validate/serialize
+        self.endpoint = None
+
+    def add(self, name, start, end, parent=None, **attrs):
+        self.spans.append({"id": next(self._ids), "name": name, "parent": parent,
+                           "start_ms": round((start - self.start) * 1000, 3),
+                           "dur_ms": round((end - start) * 1000, 3), **attrs})
+
+    def server_timing(self) -> str:
+        """`Server-Timing` value: total time per span name, plus the total so far."""
+        totals = {}
+        for record in self.spans:
+            totals[record["name"]] = totals.get(record["name"], 0.0) + record["dur_ms"]
+        metrics = [f"{name};dur={dur:.1f}" for name, dur in totals.items()]
+        metrics.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+class _Span:
+    """Context manager behind `span` (a class: cheaper than a generator on the unsampled path)."""
+    __slots__ = ("name", "attrs", "trace", "span_id", "token", "start")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.trace = None
+
+    def __enter__(self):
+        trace = self.trace = _current_trace.get()
+        if trace is None:
+            return None
+        self.span_id = next(trace._ids)
+        self.token = _current_span.set(self.span_id)
+        self.start = time.perf_counter()
+        return self.attrs
+
+    def __exit__(self, exc_type, exc, tb):
+        trace = self.trace
+        if trace is None:
+            return False
+        end = time.perf_counter()
+        _current_span.reset(self.token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        trace.spans.append({"id": self.span_id, "name": self.name, "parent": _current_span.get(),
+                            "start_ms": round((self.start - trace.start) * 1000, 3),
+                            "dur_ms": round((end - self.start) * 1000, 3), **self.attrs})
+        return False
+
+
+def span(name: str, **attrs):
+    """
+    Records the enclosed block as a span of the current trace. Entering it
+    yields a dict the block can add attributes to (None when the request is
+    not traced).
+    """
+    return _Span(name, attrs)
+
+
+def traced(name: str):
+    """Decorator form of `span` for a whole function."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracedRoute(APIRoute):
+    """
+    APIRoute that splits a traced request into validate / endpoint /
+    serialize: the endpoint is timed directly, and the rest of the route
+    handler before and after it is request parsing and response building.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        @wraps(endpoint)
+        async def traced_endpoint(*args, **kw):
+            trace = _current_trace.get()
+            if trace is None:
+                return await endpoint(*args, **kw)
+            start = time.perf_counter()
+            try:
+                with span("endpoint"):
+                    return await endpoint(*args, **kw)
+            finally:
+                trace.endpoint = (start, time.perf_counter())
+
+        super().__init__(path, traced_endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            trace = _current_trace.get()
+            if trace is None:
+                return await handler(request)
+            start = time.perf_counter()
+            response = await handler(request)
+            end = time.perf_counter()
+            if trace.endpoint is not None:
+                endpoint_start, endpoint_end = trace.endpoint
+                trace.add("validate", start, endpoint_start)
+                trace.add("serialize", endpoint_end, end)
+            return response
+
+        return traced_handler
+
+
+class TracingMiddleware:
+    """
+    Traces a sample of requests under `prefix` (ASGI middleware). Sampled
+    responses carry `Server-Timing` and `X-Trace-Id`; the full span tree is
+    appended to `path` (when set) as one JSON line per request, by a writer
+    thread that drops (and counts) records when `max_queue` behind and
+    rotates the file at `max_bytes`.
+
+    A request carrying FORCE_HEADER set to `force_secret` is always traced;
+    without a secret the header is ignored, so clients cannot bypass the
+    sampling and inflate the trace volume.
+    """
+
+    def __init__(self, app, path=None, sample_rate: float = DEFAULT_SAMPLE_RATE, prefix: str = "/api/",
+                 force_secret: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_queue: int = DEFAULT_MAX_QUEUE):
+        self.app = app
+        self.path = path
+        self.sample_rate = sample_rate
+        self.prefix = prefix
+        self.force_secret = force_secret.encode("latin-1") if force_secret else None
+        self.writer = JsonlWriter(path, _trace_line, max_queue=max_queue, max_bytes=max_bytes,
+                                  name="trace-writer") if path else None
+
+    def _sampled(self, scope) -> bool:
+        if self.force_secret is not None:
+            forced = dict(scope.get("headers") or []).get(FORCE_HEADER)
+            if forced is not None and hmac.compare_digest(forced, self.force_secret):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan" and self.writer is not None:
+            return await self.app(scope, receive, self.writer.flushing_send(send))
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix) or not self._sampled(scope):
+            return await self.app(scope, receive, send)
+
+        trace = Trace()
+        token = _current_trace.set(trace)
+        status_holder = {}
+
+        async def tracing_send(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+                headers = list(message.get("headers") or [])
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                headers.append((b"x-trace-id", trace.trace_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, tracing_send)
+        finally:
+            _current_trace.reset(token)
+            if self.writer is not None:
+                self.writer.put((trace, time.time(), scope["method"], scope["path"], status_holder.get("status", 500),
+                                 round((time.perf_counter() - trace.start) * 1000, 3)))
+
+
+def _trace_line(item) -> str:
+    """JSONL record of a finished trace (on the writer thread)."""
+    trace, timestamp, method, path, status_code, duration_ms = item
+    record = {"trace_id": trace.trace_id, "timestamp": timestamp, "method": method, "path": path,
+              "status": status_code, "duration_ms": duration_ms,
+              "spans": sorted(trace.spans, key=lambda s: s["start_ms"])}
+    return json.dumps(record) + "\n"
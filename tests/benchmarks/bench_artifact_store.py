@@ -0,0 +1,64 @@
+"""
+Artifact store reads at depth (a 100k-artifact store: 100 users with 1000
+artifacts each) and the cost `save` adds to a request.
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import benchmark
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+USERS = 100
+PER_USER = 1000
+SUMMARY = {"topic": "Biology", "summary": "- Mitochondria produce ATP.\n" * 20}
+_store = None
+
+
+def _filled_store():
+    """Built once and shared by the read benchmarks."""
+    global _store
+    if _store is None:
+        from utils.artifact_store import ArtifactStore, topic_key
+
+        scratch = tempfile.mkdtemp(prefix="bench-artifacts-")
+        _store = ArtifactStore(path=Path(scratch) / "artifacts.db", background=False)
+        data = '{"topic": "Biology", "summary": "..."}'
+        now = time.time()
+        for i in range(PER_USER):
+            _store._write([(f"user-{u}", ("quiz", "summary", "glossary")[i % 3], f"Topic {i % 7}",
+                            topic_key(f"Topic {i % 7}"), f"doc_{u}_{i % 5}", "gpt-4o-mini", None, data, now)
+                           for u in range(USERS)])
+    return _store
+
+
+@benchmark("artifact_store.page_at_depth_of_100k")
+def bench_deep_page():
+    store = _filled_store()
+    # The oldest page of one user's history: the same index seek as the newest
+    oldest = store._conn().execute("SELECT id FROM artifacts WHERE user_id = 'user-42' "
+                                   "ORDER BY id LIMIT 1 OFFSET 20").fetchone()[0]
+    return lambda: store.list_for_user("user-42", limit=20, before=oldest)
+
+
+@benchmark("artifact_store.get_by_id_of_100k")
+def bench_get():
+    store = _filled_store()
+    artifact_id = USERS * PER_USER // 2
+    user_id = store._conn().execute("SELECT user_id FROM artifacts WHERE id = ?", (artifact_id,)).fetchone()[0]
+    return lambda: store.get(artifact_id, user_id)
+
+
+@benchmark("artifact_store.save_queued")
+def bench_save():
+    from utils.artifact_store import ArtifactStore
+
+    scratch = tempfile.mkdtemp(prefix="bench-artifacts-")
+    store = ArtifactStore(path=Path(scratch) / "artifacts.db", max_queue=10_000_000)
+    return lambda: store.save("user-1", "summary", "Biology", "doc_bench", SUMMARY, "gpt-4o-mini")
@@ -0,0 +1,49 @@
+"""
+Topic retrieval on a long document: indexed search vs. re-tokenizing.
+
+The index is built once at upload; a request then only walks the postings
+of its topic terms. The tokenize benchmark is the per-request cost the index
+avoids (scanning the whole text to find the matching sections).
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+from harness import benchmark
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+TOPICS = ["photosynthesis chlorophyll", "mitochondria respiration", "meiosis alleles",
+          "enzymes catalysis", "osmosis membranes", "evolution selection"]
+
+
+def _long_document(n_chars=1_000_000):
+    paragraphs = []
+    i = 0
+    while sum(len(p) for p in paragraphs) < n_chars:
+        topic = TOPICS[i % len(TOPICS)]
+        paragraphs.append(f"Section {i} covers {topic}. " + f"Students study {topic} in unit {i}. " * 12)
+        i += 1
+    return "\n\n".join(paragraphs)
+
+
+@benchmark("document_index.search_1mb")
+def bench_search():
+    from utils.document_index import index_document, load_document_index
+    from utils.document_store import DocumentStore
+    store = DocumentStore(tempfile.mkdtemp(prefix="cognify-bench-"))
+    document_id = store.put(_long_document())
+    index_document(store, document_id)
+    index = load_document_index(store, document_id)
+    return lambda: index.search("meiosis alleles", k=6)
+
+
+@benchmark("document_index.tokenize_1mb")
+def bench_tokenize():
+    from utils.text_utils import tokenize
+    text = _long_document()
+    return lambda: tokenize(text)
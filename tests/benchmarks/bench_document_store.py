@@ -0,0 +1,91 @@
+"""
+Request size and parse cost: inline context_text vs. document_id.
+
+Before the document store, every generate call re-sent the whole extracted
+PDF text and Pydantic re-validated it. Run directly for the bytes/parse table:
+
+    python tests/benchmarks/bench_document_store.py
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from harness import benchmark, time_callable
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+PARAGRAPH = ("Photosynthesis converts light energy into chemical energy stored in glucose. "
+             "Chlorophyll absorbs light in the thylakoid membranes of the chloroplast. ")
+
+
+def _text_of_size(n_bytes):
+    return (PARAGRAPH * (n_bytes // len(PARAGRAPH) + 1))[:n_bytes]
+
+
+def _bodies(n_bytes, document_id):
+    inline = json.dumps({"context_text": _text_of_size(n_bytes), "topic": "Photosynthesis",
+                         "num_questions": 5}).encode()
+    by_id = json.dumps({"document_id": document_id, "topic": "Photosynthesis",
+                        "num_questions": 5}).encode()
+    return inline, by_id
+
+
+@benchmark("request.parse_inline_context_1mb")
+def bench_parse_inline():
+    import main
+    inline, _ = _bodies(1_000_000, "doc_" + "0" * 32)
+    return lambda: main.QuizGenerationRequest.model_validate_json(inline)
+
+
+@benchmark("request.parse_document_id")
+def bench_parse_document_id():
+    import main
+    _, by_id = _bodies(1_000_000, "doc_" + "0" * 32)
+    return lambda: main.QuizGenerationRequest.model_validate_json(by_id)
+
+
+@benchmark("document_store.get_text_1mb")
+def bench_store_get():
+    from utils.document_store import DocumentStore
+    store = DocumentStore(tempfile.mkdtemp(prefix="cognify-bench-"))
+    document_id = store.put(_text_of_size(1_000_000))
+    return lambda: store.get_text(document_id)
+
+
+def main():
+    import contextlib
+    import os
+    os.chdir(PROJECT_ROOT)
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        import main as app_main
+    from utils.document_store import DocumentStore
+
+    store = DocumentStore(tempfile.mkdtemp(prefix="cognify-bench-"))
+    print(f"{'text size':>10}{'inline bytes':>14}{'by-id bytes':>13}{'saved/call':>12}"
+          f"{'inline parse':>14}{'by-id parse+load':>18}")
+    for size in (10_000, 100_000, 1_000_000, 5_000_000):
+        text = _text_of_size(size)
+        document_id = store.put(text)
+        inline, by_id = _bodies(size, document_id)
+
+        parse_inline, _ = time_callable(lambda: app_main.QuizGenerationRequest.model_validate_json(inline))
+
+        def parse_and_load():
+            request = app_main.QuizGenerationRequest.model_validate_json(by_id)
+            store.get_text(request.document_id)
+        parse_by_id, _ = time_callable(parse_and_load)
+
+        print(f"{size:>10}{len(inline):>14}{len(by_id):>13}{len(inline) - len(by_id):>12}"
+              f"{parse_inline / 1000:>12.2f}ms{parse_by_id / 1000:>16.2f}ms")
+    # The frontend makes 3 generate calls per upload, and upload no longer echoes the text
+    print("\nPer upload the client previously sent the text 3 more times and received it once; "
+          "with document_id it sends ~100 bytes per call and receives none.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+The extractive degraded-mode engine on a long lecture (600 sentences, about
+70k characters): what a student waits for when no model is available.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+from harness import benchmark
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+TERMS = [f"{a} {b}" for a in ("cell", "plasma", "golgi", "nuclear", "light", "protein", "membrane", "enzyme")
+         for b in ("transport", "membrane", "body", "envelope", "reaction", "synthesis", "channel", "complex")]
+TEMPLATES = [
+    "The {0} is the structure that regulates the {1} in most eukaryotic organisms.",
+    "Without a working {0}, the {1} slows down and the cell eventually dies.",
+    "Researchers measured how the {0} responds when the {1} is blocked by a drug.",
+    "A {0} refers to the part of the pathway that links the {1} to energy use.",
+    "In plants, the {0} and the {1} work together during periods of rapid growth.",
+]
+
+
+def _lecture(sentences=600, seed=5):
+    rng = random.Random(seed)
+    lines = [rng.choice(TEMPLATES).format(*rng.sample(TERMS, 2)) + f" (observation {i})" for i in range(sentences)]
+    return "\n\n".join(" ".join(lines[i:i + 6]) for i in range(0, len(lines), 6))
+
+
+@benchmark("extractive.summary_600_sentences")
+def bench_summary():
+    from utils.extractive import summarize
+
+    text = _lecture()
+    return lambda: summarize(text)
+
+
+@benchmark("extractive.glossary_600_sentences")
+def bench_glossary():
+    from utils.extractive import glossary
+
+    text = _lecture()
+    return lambda: glossary(text)
+
+
+@benchmark("extractive.cloze_quiz_10_of_600_sentences")
+def bench_cloze():
+    from utils.extractive import cloze_questions
+
+    text = _lecture()
+    return lambda: cloze_questions(text, 10)
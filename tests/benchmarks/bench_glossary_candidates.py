@@ -0,0 +1,110 @@
+"""
+Glossary prompts from locally extracted candidate terms against the
+full-context prompt, on a 60k-character lecture: input tokens, estimated
+cost, local extraction time and modeled model time.
+
+    python tests/benchmarks/bench_glossary_candidates.py
+"""
+
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+from harness import benchmark, time_callable
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+TERMS = ["mitochondrion", "ribosome", "Golgi apparatus", "lysosome", "cell membrane", "cytoskeleton",
+         "nuclear envelope", "chloroplast", "vacuole", "centrosome", "endoplasmic reticulum", "peroxisome",
+         "ATP synthase", "Krebs cycle", "glycolysis", "osmosis", "active transport", "ion channel",
+         "signal transduction", "apoptosis"]
+DEFINITIONS = [
+    "A {0} is the structure that {1} relies on during cell division.",
+    "The {0} refers to the pathway that links {1} to energy use.",
+]
+PROSE = [
+    "In the second half of the lecture we looked at how the {0} behaves when {1} is disrupted.",
+    "Several students asked whether the {0} and the {1} evolved at the same time.",
+    "The textbook figure shows the {0} next to the {1}, which is easy to misread.",
+    "Experiments from the last decade suggest the {0} adapts quickly when {1} changes.",
+    "We will come back to the {0} next week when we discuss {1} in more depth.",
+]
+# Modeled provider prefill rate for the latency column (input tokens per second)
+PREFILL_TOKENS_PER_S = 5000
+GLOSSARY_OUTPUT_TOKENS = 450
+
+
+def _lecture(chars=60_000, seed=11):
+    rng = random.Random(seed)
+    sentences = [DEFINITIONS[i % 2].format(term, rng.choice(TERMS)) for i, term in enumerate(TERMS)]
+    while sum(len(s) + 1 for s in sentences) < chars:
+        sentences.append(rng.choice(PROSE).format(*rng.sample(TERMS, 2)) + f" (note {len(sentences)})")
+    rng.shuffle(sentences)
+    return "\n\n".join(" ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5))
+
+
+def _stored_lecture():
+    from utils.document_index import index_document
+    from utils.document_store import DocumentStore
+
+    store = DocumentStore(Path(tempfile.mkdtemp(prefix="bench-terms-")))
+    document_id = store.put(_lecture())
+    index_document(store, document_id)
+    return store, document_id
+
+
+def _caller():
+    from ai.production_caller import ProductionFunctionCaller
+    return ProductionFunctionCaller()
+
+
+@benchmark("glossary_candidates.extract_60k_chars")
+def bench_extract():
+    from utils.extractive import candidate_terms
+
+    text = _lecture()
+    return lambda: candidate_terms(text)
+
+
+@benchmark("glossary_candidates.prompt_from_stored_terms")
+def bench_prompt():
+    from utils.document_index import document_terms
+
+    store, document_id = _stored_lecture()
+    caller = _caller()
+    return lambda: caller._candidate_glossary_prompt(document_terms(store, document_id), "Cell biology")
+
+
+def main():
+    from utils.cost_tracking import calculate_cost
+    from utils.document_index import document_terms
+    from utils.extractive import candidate_terms
+    from utils.text_utils import estimate_tokens
+
+    text = _lecture()
+    store, document_id = _stored_lecture()
+    caller = _caller()
+    full = caller._glossary_prompt(text, "Cell biology")
+    candidates = caller._candidate_glossary_prompt(document_terms(store, document_id), "Cell biology")
+    extract_us, _ = time_callable(lambda: candidate_terms(text), repeats=3)
+    full_us, _ = time_callable(lambda: caller._glossary_prompt(text, "Cell biology"), repeats=3)
+    request_us, _ = time_callable(bench_prompt(), repeats=3)
+
+    print(f"{len(text)} chars, {len(document_terms(store, document_id))} stored candidates; "
+          f"model time modeled at {PREFILL_TOKENS_PER_S} input tokens/s\n")
+    print(f"{'prompt':<22}{'input tokens':>14}{'cost USD (gpt-4o-mini)':>24}{'local ms':>10}{'model ms':>10}")
+    for name, prompt, local_us in (("full context", full, full_us), ("candidate terms", candidates, request_us)):
+        tokens = estimate_tokens(prompt)
+        cost = calculate_cost("gpt-4o-mini", tokens, GLOSSARY_OUTPUT_TOKENS)
+        print(f"{name:<22}{tokens:>14}{cost:>24.6f}{local_us / 1000:>10.2f}"
+              f"{tokens / PREFILL_TOKENS_PER_S * 1000:>10.0f}")
+    print(f"\nextracting candidates at ingestion: {extract_us / 1000:.1f} ms; "
+          f"input tokens cut by {1 - estimate_tokens(candidates) / estimate_tokens(full):.0%}")
+
+
+if __name__ == "__main__":
+    main()
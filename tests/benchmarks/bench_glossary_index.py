@@ -0,0 +1,32 @@
+"""
+Merging per-section glossaries through the term index (the step that joins
+the concurrent section requests of a chunked glossary).
+"""
+
+import sys
+from pathlib import Path
+
+from harness import benchmark
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+
+@benchmark("glossary_index.merge_16_sections")
+def bench_merge():
+    from utils.glossary_index import TermIndex
+
+    # 16 sections of 10 terms each, with spelling variants of shared terms
+    forms = ["Cell membrane", "cell membranes", "The Cell Membrane", "Cell  membrane (plasma membrane)"]
+    sections = [[{"term": forms[(s + t) % 4] if t < 3 else f"Term {s * 10 + t} structures",
+                  "definition": "A definition of the term. " * (1 + (s * t) % 5)} for t in range(10)]
+                for s in range(16)]
+
+    def merge():
+        index = TermIndex()
+        for number, terms in enumerate(sections):
+            index.extend(terms, number)
+        return index.ranked(20)
+    return merge
@@ -0,0 +1,27 @@
+"""
+Readiness probe cost: the /health/ready endpoint served from the state the
+background probe rounds precompute.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+from harness import benchmark
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+
+@benchmark("health.readiness_endpoint")
+def bench_readiness():
+    from providers.extractive_provider import ExtractiveProvider
+    from providers.mock_provider import MockProvider
+    import main
+
+    main.health_monitor.interval_s = 0
+    main.health_monitor.start([ExtractiveProvider(), MockProvider()])
+    loop = asyncio.new_event_loop()
+    return lambda: loop.run_until_complete(main.readiness())
@@ -0,0 +1,96 @@
+"""
+LocalOpenAIProvider throughput against the stub model server.
+
+32 prompts issued at once from a threadpool (the way concurrent API
+requests reach the provider), with the stub answering after 20 ms plus
+2 ms per extra prompt in a batch. Run directly for a prompts/second table
+that also covers sequential calls and a fresh connection per request:
+
+    python tests/benchmarks/bench_local_provider.py
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+
+from harness import benchmark
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+PROMPTS = [f"Generate a 5-question multiple choice quiz about topic {i}" for i in range(32)]
+STUB_SETTINGS = {"latency_ms": 20, "batch_latency_ms": 2}
+
+_stub = None
+_callers = ThreadPoolExecutor(max_workers=len(PROMPTS))
+
+
+def _stub_url():
+    global _stub
+    if _stub is None:
+        from tools.llm_stub_server import start_stub_server
+        _stub = start_stub_server(**STUB_SETTINGS)
+    return _stub.base_url
+
+
+def _fan_out(generate):
+    return list(_callers.map(generate, PROMPTS))
+
+
+@benchmark("local_provider.pooled_32_prompts")
+def bench_pooled():
+    from providers.local_openai_provider import LocalOpenAIProvider
+    provider = LocalOpenAIProvider(_stub_url(), max_connections=16)
+    return lambda: _fan_out(provider.generate)
+
+
+@benchmark("local_provider.batched_32_prompts")
+def bench_batched():
+    from providers.local_openai_provider import LocalOpenAIProvider
+    provider = LocalOpenAIProvider(_stub_url(), max_connections=16, batch_window_ms=5, max_batch=8,
+                                  batch_endpoint="completions")
+    return lambda: _fan_out(provider.generate)
+
+
+def _unpooled_generate(url):
+    def generate(prompt):
+        # What a naive provider does: a new client (and TCP connection) per call
+        with httpx.Client(base_url=url, timeout=30) as client:
+            client.post("/chat/completions", json={"model": "x", "messages": [{"role": "user", "content": prompt}]})
+    return generate
+
+
+def main():
+    from providers.local_openai_provider import LocalOpenAIProvider
+    url = _stub_url()
+    modes = {
+        "sequential (1 connection)": None,
+        "concurrent, new connection per call": _unpooled_generate(url),
+        "concurrent, pooled": LocalOpenAIProvider(url, max_connections=16).generate,
+        "concurrent, pooled + batching": LocalOpenAIProvider(url, max_connections=16, batch_window_ms=5,
+                                                              batch_endpoint="completions",
+                                                              max_batch=8).generate,
+    }
+    print(f"{len(PROMPTS)} prompts, stub latency {STUB_SETTINGS['latency_ms']} ms "
+          f"(+{STUB_SETTINGS['batch_latency_ms']} ms per batched prompt)\n")
+    print(f"{'mode':<38}{'wall ms':>9}{'prompts/s':>11}{'HTTP requests':>15}")
+    sequential = LocalOpenAIProvider(url, max_connections=1)
+    for name, generate in modes.items():
+        before = _stub.requests
+        start = time.perf_counter()
+        if generate is None:
+            for prompt in PROMPTS:
+                sequential.generate(prompt)
+        else:
+            _fan_out(generate)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<38}{elapsed * 1000:>9.1f}{len(PROMPTS) / elapsed:>11.0f}{_stub.requests - before:>15}")
+
+
+if __name__ == "__main__":
+    main()
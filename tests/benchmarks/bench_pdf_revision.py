@@ -0,0 +1,72 @@
+"""
+Re-uploading a revised slide deck: extraction with the per-page cache, when
+one page of 60 changed, against extracting every page again.
+
+    python tests/benchmarks/bench_pdf_revision.py
+"""
+
+import sys
+from pathlib import Path
+
+from harness import benchmark, time_callable
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+PAGES = 60
+
+
+class _DictCache(dict):
+    def set(self, key, value):
+        self[key] = value
+
+
+def _deck(week, pages=PAGES):
+    import fitz
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Slide {i + 1}", fontsize=20)
+        note = f"Updated for week {week}. " if i == 10 else ""
+        page.insert_textbox(fitz.Rect(72, 100, 520, 760), note + f"Lecture notes for slide {i + 1}. " * 60,
+                            fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _warm_cache():
+    from utils.pdf_extraction import extract_pdf_pages
+    cache = _DictCache()
+    extract_pdf_pages(_deck(1), page_cache=cache)
+    return cache
+
+
+@benchmark("pdf_revision.extract_60_pages_1_changed")
+def bench_revision():
+    from utils.pdf_extraction import extract_pdf_pages
+    cache, revised = _warm_cache(), _deck(2)
+
+    def extract():
+        # Drop the changed page's entry so every run re-extracts it
+        pages = extract_pdf_pages(revised, page_cache=cache)
+        cache.pop("pdfpage:" + pages[10]["hash"], None)
+    return extract
+
+
+def main():
+    from utils.pdf_extraction import extract_pdf_pages
+    revised = _deck(2)
+    full_us, _ = time_callable(lambda: extract_pdf_pages(revised), repeats=5)
+    cache = _warm_cache()
+    reused = sum(page["reused"] for page in extract_pdf_pages(revised, page_cache=cache))
+    cached_us, _ = time_callable(bench_revision(), repeats=5)
+    print(f"{'extraction':<34}{'ms':>8}")
+    print(f"{'every page':<34}{full_us / 1000:>8.1f}")
+    print(f"{'page cache (%d of %d reused)' % (reused, PAGES):<34}{cached_us / 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Assembling a quiz from the question bank (the path that replaces a provider
+call once a bank is large enough).
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+from harness import benchmark
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+
+@benchmark("question_bank.sample_10_of_100")
+def bench_sample():
+    from utils.question_bank import QuestionBank, bank_key
+
+    scratch = tempfile.mkdtemp(prefix="bench-bank-")
+    bank = QuestionBank(path=Path(scratch) / "bank.db", seed=1)
+    key = bank_key("doc_bench", "Biology")
+    # Near-duplicates among these are dropped, leaving about 100 questions
+    bank.deposit(key, [{"question": f"Question {i} about topic q{i * 7919 % 100003}x?",
+                        "options": [f"alpha{i}", f"beta{i}", f"gamma{i}", f"delta{i}"],
+                        "answer": f"A. alpha{i}", "explanation": ""} for i in range(100)])
+    return lambda: bank.sample(key, 10)
@@ -0,0 +1,30 @@
+"""
+Near-duplicate check on a generated quiz (runs on every quiz response).
+"""
+
+import sys
+from pathlib import Path
+
+from harness import benchmark
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+SUBJECTS = ["chlorophyll", "the Calvin cycle", "stomata", "glycolysis", "the Krebs cycle",
+            "ATP synthase", "meiosis", "dominant alleles", "osmosis", "enzymes",
+            "natural selection", "ribosomes", "the nucleus", "mitosis", "diffusion"]
+
+
+def _quiz(n=15):
+    return [{"question": f"Which statement best describes the role of {subject}?",
+             "options": [f"{subject} option {c}" for c in "ABCD"],
+             "answer": "A", "explanation": ""} for subject in SUBJECTS[:n]]
+
+
+@benchmark("question_dedup.quiz_15q")
+def bench_dedupe():
+    from utils.question_dedup import dedupe_questions
+    questions = _quiz()
+    return lambda: dedupe_questions(questions)
@@ -0,0 +1,132 @@
+"""
+Benchmark: per-process LRU caches vs. the cross-worker SharedCache.
+
+Simulates N uvicorn workers (separate processes) behind a round-robin load
+balancer serving a Zipf-distributed stream of repeated study requests, and
+reports hit rate plus get/set latency for both cache layouts.
+
+Usage:
+    python tests/benchmarks/bench_shared_cache.py --workers 4 --requests 4000
+"""
+
+import argparse
+import multiprocessing as mp
+import random
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.shared_cache import SharedCache, make_cache_key  # noqa: E402
+
+PAYLOAD = '{"topic": "Study Material", "questions": [' + ", ".join(['{"id": 1}'] * 50) + "]}"
+
+
+def build_stream(n_requests, n_keys, seed):
+    """Zipf-like popularity: a few documents are requested by many students."""
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(n_keys)]
+    keys = [make_cache_key("quiz", f"doc-{i}") for i in range(n_keys)]
+    return rng.choices(keys, weights=weights, k=n_requests)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _worker(mode, stream, capacity, db_path, out):
+    if mode == "shared":
+        cache = SharedCache(path=db_path, max_entries=capacity)
+    else:
+        cache = OrderedDict()
+
+    hits = 0
+    get_lat, set_lat = [], []
+    for key in stream:
+        start = time.perf_counter()
+        if mode == "shared":
+            value = cache.get(key)
+        else:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+        get_lat.append(time.perf_counter() - start)
+
+        if value is not None:
+            hits += 1
+            continue
+
+        start = time.perf_counter()
+        if mode == "shared":
+            cache.set(key, PAYLOAD)
+        else:
+            cache[key] = PAYLOAD
+            if len(cache) > capacity:
+                cache.popitem(last=False)
+        set_lat.append(time.perf_counter() - start)
+
+    out.put({"hits": hits, "requests": len(stream), "get": get_lat, "set": set_lat})
+
+
+def run(mode, stream, workers, capacity):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench_cache.db"
+        if mode == "shared":
+            SharedCache(path=db_path, max_entries=capacity)  # create schema up front
+        out = mp.Queue()
+        # Round-robin load balancing across workers
+        procs = [
+            mp.Process(target=_worker, args=(mode, stream[i::workers], capacity, db_path, out))
+            for i in range(workers)
+        ]
+        for p in procs:
+            p.start()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+    hits = sum(r["hits"] for r in results)
+    total = sum(r["requests"] for r in results)
+    gets = [x for r in results for x in r["get"]]
+    sets = [x for r in results for x in r["set"]]
+    return {
+        "mode": mode,
+        "hit_rate": hits / total,
+        "llm_calls": total - hits,
+        "get_p50_us": percentile(gets, 50) * 1e6,
+        "get_p99_us": percentile(gets, 99) * 1e6,
+        "set_p50_us": percentile(sets, 50) * 1e6,
+        "set_p99_us": percentile(sets, 99) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--keys", type=int, default=500)
+    parser.add_argument("--capacity", type=int, default=200, help="Entries per cache")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    stream = build_stream(args.requests, args.keys, args.seed)
+    print(f"Workers: {args.workers} | Requests: {args.requests} | "
+          f"Distinct keys: {args.keys} | Capacity: {args.capacity}")
+    print(f"{'mode':<12}{'hit rate':>10}{'LLM calls':>11}{'get p50':>10}{'get p99':>10}"
+          f"{'set p50':>10}{'set p99':>10}  (us)")
+    for mode in ("per-process", "shared"):
+        r = run(mode, stream, args.workers, args.capacity)
+        print(f"{r['mode']:<12}{r['hit_rate']:>10.1%}{r['llm_calls']:>11}"
+              f"{r['get_p50_us']:>10.1f}{r['get_p99_us']:>10.1f}"
+              f"{r['set_p50_us']:>10.1f}{r['set_p99_us']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+PDF text cleanup on book-sized inputs.
+
+Run directly to check that cleanup time grows linearly with the page count
+(the per-page time should stay flat from 250 to 2000 pages):
+
+    python tests/benchmarks/bench_text_cleanup.py
+"""
+
+import random
+import sys
+from pathlib import Path
+
+from harness import benchmark, time_callable
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+WORDS = ("cell membrane protein enzyme energy glucose transport signal receptor gradient "
+         "molecule structure function pathway regulation synthesis diffusion").split()
+
+
+def _book_pages(n_pages, lines_per_page=40, seed=7):
+    """Pages shaped like get_text() output: running header, wrapped body, hyphen breaks, footer."""
+    rng = random.Random(seed)
+    pages = []
+    for number in range(1, n_pages + 1):
+        lines = ["Introduction to Cell Biology", f"Chapter {number // 25 + 1}   Membranes", ""]
+        for _ in range(lines_per_page):
+            line = "  ".join(rng.choice(WORDS) for _ in range(11))
+            lines.append(line + " trans-" if rng.random() < 0.1 else line)
+        lines += ["", f"Page {number} of {n_pages}", "(c) 2026 Cognify Press"]
+        pages.append("\n".join(lines))
+    return pages
+
+
+@benchmark("text_cleanup.clean_1000_pages")
+def bench_clean_1000_pages():
+    from utils.text_cleanup import PageCleaner
+    pages = _book_pages(1000)
+    return lambda: PageCleaner().clean_pages(pages)
+
+
+def main():
+    from utils.text_cleanup import PageCleaner
+    print(f"{'pages':>7}{'MB':>7}{'total ms':>10}{'us/page':>9}{'tokens saved':>14}")
+    for n_pages in (250, 500, 1000, 2000):
+        pages = _book_pages(n_pages)
+        total_us, _ = time_callable(lambda: PageCleaner().clean_pages(pages), repeats=3)
+        cleaner = PageCleaner()
+        cleaner.clean_pages(pages)
+        report = cleaner.report()
+        size_mb = report["chars_before"] / 1e6
+        print(f"{n_pages:>7}{size_mb:>7.1f}{total_us / 1000:>10.1f}{total_us / n_pages:>9.1f}"
+              f"{report['tokens_saved']:>8} ({report['tokens_saved'] / report['tokens_before']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Response serialization CPU and bytes on the wire.
+
+The upload response carries the whole extracted text. The benchmarks
+compare the stdlib encoder (FastAPI's old default), Pydantic's direct JSON
+dump (used for response_model routes) and orjson (FastJSONResponse), plus
+the cost of gzip at the middleware's default level. Run directly for the bytes
+table:
+
+    python tests/benchmarks/bench_wire_format.py
+"""
+
+import json
+import sys
+import zlib
+from pathlib import Path
+
+from harness import benchmark, time_callable
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+VOCABULARY = ("photosynthesis converts light energy into chemical stored glucose chlorophyll absorbs "
+              "thylakoid membranes chloroplast calvin cycle fixes carbon dioxide stomata regulate gas "
+              "exchange water oxygen reactions split enzyme rubisco plants leaves cells the of and in a "
+              "to is by which during process produces 1789 revolution assembly estates general").split()
+
+
+def _book_text(n_chars):
+    """Seeded pseudo-prose: compresses like real text, unlike a repeated paragraph."""
+    import random
+    rng = random.Random(42)
+    words, size = [], 0
+    while size < n_chars:
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(8, 20))).capitalize() + ". "
+        words.append(sentence)
+        size += len(sentence)
+    return "".join(words)[:n_chars]
+
+
+def _upload_response(n_chars=1_000_000):
+    import main
+    text = _book_text(n_chars)
+    return main.PDFUploadResponse(success=True, document_id="doc_" + "0" * 32,
+                                  extracted_text=text, page_count=400, message="ok")
+
+
+def _app_module():
+    import contextlib
+    import os
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        import main  # noqa: F401
+
+
+@benchmark("serialize.upload_1mb_stdlib")
+def bench_stdlib():
+    _app_module()
+    response = _upload_response()
+    return lambda: json.dumps(response.model_dump()).encode()
+
+
+@benchmark("serialize.upload_1mb_pydantic")
+def bench_pydantic():
+    _app_module()
+    response = _upload_response()
+    return lambda: response.model_dump_json().encode()
+
+
+@benchmark("serialize.upload_1mb_fast_json")
+def bench_fast_json():
+    _app_module()
+    from utils.fast_json import dumps
+    response = _upload_response()
+    return lambda: dumps(response.model_dump())
+
+
+@benchmark("compress.gzip_1mb")
+def bench_gzip():
+    _app_module()
+    from utils.compression import DEFAULT_GZIP_LEVEL
+    body = _upload_response().model_dump_json().encode()
+
+    def compress():
+        compressor = zlib.compressobj(DEFAULT_GZIP_LEVEL, zlib.DEFLATED, 31)
+        return compressor.compress(body) + compressor.flush()
+    return compress
+
+
+def main():
+    import os
+    os.chdir(PROJECT_ROOT)
+    _app_module()
+    from utils.compression import DEFAULT_GZIP_LEVEL, supported_encodings
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    print(f"{'text size':>10}{'json bytes':>12}{'gzip bytes':>12}{'gzip ms':>9}"
+          + (f"{'br bytes':>10}{'br ms':>8}" if brotli else ""))
+    for size in (10_000, 100_000, 1_000_000, 5_000_000):
+        body = _upload_response(size).model_dump_json().encode()
+
+        def gzip_body():
+            compressor = zlib.compressobj(DEFAULT_GZIP_LEVEL, zlib.DEFLATED, 31)
+            return compressor.compress(body) + compressor.flush()
+        gzip_us, _ = time_callable(gzip_body, repeats=3)
+        row = f"{size:>10}{len(body):>12}{len(gzip_body()):>12}{gzip_us / 1000:>9.2f}"
+        if brotli:
+            br_us, _ = time_callable(lambda: brotli.compress(body, quality=4), repeats=3)
+            row += f"{len(brotli.compress(body, quality=4)):>10}{br_us / 1000:>8.2f}"
+        print(row)
+    print(f"\nServer encodings available: {', '.join(supported_encodings())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Minimal micro-benchmark harness.
+
+Benchmarks register a setup function with @benchmark; the setup returns the
+zero-argument callable to time. The runner times it in calibrated batches and
+keeps the best per-call time across repeats (least sensitive to noise).
+"""
+
+import time
+
+BENCHMARKS = {}
+
+
+def benchmark(name, threshold=None):
+    """Registers a benchmark setup; `threshold` overrides the runner's default."""
+    def decorator(setup):
+        BENCHMARKS[name] = {"setup": setup, "threshold": threshold}
+        return setup
+    return decorator
+
+
+def time_callable(fn, repeats=5, min_batch_s=0.05):
+    """Returns the best per-call time in microseconds and the loops per batch used."""
+    fn()  # warm-up
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_batch_s or loops >= 1_000_000:
+            break
+        loops *= 2 if elapsed == 0 else max(2, int(min_batch_s / elapsed) + 1)
+
+    best = elapsed / loops
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best * 1e6, loops
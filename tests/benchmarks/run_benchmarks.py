@@ -0,0 +1,105 @@
+"""
+Runs the micro-benchmarks and compares them with the stored baselines.
+
+Exits with status 1 when any benchmark is slower than its baseline by more
+than the threshold (default 25%). Baselines are machine-specific: refresh
+them with --update-baseline on the machine that runs the comparison.
+
+Usage:
+    python tests/benchmarks/run_benchmarks.py
+    python tests/benchmarks/run_benchmarks.py --only pdf --threshold 0.5
+    python tests/benchmarks/run_benchmarks.py --update-baseline
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import platform
+import sys
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCH_DIR.parent.parent
+BASELINE_PATH = BENCH_DIR / "baselines.json"
+DEFAULT_THRESHOLD = 0.25
+
+sys.path.insert(0, str(BENCH_DIR))
+from harness import BENCHMARKS, time_callable  # noqa: E402
+
+
+def discover():
+    """Imports every bench_*.py module so its benchmarks register themselves."""
+    for path in sorted(BENCH_DIR.glob("bench_*.py")):
+        importlib.import_module(path.stem)
+
+
+def load_baselines():
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text())
+    return {"benchmarks": {}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cognify micro-benchmarks with regression thresholds")
+    parser.add_argument("--only", help="Run only benchmarks whose name contains this string")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown vs baseline as a fraction (default 0.25)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store the current results as the new baseline")
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)  # the app logs relative to the project root
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        discover()
+
+    baselines = load_baselines()
+    stored = baselines.setdefault("benchmarks", {})
+    regressions = []
+
+    print(f"{'benchmark':<38}{'us/call':>12}{'baseline':>12}{'change':>9}  status")
+    for name, entry in sorted(BENCHMARKS.items()):
+        if args.only and args.only not in name:
+            continue
+        # The code under test logs to stdout; keep that out of the timings and the report
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            fn = entry["setup"]()
+            us, loops = time_callable(fn, repeats=args.repeats)
+
+        base = stored.get(name, {}).get("us_per_call")
+        threshold = entry["threshold"] if entry["threshold"] is not None else args.threshold
+        if base is None:
+            change, verdict = "", "new"
+        else:
+            ratio = us / base - 1
+            change = f"{ratio:+.0%}"
+            verdict = "ok"
+            if ratio > threshold:
+                verdict = f"REGRESSION (> {threshold:.0%})"
+                regressions.append(name)
+        base_text = f"{base:.1f}" if base is not None else "-"
+        print(f"{name:<38}{us:>12.1f}{base_text:>12}{change:>9}  {verdict}")
+
+        if args.update_baseline:
+            stored[name] = {"us_per_call": round(us, 3), "loops": loops}
+
+    if args.update_baseline:
+        baselines["machine"] = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+        }
+        BASELINE_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"\nBaseline written to {BASELINE_PATH.relative_to(PROJECT_ROOT)}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())